@@ -0,0 +1,73 @@
+# vi:set shiftwidth=4 expandtab:
+# Atom specifier parsing speed.
+#
+# run "ChimeraX --nogui --exit --silent --script 'atomspec_benchmark.py [pdb-id] [repeat]'"
+#
+# Parses representative atom specifiers with the parse tree cache cleared
+# before every parse and with the cache in use, and times select commands
+# using the same specifiers on a structure (default 1www).
+#
+import sys
+from time import time
+from chimerax.core.commands import run, AtomSpecArg
+from chimerax.core.commands import atomspec
+from chimerax.core.logger import PlainTextLog
+
+
+class NoOutputLog(PlainTextLog):
+
+    def log(self, level, msg):
+        pass
+
+    def status(self, msg, color, secondary):
+        pass
+
+
+session = session  # noqa -- shut up flake8
+
+PDB_ID = sys.argv[1] if len(sys.argv) > 1 else "1www"
+REPEAT = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+SPECS = [
+    '#1',
+    ':ALA',
+    ':ALA@CA',
+    '/A:10-20@CA,CB',
+    '#1/A,B:1-50,100-150@N,CA,C,O',
+    ':ALA@CA & @@bfactor>50',
+    'protein & ~ligand',
+    'ligand :<5 & ~solvent',
+    '#1.1-4:12@N* | :HOH',
+    '::name="ALA" & @@bfactor<20',
+    '"#1:5"',
+    '=:5',
+]
+
+
+def time_parse(spec, cached):
+    t0 = time()
+    for i in range(REPEAT):
+        if not cached:
+            atomspec.clear_parse_cache()
+        AtomSpecArg.parse(spec, session)
+    return (time() - t0) / REPEAT
+
+
+def time_select(spec):
+    command = 'select %s' % spec
+    t0 = time()
+    for i in range(REPEAT):
+        run(session, command, log=False)
+    return (time() - t0) / REPEAT
+
+
+session.logger.add_log(NoOutputLog())
+run(session, 'open %s' % PDB_ID, log=False)
+print("Atom specifier parsing, %d repeats, select commands on %s (%d atoms)"
+      % (REPEAT, PDB_ID, session.models[0].num_atoms))
+for spec in SPECS:
+    t_uncached = time_parse(spec, cached=False)
+    t_cached = time_parse(spec, cached=True)
+    t_select = time_select(spec)
+    print("%-32s parse %8.1f us, cached %6.1f us, speedup %6.0f, select %8.1f us"
+          % (spec, 1e6 * t_uncached, 1e6 * t_cached, t_uncached / t_cached, 1e6 * t_select))
+run(session, 'close', log=False)
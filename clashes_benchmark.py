@@ -0,0 +1,149 @@
+# vi:set shiftwidth=4 expandtab:
+# Clash and contact detection speed.
+#
+# run "ChimeraX --nogui --exit --silent --script 'clashes_benchmark.py [pdb-id]'"
+#
+# Finds clashes and contacts for all atoms of a structure (default 1www)
+# with chimerax.clashes.clashes.find_clashes and with the previous
+# implementation that tested one atom at a time, checks that both give
+# the same atom pairs and clash values, and reports the times.
+#
+import sys
+from time import time
+from chimerax.core.commands import run
+from chimerax.core.logger import PlainTextLog
+
+
+class NoOutputLog(PlainTextLog):
+
+    def log(self, level, msg):
+        pass
+
+    def status(self, msg, color, secondary):
+        pass
+
+
+session = session  # noqa -- shut up flake8
+
+PDB_ID = sys.argv[1] if len(sys.argv) > 1 else "1www"
+CASES = [
+    ('clashes', dict(clash_threshold=0.6, hbond_allowance=0.4)),
+    ('contacts', dict(clash_threshold=-0.4, hbond_allowance=0.0)),
+    ('contacts intraMol false', dict(clash_threshold=-0.4, hbond_allowance=0.0, intra_mol=False)),
+    ('distance 4', dict(distance_only=4.0)),
+    ('resSeparation 5', dict(clash_threshold=-0.4, hbond_allowance=0.0, res_separation=5)),
+]
+
+
+def per_atom_clashes(test_atoms, search_atoms, use_scene_coords, assumed_max_vdw=2.1,
+        bond_separation=4, clash_threshold=0.6, distance_only=None, hbond_allowance=0.4,
+        intra_mol=True, res_separation=None):
+    """Previous find_clashes search loop, for intra-model pairs of one structure."""
+    from chimerax.clashes.clashes import _donor, _acceptor
+    if res_separation is not None:
+        chain_pos = {}
+        for s in test_atoms.unique_structures:
+            for c in s.chains:
+                for i, r in enumerate(c.residues):
+                    if r:
+                        chain_pos[r] = i
+    from chimerax.atom_search import AtomSearchTree
+    tree = AtomSearchTree(search_atoms, scene_coords=True)
+    clashes = {}
+    from chimerax.geometry import distance
+    intra_mol_map = {}
+    for a in test_atoms:
+        if distance_only:
+            cutoff = distance_only
+        else:
+            cutoff = a.radius + assumed_max_vdw - clash_threshold
+        crd = a.scene_coord if use_scene_coords else a.coord
+        nearby = tree.search(crd, cutoff)
+        if not nearby:
+            continue
+        need_expansion = [a]
+        exclusions = set(need_expansion)
+        for i in range(bond_separation):
+            next_need = []
+            for expand in need_expansion:
+                for n in expand.neighbors:
+                    if n in exclusions:
+                        continue
+                    exclusions.add(n)
+                    next_need.append(n)
+            need_expansion = next_need
+        if not intra_mol and a not in intra_mol_map:
+            connected = set([a])
+            to_do = list(a.neighbors)
+            while to_do:
+                conn = to_do.pop()
+                connected.add(conn)
+                for nb in conn.neighbors:
+                    if nb not in connected:
+                        to_do.append(nb)
+            for ca in connected:
+                intra_mol_map[ca] = connected
+        for nb in nearby:
+            if nb in exclusions:
+                continue
+            if a.residue == nb.residue:
+                continue
+            if not intra_mol and nb in intra_mol_map[a]:
+                continue
+            if a in clashes and nb in clashes[a]:
+                continue
+            if res_separation is not None:
+                if a.residue.chain is not None and a.residue.chain == nb.residue.chain:
+                    if abs(chain_pos[a.residue] - chain_pos[nb.residue]) < res_separation:
+                        continue
+            if use_scene_coords:
+                a_crd, nb_crd = a.scene_coord, nb.scene_coord
+            else:
+                a_crd, nb_crd = a.coord, nb.coord
+            if distance_only:
+                clash = distance_only - distance(a_crd, nb_crd)
+            else:
+                clash = a.radius + nb.radius - distance(a_crd, nb_crd)
+            if hbond_allowance and not distance_only:
+                if (_donor(a) and _acceptor(nb)) or (_donor(nb) and _acceptor(a)):
+                    clash -= hbond_allowance
+            if distance_only:
+                if clash < 0.0:
+                    continue
+            elif clash < clash_threshold:
+                continue
+            clashes.setdefault(a, {})[nb] = clash
+            clashes.setdefault(nb, {})[a] = clash
+    return clashes
+
+
+def differences(c1, c2):
+    pairs1 = set((a, b) for a, cl in c1.items() for b in cl)
+    pairs2 = set((a, b) for a, cl in c2.items() for b in cl)
+    value_diff = max([abs(c1[a][b] - c2[a][b]) for a, b in pairs1 & pairs2], default=0)
+    return len(pairs1 ^ pairs2), value_diff
+
+
+def time_case(name, options):
+    from chimerax.clashes.clashes import find_clashes
+    atoms = s.atoms
+    t0 = time()
+    c_new = find_clashes(session, atoms, **options)
+    t_new = time() - t0
+    t0 = time()
+    c_old = per_atom_clashes(atoms, atoms, False, **options)
+    t_old = time() - t0
+    mismatched, value_diff = differences(c_new, c_old)
+    print("%-24s %7d pairs, array %7.2f s, per atom %7.2f s, speedup %5.1f,"
+          " mismatched pairs %d, max value difference %.2g"
+          % (name, sum(len(cl) for cl in c_new.values()) // 2, t_new, t_old,
+             t_old / t_new, mismatched, value_diff))
+
+
+session.logger.add_log(NoOutputLog())
+run(session, 'open %s' % PDB_ID, log=False)
+s = session.models[0]
+print("Clashes for %s (%d atoms)" % (PDB_ID, s.num_atoms))
+for name, options in CASES:
+    time_case(name, options)
+run(session, 'close', log=False)
@@ -0,0 +1,78 @@
+# vi:set shiftwidth=4 expandtab:
+# Map filter FFT speed.
+#
+# run "ChimeraX --nogui --exit --silent --script 'fft_benchmark.py [size] [threads]'"
+#
+# Gaussian filters and Fourier transforms a random size^3 float32 map
+# (default 512^3) with each available FFT backend of chimerax.map_filter and
+# with the previous implementation that used double precision numpy.fft one
+# plane at a time, checks the results agree, and reports the times.
+#
+import sys
+from time import time
+
+SIZE = int(sys.argv[1]) if len(sys.argv) > 1 else 512
+NTHREAD = int(sys.argv[2]) if len(sys.argv) > 2 else None
+SDEV = (2.0, 2.0, 2.0)
+
+
+def plane_gaussian_convolution(data, ijk_sdev, cutoff=5):
+    """Previous gaussian_convolution() loop, numpy.fft one plane at a time."""
+    from numpy import array, float32, multiply, swapaxes
+    from numpy.fft import rfft, irfft
+    from chimerax.map_filter.gaussian import gaussian, efficient_fft_size
+    c = array(data, float32)
+    for axis in range(3):
+        size = c.shape[axis]
+        sdev = ijk_sdev[2 - axis]
+        hw = min(size // 2, int(cutoff * sdev + 1))
+        n = efficient_fft_size(size + hw)
+        g = gaussian(sdev, n, float32)
+        g[hw:-hw] = 0
+        fg = rfft(g)
+        cs = swapaxes(c, axis, 2)
+        for p in range(cs.shape[0]):
+            cp = cs[p, ...]
+            ft = rfft(cp, n=n)
+            multiply(ft, fg, ft)
+            cp[:, :] = irfft(ft, n=n)[:, :size]
+    return c
+
+
+def timed(f, *args, **kw):
+    t0 = time()
+    r = f(*args, **kw)
+    return r, time() - t0
+
+
+from numpy import random, float32, abs as absolute
+from numpy.fft import fftn
+from chimerax.map_filter import fftbackend
+from chimerax.map_filter.gaussian import gaussian_convolution
+m = random.rand(SIZE, SIZE, SIZE).astype(float32)
+print("FFT benchmark %d^3 float32 map, %s threads"
+      % (SIZE, 'default' if NTHREAD is None else NTHREAD))
+
+g_old, t_old = timed(plane_gaussian_convolution, m, SDEV)
+print("%-28s %7.2f s" % ('gaussian numpy per plane', t_old))
+ft_old, tf_old = timed(fftn, m)
+print("%-28s %7.2f s, %s" % ('fourier numpy fftn', tf_old, ft_old.dtype))
+ft_old = ft_old[::4, ::4, ::4].copy()     # Compare a sample to limit memory use.
+
+for bc in fftbackend._backend_classes:
+    try:
+        b = fftbackend.fft_backend(bc.name)
+    except ValueError:
+        print("%-28s not available" % bc.name)
+        continue
+    fftbackend.set_default_fft_backend(b.name)
+    g, t = timed(gaussian_convolution, m, SDEV, nthread=NTHREAD)
+    print("%-28s %7.2f s, speedup %5.1f, max difference %.2g"
+          % ('gaussian ' + b.name, t, t_old / t, absolute(g - g_old).max()))
+    del g
+    ft, t = timed(b.fftn, m, nthread=NTHREAD)
+    print("%-28s %7.2f s, speedup %5.1f, %s, max relative difference %.2g"
+          % ('fourier ' + b.name, t, tf_old / t, ft.dtype,
+             absolute(ft[::4, ::4, ::4] - ft_old).max() / absolute(ft_old).max()))
+    del ft
+fftbackend.set_default_fft_backend(None)
@@ -0,0 +1,76 @@
+# vi:set shiftwidth=4 expandtab:
+# Session save and restore throughput.
+#
+# run "ChimeraX --nogui --exit --silent --script 'session_benchmark.py [pdb-id]'"
+#
+# Saves and restores a session containing a large structure (default 3j3q,
+# 2.4 million atoms) and a map computed from it, for the whole-file compressed
+# version 3 format and the chunked version 4 format with each compression.
+# Also times reading only the metadata of each session file.
+#
+import os
+import sys
+import tempfile
+from time import time
+from chimerax.core.commands import run
+from chimerax.core.logger import PlainTextLog
+
+
+class NoOutputLog(PlainTextLog):
+
+    def log(self, level, msg):
+        pass
+
+    def status(self, msg, color, secondary):
+        pass
+
+
+session = session  # noqa -- shut up flake8
+
+PDB_ID = sys.argv[1] if len(sys.argv) > 1 else "3j3q"
+CASES = [(3, 'lz4'), (3, 'gzip'), (4, 'none'), (4, 'lz4'), (4, 'gzip')]
+MB = 1024 * 1024
+
+
+def open_stream(path):
+    from chimerax.core.session import is_gzip_file, is_lz4_file
+    if is_gzip_file(path):
+        import gzip
+        return gzip.open(path, 'rb')
+    if is_lz4_file(path):
+        import lz4.frame
+        return lz4.frame.open(path, 'rb')
+    return open(path, 'rb')
+
+
+def time_case(directory, version, compress):
+    path = os.path.join(directory, 'v%d-%s.cxs' % (version, compress))
+    t0 = time()
+    run(session, 'save %s version %d compress %s' % (path, version, compress), log=False)
+    t_save = time() - t0
+    size = os.path.getsize(path)
+
+    t0 = time()
+    with open_stream(path) as stream:
+        session.restore(stream, path=path, metadata_only=True)
+    t_metadata = time() - t0
+
+    t0 = time()
+    run(session, 'open %s' % path, log=False)
+    t_restore = time() - t0
+    os.remove(path)
+    print("version %d %-4s: %7.1f Mbytes, save %6.2f s (%6.1f Mbytes/s),"
+          " restore %6.2f s, metadata only %6.3f s"
+          % (version, compress, size / MB, t_save, size / MB / t_save,
+             t_restore, t_metadata))
+
+
+session.logger.add_log(NoOutputLog())
+run(session, 'open %s' % PDB_ID, log=False)
+run(session, 'molmap #1 8', log=False)
+s = session.models[0]
+print("Session with %s (%d atoms) and %d maps" % (PDB_ID, s.num_atoms, len(session.models) - 1))
+with tempfile.TemporaryDirectory() as directory:
+    for version, compress in CASES:
+        time_case(directory, version, compress)
+run(session, 'close', log=False)
@@ -572,7 +572,7 @@ extern "C" EXPORT void atom_get_coord_crdset(void *atom, int cs_id, float64_t *x
             err_msg << "Structure has no coordset with ID " << cs_id;
             PyErr_SetString(PyExc_ValueError, err_msg.str().c_str());
         } else {
-            auto& crd = a->coord(cs);
+            auto crd = a->coord_value(cs);
             *xyz++ = crd[0];
             *xyz++ = crd[1];
             *xyz++ = crd[2];
@@ -3755,12 +3755,9 @@ extern "C" EXPORT PyObject* coordset_xyzs(void *coordset)
     PyObject* ret_val;
     try {
         double *v;
-        ret_val = python_double_array(cs->coords().size(), 3, &v);
-        for (auto xyz: cs->coords()) {
-            *v++ = xyz[0];
-            *v++ = xyz[1];
-            *v++ = xyz[2];
-        }
+        // Don't widen single-precision inactive coordsets.
+        ret_val = python_double_array(cs->num_coords(), 3, &v);
+        cs->get_coords(v);
     } catch (...) {
         molc_error();
         return nullptr;
@@ -4073,6 +4070,18 @@ extern "C" EXPORT void set_structure_active_coordset_change_notify(void *structu
     error_wrap_array_set(s, n, &Structure::set_active_coord_set_change_notify, accn);
 }
 
+extern "C" EXPORT void structure_float32_coordsets(void *structures, size_t n, npy_bool *f32)
+{
+    Structure **s = static_cast<Structure **>(structures);
+    error_wrap_array_get(s, n, &Structure::float32_coord_sets, f32);
+}
+
+extern "C" EXPORT void set_structure_float32_coordsets(void *structures, size_t n, npy_bool *f32)
+{
+    Structure **s = static_cast<Structure **>(structures);
+    error_wrap_array_set(s, n, &Structure::set_float32_coord_sets, f32);
+}
+
 extern "C" EXPORT void structure_alt_loc_change_notify(void *structures, size_t n, npy_bool *alcn)
 {
     Structure **s = static_cast<Structure **>(structures);
@@ -4272,12 +4281,47 @@ extern "C" EXPORT void set_structure_active_coordset_id(void *mols, size_t n, in
     }
 }
 
-extern "C" EXPORT void structure_add_coordset(void *mol, int id, void *xyz, size_t n)
+extern "C" EXPORT void structure_add_coordset(void *mol, int id, void *xyz, size_t n, bool float32)
 {
     Structure *m = static_cast<Structure *>(mol);
     try {
         CoordSet *cs = m->new_coord_set(id);
-        cs->set_coords((double *)xyz, n);
+        if (float32)
+            cs->set_coords((float *)xyz, n);
+        else
+            cs->set_coords((double *)xyz, n);
+    } catch (...) {
+        molc_error();
+    }
+}
+
+extern "C" EXPORT void structure_set_coordset_coords(void *mol, int id, void *xyz, size_t n, bool float32)
+{
+    Structure *m = static_cast<Structure *>(mol);
+    try {
+        CoordSet *cs = m->find_coord_set(id);
+        if (cs == nullptr)
+            PyErr_Format(PyExc_IndexError, "No coordset id %d", id);
+        else if (float32)
+            cs->set_coords((float *)xyz, n);
+        else
+            cs->set_coords((double *)xyz, n);
+    } catch (...) {
+        molc_error();
+    }
+}
+
+extern "C" EXPORT void structure_release_coordset_coords(void *mol, int id)
+{
+    Structure *m = static_cast<Structure *>(mol);
+    try {
+        CoordSet *cs = m->find_coord_set(id);
+        if (cs == nullptr)
+            PyErr_Format(PyExc_IndexError, "No coordset id %d", id);
+        else if (cs == m->active_coord_set())
+            PyErr_Format(PyExc_ValueError, "Cannot release coordinates of active coordset %d", id);
+        else
+            cs->clear_coords();
     } catch (...) {
         molc_error();
     }
@@ -4293,17 +4337,23 @@ extern "C" EXPORT void structure_remove_coordsets(void *mol)
     }
 }
 
-extern "C" EXPORT void structure_add_coordsets(void *mol, bool replace, void *xyz, size_t n_sets, size_t n_coords)
+extern "C" EXPORT void structure_add_coordsets(void *mol, bool replace, void *xyz, size_t n_sets, size_t n_coords, bool float32)
 {
     Structure *m = static_cast<Structure *>(mol);
     double* xyzs = (double*)xyz;
+    float* fxyzs = (float*)xyz;
     try {
         if (replace)
             m->clear_coord_sets();
         for (size_t i = 0; i < n_sets; ++i) {
             CoordSet *cs = m->new_coord_set();
-            cs->set_coords((double *)xyzs, n_coords);
-            xyzs += n_coords * 3;
+            if (float32) {
+                cs->set_coords(fxyzs, n_coords);
+                fxyzs += n_coords * 3;
+            } else {
+                cs->set_coords(xyzs, n_coords);
+                xyzs += n_coords * 3;
+            }
         }
         if (replace)
             m->set_active_coord_set(m->coord_sets()[0]);
@@ -4346,7 +4396,7 @@ extern "C" EXPORT void structure_coordset_size(void *mols, size_t n, int32_t *co
     try {
       for (size_t i = 0; i != n; ++i) {
         CoordSet *cs = m[i]->active_coord_set();
-        *coordset_size++ = (cs ? cs->coords().size() : 0);
+        *coordset_size++ = (cs ? cs->num_coords() : 0);
       }
     } catch (...) {
         molc_error();
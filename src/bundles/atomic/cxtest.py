@@ -0,0 +1,47 @@
+from chimerax.core.commands import run
+from chimerax.atomic.changes import check_for_changes
+run(session, "open 1gcn")
+run(session, "surface #1 sharpBoundaries false")
+s = session.models[0]
+surf = s.surfaces()[0]
+
+# The first side chain rotation recomputes the whole surface and keeps its grids
+# since only a few atoms moved; the second one updates the surface incrementally.
+run(session, "torsion :17@nh1,cd,cg,cb 50")
+check_for_changes(session)
+if surf._ses_grids is None:
+	raise SystemExit("Surface distance grids not kept after a rotamer change")
+run(session, "torsion :17@nh1,cd,cg,cb 170")
+check_for_changes(session)
+if surf._ses_grids is None:
+	raise SystemExit("Surface not updated incrementally after a second rotamer change")
+
+from chimerax.surface import ses_surface_geometry, surface_area, enclosed_volume
+va, na, ta = ses_surface_geometry(surf.atom_coords(), surf.atoms.radii,
+	surf.probe_radius, surf.grid_spacing)
+area, full_area = surface_area(surf.vertices, surf.triangles), surface_area(va, ta)
+if abs(area - full_area) > 1e-3 * full_area:
+	raise SystemExit("Incrementally updated surface area %.2f differs from full recompute %.2f"
+		% (area, full_area))
+vol, holes = enclosed_volume(surf.vertices, surf.triangles)
+full_vol, full_holes = enclosed_volume(va, ta)
+if holes != full_holes or abs(vol - full_vol) > 1e-3 * full_vol:
+	raise SystemExit("Incrementally updated surface volume %.2f (%d holes) differs from"
+		" full recompute %.2f (%d holes)" % (vol, holes, full_vol, full_holes))
+
+# Moving all atoms is not a small change, so the grids are dropped.
+run(session, "move x 1 atoms #1")
+check_for_changes(session)
+if surf._ses_grids is not None:
+	raise SystemExit("Surface distance grids kept after all atoms moved")
+
+# Returning to a conformation found in the surface cache still keeps the grids.
+run(session, "torsion :17@nh1,cd,cg,cb 80")
+check_for_changes(session)
+run(session, "torsion :17@nh1,cd,cg,cb 170")
+check_for_changes(session)
+surf._ses_grids = None
+run(session, "torsion :17@nh1,cd,cg,cb 80")
+check_for_changes(session)
+if surf._ses_grids is None:
+	raise SystemExit("Surface distance grids not kept when surface geometry was cached")
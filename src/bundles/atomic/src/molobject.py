@@ -1376,8 +1376,19 @@ class StructureData:
         set to true when temporarily changing the active coordset in a Python script. Boolean''')
     active_coordset = c_property('structure_active_coordset', cptr, astype = convert.coordset,
         read_only = True, doc="Supported API. Currently active :class:`CoordSet`. Read only.")
-    active_coordset_id = c_property('structure_active_coordset_id', int32,
+    _c_active_coordset_id = c_property('structure_active_coordset_id', int32)
+    def _get_active_coordset_id(self):
+        return self._c_active_coordset_id
+    def _set_active_coordset_id(self, cs_id):
+        if self._coordset_loader is not None:
+            self._coordset_loader.load_coordset(self, cs_id)
+        self._c_active_coordset_id = cs_id
+    active_coordset_id = property(_get_active_coordset_id, _set_active_coordset_id,
         doc = "Supported API. Index of the active coordinate set.")
+    # Object with a load_coordset(structure, cs_id) method that fills in coordsets
+    # whose coordinates are kept out of memory (e.g. read on demand from a trajectory file),
+    # and a copy() method returning a loader for a copy of the structure
+    _coordset_loader = None
     alt_loc_change_notify = c_property('structure_alt_loc_change_notify', npy_bool, doc=
         '''Whether notifications are issued when altlocs are changed.  Should only be
         set to false when temporarily changing alt locs in a Python script. Boolean''')
@@ -1395,6 +1406,10 @@ class StructureData:
         doc = "Supported API. Return array of ids of all coordinate sets.")
     coordset_size = c_property('structure_coordset_size', int32, read_only = True,
         doc = "Supported API. Return the size of the active coordinate set array.")
+    float32_coordsets = c_property('structure_float32_coordsets', npy_bool, doc =
+        '''Whether coordinate sets other than the active one are stored in single precision,
+        halving the memory used by trajectories and ensembles.  The active coordset is
+        widened to double precision when it becomes active.  Boolean''')
     display = c_property('structure_display', npy_bool, doc =
         "Don't call this directly.  Use Model's 'display' attribute instead.  Only exposed so that "
         "Model's 'display' attribute can call it so that 'display changed' shows up in triggers.")
@@ -1537,15 +1552,19 @@ class StructureData:
         f = c_function('structure_combine_sym_atoms', args = (ctypes.c_void_p,))(self._c_pointer)
 
     def add_coordset(self, id, xyz):
-        '''Supported API. Add a coordinate set with the given id.'''
-        if xyz.dtype != float64:
-            raise ValueError('add_coordset(): array must be float64, got %s' % xyz.dtype.name)
+        '''Supported API. Add a coordinate set with the given id.
+           The array can be float64 or float32 (see float32_coordsets).'''
+        if xyz.dtype not in (float64, float32):
+            raise ValueError('add_coordset(): array must be float64 or float32, got %s' % xyz.dtype.name)
         f = c_function('structure_add_coordset',
-                       args = (ctypes.c_void_p, ctypes.c_int, ctypes.c_void_p, ctypes.c_size_t))
-        f(self._c_pointer, id, pointer(xyz), len(xyz))
+                       args = (ctypes.c_void_p, ctypes.c_int, ctypes.c_void_p, ctypes.c_size_t,
+                               ctypes.c_bool))
+        f(self._c_pointer, id, pointer(xyz), len(xyz), xyz.dtype == float32)
 
     def add_coordsets(self, xyzs, replace = True):
-        '''Add coordinate sets.  If 'replace' is True, clear out existing coordinate sets first'''
+        '''Add coordinate sets.  If 'replace' is True, clear out existing coordinate sets first.
+           The array can be float64 or float32.  Adding float32 coordinates to a structure with
+           float32_coordsets true avoids making a double precision copy of the frames.'''
         if len(xyzs.shape) != 3:
             raise ValueError('add_coordsets(): array must be (frames)x(atoms)x3-dimensional')
         if self.num_atoms and xyzs.shape[1] != self.num_atoms:
@@ -1554,17 +1573,37 @@ class StructureData:
         if xyzs.shape[2] != 3:
             raise ValueError('add_coordsets(): third dimension of coordinate array'
                 ' must be 3 (xyz)')
-        if xyzs.dtype != float64:
-            raise ValueError('add_coordsets(): array must be float64, got %s' % xyzs.dtype.name)
+        if xyzs.dtype not in (float64, float32):
+            raise ValueError('add_coordsets(): array must be float64 or float32, got %s' % xyzs.dtype.name)
+        if replace:
+            self._coordset_loader = None
         f = c_function('structure_add_coordsets',
-                       args = (ctypes.c_void_p, ctypes.c_bool, ctypes.c_void_p, ctypes.c_size_t, ctypes.c_size_t))
-        f(self._c_pointer, replace, pointer(xyzs), *xyzs.shape[:2])
+                       args = (ctypes.c_void_p, ctypes.c_bool, ctypes.c_void_p, ctypes.c_size_t,
+                               ctypes.c_size_t, ctypes.c_bool))
+        f(self._c_pointer, replace, pointer(xyzs), *xyzs.shape[:2], xyzs.dtype == float32)
 
     def remove_coordsets(self):
         '''Remove all coordinate sets.'''
+        self._coordset_loader = None
         f = c_function('structure_remove_coordsets', args = (ctypes.c_void_p,))
         f(self._c_pointer)
 
+    def set_coordset_coords(self, cs_id, xyz):
+        '''Set the coordinates of the existing coordset with the given id.'''
+        if xyz.dtype not in (float64, float32):
+            raise ValueError('set_coordset_coords(): array must be float64 or float32, got %s'
+                % xyz.dtype.name)
+        f = c_function('structure_set_coordset_coords',
+                       args = (ctypes.c_void_p, ctypes.c_int, ctypes.c_void_p, ctypes.c_size_t,
+                               ctypes.c_bool))
+        f(self._c_pointer, cs_id, pointer(xyz), len(xyz), xyz.dtype == float32)
+
+    def release_coordset_coords(self, cs_id):
+        '''Free the coordinates of the (non-active) coordset with the given id, leaving
+           an empty coordset.  Used for coordsets that are loaded on demand.'''
+        f = c_function('structure_release_coordset_coords', args = (ctypes.c_void_p, ctypes.c_int))
+        f(self._c_pointer, cs_id)
+
     def coordset(self, cs_id):
         '''Supported API. Return the CoordSet for the given coordset ID'''
         f = c_function('structure_py_obj_coordset', args = (ctypes.c_void_p, ctypes.c_int),
@@ -1662,16 +1701,16 @@ class StructureData:
         '''
         if index is None:
             f = c_function('structure_new_coordset_default', args = (ctypes.c_void_p,))
-            f()
+            f(self._c_pointer)
         else:
             if size is None:
                 f = c_function('structure_new_coordset_index',
                     args = (ctypes.c_void_p, ctypes.c_int))
-                f(index)
+                f(self._c_pointer, index)
             else:
                 f = c_function('structure_new_coordset_index_size',
                     args = (ctypes.c_void_p, ctypes.c_int, ctypes.c_int))
-                f(index, size)
+                f(self._c_pointer, index, size)
 
     def new_residue(self, residue_name, chain_id, pos, insert=None, *, precedes=None):
         ''' Supported API. Create a new :class:`.Residue`.
@@ -101,6 +101,9 @@ class MolecularSurface(Surface):
         self._vertex_to_atom = None
         self._vertex_to_atom_count = None	# Used to check if atoms deleted
         self._max_radius = None
+        self._ses_grids = None		# For updating surface when a few atoms move.
+        self._incremental_update = False
+        self._surface_coords = None	# Atom coordinates the current surface was computed for.
         self.clip_cap = True
 
     def delete(self):
@@ -139,6 +142,8 @@ class MolecularSurface(Surface):
             shape_change = True
 
         if shape_change:
+            self._ses_grids = None
+            self._incremental_update = False
             self._clear_shape()
         elif shown_changed:
             self.triangle_mask = self._calc_triangle_mask()
@@ -203,9 +208,49 @@ class MolecularSurface(Surface):
     def _recompute_shape(self):
         if len(self.atoms) == 0:
             self.session.models.close([self])
-        else:
+        elif not self._update_shape():
+            # Keep distance grids only when few atoms moved, like a rotamer swap,
+            # so the next such change only updates a patch of the surface.
+            self._incremental_update = self._few_atoms_moved()
             self._clear_shape()
             self.calculate_surface_geometry()
+
+    def _few_atoms_moved(self):
+        '''
+        Whether at most SESSurfaceGrids.max_changed_fraction of the atoms
+        moved since the surface was last computed.
+        '''
+        xyz0 = self._surface_coords
+        if xyz0 is None or self.resolution is not None:
+            return False
+        xyz = self.atom_coords()
+        if len(xyz) != len(xyz0):
+            return False
+        from chimerax.surface import SESSurfaceGrids
+        nmoved = (xyz != xyz0).any(axis = 1).sum()
+        return nmoved <= SESSurfaceGrids.max_changed_fraction * len(xyz)
+
+    def _update_shape(self):
+        '''
+        Update the solvent excluded surface recomputing only the region near
+        atoms that moved.  Returns false if the surface could not be updated.
+        '''
+        g = self._ses_grids
+        if (g is None or self.vertices is None or self.resolution is not None
+            or len(self.atoms) != self._atom_count):
+            self._ses_grids = None
+            return False
+        r = self.atoms.radii
+        xyz = self.atom_coords()
+        geom = g.update(xyz, r)
+        if geom is None:
+            self._ses_grids = None
+            return False
+        self._surface_coords = xyz
+        self._clear_shape()
+        self._max_radius = r.max()
+        self._set_surface_geometry(*self._sharp_boundary_geometry(*geom, xyz, r))
+        return True
         
     @property
     def atom_count(self):
@@ -221,36 +266,104 @@ class MolecularSurface(Surface):
         if not self.vertices is None:
             return              # Geometry already computed
 
+        self._set_surface_geometry(*self._compute_surface_geometry())
+
+    def _compute_surface_geometry(self, inputs = None):
+        '''
+        Compute the surface triangulation without changing the drawing.
+        The atom arrays and cache key come from inputs as returned by
+        _surface_inputs(), or from the current atoms if inputs is None.
+        Given inputs this does not use the atoms, so it can run in a thread
+        while atoms are changed or deleted.  Geometry for identical atom
+        coordinates and parameters is taken from the surface geometry cache.
+        '''
+        xyz, radii, elements, key = self._surface_inputs() if inputs is None else inputs
+        self._surface_coords = xyz
+        from chimerax.surface.surfcache import surface_geometry_cache
+        cache = surface_geometry_cache(self.session)
+        g = cache.get(key)
+        if g is not None:
+            if 'level' in g:
+                self.gaussian_level = float(g['level'])
+            if self.resolution is None:
+                self._max_radius = radii.max()
+                if self._incremental_update:
+                    # Keep distance grids so later small changes still update a patch.
+                    from chimerax.surface import SESSurfaceGrids
+                    self._ses_grids = SESSurfaceGrids(xyz, radii, self.probe_radius,
+                                                      self.grid_spacing)
+            return tuple(g.get(name) for name in ('va', 'na', 'ta', 'tj', 'v2a'))
+
+        geom = self._calculate_geometry(xyz, radii, elements)
+        g = dict(zip(('va', 'na', 'ta', 'tj', 'v2a'), geom))
+        if self.resolution is not None:
+            from numpy import array
+            g['level'] = array(self.gaussian_level)
+        cache.put(key, g)
+        return geom
+
+    def _surface_inputs(self):
+        '''
+        Copies of the atom coordinates, radii and element numbers used to
+        compute the surface, and the surface geometry cache key.
+        '''
         atoms = self.atoms
         xyz = self.atom_coords()
+        radii = atoms.radii
+        elements = None if self.resolution is None else atoms.element_numbers
+        from chimerax.surface.surfcache import surface_geometry_cache
+        key = self._geometry_cache_key(surface_geometry_cache(self.session), xyz, radii, elements)
+        return xyz, radii, elements, key
+
+    def _geometry_cache_key(self, cache, xyz, radii, elements):
+        params = (self.probe_radius, self.grid_spacing, self.resolution, self.level,
+                  self.sharp_boundaries, self._refinement_steps)
+        if self.resolution is None:
+            return cache.key(xyz, radii, ('SES',) + params)
+        return cache.key(xyz, elements, ('Gaussian',) + params)
+
+    def _calculate_geometry(self, xyz, radii, elements):
         res = self.resolution
         from chimerax import surface
         if res is None:
             # Compute solvent excluded surface
-            r = atoms.radii
-            self._max_radius = r.max()
-            va, na, ta = surface.ses_surface_geometry(xyz, r, self.probe_radius, self.grid_spacing)
+            self._max_radius = radii.max()
+            if self._incremental_update:
+                g = surface.SESSurfaceGrids(xyz, radii, self.probe_radius, self.grid_spacing)
+                self._ses_grids = g
+                va, na, ta = g.surface_geometry()
+            else:
+                va, na, ta = surface.ses_surface_geometry(xyz, radii, self.probe_radius, self.grid_spacing)
         else:
             # Compute Gaussian surface
-            va, na, ta, level = surface.gaussian_surface(xyz, atoms.element_numbers, res,
+            va, na, ta, level = surface.gaussian_surface(xyz, elements, res,
                                                          self.level, self.grid_spacing)
             self.gaussian_level = level
 
+        return self._sharp_boundary_geometry(va, na, ta, xyz, radii)
+
+    def _sharp_boundary_geometry(self, va, na, ta, xyz, radii):
+        tj = v2a = None
         if self.sharp_boundaries:
-            v2a = self.vertex_to_atom_map(va)
+            v2a = self._vertex_to_atom_map(va, xyz, radii)
             kw = {'refinement_steps': self._refinement_steps}
             if self.resolution is None:
-                kw['atom_radii'] = atoms.radii
+                kw['atom_radii'] = radii
             from chimerax.surface import sharp_edge_patches
             va, na, ta, tj, v2a = sharp_edge_patches(va, na, ta, v2a, xyz, **kw)
-            self._joined_triangles = tj	# With non-duplicate vertices for clip cap calculation
-            self._vertex_to_atom = v2a
+        return va, na, ta, tj, v2a
+
+    def _set_surface_geometry(self, va, na, ta, joined_triangles = None, vertex_to_atom = None):
+        if vertex_to_atom is not None:
+            self._joined_triangles = joined_triangles	# With non-duplicate vertices for clip cap calculation
+            self._vertex_to_atom = vertex_to_atom
+            self._vertex_to_atom_count = len(self.atoms)
 
         self.set_geometry(va, na, ta)
         self.triangle_mask = self._calc_triangle_mask()
         self._show_atom_patch_colors()
         self.update_selection()
-        self._atom_count = len(atoms)
+        self._atom_count = len(self.atoms)
 
     def _calc_triangle_mask(self):
         tmask = self._patch_display_mask(self.show_atoms)
@@ -287,26 +400,28 @@ class MolecularSurface(Surface):
         new vertex to atom map.
         '''
         if vertices is not None:
-            xyz1 = self.vertices if vertices is None else vertices
-            xyz2 = self.atom_coords()
-            radii = {'scale2':self.atoms.radii} if self.resolution is None else {}
-            max_dist = self._maximum_atom_to_surface_distance()
-            from chimerax import geometry
-            i1, i2, nearest1 = geometry.find_closest_points(xyz1, xyz2, max_dist, **radii)
-            if len(i1) < len(xyz1):
-                # TODO: For Gaussian surface should increase max_dist and try again.
-                raise RuntimeError('Surface further from atoms than expected (%g) for %d of %d atoms'
-                                   % (max_dist, len(xyz1)-len(i1), len(xyz1)))
-            from numpy import empty, int32
-            v2a = empty((len(xyz1),), int32)
-            v2a[i1] = nearest1
-            self._vertex_to_atom = v2a
+            self._vertex_to_atom = self._vertex_to_atom_map(vertices, self.atom_coords(),
+                                                            self.atoms.radii)
             self._vertex_to_atom_count = len(self.atoms)
         elif self._vertex_to_atom is not None and len(self.atoms) < self._vertex_to_atom_count:
             # Atoms deleted
             self._vertex_to_atom = None
         return self._vertex_to_atom
 
+    def _vertex_to_atom_map(self, vertices, xyz, radii):
+        r = {'scale2':radii} if self.resolution is None else {}
+        max_dist = self._maximum_atom_to_surface_distance()
+        from chimerax import geometry
+        i1, i2, nearest1 = geometry.find_closest_points(vertices, xyz, max_dist, **r)
+        if len(i1) < len(vertices):
+            # TODO: For Gaussian surface should increase max_dist and try again.
+            raise RuntimeError('Surface further from atoms than expected (%g) for %d of %d atoms'
+                               % (max_dist, len(vertices)-len(i1), len(vertices)))
+        from numpy import empty, int32
+        v2a = empty((len(vertices),), int32)
+        v2a[i1] = nearest1
+        return v2a
+
     def _vertices_for_atoms(self, atoms):
         if atoms is None:
             nv = len(self.vertices)
@@ -54,10 +54,15 @@ class Structure(Model, StructureData):
             '_use_spline_normals': False,
             'ribbon_xs_mgr': XSectionManager(),
             'filename': None,
+            '_coordset_loader': None,
+            'float32_coordsets': False,
         }
 
         StructureData.__init__(self, c_pointer)
         for attr_name, val in self._session_attrs.items():
+            if attr_name == 'float32_coordsets' and c_pointer is not None:
+                # Keep the setting of an existing C++ structure.
+                continue
             setattr(self, attr_name, val)
         self.ribbon_xs_mgr.set_structure(self)
         Model.__init__(self, name, session)
@@ -141,6 +146,9 @@ class Structure(Model, StructureData):
             c_pointer = StructureData._copy(self), auto_style = False, log_info = False)
         m.positions = self.positions
         m._copy_custom_attrs(self)
+        if self._coordset_loader is not None:
+            # Coordsets not in memory are copied empty and loaded when made active.
+            m._coordset_loader = self._coordset_loader.copy()
         return m
 
     def _get_instance_totals(self):
@@ -851,55 +859,59 @@ class Structure(Model, StructureData):
     def _atomspec_filter_chain(self, atoms, num_atoms, parts, attrs):
         # print("Structure._atomspec_filter_chain", num_atoms, parts, attrs)
         import numpy
-        chain_ids = atoms.residues.chain_ids
+        # Test each residue once instead of each atom.
+        residues, res_index = _unique_residues(atoms)
         if not parts:
-            selected = numpy.ones(num_atoms, dtype=numpy.bool_)
+            selected = numpy.ones(len(residues), dtype=numpy.bool_)
         else:
-            selected = numpy.zeros(num_atoms, dtype=numpy.bool_)
+            chain_ids = residues.chain_ids
+            selected = numpy.zeros(len(residues), dtype=numpy.bool_)
             for part in parts:
                 choose = part.string_matcher(self.lower_case_chains)
-                s = numpy.vectorize(choose)(chain_ids)
+                s = _unique_values_mask(choose, chain_ids)
                 selected = numpy.logical_or(selected, s)
         if attrs:
             chains = self.chains
             chain_selected = numpy.ones(len(chains), dtype=numpy.bool_)
             chain_selected = self._atomspec_attr_filter(chains, chain_selected, attrs)
-            chain_map = dict(zip(chains, chain_selected))
-            for i, a in enumerate(atoms):
-                if not selected[i]:
-                    continue
-                try:
-                    if not chain_map[a.residue.chain]:
-                        selected[i] = False
-                except KeyError:
-                    # XXX: Atom is not in a chain, "must not be selected?"
-                    selected[i] = False
+            # Residues not in a chain are not selected.
+            chain_residues = chains.filter(chain_selected).existing_residues
+            selected &= (chain_residues.indices(residues) >= 0)
+        selected = selected[res_index]
         # print("AtomicStructure._atomspec_filter_chain", selected)
         return selected
 
     def _atomspec_attr_filter(self, objects, selected, attrs):
         import numpy
+        selected = numpy.array(selected, dtype=numpy.bool_)
         for attr in attrs:
-            choose = attr.attr_matcher()
-            selected = [(selected[i] and choose(obj)) for i, obj in enumerate(objects)]
-        return numpy.array(selected)
-
+            values = _bulk_attribute_values(objects, attr.name)
+            if values is not None:
+                selected &= attr.array_matcher()(values)
+            else:
+                choose = attr.attr_matcher()
+                selected = numpy.array([(selected[i] and choose(obj))
+                                        for i, obj in enumerate(objects)],
+                                       dtype=numpy.bool_)
+        return selected
 
     def _atomspec_filter_residue(self, atoms, num_atoms, parts, attrs):
         # print("Structure._atomspec_filter_residue", num_atoms, parts, attrs)
         import numpy
+        # Test each residue once instead of each atom.
+        residues, res_index = _unique_residues(atoms)
         if not parts:
             # No residue specifier, choose everything
-            selected = numpy.ones(num_atoms, dtype=numpy.bool_)
+            selected = numpy.ones(len(residues), dtype=numpy.bool_)
         else:
-            res_names = numpy.array(atoms.residues.names)
-            res_numbers = atoms.residues.numbers
-            res_ics = atoms.residues.insertion_codes
-            selected = numpy.zeros(num_atoms, dtype=numpy.bool_)
+            res_names = residues.names
+            res_numbers = residues.numbers
+            res_ics = residues.insertion_codes
+            selected = numpy.zeros(len(residues), dtype=numpy.bool_)
             for part in parts:
                 choose_id = part.res_id_matcher()
                 if choose_id:
-                    s = numpy.vectorize(choose_id)(res_numbers, res_ics)
+                    s = _unique_values_mask(choose_id, res_numbers, res_ics)
                     if s.any():
                         selected = numpy.logical_or(selected, s)
                     else:
@@ -907,10 +919,11 @@ class Structure(Model, StructureData):
                         # Try using input as name instead of number
                 if not choose_id:
                     choose_type = part.string_matcher(False)
-                    s = numpy.vectorize(choose_type)(res_names)
+                    s = _unique_values_mask(choose_type, res_names)
                     selected = numpy.logical_or(selected, s)
         if attrs:
-            selected = self._atomspec_attr_filter(atoms.residues, selected, attrs)
+            selected = self._atomspec_attr_filter(residues, selected, attrs)
+        selected = selected[res_index]
         # print("AtomicStructure._atomspec_filter_residue", selected)
         return selected
 
@@ -921,11 +934,11 @@ class Structure(Model, StructureData):
             # No name specifier, use everything
             selected = numpy.ones(num_atoms, dtype=numpy.bool_)
         else:
-            names = numpy.array(atoms.names)
+            names = atoms.names
             selected = numpy.zeros(num_atoms, dtype=numpy.bool_)
             for part in parts:
                 choose = part.string_matcher(False)
-                s = numpy.vectorize(choose)(names)
+                s = _unique_values_mask(choose, names)
                 selected = numpy.logical_or(selected, s)
         if attrs:
             selected = self._atomspec_attr_filter(atoms, selected, attrs)
@@ -2205,6 +2218,77 @@ def _selected_bond_cylinders(bonds):
         sel = None
     return sel
 
+# -----------------------------------------------------------------------------
+# Return the distinct residues of atoms and for each atom the index of its
+# residue, so atom specifier tests can be done once per residue.
+#
+def _unique_residues(atoms):
+    from numpy import unique
+    rptrs, rindex = unique(atoms.residues.pointers, return_inverse = True)
+    from .molarray import Residues
+    return Residues(rptrs), rindex.ravel()
+
+# -----------------------------------------------------------------------------
+# Apply matcher(value1, value2, ...) -> bool to each distinct combination of
+# values from the arrays and return a mask for all values.  Names, chain ids
+# and residue numbers repeat many times so this calls matcher far fewer times
+# than testing each value.
+#
+def _unique_values_mask(matcher, *value_arrays):
+    import numpy
+    uvalues = []
+    key = None
+    for values in value_arrays:
+        if values.dtype == object:
+            values = values.astype(str)     # Fixed width strings sort fast.
+        u, inverse = numpy.unique(values, return_inverse = True)
+        uvalues.append(u.tolist())
+        inverse = inverse.ravel().astype(numpy.int64)
+        key = inverse if key is None else key * len(u) + inverse
+    ukey, kindex = numpy.unique(key, return_inverse = True)
+    # Recover the index of each value from the combined key.
+    vindex = []
+    k = ukey
+    for u in reversed(uvalues[1:]):
+        vindex.append(k % len(u))
+        k = k // len(u)
+    vindex.append(k)
+    vindex.reverse()
+    umask = numpy.array([matcher(*[u[i] for u, i in zip(uvalues, ki)])
+                         for ki in zip(*[vi.tolist() for vi in vindex])],
+                        dtype = numpy.bool_)
+    return umask[kindex.ravel()]
+
+# -----------------------------------------------------------------------------
+# Return a numpy array of attribute values for a collection of atoms, residues
+# or chains using the collection array property, for example Atoms.bfactors
+# for attribute bfactor.  Return None if there is no such 1-D array property.
+#
+def _bulk_attribute_values(objects, attr_name):
+    cls = type(objects)
+    bulk_names = _bulk_attribute_names.get(cls)
+    if bulk_names is None:
+        from .molarray import depluralize
+        oc = objects.object_class
+        bulk_names = {}
+        for name in dir(cls):
+            if name.startswith('_') or not isinstance(getattr(cls, name, None), property):
+                continue
+            attr = depluralize(name)
+            if attr != name and isinstance(getattr(oc, attr, None), property):
+                bulk_names[attr] = name
+        _bulk_attribute_names[cls] = bulk_names
+    name = bulk_names.get(attr_name)
+    if name is None:
+        return None
+    values = getattr(objects, name)
+    from numpy import ndarray
+    if not isinstance(values, ndarray) or values.ndim != 1 or len(values) != len(objects):
+        return None
+    return values
+
+_bulk_attribute_names = {}
+
 # -----------------------------------------------------------------------------
 #
 def _has_structure_descendant(model):
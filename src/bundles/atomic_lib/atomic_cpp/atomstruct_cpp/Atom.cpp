@@ -247,6 +247,18 @@ Atom::coord(const CoordSet* cs) const
     return cs->coords()[_coord_index];
 }
 
+Coord
+Atom::coord_value(const CoordSet* cs) const
+{
+    if (_coord_index == COORD_UNASSIGNED)
+        throw std::logic_error("coordinate value hasn't been assigned");
+    if (_alt_loc != ' ') {
+        _Alt_loc_map::const_iterator i = _alt_loc_map.find(_alt_loc);
+        return (*i).second.coord;
+    }
+    return cs->coord(_coord_index);
+}
+
 int
 Atom::coordination(int value_if_unknown) const
 {
@@ -1148,7 +1160,7 @@ Atom::effective_scene_coord() const
 Coord
 Atom::scene_coord(const CoordSet* cs) const
 {
-    return coord(cs).mat_mul(structure()->position());
+    return coord_value(cs).mat_mul(structure()->position());
 }
 
 Coord
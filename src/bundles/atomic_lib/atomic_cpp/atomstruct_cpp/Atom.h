@@ -159,6 +159,8 @@ public:
     const Coord&  coord() const;
     const Coord&  coord(const CoordSet* cs) const;
     const Coord&  coord(char alt_loc) const { return _alt_loc_map.find(alt_loc)->second.coord; }
+    // Like coord(cs) but does not widen a single-precision (packed) coordset
+    Coord  coord_value(const CoordSet* cs) const;
     unsigned int  coord_index() const { return _coord_index; }
     int  coordination(int value_if_unknown) const;
     float  default_radius() const;
@@ -48,20 +48,92 @@ CoordSet::~CoordSet()
     _structure->change_tracker()->add_deleted(_structure, this);
 }
 
+template <typename T>
+static void
+_set_coords(CoordSet* cs, Structure* s, CoordSet::Coords& coords, std::vector<float>& packed_coords,
+    bool& packed, T* xyz, size_t n)
+{
+    if (s->float32_coord_sets() && s->active_coord_set() != cs) {
+        // Inactive coordset of a single-precision structure; keep only the packed copy
+        coords.clear();
+        coords.shrink_to_fit();
+        packed_coords.resize(3*n);
+        for (size_t c = 0 ; c < 3*n ; ++c)
+            packed_coords[c] = xyz[c];
+        packed = true;
+    } else {
+        // Force widening if currently packed
+        cs->coords();
+        size_t nc = coords.size();
+        size_t c = 0;
+        for (size_t i = 0 ; i < nc && i < n ; ++i, c += 3)
+            coords[i].set_xyz(xyz[c], xyz[c+1], xyz[c+2]);
+        for (size_t i = nc ; i < n ; ++i, c += 3)
+            coords.emplace_back(xyz[c], xyz[c+1], xyz[c+2]);
+    }
+
+    s->change_tracker()->add_modified(s, cs, ChangeTracker::REASON_COORDSET);
+    if (s->active_coord_set() == cs)
+        s->change_tracker()->add_modified(s, s, ChangeTracker::REASON_SCENE_COORD);
+}
+
 void
 CoordSet::set_coords(Real *xyz, size_t n)
 {
+    _set_coords(this, _structure, _coords, _packed_coords, _packed, xyz, n);
+}
+
+void
+CoordSet::set_coords(float *xyz, size_t n)
+{
+    _set_coords(this, _structure, _coords, _packed_coords, _packed, xyz, n);
+}
+
+void
+CoordSet::pack_coords()
+{
+    if (_packed)
+        return;
     size_t nc = _coords.size();
-    size_t c = 0;
-    for (size_t i = 0 ; i < nc ; ++i, c += 3)
-        _coords[i].set_xyz(xyz[c], xyz[c+1], xyz[c+2]);
-    for (size_t i = nc ; i < n ; ++i, c += 3)
-        add_coord(Coord(xyz[c], xyz[c+1], xyz[c+2]));
-
-    _structure->change_tracker()->add_modified(_structure, this, ChangeTracker::REASON_COORDSET);
-    if (_structure->active_coord_set() == this)
-        _structure->change_tracker()->add_modified(_structure, _structure,
-            ChangeTracker::REASON_SCENE_COORD);
+    _packed_coords.resize(3*nc);
+    float *p = _packed_coords.data();
+    for (auto& crd: _coords) {
+        *p++ = crd[0];
+        *p++ = crd[1];
+        *p++ = crd[2];
+    }
+    _coords.clear();
+    _coords.shrink_to_fit();
+    _packed = true;
+}
+
+void
+CoordSet::get_coords(Real* xyz) const
+{
+    if (_packed) {
+        for (auto v: _packed_coords)
+            *xyz++ = v;
+        return;
+    }
+    for (auto& crd: _coords) {
+        *xyz++ = crd[0];
+        *xyz++ = crd[1];
+        *xyz++ = crd[2];
+    }
+}
+
+void
+CoordSet::_unpack_coords() const
+{
+    size_t nc = _packed_coords.size() / 3;
+    _coords.clear();
+    _coords.reserve(nc);
+    const float *p = _packed_coords.data();
+    for (size_t i = 0 ; i < nc ; ++i, p += 3)
+        _coords.emplace_back(p[0], p[1], p[2]);
+    _packed_coords.clear();
+    _packed_coords.shrink_to_fit();
+    _packed = false;
 }
 
 float
@@ -130,8 +202,13 @@ CoordSet::session_save(int** ints, float** floats) const
         int_ptr++; float_ptr++;
     }
 
-    int_ptr[0] = _coords.size();
+    int_ptr[0] = num_coords();
     int_ptr++;
+    if (_packed) {
+        for (auto v: _packed_coords)
+            *float_ptr++ = v;
+        return;
+    }
     for (auto crd: _coords) {
         float_ptr[0] = crd[0];
         float_ptr[1] = crd[1];
@@ -143,6 +220,8 @@ CoordSet::session_save(int** ints, float** floats) const
 void
 CoordSet::xform(PositionMatrix mat)
 {
+    if (_packed)
+        _unpack_coords();
     size_t nc = _coords.size();
     for (size_t i = 0 ; i < nc ; ++i)
         _coords[i].xform(mat);
@@ -35,35 +35,61 @@ public:
     typedef std::vector<Coord>  Coords;
 
 private:
-    Coords  _coords;
+    // When packed, coordinates are held as single precision in _packed_coords
+    // and _coords is empty; they are widened again when first accessed through
+    // coords().  Readers of inactive coordsets should use coord(i) or
+    // get_coords(), which read packed coordinates without widening them.
+    mutable Coords  _coords;
+    mutable std::vector<float>  _packed_coords;
+    mutable bool  _packed = false;
     int  _cs_id;
     std::unordered_map<const Atom *, float>  _bfactor_map;
     std::unordered_map<const Atom *, float>  _occupancy_map;
     Structure*  _structure;
     CoordSet(Structure* as, int cs_id);
     CoordSet(Structure* as, int cs_id, int size);
+    void  _unpack_coords() const;
 
 public:
     CoordSet& operator=(const CoordSet& source) {
         if (this != &source) {
             _coords = source._coords;
+            _packed_coords = source._packed_coords;
+            _packed = source._packed;
             _bfactor_map = source._bfactor_map; _occupancy_map = source._occupancy_map;
         }
         return *this;
     }
-    void  add_coord(const Point& coord) { _coords.push_back(coord); }
+    void  add_coord(const Point& coord) { if (_packed) _unpack_coords(); _coords.push_back(coord); }
     void  add_coords(const CoordSet* coords) {
+        if (_packed) _unpack_coords();
         _coords.insert(_coords.end(), coords->coords().begin(), coords->coords().end());
     }
-    const Coords &  coords() const { return _coords; }
+    void  clear_coords() {
+        _coords.clear(); _coords.shrink_to_fit();
+        _packed_coords.clear(); _packed_coords.shrink_to_fit(); _packed = false;
+    }
+    const Coords &  coords() const { if (_packed) _unpack_coords(); return _coords; }
+    Coord  coord(size_t i) const {
+        if (!_packed) return _coords[i];
+        const float *p = &_packed_coords[3*i];
+        return Coord(p[0], p[1], p[2]);
+    }
+    void  get_coords(Real* xyz) const;
+    size_t  num_coords() const { return _packed ? _packed_coords.size() / 3 : _coords.size(); }
+    void  pack_coords();
+    bool  packed() const { return _packed; }
     void set_coords(Real* xyz, size_t n);
+    void set_coords(float* xyz, size_t n);
     virtual  ~CoordSet();
     float  get_bfactor(const Atom*) const;
     float  get_occupancy(const Atom*) const;
-    void  fill(const CoordSet* source) { _coords = source->_coords; }
+    void  fill(const CoordSet* source) {
+        _coords = source->_coords; _packed_coords = source->_packed_coords; _packed = source->_packed;
+    }
     int  id() const { return _cs_id; }
     int  session_num_floats(int /*version*/=CURRENT_SESSION_VERSION) const {
-        return _bfactor_map.size() + _occupancy_map.size() + 3 * _coords.size();
+        return _bfactor_map.size() + _occupancy_map.size() + 3 * num_coords();
     }
     int  session_num_ints(int /*version*/=CURRENT_SESSION_VERSION) const {
         return _bfactor_map.size() + _occupancy_map.size() + 3;
@@ -1292,7 +1292,7 @@ CoordSet*
 Structure::new_coord_set(int index)
 {
     if (!_coord_sets.empty())
-        return new_coord_set(index, _coord_sets.back()->coords().size());
+        return new_coord_set(index, _coord_sets.back()->num_coords());
     CoordSet* cs = new CoordSet(this, index);
     _coord_set_insert(_coord_sets, cs, index);
     return cs;
@@ -2079,7 +2079,10 @@ Structure::set_active_coord_set(CoordSet *cs)
         new_active = cs;
     }
     if (_active_coord_set != new_active) {
+        CoordSet *old_active = _active_coord_set;
         _active_coord_set = new_active;
+        if (_float32_coord_sets && old_active != nullptr)
+            old_active->pack_coords();
         pb_mgr().change_cs(new_active);
         if (active_coord_set_change_notify()) {
             set_gc_shape();
@@ -2091,6 +2094,22 @@ Structure::set_active_coord_set(CoordSet *cs)
     }
 }
 
+void
+Structure::set_float32_coord_sets(bool f32)
+{
+    if (f32 == _float32_coord_sets)
+        return;
+    _float32_coord_sets = f32;
+    for (auto cs: _coord_sets) {
+        if (cs == _active_coord_set)
+            continue;
+        if (f32)
+            cs->pack_coords();
+        else
+            cs->coords();
+    }
+}
+
 void
 Structure::set_color(const Rgba& rgba)
 {
@@ -133,6 +133,7 @@ protected:
     Bonds  _bonds;
     mutable Chains*  _chains;
     ChangeTracker*  _change_tracker;
+    bool  _float32_coord_sets = false;
     CoordSets  _coord_sets;
     bool  _display = true;
     bool  _idatm_valid;
@@ -247,6 +248,7 @@ public:
         _input_seq_info[chain_id].push_back(res_name);
     }
     CoordSet*  find_coord_set(int) const;
+    bool  float32_coord_sets() const { return _float32_coord_sets; }
     Residue*  find_residue(const ChainID& chain_id, int pos, char insert) const;
     Residue*  find_residue(const ChainID& chain_id, int pos, char insert,
         ResName& name) const;
@@ -315,6 +317,7 @@ public:
         change_tracker()->add_modified(this, this, ChangeTracker::REASON_BALL_SCALE);
     }
     void  set_color(const Rgba& rgba);
+    void  set_float32_coord_sets(bool f32);
     void  set_display(bool d) {
         if (d == _display) return;
         set_gc_shape(); _display = d;
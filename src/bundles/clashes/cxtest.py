@@ -8,3 +8,41 @@ run(session, "contacts #1 restrict both make false sel true")
 num_selected = len(selected_atoms(session))
 if num_selected != 2581:
 	raise SystemExit("Finding contacts in 1www selected %d atoms instead of 2581!" % num_selected)
+run(session, "clashes #1 restrict both make false sel true perFrame true")
+num_selected = len(selected_atoms(session))
+if num_selected != 43:
+	raise SystemExit("Finding per-frame clashes in 1www selected %d atoms instead of 43!" % num_selected)
+run(session, "close; open ../md_crds/test-data/chimera_test.pdb;"
+	" open ../md_crds/test-data/chimera_test.xtc structureModel #1 lazy true cacheFrames 3")
+s = session.models[0]
+from chimerax.clashes import find_clashes, find_frame_clashes
+from chimerax.clashes.settings import defaults
+contact_kw = dict(clash_threshold=defaults["contact_threshold"],
+	hbond_allowance=defaults["clash_hbond_allowance"])
+frame_contacts = find_frame_clashes(session, s.atoms, **contact_kw)
+if frame_contacts.neighbor_list_builds < 1:
+	raise SystemExit("Per-frame contacts in chimera_test.xtc never found candidate pairs")
+if s.active_coordset_id != 1:
+	raise SystemExit("Per-frame contacts changed the active coordset to %d" % s.active_coordset_id)
+def pair_values(clashes):
+	return {frozenset((a, b)): v for a, partners in clashes.items() for b, v in partners.items()}
+for cs_id in s.coordset_ids:
+	s.active_coordset_id = cs_id
+	expected = pair_values(find_clashes(session, s.atoms, inter_model=False, **contact_kw))
+	found = pair_values(frame_contacts.clashes(cs_id))
+	if found.keys() != expected.keys():
+		raise SystemExit("Per-frame contacts in frame %d of chimera_test.xtc differ from"
+			" single frame contacts: %d pairs instead of %d" % (cs_id, len(found), len(expected)))
+	if max([abs(v - expected[p]) for p, v in found.items()] + [0]) > 1e-4:
+		raise SystemExit("Per-frame contact values in frame %d of chimera_test.xtc differ from"
+			" single frame values" % cs_id)
+s.active_coordset_id = 1
+s.active_coordset_change_notify = False
+find_frame_clashes(session, s.atoms, coordset_ids=[1, 2], **contact_kw)
+if s.active_coordset_change_notify:
+	raise SystemExit("Per-frame contacts turned on active coordset change notification")
+s.active_coordset_change_notify = True
+frame_contacts = run(session, "contacts #1 intraModel false perFrame true make false log false")
+if len(frame_contacts.atoms1) > 0:
+	raise SystemExit("Per-frame contacts with intraModel false found %d intra-model contacts"
+		% len(frame_contacts.atoms1))
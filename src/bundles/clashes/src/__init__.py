@@ -11,7 +11,7 @@
 # or derivations thereof.
 # === UCSF ChimeraX Copyright ===
 
-from .clashes import find_clashes
+from .clashes import find_clashes, find_frame_clashes
 
 from chimerax.core.toolshed import BundleAPI
 
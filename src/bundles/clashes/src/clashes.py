@@ -12,6 +12,7 @@
 # === UCSF ChimeraX Copyright ===
 
 from .settings import defaults
+import numpy
 
 def find_clashes(session, test_atoms,
         assumed_max_vdw=2.1,
@@ -66,6 +67,195 @@ def find_clashes(session, test_atoms,
        dictionaries keyed on clashing atom with value being the clash value.
     """
 
+    test_atoms, search_atoms, use_scene_coords = _clash_atoms(session, test_atoms,
+        assumed_max_vdw, clash_threshold, distance_only, ignore_hidden_models, inter_model, restrict)
+    if len(test_atoms) == 0 or len(search_atoms) == 0:
+        return {}
+
+    finder = _PairFinder(test_atoms, search_atoms, assumed_max_vdw, bond_separation,
+        clash_threshold, distance_only, hbond_allowance, inter_model, inter_submodel,
+        intra_model, intra_res, intra_mol, res_separation)
+    query_coords = test_atoms.scene_coords if use_scene_coords else test_atoms.coords
+    tree_coords = search_atoms.scene_coords if inter_model else search_atoms.coords
+    atoms = finder.atoms
+    coords = atoms.scene_coords if use_scene_coords else atoms.coords
+    clashes = {}
+    for a, b in finder.pairs(query_coords, tree_coords):
+        a, b, clash = finder.clash_values(a, b, coords)
+        for ai, bi, c in zip(atoms[a], atoms[b], clash.tolist()):
+            clashes.setdefault(ai, {})[bi] = c
+            clashes.setdefault(bi, {})[ai] = c
+    return clashes
+
+def find_frame_clashes(session, test_atoms,
+        assumed_max_vdw=2.1,
+        bond_separation=defaults["bond_separation"],
+        clash_threshold=defaults["clash_threshold"],
+        coordset_ids=None,
+        distance_only=None,
+        hbond_allowance=defaults["clash_hbond_allowance"],
+        ignore_hidden_models=False,
+        inter_submodel=False,
+        intra_model=True,
+        intra_res=False,
+        intra_mol=True,
+        res_separation=None,
+        restrict="any",
+        skin=1.0):
+    """Detect steric clashes/contacts in each coordinate set (frame) of a structure
+
+       'test_atoms' should be an Atoms collection from a single structure.  The
+       frames examined are the given 'coordset_ids', or all coordinate sets of the
+       structure if that is None.  Other arguments are as for find_clashes(), and
+       only interactions within the structure are found.  Each frame is made the
+       active coordinate set in turn, so frames of trajectories read on demand are
+       loaded, and the original active coordinate set is restored afterward.
+
+       Candidate atom pairs within the largest clash search distance plus 'skin'
+       are found once and reused for later frames until some atom has moved more
+       than half the skin distance, so the atom exclusions and spatial search are
+       only redone when needed.
+
+       Returns a FrameClashes instance.
+    """
+    structure = test_atoms.unique_structures[0]
+    if coordset_ids is None:
+        coordset_ids = structure.coordset_ids
+    test_atoms, search_atoms, use_scene_coords = _clash_atoms(session, test_atoms,
+        assumed_max_vdw, clash_threshold, distance_only, ignore_hidden_models, False, restrict,
+        prune=False)
+    search_atoms = search_atoms.intersect(structure.atoms)
+    empty = numpy.zeros(0, numpy.int32)
+    if len(test_atoms) == 0 or len(search_atoms) == 0:
+        return FrameClashes(structure.atoms[empty], numpy.array(coordset_ids, numpy.int32),
+            empty, empty, empty, empty.astype(numpy.float32), empty.astype(numpy.float32), 0)
+    finder = _PairFinder(test_atoms, search_atoms, assumed_max_vdw, bond_separation,
+        clash_threshold, distance_only, hbond_allowance, False, inter_submodel, intra_model,
+        intra_res, intra_mol, res_separation)
+    atoms = finder.atoms
+    test_indices, search_indices = finder.test_indices, finder.search_indices
+    # Search distance of each atom pair is the larger test atom distance.
+    pair_cutoffs = numpy.full(len(atoms), -1.0)
+    pair_cutoffs[test_indices] = finder.cutoffs
+    n = len(atoms)
+
+    empty = numpy.zeros(0, numpy.int64)
+    frames, atoms1, atoms2, values, distances = [empty], [empty], [empty], [empty], [empty]
+    list_coords = None
+    builds = 0
+    # Make each frame active, as find_coordset_hbonds() does, rather than reading
+    # structure.coordset(id).xyzs, so that frames read on demand are loaded and
+    # single precision frames are not widened.
+    cur_cs_id = structure.active_coordset_id
+    cur_notify = structure.active_coordset_change_notify
+    structure.active_coordset_change_notify = False
+    try:
+        for f, cs_id in enumerate(coordset_ids):
+            structure.active_coordset_id = cs_id
+            coords = atoms.coords
+            if list_coords is None or _max_displacement(coords, list_coords) > 0.5 * skin:
+                pa, pb = [empty], [empty]
+                for a, b in finder.pairs(coords[test_indices], coords[search_indices], skin):
+                    pa.append(a)
+                    pb.append(b)
+                pa, pb = numpy.concatenate(pa), numpy.concatenate(pb)
+                # Keep each pair once, as found from either atom.
+                keys = numpy.unique(numpy.minimum(pa, pb) * n + numpy.maximum(pa, pb))
+                pa, pb = keys // n, keys % n
+                cut = numpy.maximum(pair_cutoffs[pa], pair_cutoffs[pb])
+                list_coords = coords
+                builds += 1
+            d = coords[pa] - coords[pb]
+            close = (d[:,0]*d[:,0] + d[:,1]*d[:,1] + d[:,2]*d[:,2]) <= cut * cut
+            a, b, clash = finder.clash_values(pa[close], pb[close], coords)
+            frames.append(numpy.full(len(a), f, numpy.int32))
+            atoms1.append(a)
+            atoms2.append(b)
+            values.append(clash)
+            d = coords[a] - coords[b]
+            distances.append(numpy.sqrt(d[:,0]*d[:,0] + d[:,1]*d[:,1] + d[:,2]*d[:,2]))
+    finally:
+        structure.active_coordset_id = cur_cs_id
+        structure.active_coordset_change_notify = cur_notify
+
+    return FrameClashes(atoms, numpy.array(coordset_ids, numpy.int32),
+        numpy.concatenate(frames), numpy.concatenate(atoms1).astype(numpy.int32),
+        numpy.concatenate(atoms2).astype(numpy.int32), numpy.concatenate(values).astype(numpy.float32),
+        numpy.concatenate(distances).astype(numpy.float32), builds)
+
+def _max_displacement(coords, list_coords):
+    d = coords - list_coords
+    return numpy.sqrt((d[:,0]*d[:,0] + d[:,1]*d[:,1] + d[:,2]*d[:,2]).max()) if len(d) else 0.0
+
+class FrameClashes:
+    """Clashes/contacts found in each frame by find_frame_clashes().
+
+       Pairs are stored as parallel arrays: 'frames' (index into 'coordset_ids'),
+       'atoms1' and 'atoms2' (indices into 'atoms'), 'values' (clash values) and
+       'distances'.  'neighbor_list_builds' is the number of frames for which the
+       candidate atom pairs had to be found again.
+    """
+
+    def __init__(self, atoms, coordset_ids, frames, atoms1, atoms2, values, distances,
+            neighbor_list_builds):
+        self.atoms = atoms
+        self.coordset_ids = coordset_ids
+        self.frames = frames
+        self.atoms1 = atoms1
+        self.atoms2 = atoms2
+        self.values = values
+        self.distances = distances
+        self.neighbor_list_builds = neighbor_list_builds
+
+    def __len__(self):
+        return len(self.frames)
+
+    def frame_counts(self):
+        """Number of clashes in each frame"""
+        return numpy.bincount(self.frames, minlength=len(self.coordset_ids))
+
+    def clashes(self, coordset_id):
+        """Clashes for one frame as a dictionary like that returned by find_clashes()"""
+        f = numpy.nonzero(self.coordset_ids == coordset_id)[0]
+        clashes = {}
+        if len(f) == 0:
+            return clashes
+        sel = (self.frames == f[0])
+        atoms = self.atoms
+        for a, b, c in zip(atoms[self.atoms1[sel]], atoms[self.atoms2[sel]],
+                self.values[sel].tolist()):
+            clashes.setdefault(a, {})[b] = c
+            clashes.setdefault(b, {})[a] = c
+        return clashes
+
+    def save(self, file_name, naming_style=None):
+        """Save the pair table.  A file name ending in .npz is saved as NumPy arrays
+           with atom names, otherwise as a text table with one line per pair."""
+        names = [a.string(style=naming_style) for a in self.atoms]
+        if str(file_name).endswith('.npz'):
+            numpy.savez_compressed(file_name, coordset_ids=self.coordset_ids,
+                frames=self.frames, atoms1=self.atoms1, atoms2=self.atoms2, values=self.values,
+                distances=self.distances, atom_names=numpy.array(names))
+            return
+        from chimerax.io import open_output
+        out_file = open_output(file_name, 'utf-8')
+        print("%d pairs in %d frames" % (len(self), len(self.coordset_ids)), file=out_file)
+        field_width1 = max([len(names[i]) for i in numpy.unique(self.atoms1)] + [5])
+        field_width2 = max([len(names[i]) for i in numpy.unique(self.atoms2)] + [5])
+        print(f"{'frame':>8}  {'atom1':^{field_width1}}  {'atom2':^{field_width2}}  overlap  distance",
+            file=out_file)
+        for f, a1, a2, v, d in zip(self.coordset_ids[self.frames].tolist(), self.atoms1.tolist(),
+                self.atoms2.tolist(), self.values.tolist(), self.distances.tolist()):
+            print("%8d  %*s  %*s   %5.3f    %5.3f" % (f, 0-field_width1, names[a1],
+                0-field_width2, names[a2], v, d), file=out_file)
+        if file_name != out_file:
+            out_file.close()
+
+def _clash_atoms(session, test_atoms, assumed_max_vdw, clash_threshold, distance_only,
+        ignore_hidden_models, inter_model, restrict, prune=True):
+    """Return test atoms, atoms to search for interactions, and whether to use scene
+       coordinates.  With 'prune' false the 'cross' atoms are not reduced to those
+       currently near the test atoms."""
     from chimerax.atomic import Structure
     use_scene_coords = inter_model and len(
         [m for m in session.models if isinstance(m, Structure)]) > 1
@@ -87,20 +277,23 @@ def find_clashes(session, test_atoms,
             from chimerax.atomic import structure_atoms
             universe_atoms = structure_atoms(test_atoms.unique_structures)
         other_atoms = universe_atoms.subtract(test_atoms)
-        if distance_only:
-            cutoff = distance_only
-        else:
-            cutoff = 2.0 * assumed_max_vdw - clash_threshold
-        if use_scene_coords:
-            test_coords = test_atoms.scene_coords
-            other_coords = other_atoms.scene_coords
+        if prune:
+            if distance_only:
+                cutoff = distance_only
+            else:
+                cutoff = 2.0 * assumed_max_vdw - clash_threshold
+            if use_scene_coords:
+                test_coords = test_atoms.scene_coords
+                other_coords = other_atoms.scene_coords
+            else:
+                test_coords = test_atoms.coords
+                other_coords = other_atoms.coords
+            from chimerax.geometry import find_close_points
+            t_close, o_close = find_close_points(test_coords, other_coords, cutoff)
+            test_atoms = test_atoms[t_close]
+            search_atoms = other_atoms[o_close]
         else:
-            test_coords = test_atoms.coords
-            other_coords = other_atoms.coords
-        from chimerax.geometry import find_close_points
-        t_close, o_close = find_close_points(test_coords, other_coords, cutoff)
-        test_atoms = test_atoms[t_close]
-        search_atoms = other_atoms[o_close]
+            search_atoms = other_atoms
     elif not isinstance(restrict, str):
         search_atoms = restrict
     else:
@@ -108,96 +301,228 @@ def find_clashes(session, test_atoms,
     if ignore_hidden_models:
         test_atoms = test_atoms.filter(test_atoms.structures.visibles == True)
         search_atoms = search_atoms.filter(search_atoms.structures.visibles == True)
+    return test_atoms, search_atoms, use_scene_coords
 
-    if res_separation is not None:
-        chain_pos = {}
-        for s in test_atoms.unique_structures:
-            for c in s.chains:
-                for i, r in enumerate(c.residues):
-                    if r:
-                        chain_pos[r] = i
-    from chimerax.atom_search import AtomSearchTree
-    tree = AtomSearchTree(search_atoms, scene_coords=inter_model)
-    clashes = {}
-    from chimerax.geometry import distance
-    intra_mol_map = {}
-    for a in test_atoms:
+class _PairFinder:
+    """Find interacting atom pairs as index arrays into all atoms of the structures
+       involved.  Candidate pairs come from one spatial search per block of test atoms
+       and are filtered with array operations."""
+
+    block_size = 50000  # Test atoms per block, limits memory use.
+
+    def __init__(self, test_atoms, search_atoms, assumed_max_vdw, bond_separation,
+            clash_threshold, distance_only, hbond_allowance, inter_model, inter_submodel,
+            intra_model, intra_res, intra_mol, res_separation):
+        structures = list(dict.fromkeys(list(test_atoms.unique_structures)
+            + list(search_atoms.unique_structures)))
+        from chimerax.atomic import structure_atoms
+        self.atoms = atoms = structure_atoms(structures)
+        self.test_indices = atoms.indices(test_atoms)
+        self.search_indices = atoms.indices(search_atoms)
+        self.info = _AtomInfo(atoms, structures, test_atoms, intra_mol, res_separation,
+            inter_submodel)
         if distance_only:
-            cutoff = distance_only
+            self.cutoffs = numpy.full(len(test_atoms), distance_only, numpy.float64)
         else:
-            cutoff = a.radius + assumed_max_vdw - clash_threshold
-        crd = a.scene_coord if use_scene_coords else a.coord
-        nearby = tree.search(crd, cutoff)
-        if not nearby:
-            continue
-        need_expansion = [a]
-        exclusions = set(need_expansion)
-        for i in range(bond_separation):
-            next_need = []
-            for expand in need_expansion:
-                for n in expand.neighbors:
-                    if n in exclusions:
-                        continue
-                    exclusions.add(n)
-                    next_need.append(n)
-            need_expansion = next_need
-        if not intra_mol and a not in intra_mol_map:
-            connected = set([a])
-            to_do = list(a.neighbors)
-            while to_do:
-                conn = to_do.pop()
-                connected.add(conn)
-                for nb in conn.neighbors:
-                    if nb not in connected:
-                        to_do.append(nb)
-            for ca in connected:
-                intra_mol_map[ca] = connected
-        for nb in nearby:
-            if nb in exclusions:
-                continue
-            if not intra_res and a.residue == nb.residue:
-                continue
-            if not intra_mol and nb in intra_mol_map[a]:
-                continue
-            if not inter_model and a.structure != nb.structure:
-                continue
-            if not intra_model and a.structure == nb.structure:
-                continue
-            if a in clashes and nb in clashes[a]:
-                continue
-            if res_separation is not None:
-                if a.residue.chain is not None and a.residue.chain == nb.residue.chain:
-                    if abs(chain_pos[a.residue] - chain_pos[nb.residue]) < res_separation:
-                        continue
-            if not inter_submodel \
-            and a.structure.id and nb.structure.id \
-            and a.structure.id[0] == nb.structure.id[0] \
-            and a.structure.id[:-1] == nb.structure.id[:-1] \
-            and a.structure.id[1:] != nb.structure.id[1:]:
-                continue
-            if use_scene_coords:
-                a_crd, nb_crd = a.scene_coord, nb.scene_coord
-            else:
-                a_crd, nb_crd = a.coord, nb.coord
-            if distance_only:
-                clash = distance_only - distance(a_crd, nb_crd)
-            else:
-                clash = a.radius + nb.radius - distance(a_crd, nb_crd)
-            if hbond_allowance and not distance_only:
-                if (_donor(a) and _acceptor(nb)) or (_donor(nb) and _acceptor(a)):
-                    clash -= hbond_allowance
-            if distance_only:
-                if clash < 0.0:
-                    continue
-            elif clash < clash_threshold:
-                continue
-            clashes.setdefault(a, {})[nb] = clash
-            clashes.setdefault(nb, {})[a] = clash
-    return clashes
+            self.cutoffs = test_atoms.radii.astype(numpy.float64) + assumed_max_vdw - clash_threshold
+        self.radii = atoms.radii.astype(numpy.float64)
+        self.bond_separation = bond_separation
+        self.clash_threshold = clash_threshold
+        self.distance_only = distance_only
+        self.hbond_allowance = hbond_allowance
+        self.inter_model = inter_model
+        self.inter_submodel = inter_submodel
+        self.intra_model = intra_model
+        self.intra_res = intra_res
+        self.intra_mol = intra_mol
+        self.res_separation = res_separation
+
+    def pairs(self, query_coords, tree_coords, skin=0.0):
+        """Yield arrays of (test atom, search atom) indices for pairs within each
+           test atom's search distance plus 'skin' that pass the atom filters."""
+        if len(self.test_indices) == 0 or len(self.search_indices) == 0:
+            return
+        info = self.info
+        cutoffs = self.cutoffs + skin
+        from chimerax.geometry import PointGrid
+        grid = PointGrid(tree_coords, cutoffs.max())
+        for start in range(0, len(self.test_indices), self.block_size):
+            block = slice(start, start + self.block_size)
+            qi, si = grid.close_pairs(query_coords[block], cutoffs[block])
+            a = self.test_indices[block][qi]
+            b = self.search_indices[si]
+            keep = (a != b)
+            if not self.intra_res:
+                keep &= info.residue[a] != info.residue[b]
+            if not self.intra_mol:
+                keep &= info.fragment[a] != info.fragment[b]
+            if not self.inter_model:
+                keep &= info.structure[a] == info.structure[b]
+            if not self.intra_model:
+                keep &= info.structure[a] != info.structure[b]
+            if self.res_separation is not None:
+                same_chain = (info.chain[a] >= 0) & (info.chain[a] == info.chain[b])
+                keep &= ~(same_chain
+                    & (abs(info.chain_pos[a] - info.chain_pos[b]) < self.res_separation))
+            if not self.inter_submodel:
+                keep &= ~info.sibling_submodels[info.structure[a], info.structure[b]]
+            a, b = a[keep], b[keep]
+            if self.bond_separation > 0 and len(a) > 0:
+                keep = ~info.bond_separated(a, b, self.bond_separation)
+                a, b = a[keep], b[keep]
+            yield a, b
+
+    def clash_values(self, a, b, coords):
+        """Return the atom pairs that clash/contact and their clash values."""
+        d = coords[a] - coords[b]
+        dist = numpy.sqrt(d[:,0]*d[:,0] + d[:,1]*d[:,1] + d[:,2]*d[:,2])
+        if self.distance_only:
+            clash = self.distance_only - dist
+            keep = clash >= 0.0
+        else:
+            clash = self.radii[a] + self.radii[b] - dist
+            if self.hbond_allowance:
+                donor, acceptor = self.info.donors_acceptors(numpy.concatenate((a, b)))
+                hbond = (donor[a] & acceptor[b]) | (donor[b] & acceptor[a])
+                clash[hbond] -= self.hbond_allowance
+            keep = clash >= self.clash_threshold
+        return a[keep], b[keep], clash[keep]
+
+class _AtomInfo:
+    """Per-atom integer labels and bond graph used to filter candidate atom pairs."""
+
+    def __init__(self, atoms, structures, test_atoms, intra_mol, res_separation, inter_submodel):
+        self.atoms = atoms
+        n = len(atoms)
+        self.structure = numpy.repeat(numpy.arange(len(structures)),
+            [s.num_atoms for s in structures])
+        first_atoms, self.residue = numpy.unique(atoms.residues.pointers, return_index=True,
+            return_inverse=True)[1:]
+
+        # Bond graph as compressed neighbor lists.
+        a1, a2 = atoms.intra_bonds.atoms
+        b1, b2 = atoms.indices(a1), atoms.indices(a2)
+        self.bond_atoms = b1, b2
+        ends = numpy.concatenate((b1, b2))
+        nbrs = numpy.concatenate((b2, b1))
+        order = numpy.argsort(ends, kind='stable')
+        self.neighbors = nbrs[order]
+        self.neighbor_start = numpy.zeros(n+1, numpy.int64)
+        numpy.cumsum(numpy.bincount(ends, minlength=n), out=self.neighbor_start[1:])
+
+        if not intra_mol:
+            self.fragment = fragment = numpy.empty(n, numpy.int64)
+            offset = 0
+            for s in structures:
+                for group in s.bonded_groups(consider_missing_structure=False):
+                    fragment[atoms.indices(group)] = offset
+                    offset += 1
+
+        if res_separation is not None:
+            # Chain number and sequence position of each atom, chain -1 if not in a chain.
+            res_chain = numpy.full(len(first_atoms), -1, numpy.int64)
+            res_pos = numpy.zeros(len(first_atoms), numpy.int64)
+            residue_index = dict(zip(atoms[first_atoms].residues, range(len(first_atoms))))
+            chain_num = 0
+            for s in test_atoms.unique_structures:
+                for c in s.chains:
+                    for i, r in enumerate(c.residues):
+                        ri = residue_index.get(r) if r else None
+                        if ri is not None:
+                            res_chain[ri] = chain_num
+                            res_pos[ri] = i
+                    chain_num += 1
+            self.chain = res_chain[self.residue]
+            self.chain_pos = res_pos[self.residue]
+
+        if not inter_submodel:
+            ns = len(structures)
+            self.sibling_submodels = sib = numpy.zeros((ns, ns), bool)
+            for i, s1 in enumerate(structures):
+                for j, s2 in enumerate(structures):
+                    if s1.id and s2.id and s1.id[0] == s2.id[0] and s1.id[:-1] == s2.id[:-1] \
+                    and s1.id[1:] != s2.id[1:]:
+                        sib[i,j] = True
+        self._donor_acceptor = None
+
+    def bond_separated(self, a, b, max_bonds):
+        """Return mask of atom pairs that are separated by at most max_bonds bonds."""
+        n = len(self.atoms)
+        sources = numpy.unique(a)
+        reached = sources * n + sources
+        src, atm = sources, sources
+        start, nbrs = self.neighbor_start, self.neighbors
+        for i in range(max_bonds):
+            counts = start[atm+1] - start[atm]
+            total = counts.sum()
+            if total == 0:
+                break
+            offsets = numpy.arange(total) - numpy.repeat(numpy.cumsum(counts) - counts, counts)
+            nsrc = numpy.repeat(src, counts)
+            natm = nbrs[numpy.repeat(start[atm], counts) + offsets]
+            new = numpy.setdiff1d(nsrc * n + natm, reached)
+            reached = numpy.union1d(reached, new)
+            src, atm = new // n, new % n
+        return numpy.isin(a * n + b, reached)
+
+    def donors_acceptors(self, indices):
+        """Return boolean arrays over all atoms flagging H-bond donors and acceptors.
+           Only the listed atom indices are assigned."""
+        if self._donor_acceptor is None:
+            n = len(self.atoms)
+            self._donor_acceptor = (numpy.zeros(n, bool), numpy.zeros(n, bool),
+                numpy.zeros(n, bool))
+        donor, acceptor, assigned = self._donor_acceptor
+        indices = numpy.unique(indices)
+        indices = indices[~assigned[indices]]
+        if len(indices) > 0:
+            atoms = self.atoms
+            elements = atoms.element_numbers
+            b1, b2 = self.bond_atoms
+            if not hasattr(self, '_h_neighbor'):
+                h = (elements == 1)
+                self._h_neighbor = hn = numpy.zeros(len(atoms), bool)
+                hn[b1[h[b2]]] = True
+                hn[b2[h[b1]]] = True
+                self._nos_neighbor = nn = numpy.zeros(len(atoms), bool)
+                nos = numpy.isin(elements, _negative_element_numbers)
+                nn[b1[nos[b2]]] = True
+                nn[b2[nos[b1]]] = True
+            sub = atoms[indices]
+            types = sub.idatm_types
+            num_bonds = sub.num_bonds
+            substituents, acc = _idatm_donor_acceptor_info(types)
+            e = elements[indices]
+            heavy = numpy.isin(e, _negative_element_numbers)
+            d = heavy & ((num_bonds < substituents) | self._h_neighbor[indices])
+            hyd = (e == 1)
+            single = hyd & (num_bonds == 1)
+            d[single] = self._nos_neighbor[indices[single]]
+            for i in numpy.nonzero(hyd & (num_bonds > 1))[0]:
+                # First neighbor decides; rare so use the per-atom test.
+                d[i] = _donor(sub[i])
+            donor[indices] = d
+            acceptor[indices] = acc
+            assigned[indices] = True
+        return donor, acceptor
+
+def _idatm_donor_acceptor_info(types):
+    """Number of substituents (-1 if not known) and acceptor flag for IDATM type names."""
+    utypes, inverse = numpy.unique(types, return_inverse=True)
+    subs = numpy.empty(len(utypes), numpy.int64)
+    acc = numpy.empty(len(utypes), bool)
+    for i, t in enumerate(utypes):
+        info = type_info.get(t)
+        if info is None:
+            subs[i], acc[i] = -1, False
+        else:
+            subs[i], acc[i] = info.substituents, info.substituents < info.geometry
+    return subs[inverse], acc[inverse]
 
 from chimerax.atomic import Element
 hyd = Element.get_element(1)
 negative = set([Element.get_element(sym) for sym in ["N", "O", "S"]])
+_negative_element_numbers = [e.number for e in negative]
 from chimerax.atomic.idatm import type_info
 def _donor(a):
     if a.element == hyd:
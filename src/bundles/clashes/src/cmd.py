@@ -71,6 +71,7 @@ def _cmd(session, test_atoms, name, hbond_allowance, overlap_cutoff, test_type,
         log=defaults["action_log"],
         make_pseudobonds=defaults["action_pseudobonds"],
         naming_style=None,
+        per_frame=False,
         res_separation=None,
         restrict="any",
         reveal=False,
@@ -121,12 +122,36 @@ def _cmd(session, test_atoms, name, hbond_allowance, overlap_cutoff, test_type,
     elif getattr(session, _continuous_attr, None) != None:
         get_triggers().remove_handler(getattr(session, _continuous_attr))
         delattr(session, _continuous_attr)
-    from .clashes import find_clashes
-    clashes = find_clashes(session, test_atoms, attr_name=attr_name, bond_separation=bond_separation,
-        clash_threshold=overlap_cutoff, distance_only=distance_only, hbond_allowance=hbond_allowance,
-        ignore_hidden_models=ignore_hidden_models, inter_model=inter_model, inter_submodel=inter_submodel,
-        intra_model=intra_model, intra_res=intra_res, intra_mol=intra_mol, res_separation=res_separation,
-        restrict=restrict)
+    if per_frame:
+        if continuous:
+            raise UserError("perFrame not allowed with continuous detection")
+        structures = test_atoms.unique_structures
+        if len(structures) > 1:
+            raise UserError("perFrame requires atoms from a single structure")
+        if inter_model:
+            # Other structures have no frames to pair with, so rather than silently
+            # leave out their interactions require that they are not considered.
+            from chimerax.atomic import Structure
+            others = [m for m in session.models if isinstance(m, Structure)
+                and m is not structures[0] and (m.visible or not ignore_hidden_models)]
+            if others:
+                raise UserError("perFrame only finds interactions within one structure;"
+                    " use interModel false or close the other structures")
+        from .clashes import find_frame_clashes
+        frame_clashes = find_frame_clashes(session, test_atoms, bond_separation=bond_separation,
+            clash_threshold=overlap_cutoff, distance_only=distance_only,
+            hbond_allowance=hbond_allowance, ignore_hidden_models=ignore_hidden_models,
+            inter_submodel=inter_submodel, intra_model=intra_model, intra_res=intra_res,
+            intra_mol=intra_mol, res_separation=res_separation, restrict=restrict)
+        # Selection, attributes and pseudobonds show the current frame.
+        clashes = frame_clashes.clashes(structures[0].active_coordset_id)
+    else:
+        from .clashes import find_clashes
+        clashes = find_clashes(session, test_atoms, attr_name=attr_name, bond_separation=bond_separation,
+            clash_threshold=overlap_cutoff, distance_only=distance_only, hbond_allowance=hbond_allowance,
+            ignore_hidden_models=ignore_hidden_models, inter_model=inter_model,
+            inter_submodel=inter_submodel, intra_model=intra_model, intra_res=intra_res,
+            intra_mol=intra_mol, res_separation=res_separation, restrict=restrict)
     if select:
         session.selection.clear()
         for a in clashes.keys():
@@ -147,8 +172,15 @@ def _cmd(session, test_atoms, name, hbond_allowance, overlap_cutoff, test_type,
         buffer.write("</pre>")
         session.logger.info(buffer.getvalue(), is_html=True)
     if save_file is not None:
-        _file_output(save_file, info, naming_style)
-    if summary:
+        if per_frame:
+            frame_clashes.save(save_file, naming_style)
+        else:
+            _file_output(save_file, info, naming_style)
+    if summary and per_frame:
+        counts = frame_clashes.frame_counts()
+        session.logger.status("%d %s in %d frames (%d to %d per frame)" % (len(frame_clashes),
+            test_type, len(counts), counts.min(initial=0), counts.max(initial=0)), log=True)
+    elif summary:
         if clashes:
             total = 0
             for clash_list in clashes.values():
@@ -158,7 +190,7 @@ def _cmd(session, test_atoms, name, hbond_allowance, overlap_cutoff, test_type,
             session.logger.status("No %s" % test_type, log=not ongoing)
     if not (set_attrs or make_pseudobonds or reveal):
         _xcmd(session, name)
-        return clashes
+        return frame_clashes if per_frame else clashes
     from chimerax.atomic import all_atoms
     if restrict == "both":
         attr_atoms = test_atoms
@@ -225,7 +257,7 @@ def _cmd(session, test_atoms, name, hbond_allowance, overlap_cutoff, test_type,
             session.models.add([pbg])
     else:
         _xcmd(session, name)
-    return clashes
+    return frame_clashes if per_frame else clashes
 
 def _file_output(file_name, info, naming_style):
     overlap_cutoff, hbond_allowance, bond_separation, intra_res, intra_mol, \
@@ -306,7 +338,7 @@ def register_command(command_name, logger):
                 ('inter_submodel', BoolArg), ('intra_model', BoolArg), ('intra_mol', BoolArg),
                 ('intra_res', BoolArg), ('log', BoolArg), ('make_pseudobonds', BoolArg),
                 ('naming_style', EnumOf(('simple', 'command', 'serial'))), ('color', Or(NoneArg,ColorArg)),
-                ('radius', FloatArg), ('res_separation', PositiveIntArg),
+                ('per_frame', BoolArg), ('radius', FloatArg), ('res_separation', PositiveIntArg),
                 ('restrict', Or(EnumOf(('cross', 'both', 'any')), AtomsArg)), ('reveal', BoolArg),
                 ('save_file', SaveFileNameArg), ('set_attrs', BoolArg), ('select', BoolArg),
                 ('show_dist', BoolArg), ('dashes', NonNegativeIntArg), ('summary', BoolArg)], }
@@ -92,10 +92,6 @@ class _SessionAPI(BundleAPI):
                             'version': IntArg,
                         }
 
-                    @property
-                    def hidden_args(self):
-                        return ['version']
-
                     def save_args_widget(self, session):
                         from .gui import SaveOptionsWidget
                         return SaveOptionsWidget(session)
@@ -32,6 +32,7 @@ from .bounds import copies_bounding_box, copy_tree_bounds, clip_bounds
 from ._geometry import natural_cubic_spline
 from ._geometry import sphere_axes_bounds, spheres_in_bounds, bounds_overlap
 from ._geometry import find_close_points, find_closest_points, find_close_points_sets
+from .closepairs import find_close_point_pairs, PointGrid
 from ._geometry import closest_sphere_intercept, closest_cylinder_intercept, closest_triangle_intercept
 from ._geometry import segment_intercepts_spheres, points_within_planes
 from ._geometry import cylinder_rotations, half_cylinder_rotations, cylinder_rotations_x3d
@@ -0,0 +1,89 @@
+# vim: set expandtab shiftwidth=4 softtabstop=4:
+
+# === UCSF ChimeraX Copyright ===
+# Copyright 2016 Regents of the University of California.
+# All rights reserved.  This software provided pursuant to a
+# license agreement containing restrictions on its disclosure,
+# duplication and use.  For details see:
+# http://www.rbvi.ucsf.edu/chimerax/docs/licensing.html
+# This notice must be embedded in or attached to all copies,
+# including partial copies, of the software or any revisions
+# or derivations thereof.
+# === UCSF ChimeraX Copyright ===
+
+import numpy
+
+# -----------------------------------------------------------------------------
+# Find all pairs of close points using array operations.
+#
+class PointGrid:
+    """Points binned into cubic cells no smaller than the largest search distance
+       so that all points within that distance of a query point are in the 27
+       cells surrounding the query point's cell.  Can be queried repeatedly, for
+       instance with blocks of query points to limit memory use."""
+
+    def __init__(self, points, max_distance):
+        self.points = points = numpy.asarray(points, numpy.float64).reshape((-1,3))
+        self.cell_size = max(max_distance, 1.0)
+        self.origin = points.min(axis=0) if len(points) else numpy.zeros(3)
+        cells = self._cells(points)
+        self.dims = cells.max(axis=0) + 3 if len(points) else numpy.ones(3, numpy.int64)
+        keys = self._keys(cells)
+        self.order = numpy.argsort(keys, kind='stable')
+        self.sorted_keys = keys[self.order]
+
+    def _cells(self, points):
+        return numpy.floor((points - self.origin) / self.cell_size).astype(numpy.int64) + 1
+
+    def _keys(self, cells):
+        ny, nz = self.dims[1:]
+        return (cells[:,0] * ny + cells[:,1]) * nz + cells[:,2]
+
+    def close_pairs(self, query_points, distances):
+        """Return index arrays (query point, grid point) for pairs within the
+           query point's distance, inclusive.  'distances' is a single value or
+           an array with a distance for each query point."""
+        q = numpy.asarray(query_points, numpy.float64).reshape((-1,3))
+        distances = numpy.broadcast_to(numpy.asarray(distances, numpy.float64), (len(q),))
+        cells = self._cells(q)
+        # Query points outside the grid have no close grid points.
+        inside = numpy.all((cells >= 0) & (cells < self.dims), axis=1)
+        qi_all, pi_all = [], []
+        skeys = self.sorted_keys
+        for offset in _neighbor_offsets:
+            nc = cells + offset
+            ok = inside & numpy.all((nc >= 0) & (nc < self.dims), axis=1)
+            qi = numpy.nonzero(ok)[0]
+            keys = self._keys(nc[qi])
+            starts = numpy.searchsorted(skeys, keys, 'left')
+            counts = numpy.searchsorted(skeys, keys, 'right') - starts
+            total = counts.sum()
+            if total == 0:
+                continue
+            qi = numpy.repeat(qi, counts)
+            offsets = numpy.arange(total) - numpy.repeat(numpy.cumsum(counts) - counts, counts)
+            pi = self.order[numpy.repeat(starts, counts) + offsets]
+            d = q[qi] - self.points[pi]
+            d2 = d[:,0]*d[:,0] + d[:,1]*d[:,1] + d[:,2]*d[:,2]
+            close = d2 <= distances[qi] * distances[qi]
+            qi_all.append(qi[close])
+            pi_all.append(pi[close])
+        if not qi_all:
+            empty = numpy.zeros(0, numpy.int64)
+            return empty, empty
+        return numpy.concatenate(qi_all), numpy.concatenate(pi_all)
+
+_neighbor_offsets = numpy.array([(i,j,k) for i in (-1,0,1) for j in (-1,0,1) for k in (-1,0,1)],
+    numpy.int64)
+
+# -----------------------------------------------------------------------------
+#
+def find_close_point_pairs(points1, points2, distance):
+    """Return index arrays (i1, i2) for all pairs of points1 and points2 within
+       the given distance, inclusive.  The distance is a single value or an array
+       with a distance for each of points1.  Pairs are in no particular order."""
+    if len(points1) == 0 or len(points2) == 0:
+        empty = numpy.zeros(0, numpy.int64)
+        return empty, empty
+    grid = PointGrid(points2, numpy.max(distance))
+    return grid.close_pairs(points1, distance)
@@ -5,3 +5,21 @@ hbonds = find_hbonds(session, session.models[:1],
 	dist_slop=rec_dist_slop, angle_slop=rec_angle_slop)
 if len(hbonds) != 793:
 	raise SystemExit("Expected to find 793 hbonds in 2gbp; actually found %d" % len(hbonds))
+from chimerax.hbonds import find_coordset_hbonds
+run(session, "close; open ../md_crds/test-data/chimera_test.pdb;"
+	" open ../md_crds/test-data/chimera_test.xtc structureModel #1 lazy true cacheFrames 3")
+s = session.models[0]
+if s.num_coordsets < 2:
+	raise SystemExit("Expected a multi-frame trajectory; found %d coordsets" % s.num_coordsets)
+cs_hbonds = find_coordset_hbonds(session, s, dist_slop=rec_dist_slop, angle_slop=rec_angle_slop)
+if s.active_coordset_id != 1:
+	raise SystemExit("Per-coordset H-bonds changed the active coordset to %d" % s.active_coordset_id)
+if len(cs_hbonds) != s.num_coordsets:
+	raise SystemExit("Expected H-bonds for %d coordsets; got %d" % (s.num_coordsets, len(cs_hbonds)))
+for cs_id, hbs in zip(s.coordset_ids, cs_hbonds):
+	s.active_coordset_id = cs_id
+	frame_hbonds = find_hbonds(session, [s], dist_slop=rec_dist_slop, angle_slop=rec_angle_slop)
+	if set(hbs) != set(frame_hbonds):
+		raise SystemExit("Coordset %d: find_coordset_hbonds found %d H-bonds, find_hbonds found %d"
+			" (%d in common)" % (cs_id, len(hbs), len(frame_hbonds), len(set(hbs) & set(frame_hbonds))))
+s.active_coordset_id = 1
@@ -6,7 +6,8 @@ from chimerax.geometry import look_at, angle, distance_squared, distance
 from chimerax.atomic.bond_geom import bond_positions
 from chimerax.atomic.idatm import tetrahedral
 from . import hbond
-from .common_geom import test_phi, test_theta, sulphur_compensate, get_phi_plane_params, test_tau
+from .common_geom import test_phi, test_theta, sulphur_compensate, get_phi_plane_params, test_tau, \
+        get_phi_plane_atoms, SULFUR_COMP
 from math import sqrt
 
 def acc_syn_anti(donor, donor_hyds, acceptor, syn_atom, plane_atom, syn_r2, syn_phi,
@@ -161,3 +162,195 @@ def acc_generic(donor, donor_hyds, acceptor, r2, min_angle):
     if hbond.verbose:
         print("angle(s) okay (all > %g)" % min_angle)
     return True
+
+class AcceptorPairTests:
+    """Array version of the acceptor tests above, for many donor/acceptor pairs at once.
+
+       Acceptors tested with acc_syn_anti, acc_phi_psi, acc_generic, or acc_theta_tau with an
+       upsilon partner and no tau criterion are evaluated with NumPy.  Pairs with any other
+       acceptor are left undecided, and the caller has to use the acceptor's own test function.
+    """
+    UNDECIDED, PHI_PSI, THETA_TAU, GENERIC = range(4)
+
+    def __init__(self, acc_data):
+        import numpy
+        from chimerax.atomic import Atoms
+        n = self.size = len(acc_data)
+        ref_atoms = []
+        ref_indices = {}
+        def ref(a):
+            try:
+                return ref_indices[a]
+            except KeyError:
+                ref_indices[a] = ri = len(ref_atoms)
+                ref_atoms.append(a)
+                return ri
+        self.kind = kind = numpy.zeros(n, numpy.int8)
+        self.acc = acc = numpy.empty(n, numpy.int32)
+        # acc_phi_psi is tested as acc_syn_anti with identical syn and anti parameters;
+        # column 0 of r2/phi/theta holds the syn parameters and column 1 the anti ones
+        self.side = side = numpy.empty((n, 2), numpy.int32)
+        self.plane = plane = numpy.empty((n, 3), numpy.int32)
+        self.base = base = numpy.empty((n, 2), numpy.int32)
+        self.has_plane = has_plane = numpy.zeros(n, bool)
+        self.r2 = r2 = numpy.zeros((n, 2))
+        self.phi = phi = numpy.zeros((n, 2))
+        self.theta = theta = numpy.zeros((n, 2))
+        self.upsilon = upsilon = numpy.zeros((n, 2))
+        self.min_angle = min_angle = numpy.zeros(n)
+        self.nb_start = nb_start = numpy.zeros(n, numpy.int32)
+        self.nb_count = nb_count = numpy.zeros(n, numpy.int32)
+        nb = []
+        for i, (acc_atom, geom_func, args) in enumerate(acc_data):
+            ai = acc[i] = ref(acc_atom)
+            side[i] = plane[i] = ai
+            base[i] = ai
+            if geom_func == acc_syn_anti:
+                syn_atom, plane_atom = args[1:3]
+                kind[i] = self.PHI_PSI
+                side[i] = (ref(syn_atom), ref(plane_atom))
+                plane[i] = (ai, ref(plane_atom), ref(syn_atom))
+                base[i] = ref(plane_atom)
+                has_plane[i] = True
+                r2[i], phi[i], theta[i] = zip(args[3:6], args[6:9])
+            elif geom_func == acc_phi_psi:
+                bonded1, bonded2 = args[1:3]
+                if not bonded1:
+                    # water
+                    bonded = acc_atom.neighbors
+                    if len(bonded) > 0:
+                        bonded1 = bonded[0]
+                        if len(bonded) > 1:
+                            bonded2 = bonded[1]
+                try:
+                    plane_atoms, base_atoms = get_phi_plane_atoms(acc_atom, bonded1, bonded2)
+                except ValueError:
+                    # leave the connectivity problem for acc_phi_psi to report
+                    continue
+                kind[i] = self.PHI_PSI
+                if base_atoms is not None and plane_atoms is not None:
+                    plane[i] = [ref(a) for a in plane_atoms]
+                    base[i] = (ref(base_atoms[0]), ref(base_atoms[-1]))
+                    has_plane[i] = True
+                r2[i], phi[i], theta[i] = args[3:6]
+            elif geom_func == acc_theta_tau and args[1]:
+                kind[i] = self.THETA_TAU
+                side[i, 0] = ref(args[1])
+                r2[i] = args[2]
+                upsilon[i] = args[3:5]
+                theta[i] = args[5]
+            elif geom_func == acc_generic:
+                kind[i] = self.GENERIC
+                r2[i] = args[1]
+                min_angle[i] = args[2]
+                nb_start[i] = len(nb)
+                for bonded in acc_atom.neighbors:
+                    nb.append(ref(bonded))
+                nb_count[i] = len(nb) - nb_start[i]
+        self.nb = numpy.array(nb, numpy.int32)
+        self.ref_atoms = Atoms(ref_atoms)
+
+    def set_coords(self, coords):
+        """Set the coordinates of ref_atoms and compute per-acceptor geometry"""
+        import numpy
+        self._coords = c = coords
+        ap = c[self.acc]
+        # 'y' axis of look_at(ap, plane_pos, syn_pos - plane_pos); its sign decides syn vs. anti
+        pp = c[self.side[:,1]]
+        diff = _normalized(pp - ap)
+        y = _normalized(numpy.cross(diff, _normalized(numpy.cross(c[self.side[:,0]] - pp, diff))))
+        self._y = y
+        self._y_shift = -(y * ap).sum(axis=1)
+        # phi plane normals, as normalize_vector() computes them, and projections into the plane
+        p0, p1, p2 = [c[self.plane[:,i]] for i in range(3)]
+        normal = numpy.cross(p1 - p0, p2 - p1)
+        lengths = numpy.sqrt((normal * normal).sum(axis=1))
+        lengths[lengths == 0] = 1
+        normal = (normal / lengths[:,None]).astype(numpy.float32).astype(numpy.float64)
+        self._normal = normal
+        self._plane_d = (normal * p1).sum(axis=1)
+        bp = (c[self.base[:,0]] + c[self.base[:,1]]) / 2.0
+        self._ap_proj = self._project(ap, slice(None))
+        self._bp_vec = self._project(bp, slice(None)) - self._ap_proj
+
+    def _project(self, points, ai):
+        n = self._normal[ai]
+        return points - n * ((n * points).sum(axis=1) - self._plane_d[ai])[:,None]
+
+    def evaluate(self, ai, don_coords, di, don_sulfur, hyd_coords, hyd_start, hyd_count):
+        """Test donor di[k] against acceptor ai[k] for all k.
+
+           'hyd_coords' holds the donor hydrogen positions, hyd_start and hyd_count index it by
+           donor.  Returns boolean arrays saying which pairs were decided, and which of those
+           satisfy the acceptor criteria.
+        """
+        import numpy
+        kind = self.kind[ai]
+        decided = kind != self.UNDECIDED
+        c = self._coords
+        ap = c[self.acc[ai]]
+        dp = don_coords[di]
+        syn = (self._y[ai] * dp).sum(axis=1) + self._y_shift[ai] > 0.0
+        col = numpy.where((kind == self.PHI_PSI) & ~syn, 1, 0)
+        r2 = self.r2[ai, col]
+        # increase distance cutoff to allow for larger vdw radius of sulphur
+        r = numpy.sqrt(r2) + SULFUR_COMP
+        r2 = numpy.where(don_sulfur[di], r * r, r2)
+        dv = dp - ap
+        ok = decided & ((dv * dv).sum(axis=1) <= r2)
+
+        s = numpy.nonzero(ok & self.has_plane[ai])[0]
+        if len(s):
+            a = ai[s]
+            ang = _angles(self._bp_vec[a], self._project(dp[s], a) - self._ap_proj[a])
+            ok[s] = ang >= self.phi[a, col[s]]
+
+        s = numpy.nonzero(ok & (kind == self.THETA_TAU))[0]
+        if len(s):
+            a = ai[s]
+            ang = _angles(c[self.side[a,0]] - ap[s], dv[s])
+            ok[s] = (ang >= self.upsilon[a,0]) & (ang <= 0 - self.upsilon[a,1])
+
+        s = numpy.nonzero(ok & (kind == self.GENERIC))[0]
+        if len(s):
+            a = ai[s]
+            pi, offset = _expand(self.nb_count[a])
+            bp = c[self.nb[self.nb_start[a][pi] + offset]]
+            ang = _angles(bp - ap[s][pi], dv[s][pi])
+            sharp = numpy.zeros(len(s), bool)
+            sharp[pi[ang < self.min_angle[a][pi]]] = True
+            ok[s] = ~sharp
+
+        s = numpy.nonzero(ok & ((kind == self.PHI_PSI) | (kind == self.THETA_TAU)))[0]
+        if len(s):
+            counts = hyd_count[di[s]]
+            pi, offset = _expand(counts)
+            hp = hyd_coords[hyd_start[di[s]][pi] + offset]
+            ang = _angles(ap[s][pi] - hp, dp[s][pi] - hp)
+            theta_ok = (counts == 0)
+            theta_ok[pi[ang >= self.theta[ai[s], col[s]][pi]]] = True
+            ok[s] = theta_ok
+        return decided, ok
+
+def _normalized(v):
+    import numpy
+    lengths = numpy.sqrt((v * v).sum(axis=1))
+    lengths[lengths == 0] = 1
+    return v / lengths[:,None]
+
+def _angles(v0, v1):
+    """Angles in degrees between corresponding vectors, zero if either has zero length"""
+    import numpy
+    d0 = numpy.sqrt((v0 * v0).sum(axis=1))
+    d1 = numpy.sqrt((v1 * v1).sum(axis=1))
+    nonzero = (d0 > 0) & (d1 > 0)
+    cos = numpy.ones(len(v0))
+    cos[nonzero] = (v0 * v1).sum(axis=1)[nonzero] / (d0 * d1)[nonzero]
+    return numpy.degrees(numpy.arccos(numpy.clip(cos, -1, 1)))
+
+def _expand(counts):
+    """For items with 'counts' entries each, the item index and entry offset of every entry"""
+    import numpy
+    items = numpy.repeat(numpy.arange(len(counts)), counts)
+    starts = numpy.cumsum(counts) - counts
+    return items, numpy.arange(len(items)) - starts[items]
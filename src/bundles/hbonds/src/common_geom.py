@@ -35,39 +35,46 @@ def test_phi(dp, ap, bp, phi_plane, phi):
             print("phi criteria irrelevant")
     return True
 
-def get_phi_plane_params(acceptor, bonded1, bonded2):
-    ap = acceptor._hb_coord
+def get_phi_plane_atoms(acceptor, bonded1, bonded2):
+    """Atoms defining the phi plane (or None) and atoms whose midpoint is the phi base position"""
     if bonded2:
         # two principal bonds
-        phi_plane = [ap]
-        mid_point = zeros(3)
-        for bonded in [bonded1, bonded2]:
-            pt = bonded._hb_coord
-            phi_plane.append(pt)
-            mid_point = mid_point + pt
-        phi_base_pos = mid_point / 2.0
-    elif bonded1:
+        return [acceptor, bonded1, bonded2], [bonded1, bonded2]
+    if bonded1:
         # one principal bond
-        phi_base_pos = bonded1._hb_coord
         grand_bonded = list(bonded1.neighbors)
         if acceptor in grand_bonded:
             grand_bonded.remove(acceptor)
         else:
             raise ValueError("Acceptor %s not found in bond list of %s" % (acceptor, bonded1))
         if len(grand_bonded) == 1:
-            phi_plane = [ap, bonded1._hb_coord, grand_bonded[0]._hb_coord]
+            phi_plane = [acceptor, bonded1, grand_bonded[0]]
         elif len(grand_bonded) == 2:
-            phi_plane = [ap]
-            for gb in grand_bonded:
-                phi_plane.append(gb._hb_coord)
+            phi_plane = [acceptor] + grand_bonded
         elif len(grand_bonded) == 0:
             # e.g. O2
             phi_plane = None
         else:
             raise ConnectivityError("Wrong number of grandchild"
                     " atoms for phi/psi acceptor %s" % acceptor)
-    else:
+        return phi_plane, [bonded1]
+    return None, None
+
+def get_phi_plane_params(acceptor, bonded1, bonded2):
+    plane_atoms, base_atoms = get_phi_plane_atoms(acceptor, bonded1, bonded2)
+    if base_atoms is None:
         return None, None
+    if plane_atoms is None:
+        phi_plane = None
+    else:
+        phi_plane = [a._hb_coord for a in plane_atoms]
+    if len(base_atoms) == 2:
+        mid_point = zeros(3)
+        for bonded in base_atoms:
+            mid_point = mid_point + bonded._hb_coord
+        phi_base_pos = mid_point / 2.0
+    else:
+        phi_base_pos = base_atoms[0]._hb_coord
     return phi_plane, phi_base_pos
 
 def project(point, normal, D):
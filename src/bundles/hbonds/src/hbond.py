@@ -13,7 +13,7 @@
 
 verbose = False
 
-from .acceptor_geom import acc_syn_anti, acc_phi_psi, acc_theta_tau, acc_generic
+from .acceptor_geom import acc_syn_anti, acc_phi_psi, acc_theta_tau, acc_generic, AcceptorPairTests
 from .donor_geom import don_theta_tau, don_upsilon_tau, don_generic, don_water
 from .common_geom import ConnectivityError, AtomTypeError
 from chimerax.chem_group import find_group
@@ -23,6 +23,7 @@ from chimerax.atomic.idatm import type_info, tetrahedral, planar, linear, single
 from chimerax.atomic import Element
 from chimerax.core.errors import UserError
 import copy
+from functools import partial
 
 from chimerax.chem_group import H, N, C, O, R
 from chimerax.chem_group.chem_group import find_ring_planar_NHR2, find_nonring_ether, \
@@ -121,7 +122,7 @@ acceptor_params = [
         (0,), acc_theta_tau, ((1,), 3.17, 100, -153, 150)],
     # anilene
     [[[('Npl', 'N3'), ['Car', H, H]], [1,1,1,1]],
-        (0,), lambda *args: acc_theta_tau(*args, tau=37.5, tau_sym=4), ((1,), 3.42, 90, -137, 140)],
+        (0,), partial(acc_theta_tau, tau=37.5, tau_sym=4), ((1,), 3.42, 90, -137, 140)],
     # waddah
     [[[O, [H, H]], [1,0,0]], (0,), acc_phi_psi,
                 ((None, None), 3.03, 120, 145)],
@@ -277,8 +278,8 @@ donor_params = [
 processed_donor_params = {}
 
 def flush_cache():
-    global _d_cache, _a_cache, _prev_limited
-    _prev_limited = _d_cache = _a_cache = None
+    global _d_cache, _a_cache, _t_cache, _prev_limited
+    _prev_limited = _d_cache = _a_cache = _t_cache = None
 flush_cache()
 
 _problem = None
@@ -289,19 +290,30 @@ def find_coordset_hbonds(session, structure, **kw):
     """Like find_hbonds, but takes a single structure and cycles through its coordsets
        and finds the hydrogen bonds for each.  Returns a list of lists of hydrogen
        bonds, one list per coordset.
+
+       Donors and acceptors are typed once and reused for every coordset.
     """
     hbonds = []
     cs_ids = structure.coordset_ids
+    keep_cache = kw.get('cache_da', False)
+    kw['cache_da'] = True
+    status = kw.pop('status', True)
     structure.active_coordset_change_notify = False
     cur_cs_id = structure.active_coordset_id
     try:
-        for cs_id in cs_ids:
+        for i, cs_id in enumerate(cs_ids):
+            if status:
+                session.logger.status("Finding H-bonds in coordset %d of %d" % (i+1, len(cs_ids)),
+                    blank_after=0)
             structure.active_coordset_id = cs_id
-            kw['cache_da'] = cs_id != cs_ids[-1]
-            hbonds.append(find_hbonds(session, [structure], **kw))
+            hbonds.append(find_hbonds(session, [structure], status=False, **kw))
     finally:
-        structure.active_coordset_od = cur_cs_id
+        structure.active_coordset_id = cur_cs_id
         structure.active_coordset_change_notify = True
+        if not keep_cache:
+            flush_cache()
+        if status:
+            session.logger.status("")
     return hbonds
 
 def find_hbonds(session, structures, *, inter_model=True, intra_model=True, donors=None, acceptors=None,
@@ -347,7 +359,7 @@ def find_hbonds(session, structures, *, inter_model=True, intra_model=True, dono
             limited_acceptors = Atoms(acceptors)
         else:
             limited_acceptors = acceptors
-        global _d_cache, _a_cache, _prev_limited
+        global _d_cache, _a_cache, _t_cache, _prev_limited
         if cache_da:
             if limited_donors:
                 dIDs = [id(d) for d in limited_donors]
@@ -367,6 +379,7 @@ def find_hbonds(session, structures, *, inter_model=True, intra_model=True, dono
             if _d_cache is None:
                 _d_cache = WeakKeyDictionary()
                 _a_cache = WeakKeyDictionary()
+                _t_cache = WeakKeyDictionary()
         else:
             flush_cache()
         global donor_params, acceptor_params
@@ -467,9 +480,11 @@ def find_hbonds(session, structures, *, inter_model=True, intra_model=True, dono
             'S': gen_don_S_params
         }
 
-        from chimerax.atom_search import AtomSearchTree
+        import numpy
+        from chimerax.geometry import find_close_point_pairs
+        scene_coords = (Atom._hb_coord == Atom.scene_coord)
         metal_coord = {}
-        acc_trees = {}
+        acc_info = {}
         hbonds = []
         has_sulfur = {}
         for structure in structures:
@@ -500,14 +515,22 @@ def find_hbonds(session, structures, *, inter_model=True, intra_model=True, dono
                 #xyz.append([c[0], c[1], c[2]])
                 if acc_atom.element == Element.get_element('S'):
                     has_sulfur[structure] = True
-            if status:
-                session.logger.status("Building search tree of acceptor atoms", blank_after=0)
-            acc_tree = acc_trees[structure] = AtomSearchTree(acc_atoms, data=acc_data, sep_val=3.0,
-                scene_coords=(Atom._hb_coord == Atom.scene_coord))
+            acc_coords = _hb_coords(Atoms(acc_atoms), scene_coords)
+            acc_r2 = numpy.array([_acceptor_r2(geom_func, args) for acc_atom, geom_func, args in acc_data],
+                numpy.float64).reshape((len(acc_data),))
+            acc_tests = None
+            if cache_da:
+                acc_tests = _t_cache.get(structure, {}).get((dist_slop, angle_slop))
+            if acc_tests is None or acc_tests.size != len(acc_data):
+                acc_tests = AcceptorPairTests(acc_data)
+                if cache_da:
+                    _t_cache.setdefault(structure, {})[(dist_slop, angle_slop)] = acc_tests
+            acc_tests.set_coords(_hb_coords(acc_tests.ref_atoms, scene_coords))
+            acc_info[structure] = (acc_data, acc_coords, acc_r2, acc_tests)
             metals = structure.atoms.filter(structure.atoms.elements.is_metal)
-            for metal in metals:
-                for acc_atom, geom_func, args in acc_tree.search(metal._hb_coord, 4.0):
-                    metal_coord.setdefault(acc_atom, []).append(metal)
+            mi, ai = find_close_point_pairs(_hb_coords(metals, scene_coords), acc_coords, 4.0)
+            for i, j in zip(mi, ai):
+                metal_coord.setdefault(acc_atoms[j], []).append(metals[i])
 
         if process_key not in processed_donor_params:
             # find max donor distances before they get squared..
@@ -568,108 +591,139 @@ def find_hbonds(session, structures, *, inter_model=True, intra_model=True, dono
             if status:
                 session.logger.status("Matching donors in model '%s' to acceptors" % structure.name,
                     blank_after=0)
-            for i in range(len(don_atoms)):
+            # Gather candidate acceptors of all donors with one search per acceptor structure.
+            # Every acceptor test fails beyond the acceptor's distance cutoff, so only pairs
+            # within it need the detailed geometry tests.  The common acceptor tests are then
+            # applied to all those pairs at once; the donor tests are still done per pair.
+            don_coords = _hb_coords(Atoms(don_atoms), scene_coords)
+            test_dists = numpy.array([dd[3] for dd in don_data], numpy.float64)
+            don_sulfur = numpy.array([a.element.name == "S" for a in don_atoms], bool)
+            from .common_geom import SULFUR_COMP
+            pairs = []
+            for acc_structure in structures:
+                if acc_structure == structure and not intra_model or acc_structure != structure and not inter_model:
+                    continue
+                if not inter_submodel \
+                and acc_structure.id and structure.id \
+                and acc_structure.id[0] == structure.id[0] \
+                and acc_structure.id[:-1] == structure.id[:-1] \
+                and acc_structure.id[1:] != structure.id[1:]:
+                    continue
+                acc_data, acc_coords, acc_r2, acc_tests = acc_info[acc_structure]
+                td = test_dists + SULFUR_COMP if has_sulfur[acc_structure] else test_dists
+                di, ai = find_close_point_pairs(don_coords, acc_coords, td)
+                r = numpy.sqrt(acc_r2[ai]) + SULFUR_COMP * don_sulfur[di]
+                d = don_coords[di] - acc_coords[ai]
+                close = (d*d).sum(axis=1) <= r*r + 1e-6
+                pairs.append((acc_structure, di[close], ai[close]))
+
+            donor_hyds = {}
+            for acc_structure, di, ai in pairs:
+                for i in numpy.unique(di).tolist():
+                    if i not in donor_hyds:
+                        donor_hyds[i] = hyd_positions(don_atoms[i])
+            hyd_coords, hyd_start, hyd_count = _flatten_positions(donor_hyds, len(don_atoms))
+            candidates = {}
+            for acc_structure, di, ai in pairs:
+                acc_data, acc_coords, acc_r2, acc_tests = acc_info[acc_structure]
+                if verbose:
+                    # let the acceptor test functions explain themselves
+                    acc_ok = numpy.zeros(len(di), bool)
+                else:
+                    acc_ok, passed = acc_tests.evaluate(ai, don_coords, di, don_sulfur,
+                        hyd_coords, hyd_start, hyd_count)
+                    keep = ~acc_ok | passed
+                    di, ai, acc_ok = di[keep], ai[keep], acc_ok[keep]
+                order = numpy.lexsort((ai, di))
+                for i, j, ok in zip(di[order].tolist(), ai[order].tolist(), acc_ok[order].tolist()):
+                    candidates.setdefault(i, []).append((acc_data[j], ok))
+
+            for i, accs in sorted(candidates.items()):
                 donor_atom = don_atoms[i]
                 geom_type, tau_sym, arg_list, test_dist = don_data[i]
-                donor_hyds = hyd_positions(donor_atom)
-                coord = donor_atom._hb_coord
-                for acc_structure in structures:
-                    if acc_structure == structure and not intra_model or acc_structure != structure and not inter_model:
+                hyds = donor_hyds[i]
+                if verbose:
+                    session.logger.info("Found %d possible acceptors for donor %s:"
+                        % (len(accs), donor_atom))
+                    for acc_data, acc_ok in accs:
+                        session.logger.info("\t%s\n" % acc_data[0])
+                for (acc_atom, geom_func, args), acc_ok in accs:
+                    if acc_atom == donor_atom:
+                        # e.g. hydroxyl
+                        if verbose:
+                            print("skipping: donor == acceptor")
                         continue
-                    if not inter_submodel \
-                    and acc_structure.id and structure.id \
-                    and acc_structure.id[0] == structure.id[0] \
-                    and acc_structure.id[:-1] == structure.id[:-1] \
-                    and acc_structure.id[1:] != structure.id[1:]:
+                    try:
+                        if not acc_ok and not geom_func(donor_atom, hyds, *args):
+                            continue
+                    except ConnectivityError as e:
+                        session.logger.info("Skipping possible acceptor with bad geometry: %s\n%s\n"
+                            % (acc_atom, e))
+                        bad_connectivities += 1
                         continue
-                    if has_sulfur[acc_structure]:
-                        from .common_geom import SULFUR_COMP
-                        td = test_dist + SULFUR_COMP
-                    else:
-                        td = test_dist
-                    accs = acc_trees[acc_structure].search(coord, td)
+                    except Exception:
+                        print("donor:", donor_atom, " acceptor:", acc_atom)
+                        raise
                     if verbose:
-                        session.logger.info("Found %d possible acceptors for donor %s:"
-                            % (len(accs), donor_atom))
-                        for acc_data in accs:
-                            session.logger.info("\t%s\n" % acc_data[0])
-                    for acc_atom, geom_func, args in accs:
-                        if acc_atom == donor_atom:
-                            # e.g. hydroxyl
-                            if verbose:
-                                print("skipping: donor == acceptor")
-                            continue
-                        try:
-                            if not geom_func(donor_atom, donor_hyds, *args):
-                                continue
-                        except ConnectivityError as e:
-                            session.logger.info("Skipping possible acceptor with bad geometry: %s\n%s\n"
-                                % (acc_atom, e))
-                            bad_connectivities += 1
-                            continue
-                        except Exception:
-                            print("donor:", donor_atom, " acceptor:", acc_atom)
-                            raise
-                        if verbose:
-                            session.logger.info("\t%s satisfies acceptor criteria" % acc_atom)
-                        if geom_type == upsilon_tau:
-                            donor_func = don_upsilon_tau
-                            add_args = generic_upsilon_tau_params + [tau_sym]
-                        elif geom_type == theta_tau:
-                            donor_func = don_theta_tau
-                            add_args = generic_theta_tau_params
-                        elif geom_type == water:
-                            donor_func = don_water
-                            add_args = generic_water_params
-                        else:
-                            if donor_atom.idatm_type in ["Npl", "N2+"]:
-                                heavys = 0
-                                for bonded in donor_atom.neighbors:
-                                    if bonded.element.number > 1:
-                                        heavys += 1
-                                if heavys > 1:
-                                    info = gen_don_Npl_1h_params
-                                else:
-                                    info = gen_don_Npl_2h_params
+                        session.logger.info("\t%s satisfies acceptor criteria" % acc_atom)
+                    if geom_type == upsilon_tau:
+                        donor_func = don_upsilon_tau
+                        add_args = generic_upsilon_tau_params + [tau_sym]
+                    elif geom_type == theta_tau:
+                        donor_func = don_theta_tau
+                        add_args = generic_theta_tau_params
+                    elif geom_type == water:
+                        donor_func = don_water
+                        add_args = generic_water_params
+                    else:
+                        if donor_atom.idatm_type in ["Npl", "N2+"]:
+                            heavys = 0
+                            for bonded in donor_atom.neighbors:
+                                if bonded.element.number > 1:
+                                    heavys += 1
+                            if heavys > 1:
+                                info = gen_don_Npl_1h_params
                             else:
-                                info = generic_don_info[donor_atom.element.name]
-                            donor_func, arg_list = info
-                            add_args = generic_generic_params
-                            if donor_func == don_upsilon_tau:
-                                # tack on generic
-                                # tau symmetry
-                                add_args = generic_upsilon_tau_params + [4]
-                            elif donor_func == don_theta_tau:
-                                add_args = generic_theta_tau_params
-                        try:
-                            if not donor_func(donor_atom, donor_hyds, acc_atom,
-                                    *tuple(arg_list + add_args)):
-                                continue
-                        except ConnectivityError as e:
-                            session.logger.info("Skipping possible donor with bad geometry: %s\n%s\n"
-                                % (donor_atom, e))
-                            bad_connectivities += 1
+                                info = gen_don_Npl_2h_params
+                        else:
+                            info = generic_don_info[donor_atom.element.name]
+                        donor_func, arg_list = info
+                        add_args = generic_generic_params
+                        if donor_func == don_upsilon_tau:
+                            # tack on generic
+                            # tau symmetry
+                            add_args = generic_upsilon_tau_params + [4]
+                        elif donor_func == don_theta_tau:
+                            add_args = generic_theta_tau_params
+                    try:
+                        if not donor_func(donor_atom, hyds, acc_atom,
+                                *tuple(arg_list + add_args)):
                             continue
-                        except AtomTypeError as e:
-                            session.logger.warning(str(e))
-                            #_problem = ("atom type", donor_atom, str(e), None)
+                    except ConnectivityError as e:
+                        session.logger.info("Skipping possible donor with bad geometry: %s\n%s\n"
+                            % (donor_atom, e))
+                        bad_connectivities += 1
+                        continue
+                    except AtomTypeError as e:
+                        session.logger.warning(str(e))
+                        #_problem = ("atom type", donor_atom, str(e), None)
+                        continue
+                    if verbose:
+                        session.logger.info("\t%s satisfies donor criteria" % donor_atom)
+                    # ensure hbond isn't precluded by metal-coordination...
+                    if acc_atom in metal_coord:
+                        from chimerax.geometry import angle
+                        conflict = False
+                        for metal in metal_coord[acc_atom]:
+                            if angle(donor_atom._hb_coord, acc_atom._hb_coord, metal._hb_coord) < 45.0:
+                                if verbose:
+                                    session.logger.info("\tH-bond between %s and %s conflicts with"
+                                        " metal coordination to %s" % (donor_atom, acc_atom, metal))
+                                conflict = True
+                                break
+                        if conflict:
                             continue
-                        if verbose:
-                            session.logger.info("\t%s satisfies donor criteria" % donor_atom)
-                        # ensure hbond isn't precluded by metal-coordination...
-                        if acc_atom in metal_coord:
-                            from chimerax.geometry import angle
-                            conflict = False
-                            for metal in metal_coord[acc_atom]:
-                                if angle(donor_atom._hb_coord, acc_atom._hb_coord, metal._hb_coord) < 45.0:
-                                    if verbose:
-                                        session.logger.info("\tH-bond between %s and %s conflicts with"
-                                            " metal coordination to %s" % (donor_atom, acc_atom, metal))
-                                    conflict = True
-                                    break
-                            if conflict:
-                                continue
-                        hbonds.append((donor_atom, acc_atom))
+                    hbonds.append((donor_atom, acc_atom))
             if status:
                 session.logger.status("")
         if bad_connectivities:
@@ -724,6 +778,42 @@ def find_hbonds(session, structures, *, inter_model=True, intra_model=True, dono
         delattr(Atom, "_hb_coord")
     return hbonds
 
+def _hb_coords(atoms, scene_coords):
+    return atoms.scene_coords if scene_coords else atoms.coords
+
+def _flatten_positions(positions, n):
+    """Concatenate the position lists in the dictionary 'positions' (keyed by index < n).
+       Returns the coordinates and the start and count of each index's positions.
+    """
+    import numpy
+    start = numpy.zeros(n, numpy.int32)
+    count = numpy.zeros(n, numpy.int32)
+    xyz = []
+    for i, pos in positions.items():
+        start[i] = len(xyz)
+        count[i] = len(pos)
+        xyz.extend(pos)
+    return numpy.array(xyz, numpy.float64).reshape((len(xyz), 3)), start, count
+
+# positions of the squared distance cutoff(s) in the argument tuples of acceptor tests
+_acceptor_r2_args = {
+    acc_syn_anti: (3, 6),
+    acc_phi_psi: (3,),
+    acc_theta_tau: (2,),
+    acc_generic: (1,)
+}
+
+def _acceptor_r2(geom_func, args):
+    """Largest squared donor-acceptor distance that can satisfy an acceptor test"""
+    func = geom_func.func if isinstance(geom_func, partial) else geom_func
+    try:
+        r2s = [args[i] for i in _acceptor_r2_args[func]]
+    except (KeyError, IndexError):
+        return float('inf')
+    if [r2 for r2 in r2s if not isinstance(r2, (int, float))]:
+        return float('inf')
+    return max(r2s)
+
 def _process_arg_tuple(arg_tuple, dist_slop, angle_slop):
     new_args = []
     for arg in arg_tuple:
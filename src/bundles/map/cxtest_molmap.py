@@ -0,0 +1,33 @@
+# Check molmap series of a lazily read trajectory reads each frame once and
+# gives the same maps as molmap of each frame on the series grid.
+from chimerax.core.commands import run
+run(session, "open ../md_crds/test-data/chimera_test.pdb;"
+	" open ../md_crds/test-data/chimera_test.xtc structureModel #1 lazy true cacheFrames 3")
+s = session.models[0]
+source = s._coordset_loader._frame_source(0)
+reads = []
+frame_coords = source.frame_coords
+def count_reads(fi, *args):
+	reads.append(fi)
+	return frame_coords(fi, *args)
+source.frame_coords = count_reads
+
+ms = run(session, "molmap #1 5 series true")
+# Restoring the active frame may read it again.
+if len(reads) > s.num_coordsets + 1:
+	raise SystemExit("molmap series read %d frames for %d coordinate sets"
+		% (len(reads), s.num_coordsets))
+if len(ms.maps) != s.num_coordsets:
+	raise SystemExit("molmap series has %d maps for %d coordinate sets"
+		% (len(ms.maps), s.num_coordsets))
+if s.active_coordset_id != 1:
+	raise SystemExit("molmap series changed the active coordinate set to %d" % s.active_coordset_id)
+
+from numpy import allclose
+for i in (0, 10, s.num_coordsets - 1):
+	s.active_coordset_id = s.coordset_ids[i]
+	v = run(session, "molmap #1 5 onGrid #%s" % ms.maps[i].id_string)
+	if not allclose(v.full_matrix(), ms.maps[i].full_matrix(), atol = 1e-5):
+		raise SystemExit("molmap series map %d differs from molmap of coordinate set %d"
+			% (i+1, s.coordset_ids[i]))
+	v.delete()
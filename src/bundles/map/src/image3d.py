@@ -49,6 +49,7 @@ class Image3d(Model):
     self._planes_3d = None			# Texture3dPlanes instance for 3d projection mode
 
     self._backing_drawing = None		# For drawing black background behind image
+    self.region_loader = None			# RegionLoader to read data in a thread
     
   # ---------------------------------------------------------------------------
   #
@@ -203,7 +204,11 @@ class Image3d(Model):
     ijk_origin[axis] = k
     ijk_size = [i1-i0+1 for i0,i1 in zip(ijk_min, ijk_max)]
     ijk_size[axis] = 1
-    m = self._data.matrix(ijk_origin, ijk_size, ijk_step)
+    rl = self.region_loader
+    if rl:
+      m = rl.matrix(ijk_origin, ijk_size, ijk_step, self._texture_region)
+    else:
+      m = self._data.matrix(ijk_origin, ijk_size, ijk_step)
     from numpy import squeeze
     p = squeeze(m, 2-axis)	# Reduce from 3d array to 2d.
     return p
@@ -19,7 +19,7 @@
 def register_molmap_command(logger):
 
     from chimerax.core.commands import CmdDesc, register, BoolArg, FloatArg, PositiveFloatArg
-    from chimerax.core.commands import CenterArg, AxisArg, CoordSysArg
+    from chimerax.core.commands import CenterArg, AxisArg, CoordSysArg, SaveFileNameArg
     from chimerax.atomic import SymmetryArg, AtomsArg
     from . import MapArg
     molmap_desc = CmdDesc(
@@ -42,6 +42,8 @@ def register_molmap_command(logger):
 #            ('modelId', model_id_arg),
             ('replace', BoolArg),
             ('show_dialog', BoolArg),
+            ('series', BoolArg),
+            ('save_series', SaveFileNameArg),
         ],
         synopsis = 'Compute a map by placing Gaussians at atom positions'
     )
@@ -66,7 +68,9 @@ def molmap(session,
            display_threshold = 0.95, # fraction of total density
            model_id = None, # integer
            replace = True,
-           show_dialog = True
+           show_dialog = True,
+           series = False,        # One map for each coordinate set or structure
+           save_series = None,    # Write series maps to file(s) instead of opening
           ):
     '''
     Create a density map by placing Gaussians centered on atoms.
@@ -99,6 +103,14 @@ def molmap(session,
     replace : bool
       Default true
     show_dialog : bool, not supported
+    series : bool
+      Make one map for each coordinate set of a single structure, or for each
+      structure if atoms are from several structures.  All maps use the same grid
+      and are computed in parallel threads.  The maps are opened as a map series.
+    save_series : string
+      Write the series maps to a file instead of opening them.  A Chimera map
+      (.cmap) file holds all the maps.  For other formats the path must contain a
+      frame number format, e.g. pose%03d.mrc, and one file is written per map.
     '''
 
     molecules = atoms.unique_structures
@@ -125,6 +137,12 @@ def molmap(session,
         from chimerax.core.commands.parse import parse_model_id
         model_id = parse_model_id(model_id)
 
+    if series or save_series:
+        return molecule_map_series(atoms, resolution, step, pad, on_grid,
+                                   cutoff_range, sigma_factor, balls, transforms,
+                                   display_threshold, name, session,
+                                   save_path = save_series)
+
     v = make_molecule_map(atoms, resolution, step, pad, on_grid,
                           cutoff_range, sigma_factor, balls, transforms,
                           display_threshold, model_id, replace, show_dialog, name, session)
@@ -203,11 +221,212 @@ def molecule_grid_data(atoms, resolution, step, pad, on_grid,
 
     return grid
 
+# -----------------------------------------------------------------------------
+# Make maps for all coordinate sets of a structure, or for each of several
+# structures on one grid and open them as a map series or save them to files.
+#
+def molecule_map_series(atoms, resolution, step, pad, on_grid, cutoff_range,
+                        sigma_factor, balls, transforms, display_threshold,
+                        name, session, save_path = None, nthread = None):
+
+    frames = molecule_map_frames(atoms, on_grid)
+    active = _hold_active_coordsets(atoms)
+    if save_path is not None:
+        try:
+            save_grid_series(frames, save_path, resolution, step, pad, on_grid,
+                             cutoff_range, sigma_factor, balls, transforms,
+                             session, nthread)
+        finally:
+            _restore_active_coordsets(active)
+        return None
+
+    from . import volume_from_grid_data
+    maps = []
+    try:
+        for i, grid in enumerate(molecule_grid_series(frames, resolution, step, pad, on_grid,
+                                                      cutoff_range, sigma_factor, balls,
+                                                      transforms, nthread)):
+            session.logger.status('Computed molmap %d of %d' % (i+1, len(frames)))
+            v = volume_from_grid_data(grid, session, style = 'surface', open_model = False,
+                                      show_dialog = False)
+            maps.append(v)
+    finally:
+        _restore_active_coordsets(active)
+
+    # Use the same contour level for all maps so frames are comparable.
+    levels, colors = maps[0].initial_surface_levels(mfrac = (display_threshold,1))
+    tf = on_grid.position if on_grid else atoms[0].structure.position
+    for v in maps:
+        v.set_parameters(surface_levels = levels, surface_colors = colors)
+        v.position = tf
+        v.molmap_parameters = (resolution, step, pad, cutoff_range, sigma_factor)
+
+    from chimerax.map_series import MapSeries
+    ms = MapSeries(name, maps, session)
+    session.models.add([ms])
+    return ms
+
+# -----------------------------------------------------------------------------
+# Return list of (name, frame_coords, atoms) for the frames of a map series.
+# Calling frame_coords() returns the frame coordinates in the grid coordinate
+# system.  Coordinate sets are read by making them active so that trajectory
+# frames loaded on demand or stored in single precision are read as usual,
+# so frame_coords() must be called in the main thread.
+#
+def molecule_map_frames(atoms, on_grid = None):
+    structures = atoms.unique_structures
+    tf = on_grid.position if on_grid else atoms[0].structure.position
+    frames = []
+    if len(structures) == 1:
+        s = structures[0]
+        to_grid = tf.inverse() * s.position
+        def coordset_coords(cs_id):
+            s.active_coordset_id = cs_id
+            xyz = atoms.coords
+            to_grid.transform_points(xyz, in_place = True)
+            return xyz
+        for cs_id in s.coordset_ids:
+            frames.append(('%s %d' % (s.name, cs_id),
+                           lambda cs_id = cs_id: coordset_coords(cs_id), atoms))
+    else:
+        def structure_coords(satoms):
+            xyz = satoms.scene_coords
+            tf.inverse().transform_points(xyz, in_place = True)
+            return xyz
+        for s, satoms in atoms.by_structure:
+            frames.append((s.name, lambda satoms = satoms: structure_coords(satoms), satoms))
+    return frames
+
+# -----------------------------------------------------------------------------
+# Remember the active coordinate sets and stop change notifications while
+# reading frames makes other coordinate sets active.
+#
+def _hold_active_coordsets(atoms):
+    structures = atoms.unique_structures
+    for s in structures:
+        s.active_coordset_change_notify = False
+    return [(s, s.active_coordset_id) for s in structures]
+
+def _restore_active_coordsets(active):
+    for s, cs_id in active:
+        s.active_coordset_id = cs_id
+        s.active_coordset_change_notify = True
+
+# -----------------------------------------------------------------------------
+# Compute maps for frames on one shared grid in parallel threads.  Grids are
+# yielded in frame order.  Each frame's coordinates are read once.  Without a
+# given grid they are kept in single precision, as used by the map calculation,
+# to find the grid bounds of all frames before computing maps.  At most a few
+# maps more than the number of threads are in memory at once so long series
+# can be written to files.
+#
+def molecule_grid_series(frames, resolution, step, pad, on_grid, cutoff_range,
+                         sigma_factor, balls = False, transforms = None,
+                         nthread = None):
+
+    if transforms:
+        tf = on_grid.position if on_grid else frames[0][2][0].structure.position
+        transforms = transforms.transform_coordinates(tf)
+
+    # Grid geometry is set up once and each map gets a new zero array.
+    from numpy import zeros, float32
+    if on_grid:
+        g0 = on_grid.region_grid(on_grid.region, float32)
+        def frames_xyz():
+            for fname, frame_coords, fatoms in frames:
+                yield fname, frame_coords(), fatoms
+    else:
+        from chimerax.geometry import bounds
+        from collections import deque
+        fxyz = deque()
+        blist = []
+        for fname, frame_coords, fatoms in frames:
+            xyz = frame_coords()
+            blist.append(bounds.point_bounds(xyz, transforms))
+            fxyz.append((fname, xyz.astype(float32, copy = False), fatoms))
+        g0 = bounds_grid(bounds.union_bounds(blist), step, pad)
+        def frames_xyz():
+            while fxyz:
+                yield fxyz.popleft()   # Free coordinates once the map is queued.
+    shape = tuple(g0.size[::-1])
+    from chimerax.map_data import ArrayGridData
+    def new_grid(fname):
+        return ArrayGridData(zeros(shape, float32), g0.origin, g0.step,
+                             g0.cell_angles, g0.rotation, name = fname)
+
+    sdev = resolution * sigma_factor
+    def frame_grid(fname, xyz, weights):
+        grid = new_grid(fname)
+        if balls:
+            add_balls(grid, xyz, weights, sdev, cutoff_range, transforms)
+        else:
+            add_gaussians(grid, xyz, weights, sdev, cutoff_range, transforms)
+        return grid
+
+    if nthread is None:
+        from multiprocessing import cpu_count
+        nthread = max(1, cpu_count()//2)
+    from concurrent.futures import ThreadPoolExecutor
+    from collections import deque
+    with ThreadPoolExecutor(max_workers = nthread) as executor:
+        pending = deque()
+        for fname, xyz, fatoms in frames_xyz():
+            # Atoms are only accessed in this thread.
+            weights = fatoms.radii if balls else fatoms.element_numbers
+            pending.append(executor.submit(frame_grid, fname, xyz, weights))
+            if len(pending) > 2*nthread:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+# -----------------------------------------------------------------------------
+# Write maps to one Chimera map file, or to one file per map if the path
+# contains a frame number format like %d.
+#
+def save_grid_series(frames, path, resolution, step, pad, on_grid, cutoff_range,
+                     sigma_factor, balls, transforms, session, nthread = None):
+
+    from os.path import expanduser, basename
+    path = expanduser(path)
+    multifile = ('%' in basename(path))
+    from chimerax.map_data import save_grid_data
+    from chimerax.map_data.fileformats import file_writer
+    ff = file_writer(path % 0 if multifile else path)
+    if ff is None:
+        from chimerax.core.errors import UserError
+        raise UserError('Unknown map file format for "%s"' % path)
+    if not multifile and 'multigrid' not in ff.writer_options:
+        from chimerax.core.errors import UserError
+        raise UserError('Saving a map series in %s format requires a frame number'
+                        ' in the file name, e.g. frame%%03d%s' % (ff.name, ff.suffixes[0]))
+    if not multifile:
+        import os
+        if os.path.exists(path):
+            os.remove(path)   # Maps are appended.
+
+    n = len(frames)
+    grids = molecule_grid_series(frames, resolution, step, pad, on_grid, cutoff_range,
+                                 sigma_factor, balls, transforms, nthread)
+    for i, grid in enumerate(grids):
+        session.logger.status('Writing molmap %d of %d to %s' % (i+1, n, basename(path)))
+        if multifile:
+            save_grid_data(grid, path % i, session)
+        else:
+            grid.name = '%04d' % i
+            grid.time = i     # Frame number so even a few maps open as a series.
+            save_grid_data(grid, path, session, options = {'append': True})
+    session.logger.info('Wrote %d molmaps to %s' % (n, basename(path)))
+
 # -----------------------------------------------------------------------------
 #
 def bounding_grid(xyz, step, pad, transforms = None):
     from chimerax.geometry import bounds
     b = bounds.point_bounds(xyz, transforms)
+    return bounds_grid(b, step, pad)
+
+# -----------------------------------------------------------------------------
+#
+def bounds_grid(b, step, pad):
     origin = [x-pad for x in b.xyz_min]
     from math import ceil
     shape = [int(ceil((b.xyz_max[a] - b.xyz_min[a] + 2*pad) / step))
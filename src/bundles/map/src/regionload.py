@@ -0,0 +1,214 @@
+# vim: set expandtab shiftwidth=4 softtabstop=4:
+
+# === UCSF ChimeraX Copyright ===
+# Copyright 2016 Regents of the University of California.
+# All rights reserved.  This software provided pursuant to a
+# license agreement containing restrictions on its disclosure,
+# duplication and use.  For details see:
+# http://www.rbvi.ucsf.edu/chimerax/docs/licensing.html
+# This notice must be embedded in or attached to all copies,
+# including partial copies, of the software or any revisions
+# or derivations thereof.
+# === UCSF ChimeraX Copyright ===
+
+# -----------------------------------------------------------------------------
+# Read volume image data in a separate thread so that moving planes or the
+# region of a large map does not stall graphics drawing.
+#
+# When image planes are drawn for a region that is not in the data cache the
+# full resolution region is queued for reading in a thread.  Until it is read
+# planes are drawn from a coarse subsampled copy of the region (every 2nd, 4th,
+# ... grid point) which is small enough to read quickly, and images are redrawn
+# from the full resolution data when it arrives.  Only the most recently
+# requested region is read, older queued requests are dropped.
+#
+class RegionLoader:
+
+  coarse_voxel_limit = 2**18    # Maximum grid points in coarse placeholder data.
+  min_thread_voxels = 2**22     # Smaller regions are read without a thread.
+
+  def __init__(self, grid_data, session, loaded_cb = None):
+
+    self.grid_data = grid_data
+    self.session = session
+    self._loaded_cb = loaded_cb         # Called when full resolution data read.
+    self._thread = None
+    self._reading = set()               # Regions queued or being read.
+    self._coarse = None                 # (region, coarse step, matrix)
+    self._frame_handler = None
+    self._read_done = set()             # Regions read or that got errors reading.
+
+  # ---------------------------------------------------------------------------
+  # Return a matrix for a plane or subregion of the specified region.  If it is
+  # not cached then coarse data is returned and the full region is read in a
+  # thread.
+  #
+  def matrix(self, ijk_origin, ijk_size, ijk_step, region):
+
+    d = self.grid_data
+    m = d.matrix(ijk_origin, ijk_size, ijk_step, from_cache_only = True)
+    if m is not None:
+      return m
+
+    key = _region_key(region)
+    if (key in self._read_done or self.session.in_script or
+        _region_voxels(region) < self.min_thread_voxels):
+      # If the region was read in a thread and this part is not in the cache,
+      # or the read failed, read without a thread.
+      return d.matrix(ijk_origin, ijk_size, ijk_step)
+
+    # Read coarse data before starting the thread read, which holds the
+    # grid read lock for file formats that are not thread safe.
+    m = self._coarse_matrix(ijk_origin, ijk_size, ijk_step, region)
+    self._read_in_thread(key)
+    return m
+
+  # ---------------------------------------------------------------------------
+  #
+  @property
+  def reading(self):
+    return len(self._reading) > 0
+
+  # ---------------------------------------------------------------------------
+  #
+  def _read_in_thread(self, key):
+
+    if key in self._reading:
+      return
+    self._read_done.clear()
+
+    t = self._thread
+    if t is None:
+      from queue import Queue
+      self._in_queue, self._out_queue = Queue(), Queue()
+
+    # Only the most recent region request is kept in the queue.
+    import queue
+    try:
+      while True:
+        old_key, = self._in_queue.get_nowait()
+        self._reading.discard(old_key)
+        self._in_queue.task_done()
+    except queue.Empty:
+      pass
+
+    self._reading.add(key)
+    self._in_queue.put((key,))
+    self._start_thread()
+
+    if self._frame_handler is None:
+      self._frame_handler = self.session.triggers.add_handler('new frame',
+                                                              self._check_for_data)
+
+  # ---------------------------------------------------------------------------
+  #
+  def _start_thread(self):
+    t = self._thread
+    if t is None or not t.is_alive():
+      from chimerax.core.threadq import WorkThread
+      self._thread = t = WorkThread(self._read_region, in_queue = self._in_queue,
+                                    out_queue = self._out_queue)
+      t.daemon = True
+      t.start()
+
+  # ---------------------------------------------------------------------------
+  # Called in the read thread.  Reading the matrix puts it in the data cache.
+  # GridData.matrix() holds the grid read lock while reading so this never
+  # reads at the same time as the main thread, since most file readers are not
+  # thread safe.
+  #
+  def _read_region(self, key):
+    ijk_min, ijk_max, ijk_step = key
+    ijk_size = [b-a+1 for a,b in zip(ijk_min, ijk_max)]
+    try:
+      m = self.grid_data.matrix(ijk_min, ijk_size, ijk_step)
+    except Exception as e:
+      return key, e
+    return key, m
+
+  # ---------------------------------------------------------------------------
+  # Called each graphics frame while regions are being read.
+  #
+  def _check_for_data(self, *_):
+
+    loaded = []
+    import queue
+    while True:
+      try:
+        key, m = self._out_queue.get_nowait()
+      except queue.Empty:
+        break
+      self._reading.discard(key)
+      self._read_done.add(key)
+      loaded.append(m)
+
+    if self._reading:
+      # Thread may have exited just before a new region was queued.
+      self._start_thread()
+      result = None
+    else:
+      self._frame_handler = None
+      self._coarse = None
+      from chimerax.core.triggerset import DEREGISTER
+      result = DEREGISTER
+
+    if loaded and self._loaded_cb:
+      self._loaded_cb(loaded)
+
+    return result
+
+  # ---------------------------------------------------------------------------
+  # Return coarse data upsampled to the size of the requested matrix by
+  # repeating each grid point.
+  #
+  def _coarse_matrix(self, ijk_origin, ijk_size, ijk_step, region):
+
+    c = self._coarse
+    if c is None or c[0] != _region_key(region):
+      cstep, cm = self._read_coarse_region(region)
+      self._coarse = c = (_region_key(region), cstep, cm)
+    cstep, cm = c[1:]
+
+    cmin = region[0]
+    from numpy import arange, ix_
+    indices = []
+    for a in (2,1,0):
+      n = 1 + (ijk_size[a]-1)//ijk_step[a]
+      ijk = ijk_origin[a] + arange(n)*ijk_step[a]
+      ci = (ijk - cmin[a]) // cstep[a]
+      ci.clip(0, cm.shape[2-a]-1, out = ci)
+      indices.append(ci)
+    m = cm[ix_(*indices)]
+    return m
+
+  # ---------------------------------------------------------------------------
+  # Read region with step a power of 2 larger than region step so that the
+  # number of grid points is below the coarse voxel limit.
+  #
+  def _read_coarse_region(self, region):
+
+    ijk_min, ijk_max, ijk_step = region
+    ijk_size = [b-a+1 for a,b in zip(ijk_min, ijk_max)]
+    cstep = list(ijk_step)
+    while _region_voxels((ijk_min, ijk_max, cstep)) > self.coarse_voxel_limit:
+      new_step = [(2*st if s > st else st) for s,st in zip(ijk_size, cstep)]
+      if new_step == cstep:
+        break
+      cstep = new_step
+    cm = self.grid_data.matrix(ijk_min, ijk_size, cstep)
+    return cstep, cm
+
+# -----------------------------------------------------------------------------
+#
+def _region_key(region):
+  ijk_min, ijk_max, ijk_step = region
+  return (tuple(ijk_min), tuple(ijk_max), tuple(ijk_step))
+
+# -----------------------------------------------------------------------------
+#
+def _region_voxels(region):
+  ijk_min, ijk_max, ijk_step = region
+  n = 1
+  for a,b,st in zip(ijk_min, ijk_max, ijk_step):
+    n *= 1 + (b-a)//st
+  return n
@@ -191,6 +191,8 @@ def grid_data_state(grid_data, session, include_maps = False):
 from chimerax.core.state import State
 class GridDataState(State):
 
+  lazy_session_arrays = True	# Map arrays are read from session file when needed.
+
   def __init__(self, grid_data, include_maps = False):
     self.grid_data = grid_data
     self._include_maps = include_maps
@@ -307,10 +309,12 @@ def state_from_grid_data(data, session_path = None, include_maps = False):
     s['size'] = dt.size
     s['value_type'] = str(dt.value_type)
     compress_maps = False  # No advantage.  Ticket #4002
-    bytes = dt.matrix().tobytes()
+    # Save as an array rather than bytes so version 4 session files can store
+    # it outside the serialized state and read it only when the map is used.
+    array = dt.matrix()
 
     MAX_MSGPACK_OBJECT_SIZE = 2**32-1
-    if len(bytes) > MAX_MSGPACK_OBJECT_SIZE:
+    if array.nbytes > MAX_MSGPACK_OBJECT_SIZE:
       from chimerax.core.errors import UserError
       raise UserError('ChimeraX session files cannot include maps over 4 Gbytes in size.\n\n' +
                       'You tried to save map "%s"' % dt.name +
@@ -323,10 +327,10 @@ def state_from_grid_data(data, session_path = None, include_maps = False):
     if compress_maps:
       from gzip import compress
       s['array_compression'] = 'gzip'
-      s['array'] = compress(bytes)
+      s['array'] = compress(array.tobytes())
     else:
       s['array_compression'] = 'none'
-      s['array'] = bytes
+      s['array'] = array
     save_position = True
   else:
     save_position = False
@@ -367,21 +371,26 @@ def grid_data_from_state(s, gdcache, session, file_paths):
 
   if 'array' in s:
     compression = s.get('array_compression')
-    if compression == 'none':
-      bytes = s['array']
+    from chimerax.core.session_chunks import LazyArray
+    if compression == 'none' and isinstance(s['array'], LazyArray):
+      # Read from session file when map data is first needed.
+      array = s['array']
     else:
-      from gzip import decompress
-      if compression == 'gzip':
-        bytes = decompress(s['array'])
+      if compression == 'none':
+        bytes = s['array']
       else:
-        # Older sessions without array_compression attribute used gzip and base64 encoding.
-        from base64 import b64decode
-        bytes = decompress(b64decode(s['array']))
-    from numpy import frombuffer, dtype
-    a = frombuffer(bytes, dtype = dtype(s['value_type']))
-    if not a.flags.writeable:
-      a = a.copy()
-    array = a.reshape(s['size'][::-1])
+        from gzip import decompress
+        if compression == 'gzip':
+          bytes = decompress(s['array'])
+        else:
+          # Older sessions without array_compression attribute used gzip and base64 encoding.
+          from base64 import b64decode
+          bytes = decompress(b64decode(s['array']))
+      from numpy import frombuffer, dtype
+      a = frombuffer(bytes, dtype = dtype(s['value_type']))
+      if not a.flags.writeable:
+        a = a.copy()
+      array = a.reshape(s['size'][::-1])
     from chimerax.map_data import ArrayGridData
     dlist = [ArrayGridData(array)]
   else:
@@ -82,6 +82,7 @@ class Volume(Model):
 
     # Image display submodel and parameters
     self._image = None
+    self._image_region_loader = None		# Reads image data in a thread
     self.image_levels = []                      # list of (threshold, scale)
     self.image_colors = []
     self._mask_colors = None			# For coloring by segmentation
@@ -793,7 +794,37 @@ class Volume(Model):
       self.call_change_callbacks('display style changed')
       
     # Prevent cached matrix for displayed data from being freed.
-    self._keep_displayed_data = self.displayed_matrices()
+    # Image data not yet read is read in a thread when drawn.
+    read = not (self.image_shown and self._image.region_loader)
+    self._keep_displayed_data = self.displayed_matrices(read_matrix = read)
+
+  # ---------------------------------------------------------------------------
+  # Image data is read in a thread in the graphical user interface so that
+  # moving planes does not wait for data to be read.
+  #
+  def _region_loader(self):
+    s = self.session
+    if not (hasattr(s, 'ui') and s.ui.is_gui):
+      return None
+    rl = self._image_region_loader
+    if rl is None or rl.grid_data is not self.data:
+      from .regionload import RegionLoader
+      self._image_region_loader = rl = RegionLoader(self.data, s, self._region_loaded)
+    return rl
+
+  # ---------------------------------------------------------------------------
+  # Redraw image with full resolution data read in a thread.
+  #
+  def _region_loaded(self, matrices):
+    if self.deleted:
+      return
+    im = self._image
+    if im and not im.deleted:
+      im._remove_planes()
+      bi = im._blend_image
+      if bi:
+        bi._remove_planes()
+    self._keep_displayed_data = self.displayed_matrices(read_matrix = False)
 
   # ---------------------------------------------------------------------------
   #
@@ -1872,6 +1903,8 @@ class VolumeImage(Image3d):
                      v.session, blend_manager(v.session))
     v.add([self])
 
+    self.region_loader = v._region_loader()
+
     if v.mask_colors is not None:
       self.mask_colors = v.mask_colors
     if v.segment_colors is not None:
@@ -120,6 +120,12 @@ def register_volume_command(logger):
                              synopsis = 'report volume display settings')
     register('volume settings', vsettings_desc, volume_settings, logger=logger)
 
+    # Register volume cache command
+    vcache_desc = CmdDesc(keyword = [('size', FloatArg),
+                                     ('clear', BoolArg)],
+                          synopsis = 'report or resize volume data cache')
+    register('volume cache', vcache_desc, volume_cache, logger=logger)
+
     # Register volume channels command
     from . import channels
     channels.register_volume_channels_command(logger)
@@ -722,6 +728,31 @@ def volume_settings(session, volumes = None):
     msg = '\n\n'.join(volume_settings_text(v) for v in volumes)
     session.logger.info(msg)
     
+# -----------------------------------------------------------------------------
+#
+def volume_cache(session, size = None, clear = False):
+    '''
+    Report memory used by the volume data cache and how often requested data
+    was found in the cache.  Optionally set the cache size in Mbytes or
+    remove all cached data.
+    '''
+    if size is not None:
+        apply_global_settings(session, {'data_cache_size': size})
+    from .volume import data_cache
+    dc = data_cache(session)
+    if clear:
+        dc.clear()
+    s = dc.statistics()
+    mb = 2**20
+    lookups = s['hits'] + s['misses']
+    hit_pct = 100 * s['hits'] / lookups if lookups else 0
+    msg = ('Volume data cache using %.1f of %.0f Mbytes in %d arrays, '
+           '%d pinned groups, %d hits (%.0f%%), %d misses, %d evictions'
+           % (s['used']/mb, s['size']/mb, s['entries'], s['pinned groups'],
+              s['hits'], hit_pct, s['misses'], s['evictions']))
+    session.logger.info(msg)
+    return s
+
 # -----------------------------------------------------------------------------
 #
 def volume_settings_text(v):
@@ -0,0 +1,56 @@
+from chimerax.map_data.datacache import Data_Cache
+from numpy import zeros
+
+def cache_arrays(cache, keys, group = None):
+	for k in keys:
+		cache.cache_data(k, zeros((100,), 'uint8'), 100, k,
+			groups = ([group] if group else []))
+
+# Least recently used data is released first.
+c = Data_Cache(size = 300)
+cache_arrays(c, ['a', 'b', 'c'])
+c.lookup_data('a')
+cache_arrays(c, ['d'])
+if c.lookup_data('b') is not None or c.lookup_data('a') is None:
+	raise SystemExit("Data cache released %s instead of least recently used entry"
+		% ('a' if c.lookup_data('b') is not None else 'nothing'))
+if c.used > c.size:
+	raise SystemExit("Data cache uses %d bytes, over its size %d" % (c.used, c.size))
+
+# Data in use outside the cache is kept and keeps its place in access order.
+c = Data_Cache(size = 300)
+cache_arrays(c, ['a', 'b', 'c'])
+held = c.lookup_data('a')
+c.lookup_data('b')
+c.lookup_data('c')
+cache_arrays(c, ['d'])
+if list(c.data.keys()) != ['a', 'c', 'd']:
+	raise SystemExit("Data cache with an in-use entry holds %s instead of a, c, d"
+		% ', '.join(c.data.keys()))
+del held
+cache_arrays(c, ['e'])
+if 'a' in c.data:
+	raise SystemExit("Data cache kept least recently used entry once no longer in use")
+
+# Pinned groups are not released until unpinned, then the size limit is enforced.
+c = Data_Cache(size = 300)
+c.pin_group('map')
+cache_arrays(c, ['a', 'b', 'c'], group = 'map')
+cache_arrays(c, ['d'])
+if len(c.group_keys_and_data('map')) != 3 or 'd' not in c.data:
+	raise SystemExit("Data cache released pinned data")
+if c.statistics()['pinned groups'] != 1:
+	raise SystemExit("Data cache reports %d pinned groups instead of 1"
+		% c.statistics()['pinned groups'])
+c.unpin_group('map')
+if c.used > c.size or 'a' in c.data:
+	raise SystemExit("Data cache over its size after unpinning, using %d of %d bytes"
+		% (c.used, c.size))
+c.resize(100)
+if c.used > 100 or list(c.data.keys()) != ['d']:
+	raise SystemExit("Data cache resized to 100 bytes holds %s" % ', '.join(c.data.keys()))
+
+from chimerax.core.commands import run
+s = run(session, "volume cache")
+if 'pinned groups' not in s:
+	raise SystemExit("volume cache does not report pinned groups")
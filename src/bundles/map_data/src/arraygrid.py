@@ -73,6 +73,19 @@ class ArrayGridData(GridData):
 
       self.writable = True
   
+  # ---------------------------------------------------------------------------
+  # The array can be a placeholder with shape and dtype that is read from
+  # a session file when first used.
+  #
+  def _get_array(self):
+    a = self._array
+    if hasattr(a, 'materialize'):
+      a = self._array = a.materialize()
+    return a
+  def _set_array(self, array):
+    self._array = array
+  array = property(_get_array, _set_array)
+
   # ---------------------------------------------------------------------------
   #
   def read_matrix(self, ijk_origin, ijk_size, ijk_step, progress):
@@ -83,7 +83,8 @@ def read_chimera_map(path):
 def _index_grid_series(grids):
   '''
   Mark as volume series if 5 or more maps of same size with the same channel number.
-  Fewer than 5 maps are considered different maps.
+  Fewer than 5 maps are considered different maps unless each has a different
+  time series frame number.
   '''
   # Find grids by channel
   cgrids = {}
@@ -95,7 +96,9 @@ def _index_grid_series(grids):
 
   # Check each channel to see if it is a series.
   for glist in cgrids.values():
-    if len(glist) > 4 and len(set(tuple(g.size) for g in glist)) == 1:
+    times = set(g.time for g in glist if g.time is not None)
+    timed = (len(glist) > 1 and len(times) == len(glist))
+    if (len(glist) > 4 or timed) and len(set(tuple(g.size) for g in glist)) == 1:
       for i,g in enumerate(glist):
         g.series_index = i
     
@@ -15,6 +15,11 @@
 # Maintain a cache of data objects using a limited amount of memory.
 # The least recently accessed data is released first.
 #
+# Entries are kept in access order so the oldest entry is found without
+# sorting.  Data still referenced outside the cache and data in pinned groups
+# is never released.  All methods hold a lock so the cache can be used by
+# threads reading data in the background.
+#
 
 # -----------------------------------------------------------------------------
 #
@@ -24,83 +29,124 @@ class Data_Cache:
 
     self.size = size
     self.used = 0
-    self.time = 1
-    self.data = {}
-    self.groups = {}
+    from collections import OrderedDict
+    self.data = OrderedDict()   # Key -> Cached_Data, least recently used first
+    self.groups = {}            # Group -> {key: Cached_Data}
+    self.pinned = {}            # Group -> pin count
+    self.hits = 0
+    self.misses = 0
+    self.evictions = 0
+    from threading import RLock
+    self._lock = RLock()
 
   # ---------------------------------------------------------------------------
   #
   def cache_data(self, key, value, size, description, groups = []):
 
-    self.remove_key(key)
-    d = Cached_Data(key, value, size, description,
-                    self.time_stamp(), groups)
-    self.data[key] = d
+    with self._lock:
+      self._remove_key(key)
+      d = Cached_Data(key, value, size, description, groups)
+      self.data[key] = d
 
-    for g in groups:
       gtable = self.groups
-      if not g in gtable:
-        gtable[g] = []
-      gtable[g].append(d)
+      for g in groups:
+        if not g in gtable:
+          gtable[g] = {}
+        gtable[g][key] = d
 
-    self.used = self.used + size
-    self.reduce_use()
+      self.used += size
+      self.reduce_use()
 
   # ---------------------------------------------------------------------------
   #
   def lookup_data(self, key):
 
-    data = self.data
-    if key in data:
-      d = data[key]
-      d.last_access = self.time_stamp()
-      v = d.value
-    else:
-      v = None
-    self.reduce_use()
+    with self._lock:
+      d = self.data.get(key)
+      if d is None:
+        self.misses += 1
+        v = None
+      else:
+        self.hits += 1
+        self.data.move_to_end(key)
+        v = d.value
+      self.reduce_use()
     return v
 
   # ---------------------------------------------------------------------------
   #
   def remove_key(self, key):
 
-    data = self.data
-    if key in data:
-      self.remove_data(data[key])
-    self.reduce_use()
+    with self._lock:
+      self._remove_key(key)
+      self.reduce_use()
 
   # ---------------------------------------------------------------------------
   #
-  def group_keys_and_data(self, group):
+  def _remove_key(self, key):
 
-    groups = self.groups
-    if not group in groups:
-      return []
+    d = self.data.get(key)
+    if d is not None:
+      self.remove_data(d)
 
-    kd = [(d.key, d.value) for d in groups[group]]
+  # ---------------------------------------------------------------------------
+  #
+  def group_keys_and_data(self, group):
+
+    with self._lock:
+      gdata = self.groups.get(group)
+      if gdata is None:
+        return []
+      kd = [(d.key, d.value) for d in gdata.values()]
     return kd
 
   # ---------------------------------------------------------------------------
   #
   def resize(self, size):
 
-    self.size = size
-    self.reduce_use()
+    with self._lock:
+      self.size = size
+      self.reduce_use()
 
   # ---------------------------------------------------------------------------
+  # Data in a pinned group is not released until the group is unpinned.
+  # Pins are counted so each pin_group() call needs a matching unpin_group().
   #
-  def reduce_use(self):
+  def pin_group(self, group):
+
+    with self._lock:
+      self.pinned[group] = self.pinned.get(group, 0) + 1
 
-    if self.used <= self.size:
-      return
+  # ---------------------------------------------------------------------------
+  #
+  def unpin_group(self, group):
+
+    with self._lock:
+      count = self.pinned.get(group, 0)
+      if count <= 1:
+        self.pinned.pop(group, None)
+      else:
+        self.pinned[group] = count - 1
+      self.reduce_use()
+
+  # ---------------------------------------------------------------------------
+  # Release least recently used data until the memory limit is met.
+  #
+  def reduce_use(self):
 
-    data = self.data
-    dlist = list(data.values())
-    dlist.sort(key = lambda d: d.last_access)
-    import sys
-    for d in dlist:
-      if sys.getrefcount(d.value) == 2:
+    with self._lock:
+      if self.used <= self.size:
+        return
+      pinned = self.pinned
+      import sys
+      # Entries in use or pinned stay in place so access order is kept.
+      for d in list(self.data.values()):
+        if sys.getrefcount(d.value) > 2:
+          continue      # Data is in use outside cache.
+        if pinned and [g for g in d.groups if g in pinned]:
+          continue
         self.remove_data(d)
+        self.evictions += 1
         if self.used <= self.size:
           break
 
@@ -108,33 +154,66 @@ class Data_Cache:
   #
   def remove_data(self, d):
 
-    del self.data[d.key]
-    self.used = self.used - d.size
-    d.value = None
+    with self._lock:
+      del self.data[d.key]
+      self.used -= d.size
+      d.value = None
+
+      for g in d.groups:
+        gdata = self.groups[g]
+        del gdata[d.key]
+        if len(gdata) == 0:
+          del self.groups[g]
+
+  # ---------------------------------------------------------------------------
+  #
+  def clear(self):
+
+    with self._lock:
+      for d in list(self.data.values()):
+        self.remove_data(d)
+
+  # ---------------------------------------------------------------------------
+  #
+  def statistics(self):
 
-    for g in d.groups:
-      dlist = self.groups[g]
-      dlist.remove(d)
-      if len(dlist) == 0:
-        del self.groups[g]
+    with self._lock:
+      return {'size': self.size, 'used': self.used, 'entries': len(self.data),
+              'pinned groups': len(self.pinned), 'hits': self.hits,
+              'misses': self.misses, 'evictions': self.evictions}
 
   # ---------------------------------------------------------------------------
   #
-  def time_stamp(self):
+  def reset_statistics(self):
 
-    t = self.time
-    self.time = t + 1
-    return t
+    with self._lock:
+      self.hits = self.misses = self.evictions = 0
 
 # -----------------------------------------------------------------------------
 #
 class Cached_Data:
 
-  def __init__(self, key, value, size, description, time_stamp, groups):
+  def __init__(self, key, value, size, description, groups):
 
     self.key = key
     self.value = value
     self.size = size
     self.description = description
-    self.last_access = time_stamp
     self.groups = groups
+
+# -----------------------------------------------------------------------------
+# Number of bytes of memory held by an array.  A view counts the full array
+# it references since that is kept in memory.  Arrays mapped from a file count
+# as zero since the operating system can drop their pages at any time.
+#
+def array_bytes(a):
+
+  from numpy import memmap, ndarray
+  b = a
+  while isinstance(b, ndarray) and b.base is not None:
+    b = b.base
+  if isinstance(b, memmap) or type(b).__name__ == 'mmap':
+    return 0
+  if isinstance(b, ndarray):
+    return b.nbytes
+  return a.nbytes
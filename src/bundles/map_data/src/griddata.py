@@ -83,6 +83,10 @@ class GridData:
     Integer channel number for multi-channel data (e.g. light microscopy).
     Default None.
   '''
+  # Whether read_matrix() can be called from several threads at once, for
+  # example when each read opens its own file handle.
+  thread_safe_read = False
+
   def __init__(self, size,
                value_type = float32,
                origin = (0,0,0),
@@ -132,6 +136,7 @@ class GridData:
     self.channel = channel		# Integer, channel number for multi-channel data
 
     self.data_cache = None
+    self._pyramid = None                # Multiresolution copy, False if none.
 
     self.writable = False
     self.change_callbacks = []
@@ -297,9 +302,14 @@ class GridData:
       ijk_size = self.size
 
     m = self.cached_data(ijk_origin, ijk_size, ijk_step)
+    if m is None and not from_cache_only and tuple(ijk_step) != (1,1,1):
+      m = self.pyramid_matrix(ijk_origin, ijk_size, ijk_step, progress)
+      if m is not None:
+        self.cache_data(m, ijk_origin, ijk_size, ijk_step)
     if m is None and not from_cache_only:
       try:
-        m = self.read_matrix(ijk_origin, ijk_size, ijk_step, progress)
+        with self.read_lock:
+          m = self.read_matrix(ijk_origin, ijk_size, ijk_step, progress)
       except IOError as e:
         import errno
         if e.errno == errno.ENOENT:
@@ -317,6 +327,32 @@ class GridData:
 
     return m
     
+  # ---------------------------------------------------------------------------
+  #
+  @property
+  def read_lock(self):
+    '''
+    Lock held while values are read with read_matrix() so that threads
+    reading in the background and the main thread never read at the same
+    time.  Most file readers are not thread safe.  Grids from the same file
+    share a lock since they may share an open file handle.  Grids with
+    thread_safe_read true are not locked.
+    '''
+    if self.thread_safe_read:
+      from contextlib import nullcontext
+      return nullcontext()
+    lock = getattr(self, '_read_lock', None)
+    if lock is None:
+      path = self.path
+      key = tuple(path) if isinstance(path, (list, tuple)) else path
+      from threading import RLock
+      with _read_locks_lock:
+        lock = getattr(self, '_read_lock', None)
+        if lock is None:
+          lock = _read_locks.setdefault(key, RLock()) if key else RLock()
+          self._read_lock = lock
+    return lock
+
   # ---------------------------------------------------------------------------
   #
   def read_matrix(self, ijk_origin = (0,0,0), ijk_size = None,
@@ -337,6 +373,23 @@ class GridData:
 
     raise NotImplementedError('Grid %s has no read_matrix() routine' % self.name)
     
+  # ---------------------------------------------------------------------------
+  # Read a subsampled matrix from a multiresolution copy of the data kept in
+  # the cache directory.  The copy is built in a thread the first time it is
+  # needed.  Returns None if the data is too small, the step is not a multiple
+  # of 2, or the copy is not built yet.
+  #
+  def pyramid_matrix(self, ijk_origin, ijk_size, ijk_step, progress = None):
+
+    p = self._pyramid
+    if p is None:
+      from .pyramid import map_pyramid
+      p = map_pyramid(self)
+      self._pyramid = False if p is None else p
+    if p is False:
+      return None
+    return p.matrix(ijk_origin, ijk_size, ijk_step, progress)
+
   # ---------------------------------------------------------------------------
   #
   def _read_full_planes(self, ijk_origin, ijk_size, ijk_step, progress):
@@ -456,8 +509,8 @@ class GridData:
       return
 
     key = (self, tuple(origin), tuple(size), tuple(step))
-    elements = m.size
-    bytes = elements * m.itemsize
+    from .datacache import array_bytes
+    bytes = array_bytes(m)
     groups = [self]
     descrip = self.data_description(origin, size, step)
     dcache.cache_data(key, m, bytes, descrip, groups)
@@ -510,6 +563,10 @@ class GridData:
   #
   def values_changed(self):
 
+    p = self._pyramid
+    if p:
+      p.cancel()                # Stop building pyramid in thread.
+    self._pyramid = False       # Values no longer match file.
     self.call_callbacks('values changed')
 
   # ---------------------------------------------------------------------------
@@ -526,6 +583,13 @@ class GridData:
     for cb in self.change_callbacks:
       cb(reason)
     
+# -----------------------------------------------------------------------------
+# Read locks shared by grids from the same file, keyed by path.
+#
+from threading import Lock
+_read_locks_lock = Lock()
+_read_locks = {}
+
 # -----------------------------------------------------------------------------
 # Return 3 by 4 matrix where first 3 columns give rotation and last column
 # is translation.
@@ -53,6 +53,7 @@ class MRC_Data:
     
     self.data_offset = file.tell()
     file.close()
+    self._mappable = True       # False if mapping the file failed.
     
     # Axes permutation.
     # Names c,r,s refer to fast, medium, slow file matrix axes.
@@ -280,16 +281,45 @@ class MRC_Data:
     crs_size = [ijk_size[a] for a in self.crs_to_ijk]
     crs_step = [ijk_step[a] for a in self.crs_to_ijk]
 
-    from ..readarray import read_array
-    matrix = read_array(self.path, self.data_offset,
-                        crs_origin, crs_size, crs_step,
-                        self.matrix_size, self.element_type, self.swap_bytes,
-                        progress)
+    mmap = self.memory_map()
+    if mmap is None:
+      from ..readarray import read_array
+      matrix = read_array(self.path, self.data_offset,
+                          crs_origin, crs_size, crs_step,
+                          self.matrix_size, self.element_type, self.swap_bytes,
+                          progress)
+    else:
+      from ..readarray import read_mapped_array
+      matrix = read_mapped_array(mmap, crs_origin, crs_size, crs_step,
+                                 progress)
+      del mmap    # Unmap the file now, the matrix is a copy.
     if not matrix is None:
       matrix = self.permute_matrix_to_xyz_axis_order(matrix)
     
     return matrix
 
+  # ---------------------------------------------------------------------------
+  # Memory map the voxel values with file (slow,medium,fast) axis order.
+  # Returns None if bytes need swapping or the file cannot be mapped, in which
+  # case values are read from the file with seek and read calls.  The file is
+  # mapped again for each read and not kept mapped, so the file can still be
+  # replaced or removed (Windows does not allow that for mapped files) and a
+  # file truncated by another program gives an error instead of a crash
+  # (SIGBUS) when mapped memory past its end is used.
+  #
+  def memory_map(self):
+
+    if self.swap_bytes or not self._mappable:
+      return None
+
+    from ..readarray import map_array
+    m = map_array(self.path, self.data_offset, self.matrix_size,
+                  self.element_type)
+    if m is None:
+      self._mappable = False
+
+    return m
+
   # ---------------------------------------------------------------------------
   #
   def permute_matrix_to_xyz_axis_order(self, matrix):
@@ -18,6 +18,8 @@ from .. import GridData
 #
 class MRCGrid(GridData):
 
+  thread_safe_read = True       # Each read opens or maps the file itself.
+
   def __init__(self, path, file_type = 'mrc'):
 
     from . import mrc_format
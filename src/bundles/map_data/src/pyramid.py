@@ -0,0 +1,300 @@
+# vim: set expandtab shiftwidth=4 softtabstop=4:
+
+# === UCSF ChimeraX Copyright ===
+# Copyright 2016 Regents of the University of California.
+# All rights reserved.  This software provided pursuant to a
+# license agreement containing restrictions on its disclosure,
+# duplication and use.  For details see:
+# http://www.rbvi.ucsf.edu/chimerax/docs/licensing.html
+# This notice must be embedded in or attached to all copies,
+# including partial copies, of the software or any revisions
+# or derivations thereof.
+# === UCSF ChimeraX Copyright ===
+
+# -----------------------------------------------------------------------------
+# Multiresolution pyramid of a large map stored in the ChimeraX cache directory.
+#
+# Volume display of a huge map uses a coarse step (2, 4, 8, ...) so that the
+# displayed voxel count stays under a limit.  Reading every Nth grid point
+# from the map file requires reading much of the file each time the step
+# changes.  Instead the first time a coarse step is requested the map is read
+# once and copies subsampled by 2, 4 and 8 are saved as numpy files.  Later
+# coarse reads, including in later ChimeraX sessions, memory map the level
+# with the largest subsampling that divides the requested step.
+#
+# The pyramid is built in a background thread.  Until it is ready coarse
+# steps are read from the map file as before, so the first display of a huge
+# map is not delayed.  Pyramids are removed, least recently used first, when
+# the pyramid cache directory exceeds max_pyramid_cache_bytes.
+#
+# Levels hold every Nth grid point (not averages) so values are identical to
+# reading the map file with that step.  A pyramid is identified by the map
+# file paths, sizes and modification times so it is rebuilt if a file changes.
+#
+PYRAMID_LEVELS = (2, 4, 8)
+PYRAMID_VERSION = 1
+min_pyramid_voxels = 2**27      # Only build pyramids for maps this large.
+max_pyramid_cache_bytes = 16 * 2**30    # Disk space for all pyramids.
+
+# -----------------------------------------------------------------------------
+#
+class MapPyramid:
+
+  def __init__(self, grid_data, directory):
+
+    self.grid_data = grid_data
+    self.directory = directory
+    self._levels = None           # Subsampling -> numpy memmap
+    self._failed = False          # Could not build or read pyramid.
+
+  # ---------------------------------------------------------------------------
+  #
+  def cancel(self):
+
+    self._failed = True         # Also stops a build in progress.
+
+  # ---------------------------------------------------------------------------
+  # Return the matrix for a subregion from the pyramid, or None if no level
+  # is compatible with the requested origin and step or the pyramid is still
+  # being built.
+  #
+  def matrix(self, ijk_origin, ijk_size, ijk_step, progress = None):
+
+    f = self.level_for_step(ijk_origin, ijk_step)
+    if f is None:
+      return None
+
+    levels = self.levels()
+    if levels is None:
+      return None
+
+    a = levels[f]
+    origin = [i//f for i in ijk_origin]
+    size = [(s+f-1)//f for s in ijk_size]
+    step = [s//f for s in ijk_step]
+    m = a[origin[2]:origin[2]+size[2]:step[2],
+          origin[1]:origin[1]+size[1]:step[1],
+          origin[0]:origin[0]+size[0]:step[0]]
+    return m
+
+  # ---------------------------------------------------------------------------
+  #
+  def level_for_step(self, ijk_origin, ijk_step):
+
+    for f in reversed(PYRAMID_LEVELS):
+      if ([s for s in ijk_step if s % f] or
+          [o for o in ijk_origin if o % f]):
+        continue
+      return f
+    return None
+
+  # ---------------------------------------------------------------------------
+  # Memory map the pyramid levels.  If there is no pyramid start building it
+  # in a thread and return None.
+  #
+  def levels(self):
+
+    if self._levels is None and not self._failed:
+      try:
+        levels = self._read_levels()
+      except (OSError, ValueError):
+        levels = None
+        self._failed = True
+      if levels is None and not self._failed:
+        self._start_build()
+      self._levels = levels
+    return self._levels
+
+  # ---------------------------------------------------------------------------
+  #
+  def _read_levels(self):
+
+    import os
+    if not os.path.isdir(self.directory):
+      return None
+    from numpy import load
+    levels = {}
+    for f in PYRAMID_LEVELS:
+      levels[f] = load(self._level_path(f), mmap_mode = 'r')
+    try:
+      os.utime(self.directory)      # Record use for least recently used removal.
+    except OSError:
+      pass
+    return levels
+
+  # ---------------------------------------------------------------------------
+  #
+  def _start_build(self):
+
+    d = self.directory
+    with _builds_lock:
+      if d in _builds:
+        return          # Another grid for the same file is building it.
+      from threading import Thread
+      t = Thread(target = self._build_thread, daemon = True,
+                 name = 'map pyramid %s' % self.grid_data.name)
+      _builds[d] = t
+    t.start()
+
+  # ---------------------------------------------------------------------------
+  #
+  def _build_thread(self):
+
+    try:
+      self._build()
+      trim_pyramid_cache(keep = self.directory)
+    except Exception:
+      self._failed = True
+    finally:
+      with _builds_lock:
+        _builds.pop(self.directory, None)
+
+  # ---------------------------------------------------------------------------
+  #
+  def _level_path(self, f, directory = None):
+
+    import os.path
+    d = self.directory if directory is None else directory
+    return os.path.join(d, 'level_%d.npy' % f)
+
+  # ---------------------------------------------------------------------------
+  # Read the full map in slabs of planes and write every Nth grid point of
+  # each slab to the level files.  The levels are written in a temporary
+  # directory that is renamed when complete so a partial pyramid is never used.
+  # Runs in a thread, reading each slab with the grid read lock held.
+  #
+  def _build(self):
+
+    g = self.grid_data
+    isz, jsz, ksz = g.size
+    fmax = max(PYRAMID_LEVELS)
+    nbytes = sum(g.value_type.itemsize * isz * jsz * ksz // f**3
+                 for f in PYRAMID_LEVELS)
+    if nbytes > max_pyramid_cache_bytes // 2:
+      raise OSError('Map pyramid larger than cache size limit')
+    import os, shutil
+    parent = os.path.dirname(self.directory)
+    os.makedirs(parent, exist_ok = True)
+    if shutil.disk_usage(parent).free < 2*nbytes:
+      raise OSError('Not enough disk space for map pyramid')
+
+    from threading import get_ident
+    tmp_dir = self.directory + '.tmp%d_%d' % (os.getpid(), get_ident())
+    os.makedirs(tmp_dir, exist_ok = True)
+    try:
+      from numpy.lib.format import open_memmap
+      levels = {f: open_memmap(self._level_path(f, tmp_dir), mode = 'w+',
+                               dtype = g.value_type,
+                               shape = ((ksz+f-1)//f, (jsz+f-1)//f, (isz+f-1)//f))
+                for f in PYRAMID_LEVELS}
+      for k in range(0, ksz, fmax):
+        if self._failed:
+          raise OSError('Map values changed while building pyramid')
+        kn = min(fmax, ksz-k)
+        with g.read_lock:
+          slab = g.read_matrix((0,0,k), (isz,jsz,kn), (1,1,1), None)
+        for f, a in levels.items():
+          a[k//f:(k+kn+f-1)//f] = slab[::f,::f,::f]
+      for a in levels.values():
+        a.flush()
+      del levels
+      os.replace(tmp_dir, self.directory)
+    except BaseException:
+      shutil.rmtree(tmp_dir, ignore_errors = True)
+      raise
+
+# -----------------------------------------------------------------------------
+# Return the pyramid for a map, or None if it is too small, not read from a
+# file, or there is no cache directory.
+#
+def map_pyramid(grid_data):
+
+  g = grid_data
+  if g.writable or not g.path:
+    return None
+  isz, jsz, ksz = g.size
+  if isz*jsz*ksz < min_pyramid_voxels:
+    return None
+  directory = pyramid_directory(g)
+  if directory is None:
+    return None
+  return MapPyramid(g, directory)
+
+_builds = {}            # Pyramid directory -> thread building it
+from threading import Lock
+_builds_lock = Lock()
+
+# -----------------------------------------------------------------------------
+# Remove least recently used pyramids until the pyramid cache directory uses
+# at most max_bytes.  Partial pyramids left by a build that did not finish
+# are removed after a day.
+#
+def trim_pyramid_cache(max_bytes = None, keep = None):
+
+  cache_dir = pyramid_cache_directory()
+  if cache_dir is None:
+    return
+  if max_bytes is None:
+    max_bytes = max_pyramid_cache_bytes
+  import os, shutil, time
+  if not os.path.isdir(cache_dir):
+    return
+  pyramids = []
+  for e in os.scandir(cache_dir):
+    if not e.is_dir():
+      continue
+    try:
+      mtime = e.stat().st_mtime
+      size = sum(f.stat().st_size for f in os.scandir(e.path))
+    except OSError:
+      continue
+    if '.tmp' in e.name:
+      if mtime < time.time() - 24*3600:
+        shutil.rmtree(e.path, ignore_errors = True)
+      continue
+    pyramids.append((mtime, size, e.path))
+  total = sum(size for mtime, size, path in pyramids)
+  pyramids.sort()
+  for mtime, size, path in pyramids:
+    if total <= max_bytes:
+      break
+    if path == keep:
+      continue
+    # On Windows a pyramid memory mapped by another session can't be removed.
+    shutil.rmtree(path, ignore_errors = True)
+    total -= size
+
+# -----------------------------------------------------------------------------
+#
+def pyramid_cache_directory():
+
+  try:
+    from chimerax import app_dirs
+  except ImportError:
+    return None
+  import os.path
+  return os.path.join(app_dirs.user_cache_dir, 'map_pyramid')
+
+# -----------------------------------------------------------------------------
+#
+def pyramid_directory(grid_data):
+
+  cache_dir = pyramid_cache_directory()
+  if cache_dir is None:
+    return None
+
+  g = grid_data
+  paths = g.path if isinstance(g.path, (list, tuple)) else [g.path]
+  import os
+  files = []
+  for path in paths:
+    try:
+      stat = os.stat(path)
+    except OSError:
+      return None
+    files.append((os.path.abspath(path), stat.st_size, stat.st_mtime_ns))
+  key = repr((PYRAMID_VERSION, files, g.file_type, g.grid_id,
+              g.size, g.value_type.str))
+  from hashlib import sha1
+  name = sha1(key.encode('utf-8')).hexdigest()
+  return os.path.join(cache_dir, name)
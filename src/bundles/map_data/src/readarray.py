@@ -94,6 +94,70 @@ def read_full_array(path, byte_offset, size, type, byte_swap,
 
     return a
 
+# -----------------------------------------------------------------------------
+# Memory map an uncompressed array stored in a binary file.  Returns a
+# read-only numpy.memmap with zyx index order or None if the file cannot be
+# mapped.  Values are paged in from the file as they are accessed.
+#
+def map_array(path, byte_offset, size, type):
+
+    shape = tuple(reversed(size))
+    from numpy import memmap
+    try:
+        m = memmap(path, dtype = type, mode = 'r', offset = byte_offset,
+                   shape = shape)
+    except (OSError, ValueError):
+        # File too short, too large for address space, or not mappable.
+        return None
+    return m
+
+# -----------------------------------------------------------------------------
+# Copy a subregion of a memory mapped array into a new contiguous array,
+# reading planes on a thread pool since numpy copies release the global
+# interpreter lock.  The result is a copy, not a view, so the file mapping
+# can be closed as soon as this returns.
+#
+def read_mapped_array(mmap, ijk_origin, ijk_size, ijk_step,
+                      progress = None, max_threads = 8):
+
+    io, jo, ko = ijk_origin
+    isize, jsize, ksize = ijk_size
+    istep, jstep, kstep = ijk_step
+    region = mmap[ko:ko+ksize:kstep, jo:jo+jsize:jstep, io:io+isize:istep]
+
+    matrix = allocate_array(ijk_size, mmap.dtype, ijk_step, progress)
+    kcount = matrix.shape[0]
+
+    def copy_planes(k1, k2):
+        matrix[k1:k2] = region[k1:k2]
+        return k2
+
+    import os
+    threads = max(1, min(max_threads, os.cpu_count() or 1, kcount))
+    if threads == 1:
+        copy_planes(0, kcount)
+        return matrix
+
+    # Several blocks per thread so progress can be reported.
+    kblock = max(1, kcount // (4*threads))
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+    with ThreadPoolExecutor(max_workers = threads) as pool:
+        futures = [pool.submit(copy_planes, k, min(k+kblock, kcount))
+                   for k in range(0, kcount, kblock)]
+        try:
+            done = 0
+            for f in as_completed(futures):
+                f.result()
+                done += 1
+                if progress:
+                    progress.plane(min(done*kblock, kcount) - 1)
+        except BaseException:
+            for f in futures:
+                f.cancel()
+            raise
+
+    return matrix
+
 # -----------------------------------------------------------------------------
 # Read ascii float values on as many lines as needed to get count values.
 #
@@ -0,0 +1,52 @@
+# Check that deferred volume operations give the same values as computing the
+# whole map, and that they are recomputed when the input map values change.
+from chimerax.core.commands import run
+from chimerax.map import volume_from_grid_data
+from chimerax.map_data import ArrayGridData
+from numpy import allclose, float32, random
+random.seed(1)
+a = random.random((37, 45, 51)).astype(float32)
+v = volume_from_grid_data(ArrayGridData(a, name = 'a'), session)
+b = volume_from_grid_data(ArrayGridData(random.random(a.shape).astype(float32), name = 'b'), session)
+
+# Each operation is applied to the result of the previous one, starting with map a.
+operations = [['volume gaussian {0} sDev 2'],
+              ['volume laplacian {0}'],
+              ['volume median {0} binSize 3'],
+              ['volume scale {0} shift 1 factor 2'],
+              ['volume threshold {0} minimum 0.5 set 0'],
+              ['volume scale {0} factor 3', 'volume threshold {0} minimum 1 set 0'],
+              ['volume add {0},#%s scaleFactors 1,-2' % b.id_string]]
+
+def run_operations(ops, deferred):
+	m = v
+	for op in ops:
+		m = run(session, op.format('#' + m.id_string) + (' deferred true' if deferred else ''))
+	return m
+
+def check(ops, eager, lazy):
+	m, dm = eager.full_matrix(), lazy.full_matrix()
+	if m.shape != dm.shape or not allclose(m, dm, rtol = 1e-5, atol = 1e-5):
+		raise SystemExit('Deferred "%s" values differ from whole map values'
+			% ' ; '.join(ops))
+
+results = []
+for ops in operations:
+	lazy = run_operations(ops, True)
+	check(ops, run_operations(ops, False), lazy)
+	results.append((ops, lazy))
+
+# Deferred maps are recomputed when input values change.
+a *= 2
+v.data.values_changed()
+for ops, lazy in results:
+	check(ops, run_operations(ops, False), lazy)
+
+# Closed deferred maps no longer get input map change callbacks.
+ncb = len(v.data.change_callbacks)
+run(session, 'close #%s' % results[0][1].id_string)
+del results, lazy
+import gc
+gc.collect()
+if len(v.data.change_callbacks) != ncb - 1:
+	raise SystemExit('Closed deferred map still has a change callback on its input map')
@@ -0,0 +1,32 @@
+# Check that tiled volume operations give the same values as filtering the whole map.
+# Small bricks and a map size that is not a multiple of the brick size exercise
+# bricks at the map edges and the halo around each brick.
+from chimerax.core.commands import run
+from chimerax.map import volume_from_grid_data
+from chimerax.map_data import ArrayGridData
+from chimerax.map_filter import tiled
+from numpy import allclose, float32, random
+tiled.default_brick_size = 16
+random.seed(1)
+a = random.random((37, 45, 51)).astype(float32)
+v = volume_from_grid_data(ArrayGridData(a, name = 'random'), session)
+spec = '#%s' % v.id_string
+
+operations = ['volume gaussian %s sDev 2' % spec,
+              'volume gaussian %s sDev 1,2,3 step 2' % spec,
+              'volume laplacian %s' % spec,
+              'volume median %s binSize 3' % spec,
+              'volume median %s binSize 5 iterations 2' % spec,
+              'volume scale %s shift 1 factor 2' % spec,
+              'volume scale %s sd 1' % spec,
+              'volume threshold %s minimum 0.5 set 0' % spec]
+
+for op in operations:
+	m = run(session, op).full_matrix()
+	tm = run(session, op + ' tiled true').full_matrix()
+	if m.shape != tm.shape:
+		raise SystemExit('Tiled "%s" map size %s differs from whole map size %s'
+			% (op, tm.shape, m.shape))
+	if not allclose(m, tm, rtol = 1e-5, atol = 1e-5):
+		raise SystemExit('Tiled "%s" values differ from whole map values,'
+			' maximum difference %.3g' % (op, abs(m - tm).max()))
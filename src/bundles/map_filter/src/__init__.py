@@ -13,6 +13,7 @@ from .vopcommand import register_volume_filtering_subcommands
 from .gaussian import gaussian_convolve
 from .laplace import laplacian
 from .fourier import fourier_transform
+from .fftbackend import fft_backend, set_default_fft_backend, register_fft_backend
 from .median import median_filter
 from .permute import permute_axes
 from .zone import zone_volume
@@ -0,0 +1,206 @@
+# === UCSF ChimeraX Copyright ===
+# Copyright 2016 Regents of the University of California.
+# All rights reserved.  This software provided pursuant to a
+# license agreement containing restrictions on its disclosure,
+# duplication and use.  For details see:
+# http://www.rbvi.ucsf.edu/chimerax/docs/licensing.html
+# This notice must be embedded in or attached to all copies,
+# including partial copies, of the software or any revisions
+# or derivations thereof.
+# === UCSF ChimeraX Copyright ===
+
+# -----------------------------------------------------------------------------
+# Deferred volume operations.  Instead of computing a complete new map an
+# operation makes a GridData that computes values from its input grids only
+# when a region is read, for example the region and step being displayed, or
+# the planes being written to a file.  A chain of deferred operations forms an
+# expression graph of grids.  Consecutive pointwise operations are fused into
+# one grid that reads its input once and applies all the operations to that
+# array, so the intermediate maps are never computed or stored.
+#
+from chimerax.map_data import GridData
+
+# -----------------------------------------------------------------------------
+#
+class ElementwiseGrid(GridData):
+  '''
+  Grid with values computed by functions f(array) -> array that act on each
+  value independently.  The functions may modify the array they are given.
+  '''
+  def __init__(self, grid_data, array_function, value_type = None, name = None):
+
+    source, functions = _fused_source(grid_data)
+    self.source = source
+    self.functions = functions + [array_function]
+    g = grid_data
+    vt = g.value_type if value_type is None else value_type
+    settings = g.settings(value_type = vt, name = (name or g.name))
+    GridData.__init__(self, **settings)
+    _forward_values_changed(self, [self.source])
+
+  # ---------------------------------------------------------------------------
+  #
+  def read_matrix(self, ijk_origin, ijk_size, ijk_step, progress):
+
+    m = self.source.matrix(ijk_origin, ijk_size, ijk_step, progress)
+    m = m.copy()        # Source array may be cached so don't modify it.
+    for f in self.functions:
+      m = f(m)
+    if m.dtype != self.value_type:
+      m = m.astype(self.value_type)
+    return m
+
+# -----------------------------------------------------------------------------
+# Return the grid and list of pointwise functions that compute the grid values.
+# Subregions of pointwise grids are the same functions applied to a subregion
+# of the source grid.
+#
+def _fused_source(g):
+
+  from chimerax.map_data import GridSubregion
+  if isinstance(g, ElementwiseGrid):
+    return g.source, list(g.functions)
+  elif isinstance(g, GridSubregion) and isinstance(g.full_data, ElementwiseGrid):
+    e = g.full_data
+    ijk_max = [o + (s-1)*st for o,s,st in zip(g.ijk_offset, g.size, g.ijk_step)]
+    sub = GridSubregion(e.source, g.ijk_offset, ijk_max, g.ijk_step)
+    return sub, list(e.functions)
+  return g, []
+
+# -----------------------------------------------------------------------------
+# Report changed values of a deferred grid when the values of a grid it is
+# computed from change, so volumes showing it clear cached values and redraw.
+# The callback refers to the deferred grid weakly and is removed when that grid
+# is deleted, so sources don't keep closed deferred maps.
+#
+def _forward_values_changed(grid, sources):
+
+  from weakref import ref, finalize
+  grid_ref = ref(grid)
+  def values_changed_cb(reason, grid_ref = grid_ref):
+    g = grid_ref()
+    if g is not None and reason == 'values changed':
+      g.values_changed()
+
+  from chimerax.map_data import GridSubregion
+  full = {}
+  for g in sources:
+    while isinstance(g, GridSubregion):
+      g = g.full_data   # Subregion grids do not report changes of their full grid.
+    full[id(g)] = g
+  full = list(full.values())
+  for g in full:
+    g.add_change_callback(values_changed_cb)
+  finalize(grid, _remove_change_callback, full, values_changed_cb)
+
+# -----------------------------------------------------------------------------
+#
+def _remove_change_callback(grids, cb):
+
+  for g in grids:
+    if cb in g.change_callbacks:
+      g.remove_change_callback(cb)
+
+# -----------------------------------------------------------------------------
+#
+class CombinedGrid(GridData):
+  '''
+  Pointwise sum, difference, product, maximum or minimum of scaled grids
+  that have the same size and spacing.
+  '''
+  def __init__(self, grids, operation, scales, value_type, name):
+
+    self.grids = grids
+    self.operation = operation
+    self.scales = scales
+    settings = grids[0].settings(value_type = value_type, name = name)
+    GridData.__init__(self, **settings)
+    _forward_values_changed(self, grids)
+
+  # ---------------------------------------------------------------------------
+  #
+  def read_matrix(self, ijk_origin, ijk_size, ijk_step, progress):
+
+    import numpy
+    op = getattr(numpy, self.operation)
+    from numpy import dtype, float32
+    vt = self.value_type if dtype(self.value_type).kind == 'f' else float32
+    m = None
+    for g, s in zip(self.grids, self.scales):
+      gm = g.matrix(ijk_origin, ijk_size, ijk_step, progress).astype(vt)
+      if s != 1:
+        numpy.multiply(gm, s, gm)
+      if m is None:
+        m = gm
+      else:
+        op(m, gm, m)
+    if m.dtype != self.value_type:
+      m = m.astype(self.value_type)
+    return m
+
+# -----------------------------------------------------------------------------
+#
+class FilteredGrid(GridData):
+  '''
+  Grid with values computed by a neighborhood filter f(array) -> array of
+  the same shape that does not modify its argument.  The halo (i,j,k) is the
+  number of grid points the filter reaches.  A region is computed by
+  filtering it at full resolution with a border of halo grid points which
+  gives the same values as filtering the whole map.  Large regions are
+  filtered in slabs of planes to limit memory use.  The filter acts on full
+  resolution grid points, so a region read with step greater than 1 is still
+  filtered at step 1 and then subsampled.  This gives the same values at any
+  step, but reading a coarse step costs as much as reading every grid point
+  of the region.
+  '''
+  slab_planes = 64
+
+  def __init__(self, grid_data, array_filter, halo, value_type = None, name = None):
+
+    self.source = g = grid_data
+    self.array_filter = array_filter
+    self.halo = tuple(halo)
+    vt = g.value_type if value_type is None else value_type
+    settings = g.settings(value_type = vt, name = (name or g.name))
+    GridData.__init__(self, **settings)
+    _forward_values_changed(self, [g])
+
+  # ---------------------------------------------------------------------------
+  #
+  def read_matrix(self, ijk_origin, ijk_size, ijk_step, progress):
+
+    i0, j0, k0 = ijk_origin
+    isz, jsz, ksz = ijk_size
+    kstep = ijk_step[2]
+    shape = [(s+st-1)//st for s,st in zip(ijk_size, ijk_step)][::-1]
+    from numpy import empty
+    m = empty(shape, self.value_type)
+    kslab = max(1, self.slab_planes // kstep) * kstep
+    for k in range(0, ksz, kslab):
+      size = (isz, jsz, min(kslab, ksz-k))
+      fm = self._filtered_region((i0, j0, k0+k), size, ijk_step)
+      m[k//kstep:k//kstep+fm.shape[0]] = fm
+    return m
+
+  # ---------------------------------------------------------------------------
+  #
+  def _filtered_region(self, ijk_origin, ijk_size, ijk_step):
+
+    read = []
+    for o, s, h, n in zip(ijk_origin, ijk_size, self.halo, self.size):
+      r0, r1 = max(0, o-h), min(n, o+s+h)
+      if r1 - r0 < 2*h + 1:
+        # Filters that limit their reach by the array size, like Gaussian
+        # convolution, need at least twice the halo to reach as far as
+        # they would in the whole map.
+        r0 = max(0, min(r0, n - (2*h+1)))
+        r1 = min(n, r0 + 2*h + 1)
+      read.append((r0, r1))
+
+    origin = [r0 for r0,r1 in read]
+    size = [r1-r0 for r0,r1 in read]
+    m = self.source.matrix(origin, size, (1,1,1))
+    fm = self.array_filter(m)
+    (i0, j0, k0) = [o-r0 for o,(r0,r1) in zip(ijk_origin, read)]
+    (isz, jsz, ksz), (ist, jst, kst) = ijk_size, ijk_step
+    return fm[k0:k0+ksz:kst, j0:j0+jsz:jst, i0:i0+isz:ist]
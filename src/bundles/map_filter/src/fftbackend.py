@@ -0,0 +1,138 @@
+# === UCSF ChimeraX Copyright ===
+# Copyright 2016 Regents of the University of California.
+# All rights reserved.  This software provided pursuant to a
+# license agreement containing restrictions on its disclosure,
+# duplication and use.  For details see:
+# http://www.rbvi.ucsf.edu/chimerax/docs/licensing.html
+# This notice must be embedded in or attached to all copies,
+# including partial copies, of the software or any revisions
+# or derivations thereof.
+# === UCSF ChimeraX Copyright ===
+
+# -----------------------------------------------------------------------------
+# Fast Fourier transforms used by map filters.  A backend computes transforms
+# with the same arguments and results as numpy.fft.  The scipy backend keeps
+# single precision (float32 values give complex64 transforms), uses multiple
+# threads, and reuses the FFT plans it caches.  The numpy backend is used if
+# scipy is not available.  Other FFT libraries can be added with
+# register_fft_backend().
+#
+class NumpyFFT:
+
+  name = 'numpy'
+
+  def __init__(self):
+    import numpy
+    # Numpy before version 2 computes all transforms in double precision.
+    self.single_precision = (int(numpy.__version__.split('.')[0]) >= 2)
+
+  def rfft(self, a, n = None, axis = -1, nthread = None):
+    from numpy.fft import rfft
+    return rfft(a, n = n, axis = axis)
+
+  def irfft(self, a, n = None, axis = -1, nthread = None):
+    from numpy.fft import irfft
+    return irfft(a, n = n, axis = axis)
+
+  def fftn(self, a, nthread = None):
+    from numpy.fft import fftn
+    return fftn(a)
+
+  def rfftn(self, a, nthread = None):
+    from numpy.fft import rfftn
+    return rfftn(a)
+
+  def irfftn(self, a, s = None, nthread = None):
+    from numpy.fft import irfftn
+    return irfftn(a, s = s)
+
+  def fast_size(self, n):
+    from .gaussian import efficient_fft_size
+    return efficient_fft_size(n)
+
+# -----------------------------------------------------------------------------
+#
+class ScipyFFT:
+
+  name = 'scipy'
+  single_precision = True
+
+  def __init__(self):
+    import scipy.fft
+    self._fft = scipy.fft
+
+  def rfft(self, a, n = None, axis = -1, nthread = None):
+    return self._fft.rfft(a, n = n, axis = axis, workers = _thread_count(nthread))
+
+  def irfft(self, a, n = None, axis = -1, nthread = None):
+    return self._fft.irfft(a, n = n, axis = axis, workers = _thread_count(nthread))
+
+  def fftn(self, a, nthread = None):
+    return self._fft.fftn(a, workers = _thread_count(nthread))
+
+  def rfftn(self, a, nthread = None):
+    return self._fft.rfftn(a, workers = _thread_count(nthread))
+
+  def irfftn(self, a, s = None, nthread = None):
+    return self._fft.irfftn(a, s = s, workers = _thread_count(nthread))
+
+  def fast_size(self, n):
+    return self._fft.next_fast_len(n, real = True)
+
+# -----------------------------------------------------------------------------
+#
+def _thread_count(nthread):
+  if nthread is None:
+    from multiprocessing import cpu_count
+    nthread = cpu_count()//2
+  return max(1, nthread)
+
+# -----------------------------------------------------------------------------
+#
+_backend_classes = [ScipyFFT, NumpyFFT]  # In order of preference
+_backends = {}
+_default_backend_name = None
+
+def register_fft_backend(backend_class, preferred = True):
+  '''
+  Add an FFT backend class with the methods of NumpyFFT.  It is created
+  when first used, and if creating it raises ImportError it is not used.
+  '''
+  _backend_classes.insert(0 if preferred else len(_backend_classes), backend_class)
+
+def fft_backend(name = None):
+  '''
+  Return the FFT backend with the given name, or the default backend.
+  The default is the first registered backend that is available.
+  '''
+  if name is None:
+    name = _default_backend_name
+  for bc in _backend_classes:
+    if name is None or bc.name == name:
+      b = _backends.get(bc.name)
+      if b is None:
+        try:
+          b = bc()
+        except ImportError:
+          continue
+        _backends[bc.name] = b
+      return b
+  raise ValueError('FFT backend "%s" is not available' % name)
+
+def set_default_fft_backend(name):
+  '''Set the FFT backend used by map filters.  Name None restores the default.'''
+  global _default_backend_name
+  if name is not None:
+    fft_backend(name)     # Check it is available.
+  _default_backend_name = name
+
+def fft_size(n):
+  '''Smallest size >= n for which the default backend FFT is fast.'''
+  b = fft_backend()
+  key = (b.name, n)
+  s = _fast_sizes.get(key)
+  if s is None:
+    _fast_sizes[key] = s = b.fast_size(n)
+  return s
+
+_fast_sizes = {}
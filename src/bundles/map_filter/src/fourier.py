@@ -17,8 +17,8 @@ def fourier_transform(v, step = None, subregion = None, model_id = None,
                       phase = False):
 
   m = v.matrix(step = step, subregion = subregion)
-  from numpy.fft import fftn
-  cftm = fftn(m)      # Complex128 result, same array size as input
+  from .fftbackend import fft_backend
+  cftm = fft_backend().fftn(m)  # Complex result, same array size as input
 
   from numpy import absolute, angle, float32
   if phase:
@@ -17,10 +17,12 @@
 #
 def gaussian_convolve(volume, sdev, step = 1, subregion = None,
                       value_type = None, invert = False,
-                      modelId = None, task = None, session = None):
+                      modelId = None, task = None, session = None, tiled = False,
+                      deferred = False):
 
   gg = gaussian_grid(volume, sdev, step, subregion, value_type = value_type,
-                     invert = invert, task = task)
+                     invert = invert, task = task, tiled = tiled,
+                     deferred = deferred)
   from chimerax.map import volume_from_grid_data
   gv = volume_from_grid_data(gg, session, model_id = modelId)
   gv.copy_settings_from(volume, copy_region = False, copy_colors = False, copy_thresholds = False)
@@ -32,7 +34,8 @@ def gaussian_convolve(volume, sdev, step = 1, subregion = None,
 # -----------------------------------------------------------------------------
 #
 def gaussian_grid(volume, sdev, step = 1, subregion = None, region = None,
-                  value_type = None, invert = False, task = None):
+                  value_type = None, invert = False, task = None, tiled = False,
+                  deferred = False):
 
   v = volume
   if region is None:
@@ -43,14 +46,35 @@ def gaussian_grid(volume, sdev, step = 1, subregion = None, region = None,
   sdev3 = (sdev,sdev,sdev) if isinstance(sdev,(float,int)) else sdev
   ijk_sdev = [float(sd)/s for sd,s in zip(sdev3,step)]
 
+  d = v.data
+  if v.name.endswith('gaussian'): name = v.name
+  else:                           name = '%s gaussian' % v.name
+
+  if tiled or deferred:
+    if invert:
+      from chimerax.core.errors import UserError
+      raise UserError('%s Gaussian filtering cannot invert the filter'
+                      % ('Tiled' if tiled else 'Deferred'))
+    # Convolution uses Gaussian out to 5 standard deviations.
+    halo = [int(5*sd+1) for sd in ijk_sdev]
+    # Tiled bricks are already filtered in parallel threads.
+    nthread = 1 if tiled else None
+    def brick_filter(m):
+      return gaussian_convolution(m, ijk_sdev, value_type = value_type,
+                                  nthread = nthread)
+    vtype = d.value_type if value_type is None else value_type
+    if deferred:
+      from .deferred import FilteredGrid
+      return FilteredGrid(v.grid_data(region = region, mask_zone = False),
+                          brick_filter, halo, vtype, name)
+    from .tiled import tiled_grid
+    return tiled_grid(v, brick_filter, halo, region, vtype, name)
+
   m = v.region_matrix(region)
   gm = gaussian_convolution(m, ijk_sdev, value_type = value_type,
                             invert = invert, task = task)
 
   from chimerax.map_data import ArrayGridData
-  d = v.data
-  if v.name.endswith('gaussian'): name = v.name
-  else:                           name = '%s gaussian' % v.name
   gg = ArrayGridData(gm, origin, step, d.cell_angles, d.rotation,
                      name = name)
   return gg
@@ -59,7 +83,8 @@ def gaussian_grid(volume, sdev, step = 1, subregion = None, region = None,
 # Compute with zero padding in real-space to avoid cyclic-convolution.
 #
 def gaussian_convolution(data, ijk_sdev, value_type = None,
-                         cyclic = False, cutoff = 5, invert = False, task = None):
+                         cyclic = False, cutoff = 5, invert = False, task = None,
+                         nthread = None):
 
   if value_type is None:
     value_type = data.dtype
@@ -68,7 +93,8 @@ def gaussian_convolution(data, ijk_sdev, value_type = None,
   vt = value_type if value_type == float32 or value_type == float64 else float32
   c = array(data, vt)
 
-  from numpy.fft import rfft, irfft
+  from .fftbackend import fft_backend, fft_size
+  fft = fft_backend()
   for axis in range(3):           # Transform one axis at a time.
     size = c.shape[axis]
     if size == 1:
@@ -79,23 +105,25 @@ def gaussian_convolution(data, ijk_sdev, value_type = None,
     if nzeros > 0:
       # FFT performance is much better (up to 10x faster in numpy 1.2.1)
       # than other sizes.
-      nzeros = efficient_fft_size(size + nzeros) - size
-    g = gaussian(sdev, size + nzeros, vt)
-    g[hw:-hw] = 0
-    fg = rfft(g)                  # Fourier transform of 1-d gaussian.
+      nzeros = fft_size(size + nzeros) - size
+    n = size + nzeros
+    fg = gaussian_fft(sdev, n, hw, vt, fft)   # Fourier transform of 1-d gaussian.
     cs = swapaxes(c, axis, 2)     # Make axis 2 the FT axis.
     s0 = cs.shape[0]
-    for p in range(s0):  # Transform one plane at a time.
-      cp = cs[p,...]
+    # Transform blocks of planes small enough to stay in the CPU cache
+    # with enough rows for threads to share the work.
+    pb = max(1, 2**18 // (cs.shape[1] * (n//2+1)))
+    for p in range(0, s0, pb):
+      cp = cs[p:p+pb]
       try:
-        ft = rfft(cp, n=len(g))   # Complex128 result, size n/2+1
+        ft = fft.rfft(cp, n = n, nthread = nthread)   # Size n/2+1
       except ValueError as e:
         raise MemoryError(e)      # Array dimensions too large.
       if invert:
         divide(ft, fg, ft)
       else:
         multiply(ft, fg, ft)
-      cp[:,:] = irfft(ft)[:,:size] # Float64 result
+      cp[:] = fft.irfft(ft, n = n, nthread = nthread)[...,:size]
       if task:
         pct = 100.0 * (axis + float(p)/s0) / 3.0
         task.updateStatus('%.0f%%' % pct)
@@ -105,6 +133,28 @@ def gaussian_convolution(data, ijk_sdev, value_type = None,
 
   return c
 
+# -----------------------------------------------------------------------------
+# Fourier transform of a 1-d Gaussian of length n zeroed beyond half-width hw.
+# Recent results are kept since filtering a series of maps or bricks of a
+# map uses the same transforms many times.
+#
+def gaussian_fft(sdev, n, hw, value_type, fft):
+
+  from numpy import dtype
+  key = (sdev, n, hw, dtype(value_type).str, fft.name)
+  fg = _gaussian_fft_cache.get(key)
+  if fg is None:
+    g = gaussian(sdev, n, value_type)
+    g[hw:-hw] = 0
+    fg = fft.rfft(g)
+    fg.flags.writeable = False
+    if len(_gaussian_fft_cache) >= 32:
+      _gaussian_fft_cache.clear()
+    _gaussian_fft_cache[key] = fg
+  return fg
+
+_gaussian_fft_cache = {}
+
 # -----------------------------------------------------------------------------
 #
 def gaussian(sdev, size, value_type):
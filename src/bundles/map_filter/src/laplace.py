@@ -18,9 +18,40 @@
 # is approaximated with "-1 2 -1" kernel in each dimension.  Resulting volume
 # is same size with edge voxels set to zero.
 #
-def laplacian(v, step = None, subregion = None, model_id = None):
+def laplacian(v, step = None, subregion = None, model_id = None, tiled = False,
+              deferred = False):
 
-  m = v.matrix(step = step, subregion = subregion)
+  if deferred:
+    from .deferred import FilteredGrid
+    from numpy import float32
+    ld = FilteredGrid(v.grid_data(subregion, step, mask_zone = False),
+                      laplacian_array, (1,1,1), float32, v.name + ' Laplacian')
+  elif tiled:
+    region = v.subregion(step, subregion)
+    from .tiled import tiled_grid
+    from numpy import float32
+    ld = tiled_grid(v, laplacian_array, (1,1,1), region, float32, v.name + ' Laplacian')
+  else:
+    m = v.matrix(step = step, subregion = subregion)
+    lm = laplacian_array(m)
+    origin, step = v.data_origin_and_step(subregion = subregion, step = step)
+    d = v.data
+    from chimerax.map_data import ArrayGridData
+    ld = ArrayGridData(lm, origin, step, d.cell_angles, d.rotation,
+                       name = v.name + ' Laplacian')
+  ld.polar_values = True
+  from chimerax.map import volume_from_grid_data
+  lv = volume_from_grid_data(ld, v.session, model_id = model_id)
+  lv.copy_settings_from(v, copy_thresholds = False, copy_colors = False)
+  lv.set_parameters(cap_faces = False)
+  
+  v.display = False          # Hide original map
+
+  return lv
+
+# -----------------------------------------------------------------------------
+#
+def laplacian_array(m):
 
   from numpy import float32, multiply, add
   lm = m.astype(float32)        # Copy array
@@ -39,17 +70,4 @@ def laplacian(v, step = None, subregion = None, model_id = None):
   lm[:,:,0] = 0
   lm[:,:,-1] = 0
 
-  origin, step = v.data_origin_and_step(subregion = subregion, step = step)
-  d = v.data
-  from chimerax.map_data import ArrayGridData
-  ld = ArrayGridData(lm, origin, step, d.cell_angles, d.rotation,
-                       name = v.name + ' Laplacian')
-  ld.polar_values = True
-  from chimerax.map import volume_from_grid_data
-  lv = volume_from_grid_data(ld, v.session, model_id = model_id)
-  lv.copy_settings_from(v, copy_thresholds = False, copy_colors = False)
-  lv.set_parameters(cap_faces = False)
-  
-  v.display = False          # Hide original map
-
-  return lv
+  return lm
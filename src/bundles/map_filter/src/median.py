@@ -13,9 +13,11 @@
 # 3x3x3 median filter.
 #
 def median_filter(volume, bin_size = 3, iterations = 1,
-                  step = 1, subregion = None, modelId = None):
+                  step = 1, subregion = None, modelId = None, tiled = False,
+                  deferred = False):
 
-  mg = median_grid(volume, bin_size, iterations, step, subregion)
+  mg = median_grid(volume, bin_size, iterations, step, subregion, tiled = tiled,
+                   deferred = deferred)
   from chimerax.map import volume_from_grid_data
   mv = volume_from_grid_data(mg, volume.session, model_id = modelId)
   mv.copy_settings_from(volume, copy_region = False)
@@ -27,7 +29,8 @@ def median_filter(volume, bin_size = 3, iterations = 1,
 # -----------------------------------------------------------------------------
 #
 def median_grid(volume, bin_size = 3, iterations = 1,
-                step = 1, subregion = None, region = None):
+                step = 1, subregion = None, region = None, tiled = False,
+                deferred = False):
 
   v = volume
   if region is None:
@@ -35,15 +38,29 @@ def median_grid(volume, bin_size = 3, iterations = 1,
 
   origin, step = v.region_origin_and_step(region)
 
-  vm = v.region_matrix(region)
-  m = vm
-  for i in range(iterations):
-    m = median_array(m, bin_size)
-
-  from chimerax.map_data import ArrayGridData
   d = v.data
   if v.name.endswith('median'): name = v.name
   else:                         name = '%s median' % v.name
+
+  def brick_filter(m):
+    for i in range(iterations):
+      m = median_array(m, bin_size)
+    return m
+
+  if tiled or deferred:
+    bs = (bin_size, bin_size, bin_size) if isinstance(bin_size, int) else bin_size
+    # Each iteration reaches half a bin further.
+    halo = [iterations*((n-1)//2) for n in bs]
+    if deferred:
+      from .deferred import FilteredGrid
+      return FilteredGrid(v.grid_data(region = region, mask_zone = False),
+                          brick_filter, halo, d.value_type, name)
+    from .tiled import tiled_grid
+    return tiled_grid(v, brick_filter, halo, region, d.value_type, name)
+
+  m = brick_filter(v.region_matrix(region))
+
+  from chimerax.map_data import ArrayGridData
   mg = ArrayGridData(m, origin, step, d.cell_angles, d.rotation,
                      name = name)
   return mg
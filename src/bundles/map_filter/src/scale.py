@@ -13,19 +13,37 @@
 # Scale, shift, and change value type of volume values.
 #
 def scaled_volume(v, scale = 1, sd = None, rms = None, shift = 0, type = None,
-                 step = None, subregion = None, model_id = None, session = None):
+                 step = None, subregion = None, model_id = None, session = None,
+                 tiled = False, deferred = False):
 
   if not sd is None or not rms is None:
-    m = v.full_matrix()
-    from chimerax.map.volume import mean_sd_rms
-    mean, sdev, rmsv = mean_sd_rms(m)
+    if tiled or deferred:
+      from .tiled import tiled_mean_sd_rms
+      mean, sdev, rmsv = tiled_mean_sd_rms(v)
+    else:
+      m = v.full_matrix()
+      from chimerax.map.volume import mean_sd_rms
+      mean, sdev, rmsv = mean_sd_rms(m)
     if not rms is None and rmsv > 0:
       scale = (1.0 if scale is None else scale) * rms / rmsv
     if not sd is None and sdev > 0:
       shift = -mean if shift is None else (-mean + shift)
       scale = (1.0 if scale is None else scale) * sd / sdev
     
-  sg = scaled_grid(v, scale, shift, type, subregion, step)
+  if deferred:
+    def scale_values(m):
+      return scale_array(m, scale, shift, type or m.dtype)
+    from .deferred import ElementwiseGrid
+    sg = ElementwiseGrid(v.grid_data(subregion, step, mask_zone = False),
+                         scale_values, type, v.name + ' scaled')
+  elif tiled:
+    def brick_filter(m):
+      return scale_array(m, scale, shift, type or m.dtype)
+    from .tiled import tiled_grid
+    sg = tiled_grid(v, brick_filter, (0,0,0), v.subregion(step, subregion),
+                    type or v.data.value_type, v.name + ' scaled')
+  else:
+    sg = scaled_grid(v, scale, shift, type, subregion, step)
   from chimerax.map import volume_from_grid_data
   sv = volume_from_grid_data(sg, session, model_id = model_id)
   sv.copy_settings_from(v, copy_thresholds = False)
@@ -65,38 +83,43 @@ class ScaledGrid(GridData):
   def read_matrix(self, ijk_origin, ijk_size, ijk_step, progress):
 
     data = self.grid_data.matrix(ijk_origin, ijk_size, ijk_step, progress)
-    s = self.scale
-    o = self.shift
-    t = self.value_type
-    if s == 1 and o == 0:
-      dt = data
-    else:
-      # Convert to float32, then scale and shift.
-      from numpy import float32, multiply, add
-      dt = data.astype(float32)
-      if o != 0:
-        add(dt, o, dt)
-      if s != 1:
-        multiply(dt, s, dt)
+    return scale_array(data, self.scale, self.shift, self.value_type)
 
-    if t == dt.dtype:
-      d = dt
+# -----------------------------------------------------------------------------
+# Return array scaled and shifted and converted to value type t.  The
+# original array is returned if it is unchanged.
+#
+def scale_array(data, s, o, t):
+
+  if s == 1 and o == 0:
+    dt = data
+  else:
+    # Convert to float32, then scale and shift.
+    from numpy import float32, multiply, add
+    dt = data.astype(float32)
+    if o != 0:
+      add(dt, o, dt)
+    if s != 1:
+      multiply(dt, s, dt)
+
+  if t == dt.dtype:
+    d = dt
+  else:
+    from numpy import dtype
+    if dtype(t).kind in 'iu':
+      # Clamp integer types to limit values.
+      from numpy import empty, iinfo
+      d = empty(dt.shape, t)
+      di = iinfo(t)
+      dmin, dmax = di.min, di.max
+      if dt.dtype.kind in 'iu':
+        # Clip limits get cast to dt type by dt.clip().
+        # int16 -> uint16 incorrectly gave all 65535 values when clipped.
+        dti = iinfo(dt.dtype)
+        dmin = max(dti.min, dmin)
+        dmax = min(dti.max, dmax)
+      dt.clip(dmin, dmax, d)
     else:
-      from numpy import dtype
-      if dtype(t).kind in 'iu':
-        # Clamp integer types to limit values.
-        from numpy import empty, iinfo
-        d = empty(dt.shape, t)
-        di = iinfo(t)
-        dmin, dmax = di.min, di.max
-        if dt.dtype.kind in 'iu':
-          # Clip limits get cast to dt type by dt.clip().
-          # int16 -> uint16 incorrectly gave all 65535 values when clipped.
-          dti = iinfo(dt.dtype)
-          dmin = max(dti.min, dmin)
-          dmax = min(dti.max, dmax)
-        dt.clip(dmin, dmax, d)
-      else:
-        d = dt.astype(t)
+      d = dt.astype(t)
 
-    return d
+  return d
@@ -14,10 +14,11 @@
 #
 def threshold(volume, minimum = None, set_minimum = None,
               maximum = None, set_maximum = None,
-              step = 1, subregion = None, modelId = None, session = None):
+              step = 1, subregion = None, modelId = None, session = None,
+              tiled = False, deferred = False):
 
   tg = threshold_grid(volume, minimum, set_minimum, maximum, set_maximum,
-                      step, subregion)
+                      step, subregion, tiled = tiled, deferred = deferred)
   from chimerax.map import volume_from_grid_data
   tv = volume_from_grid_data(tg, model_id = modelId, session = session)
   tv.copy_settings_from(volume)
@@ -30,7 +31,8 @@ def threshold(volume, minimum = None, set_minimum = None,
 #
 def threshold_grid(volume, minimum = None, set_minimum = None,
                    maximum = None, set_maximum = None,
-                   step = 1, subregion = None, region = None):
+                   step = 1, subregion = None, region = None, tiled = False,
+                   deferred = False):
 
   v = volume
   if region is None:
@@ -38,7 +40,36 @@ def threshold_grid(volume, minimum = None, set_minimum = None,
 
   origin, step = v.region_origin_and_step(region)
 
-  m = v.region_matrix(region).copy()
+  d = v.data
+  if v.name.endswith('thresholded'): name = v.name
+  else:                         name = '%s thresholded' % v.name
+
+  def brick_filter(m):
+    return threshold_array(m.copy(), minimum, set_minimum, maximum, set_maximum)
+
+  if deferred:
+    def threshold_values(m):
+      return threshold_array(m, minimum, set_minimum, maximum, set_maximum)
+    from .deferred import ElementwiseGrid
+    return ElementwiseGrid(v.grid_data(region = region, mask_zone = False),
+                           threshold_values, name = name)
+
+  if tiled:
+    from .tiled import tiled_grid
+    return tiled_grid(v, brick_filter, (0,0,0), region, d.value_type, name)
+
+  m = brick_filter(v.region_matrix(region))
+
+  from chimerax.map_data import ArrayGridData
+  tg = ArrayGridData(m, origin, step, d.cell_angles, d.rotation,
+                     name = name)
+  return tg
+
+# -----------------------------------------------------------------------------
+# Clamp array values in place.
+#
+def threshold_array(m, minimum = None, set_minimum = None,
+                    maximum = None, set_maximum = None):
 
   import numpy
   from numpy import array, putmask
@@ -55,10 +86,4 @@ def threshold_grid(volume, minimum = None, set_minimum = None,
     else:
       putmask(m, m > t, array(set_maximum, m.dtype))
 
-  from chimerax.map_data import ArrayGridData
-  d = v.data
-  if v.name.endswith('thresholded'): name = v.name
-  else:                         name = '%s thresholded' % v.name
-  tg = ArrayGridData(m, origin, step, d.cell_angles, d.rotation,
-                     name = name)
-  return tg
+  return m
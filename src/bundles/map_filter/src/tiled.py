@@ -0,0 +1,149 @@
+# === UCSF ChimeraX Copyright ===
+# Copyright 2016 Regents of the University of California.
+# All rights reserved.  This software provided pursuant to a
+# license agreement containing restrictions on its disclosure,
+# duplication and use.  For details see:
+# http://www.rbvi.ucsf.edu/chimerax/docs/licensing.html
+# This notice must be embedded in or attached to all copies,
+# including partial copies, of the software or any revisions
+# or derivations thereof.
+# === UCSF ChimeraX Copyright ===
+
+# -----------------------------------------------------------------------------
+# Filter maps too large for memory one brick at a time.  Bricks are read from
+# the map file with a halo of extra planes on each side, filtered in a thread
+# pool, and the brick interior is written to an output array memory mapped to
+# a temporary file.  The halo is as wide as the filter reaches so the result
+# matches filtering the whole map at once.
+#
+default_brick_size = 128        # Grid points along each brick axis.
+
+# -----------------------------------------------------------------------------
+#
+def tiled_grid(volume, brick_filter, halo, region, value_type, name,
+               brick_size = None, nthread = None):
+  '''
+  Apply brick_filter(array) -> array of same shape to the volume region,
+  returning an ArrayGridData with memory mapped values.  Halo is the number
+  of extra grid points (i,j,k) needed on each side of a brick.
+  '''
+  v = volume
+  d = v.data
+  origin, size, step = v.step_aligned_region(region)
+  shape = tuple((s+st-1)//st for s,st in zip(size, step))[::-1]	# k,j,i
+  out = memory_mapped_array(shape, value_type)
+
+  def filter_brick(brick):
+    (kin, jin, iin), (kout, jout, iout), m = brick
+    fm = brick_filter(m)
+    out[kout, jout, iout] = fm[kin, jin, iin]
+
+  session = v.session
+  if brick_size is None:
+    brick_size = default_brick_size
+  bricks = list(brick_regions(shape, halo[::-1], brick_size))
+  if nthread is None:
+    from multiprocessing import cpu_count
+    nthread = max(1, cpu_count()//2)
+  from concurrent.futures import ThreadPoolExecutor
+  from collections import deque
+  with ThreadPoolExecutor(max_workers = nthread) as executor:
+    pending = deque()
+    for b, (read_slices, in_slices, out_slices) in enumerate(bricks):
+      # Read in this thread since map file readers are not thread safe.
+      m = read_brick(d, origin, step, read_slices)
+      pending.append(executor.submit(filter_brick, (in_slices, out_slices, m)))
+      while len(pending) > nthread + 1:
+        pending.popleft().result()
+      session.logger.status('Filtering %s brick %d of %d' % (v.name, b+1, len(bricks)))
+    while pending:
+      pending.popleft().result()
+  session.logger.status('')
+
+  xyz_origin, xyz_step = v.region_origin_and_step((origin, None, step))
+  from chimerax.map_data import ArrayGridData
+  g = ArrayGridData(out, xyz_origin, xyz_step, d.cell_angles, d.rotation,
+                    name = name)
+  return g
+
+# -----------------------------------------------------------------------------
+# Yield for each brick the (k,j,i) slices of the output array to read with
+# halo, the slices of the brick interior within the read array, and the
+# slices of the output array for the interior.  An axis is not split if it
+# is not much larger than the brick size.  Bricks are at least as large as
+# the halo so that filters that limit their reach by the array size, like
+# Gaussian convolution, see the same reach in bricks as in the full array.
+#
+def brick_regions(shape, halo, brick_size):
+
+  ranges = []
+  for n, h in zip(shape, halo):
+    if n <= brick_size + 2*h:
+      ranges.append([(0, n)])
+    else:
+      nb = max(1, n // max(brick_size, h))
+      e = [(n*b)//nb for b in range(nb+1)]
+      ranges.append(list(zip(e[:-1], e[1:])))
+
+  for k0, k1 in ranges[0]:
+    for j0, j1 in ranges[1]:
+      for i0, i1 in ranges[2]:
+        core = ((k0,k1), (j0,j1), (i0,i1))
+        read = [(max(0, a-h), min(n, b+h)) for (a,b), h, n in zip(core, halo, shape)]
+        read_slices = tuple(slice(a,b) for a,b in read)
+        in_slices = tuple(slice(a-r0, b-r0) for (a,b), (r0,r1) in zip(core, read))
+        out_slices = tuple(slice(a,b) for a,b in core)
+        yield read_slices, in_slices, out_slices
+
+# -----------------------------------------------------------------------------
+# Read part of a subsampled region given as slices of the subsampled array.
+#
+def read_brick(data, origin, step, read_slices):
+
+  ks, js, is_ = read_slices
+  ijk_origin = [o + s.start*st for o, s, st in zip(origin, (is_, js, ks), step)]
+  ijk_size = [(s.stop - s.start - 1)*st + 1 for s, st in zip((is_, js, ks), step)]
+  m = data.cached_data(ijk_origin, ijk_size, step)
+  if m is None:
+    # Don't cache bricks, large maps would push everything else out of the cache.
+    with data.read_lock:
+      m = data.read_matrix(ijk_origin, ijk_size, step, None)
+  return m
+
+# -----------------------------------------------------------------------------
+# Array backed by an anonymous temporary file that is removed when the array
+# is freed.
+#
+def memory_mapped_array(shape, value_type):
+
+  from numpy import memmap, zeros
+  if min(shape) == 0:
+    return zeros(shape, value_type)
+  from tempfile import TemporaryFile
+  with TemporaryFile(prefix = 'chimerax_map_') as f:
+    m = memmap(f, dtype = value_type, mode = 'w+', shape = shape)
+  return m
+
+# -----------------------------------------------------------------------------
+# Mean, standard deviation and root mean square of a map computed by reading
+# bricks so the whole map is never in memory.
+#
+def tiled_mean_sd_rms(volume, brick_size = None):
+
+  if brick_size is None:
+    brick_size = default_brick_size
+  d = volume.data
+  origin, size, step = volume.step_aligned_region(volume.full_region())
+  shape = tuple(size[::-1])
+  n = s1 = s2 = 0
+  from numpy import float64
+  for read_slices, in_slices, out_slices in brick_regions(shape, (0,0,0), brick_size):
+    m = read_brick(d, origin, step, read_slices)
+    n += m.size
+    s1 += m.sum(dtype = float64)
+    s2 += (m.astype(float64)**2).sum()
+  mean = s1 / n
+  from math import sqrt
+  sd = sqrt(max(0, s2/n - mean*mean))
+  rms = sqrt(s2/n)
+  return mean, sd, rms
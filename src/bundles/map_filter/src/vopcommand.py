@@ -72,6 +72,7 @@ def register_volume_filtering_subcommands(logger):
     add_kw = resample_kw + [
         ('in_place', BoolArg),
         ('scale_factors', FloatsArg),
+        ('deferred', BoolArg),
     ]
     add_desc = CmdDesc(required = varg, keyword = add_kw,
                        synopsis = 'Add two or more maps')
@@ -138,12 +139,15 @@ def register_volume_filtering_subcommands(logger):
                             keyword = [('s_dev', Float1or3Arg),
                                        ('bfactor', FloatArg),
                                        ('value_type', ValueTypeArg),
-                                       ('invert', BoolArg)] + ssm_kw,
+                                       ('invert', BoolArg),
+                                       ('tiled', BoolArg),
+                                       ('deferred', BoolArg)] + ssm_kw,
                             synopsis = 'Convolve map with a Gaussian for smoothing'
     )
     register('volume gaussian', gaussian_desc, volume_gaussian, logger=logger)
 
-    laplacian_desc = CmdDesc(required = varg, keyword = ssm_kw,
+    laplacian_desc = CmdDesc(required = varg,
+                             keyword = [('tiled', BoolArg), ('deferred', BoolArg)] + ssm_kw,
                              synopsis = 'Laplace filter a map to enhance edges')
     register('volume laplacian', laplacian_desc, volume_laplacian, logger=logger)
 
@@ -164,7 +168,9 @@ def register_volume_filtering_subcommands(logger):
 
     median_desc = CmdDesc(required = varg,
                           keyword = [('bin_size', MapStepArg),
-                                     ('iterations', IntArg)] + ssm_kw,
+                                     ('iterations', IntArg),
+                                     ('tiled', BoolArg),
+                                     ('deferred', BoolArg)] + ssm_kw,
                           synopsis = 'Median map value over a sliding window')
     register('volume median', median_desc, volume_median, logger=logger)
 
@@ -233,6 +239,8 @@ def register_volume_filtering_subcommands(logger):
                                     ('sd', FloatArg),
                                     ('rms', FloatArg),
                                     ('value_type', ValueTypeArg),
+                                    ('tiled', BoolArg),
+                                    ('deferred', BoolArg),
                                     ] + ssm_kw,
                          synopsis = 'Scale and shift map values')
     register('volume scale', scale_desc, volume_scale, logger=logger)
@@ -246,7 +254,9 @@ def register_volume_filtering_subcommands(logger):
                              keyword = [('minimum', FloatArg),
                                         ('set', FloatArg),
                                         ('maximum', FloatArg),
-                                        ('set_maximum', FloatArg)] + ssm_kw,
+                                        ('set_maximum', FloatArg),
+                                        ('tiled', BoolArg),
+                                        ('deferred', BoolArg)] + ssm_kw,
                              synopsis = 'Set map values below a threshold to zero'
     )
     register('volume threshold', threshold_desc, volume_threshold, logger=logger)
@@ -310,12 +320,12 @@ def volume_add(session, volumes, on_grid = None, bounding_grid = None,
                subregion = 'all', step = 1,
                grid_subregion = 'all', grid_step = 1, spacing = None, value_type = None,
                in_place = False, scale_factors = None, model_id = None,
-               hide_maps = True):
+               hide_maps = True, deferred = False):
     '''Add maps.'''
     rv = combine_op(volumes, 'add', on_grid, bounding_grid, subregion, step,
                     grid_subregion, grid_step, spacing, value_type,
                     in_place, scale_factors, model_id, session,
-                    hide_maps = hide_maps)
+                    hide_maps = hide_maps, deferred = deferred)
     return rv
 
 # -----------------------------------------------------------------------------
@@ -324,12 +334,12 @@ def volume_maximum(session, volumes, on_grid = None, bounding_grid = None,
                    subregion = 'all', step = 1,
                    grid_subregion = 'all', grid_step = 1, spacing = None, value_type = None,
                    in_place = False, scale_factors = None, model_id = None,
-                   hide_maps = True):
+                   hide_maps = True, deferred = False):
     '''Pointwise maximum of maps.'''
     rv = combine_op(volumes, 'maximum', on_grid, bounding_grid, subregion, step,
                     grid_subregion, grid_step, spacing, value_type,
                     in_place, scale_factors, model_id, session,
-                    hide_maps = hide_maps)
+                    hide_maps = hide_maps, deferred = deferred)
     return rv
 
 # -----------------------------------------------------------------------------
@@ -338,12 +348,12 @@ def volume_minimum(session, volumes, on_grid = None, bounding_grid = None,
                    subregion = 'all', step = 1,
                    grid_subregion = 'all', grid_step = 1, spacing = None, value_type = None,
                    in_place = False, scale_factors = None, model_id = None,
-                   hide_maps = True):
+                   hide_maps = True, deferred = False):
     '''Pointwise minimum of maps.'''
     rv = combine_op(volumes, 'minimum', on_grid, bounding_grid, subregion, step,
                     grid_subregion, grid_step, spacing, value_type,
                     in_place, scale_factors, model_id, session,
-                    hide_maps = hide_maps)
+                    hide_maps = hide_maps, deferred = deferred)
     return rv
 
 # -----------------------------------------------------------------------------
@@ -352,12 +362,12 @@ def volume_multiply(session, volumes, on_grid = None, bounding_grid = None,
                     subregion = 'all', step = 1,
                     grid_subregion = 'all', grid_step = 1, spacing = None, value_type = None,
                     in_place = False, scale_factors = None, model_id = None,
-                    hide_maps = True):
+                    hide_maps = True, deferred = False):
     '''Pointwise multiply maps.'''
     rv = combine_op(volumes, 'multiply', on_grid, bounding_grid, subregion, step,
                     grid_subregion, grid_step, spacing, value_type,
                     in_place, scale_factors, model_id, session,
-                    hide_maps = hide_maps)
+                    hide_maps = hide_maps, deferred = deferred)
     return rv
 
 # -----------------------------------------------------------------------------
@@ -366,8 +376,10 @@ def combine_op(volumes, operation = 'add', on_grid = None, bounding_grid = None,
                subregion = 'all', step = 1,
                grid_subregion = 'all', grid_step = 1, spacing = None, value_type = None,
                in_place = False, scale_factors = None, model_id = None, session = None,
-               hide_maps = True):
+               hide_maps = True, deferred = False):
 
+    if deferred and in_place:
+        raise CommandError("Can't use in_place option with deferred option")
     if bounding_grid is None and not in_place:
         bounding_grid = (on_grid is None)
     if on_grid is None:
@@ -386,7 +398,7 @@ def combine_op(volumes, operation = 'add', on_grid = None, bounding_grid = None,
     cv = [combine_operation(volumes, operation, subregion, step,
                             gv, grid_subregion, grid_step, spacing, value_type,
                             bounding_grid, in_place, scale_factors, model_id, session,
-                            hide_maps = hide_maps)
+                            hide_maps = hide_maps, deferred = deferred)
           for gv in on_grid]
 
     return _volume_or_list(cv)
@@ -396,11 +408,15 @@ def combine_op(volumes, operation = 'add', on_grid = None, bounding_grid = None,
 def combine_operation(volumes, operation, subregion, step,
                       gv, grid_subregion, grid_step, spacing, value_type,
                       bounding_grid, in_place, scale, model_id, session,
-                      hide_maps = True):
+                      hide_maps = True, deferred = False):
 
     if scale is None:
         scale = [1]*len(volumes)
-    if in_place:
+    if deferred:
+        rv = deferred_combine_operation(volumes, operation, subregion, step,
+                                        gv, grid_subregion, grid_step, spacing,
+                                        value_type, scale, model_id, session)
+    elif in_place:
         rv = gv
         for i, v in enumerate(volumes):
             s = (scale[i] if v != rv else scale[i]-1)
@@ -423,19 +439,7 @@ def combine_operation(volumes, operation, subregion, step,
         if value_type is None:
             value_type = v0.data.value_type if volumes else gv.data.value_type
         rg = gv.region_grid(r, value_type = value_type, new_spacing = spacing, clamp = False)
-        if len(volumes) == 1:
-            rg.name = v0.name + ' resampled'
-        elif operation == 'subtract':
-            rg.name = 'volume difference'
-            rg.polar_values = True
-        elif operation == 'maximum':
-            rg.name = 'volume maximum'
-        elif operation == 'minimum':
-            rg.name = 'volume minimum'
-        elif operation == 'multiply':
-            rg.name = 'volume product'
-        else:
-            rg.name = 'volume sum'
+        name_combined_grid(rg, volumes, operation)
         from chimerax.map import volume_from_grid_data
         rv = volume_from_grid_data(rg, session, model_id = model_id,
                                    show_dialog = False)
@@ -445,6 +449,7 @@ def combine_operation(volumes, operation, subregion, step,
             rv.combine_interpolated_values(v, op, subregion = subregion, step = step,
                                            scale = scale[i])
     rv.data.values_changed()
+    v0 = volumes[0] if volumes else None
     if volumes:
         rv.copy_settings_from(v0, copy_region = False, copy_xform = False, copy_colors = False)
         if rv.data.name.endswith('difference'):
@@ -457,6 +462,47 @@ def combine_operation(volumes, operation, subregion, step,
 
     return rv
 
+# -----------------------------------------------------------------------------
+# Make a map that computes combined values only when they are needed.  Maps
+# must be on the same grid.
+#
+def deferred_combine_operation(volumes, operation, subregion, step,
+                               gv, grid_subregion, grid_step, spacing,
+                               value_type, scale, model_id, session):
+
+    gr = gv.subregion(step = grid_step, subregion = grid_subregion)
+    if spacing is not None or not same_grids(volumes, subregion, step, gv, gr):
+        raise CommandError('Deferred map %s requires maps on the same grid' % operation)
+    grids = [v.grid_data(subregion, step, mask_zone = False) for v in volumes]
+    if value_type is None:
+        value_type = volumes[0].data.value_type
+    from .deferred import CombinedGrid
+    rg = CombinedGrid(grids, operation, scale, value_type, name = '')
+    name_combined_grid(rg, volumes, operation)
+    from chimerax.map import volume_from_grid_data
+    rv = volume_from_grid_data(rg, session, model_id = model_id,
+                               show_dialog = False)
+    rv.position = gv.position
+    return rv
+
+# -----------------------------------------------------------------------------
+#
+def name_combined_grid(rg, volumes, operation):
+
+    if len(volumes) == 1:
+        rg.name = volumes[0].name + ' resampled'
+    elif operation == 'subtract':
+        rg.name = 'volume difference'
+        rg.polar_values = True
+    elif operation == 'maximum':
+        rg.name = 'volume maximum'
+    elif operation == 'minimum':
+        rg.name = 'volume minimum'
+    elif operation == 'multiply':
+        rg.name = 'volume product'
+    else:
+        rg.name = 'volume sum'
+
 # -----------------------------------------------------------------------------
 #
 def same_grids(volumes, subregion, step, gv, gr):
@@ -612,8 +658,15 @@ def volume_fourier(session, volumes, subregion = 'all', step = 1, model_id = Non
 #
 def volume_gaussian(session, volumes, s_dev = (1.0,1.0,1.0), bfactor = None,
                  subregion = 'all', step = 1, value_type = None, invert = False,
-                 model_id = None):
-    '''Smooth maps by Gaussian convolution.'''
+                 model_id = None, tiled = False, deferred = False):
+    '''
+    Smooth maps by Gaussian convolution.  If tiled is true the map is filtered
+    in bricks in parallel threads and the result is memory mapped to a temporary
+    file so maps larger than memory can be filtered.  If deferred is true values
+    are only computed for the regions that are displayed or saved.
+    '''
+    if tiled and deferred:
+        raise CommandError('volume gaussian: Cannot use both tiled and deferred options')
     if bfactor is not None:
         if bfactor < 0:
             invert = True
@@ -623,16 +676,20 @@ def volume_gaussian(session, volumes, s_dev = (1.0,1.0,1.0), bfactor = None,
         s_dev = (sd,sd,sd)
 
     from .gaussian import gaussian_convolve
-    gv = [gaussian_convolve(v, s_dev, step, subregion, value_type, invert, model_id, session = session)
+    gv = [gaussian_convolve(v, s_dev, step, subregion, value_type, invert, model_id,
+                            session = session, tiled = tiled, deferred = deferred)
           for v in volumes]
     return _volume_or_list(gv)
 
 # -----------------------------------------------------------------------------
 #
-def volume_laplacian(session, volumes, subregion = 'all', step = 1, model_id = None):
+def volume_laplacian(session, volumes, subregion = 'all', step = 1, model_id = None,
+                     tiled = False, deferred = False):
     '''Detect map edges with Laplacian filter.'''
+    if tiled and deferred:
+        raise CommandError('volume laplacian: Cannot use both tiled and deferred options')
     from .laplace import laplacian
-    lv = [laplacian(v, step, subregion, model_id)
+    lv = [laplacian(v, step, subregion, model_id, tiled = tiled, deferred = deferred)
           for v in volumes]
     return _volume_or_list(lv)
 
@@ -658,14 +715,18 @@ def volume_local_correlation(session, volumes, window_size = 5, subtract_mean =
 # -----------------------------------------------------------------------------
 #
 def volume_median(session, volumes, bin_size = (3,3,3), iterations = 1,
-              subregion = 'all', step = 1, model_id = None):
+              subregion = 'all', step = 1, model_id = None, tiled = False,
+              deferred = False):
     '''Replace map values with median of neighboring values.'''
+    if tiled and deferred:
+        raise CommandError('volume median: Cannot use both tiled and deferred options')
     for b in bin_size:
         if b <= 0 or b % 2 == 0:
             raise CommandError('Bin size must be positive odd integer, got %d' % b)
 
     from .median import median_filter
-    mv = [median_filter(v, bin_size, iterations, step, subregion, model_id)
+    mv = [median_filter(v, bin_size, iterations, step, subregion, model_id,
+                        tiled = tiled, deferred = deferred)
           for v in volumes]
     return _volume_or_list(mv)
 
@@ -863,14 +924,17 @@ def volume_ridges(session, volumes, level = None, subregion = 'all', step = 1, m
 # -----------------------------------------------------------------------------
 #
 def volume_scale(session, volumes, shift = 0, factor = 1, sd = None, rms = None,
-                 value_type = None, subregion = 'all', step = 1, model_id = None):
+                 value_type = None, subregion = 'all', step = 1, model_id = None,
+                 tiled = False, deferred = False):
     '''Scale, shift and convert number type of map values.'''
     if not sd is None and not rms is None:
         raise CommandError('volume scale: Cannot specify both sd and rms options')
+    if tiled and deferred:
+        raise CommandError('volume scale: Cannot use both tiled and deferred options')
 
     from .scale import scaled_volume
     sv = [scaled_volume(v, factor, sd, rms, shift, value_type, step, subregion, model_id,
-                        session = session)
+                        session = session, tiled = tiled, deferred = deferred)
           for v in volumes]
     return _volume_or_list(sv)
 
@@ -880,29 +944,35 @@ def volume_subtract(session, volumes, on_grid = None, bounding_grid = False,
                     subregion = 'all', step = 1,
                     grid_subregion = 'all', grid_step = 1, spacing = None, value_type = None,
                     in_place = False, scale_factors = None, min_rms = False,
-                    model_id = None, hide_maps = True):
+                    model_id = None, hide_maps = True, deferred = False):
     '''Subtract two maps.'''
     if len(volumes) != 2:
         raise CommandError('volume subtract operation requires exactly two volumes')
     if min_rms and scale_factors:
         raise CommandError('volume subtract cannot specify both minRMS and scaleFactors options.')
+    if min_rms and deferred:
+        raise CommandError('volume subtract cannot use minRMS with deferred option.')
     mult = (1,'minrms') if min_rms else scale_factors
 
     sv = combine_op(volumes, 'subtract', on_grid, bounding_grid, subregion, step,
                     grid_subregion, grid_step, spacing, value_type,
                     in_place, mult, model_id, session,
-                    hide_maps = hide_maps)
+                    hide_maps = hide_maps, deferred = deferred)
     return sv
 
 # -----------------------------------------------------------------------------
 #
 def volume_threshold(session, volumes, minimum = None, set = None,
                  maximum = None, set_maximum = None,
-                 subregion = 'all', step = 1, model_id = None):
+                 subregion = 'all', step = 1, model_id = None, tiled = False,
+                 deferred = False):
     '''Set map values below or above a threshold to a constant.'''
+    if tiled and deferred:
+        raise CommandError('volume threshold: Cannot use both tiled and deferred options')
     from .threshold import threshold
     tv = [threshold(v, minimum, set, maximum, set_maximum,
-                    step, subregion, model_id, session)
+                    step, subregion, model_id, session, tiled = tiled,
+                    deferred = deferred)
           for v in volumes]
     return _volume_or_list(tv)
 
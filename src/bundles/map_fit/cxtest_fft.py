@@ -0,0 +1,28 @@
+# Check that fitmap FFT search finds the same best fit as random placement search.
+from chimerax.core.commands import run
+run(session, "open 1a0m")
+run(session, "molmap /A 5")
+m = session.models[0]
+fit_xyz = m.atoms.scene_coords
+
+def search(options):
+	import random
+	random.seed(7)
+	run(session, "turn y 20 models #1 ; move x 4 models #1")
+	fits = run(session, "fitmap #1/A inMap #2 %s" % options)
+	return fits[0], m.atoms.scene_coords
+
+fit, xyz = search("search 30 placement s")
+fft_fit, fft_xyz = search("search 10 fftAngle 20")
+
+from numpy import sqrt
+def rmsd(xyz1, xyz2):
+	return sqrt(((xyz1 - xyz2)**2).sum(axis = 1).mean())
+if rmsd(xyz, fit_xyz) > 0.5:
+	raise SystemExit("fitmap random search best fit is %.2f A from molmap position" % rmsd(xyz, fit_xyz))
+if rmsd(fft_xyz, xyz) > 0.5:
+	raise SystemExit("fitmap FFT search best fit is %.2f A from random search best fit" % rmsd(fft_xyz, xyz))
+s, fft_s = fit.average_map_value(), fft_fit.average_map_value()
+if abs(s - fft_s) > 1e-3 * abs(s):
+	raise SystemExit("fitmap FFT search best fit average map value %.6g differs from random search %.6g"
+		% (fft_s, s))
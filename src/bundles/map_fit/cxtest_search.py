@@ -0,0 +1,29 @@
+# Check that fitmap search finds the same fits optimizing placements in one or two processes.
+from chimerax.core.commands import run
+run(session, "open 1a0m")
+run(session, "molmap /A 5")
+m = session.models[0]
+start = m.position
+
+def search(processes):
+	import random
+	random.seed(7)
+	m.position = start
+	return run(session, "fitmap #1 inMap #2 search 12 processes %d" % processes)
+
+fits1 = search(1)
+fits2 = search(2)
+if len(fits1) != len(fits2):
+	raise SystemExit("fitmap search found %d fits with 1 process, %d fits with 2 processes"
+		% (len(fits1), len(fits2)))
+from numpy import allclose
+for i, (f1, f2) in enumerate(zip(fits1, fits2)):
+	if f1.hits() != f2.hits():
+		raise SystemExit("Fit %d has %d hits with 1 process, %d with 2 processes"
+			% (i+1, f1.hits(), f2.hits()))
+	s1, s2 = f1.average_map_value(), f2.average_map_value()
+	if abs(s1 - s2) > 1e-5 * max(1, abs(s1)):
+		raise SystemExit("Fit %d average map value %.6g with 1 process, %.6g with 2 processes"
+			% (i+1, s1, s2))
+	if not allclose(f1.transforms[0].matrix, f2.transforms[0].matrix, atol = 1e-4):
+		raise SystemExit("Fit %d placement differs between 1 and 2 processes" % (i+1))
@@ -0,0 +1,176 @@
+# vim: set expandtab shiftwidth=4 softtabstop=4:
+
+# === UCSF ChimeraX Copyright ===
+# Copyright 2016 Regents of the University of California.
+# All rights reserved.  This software provided pursuant to a
+# license agreement containing restrictions on its disclosure,
+# duplication and use.  For details see:
+# http://www.rbvi.ucsf.edu/chimerax/docs/licensing.html
+# This notice must be embedded in or attached to all copies,
+# including partial copies, of the software or any revisions
+# or derivations thereof.
+# === UCSF ChimeraX Copyright ===
+
+# -----------------------------------------------------------------------------
+# Exhaustive rigid fit search.  For each rotation of a uniform rotation grid
+# the fit points are spread onto a grid aligned with the target map and the
+# sum of map values at the points is computed for all grid translations at
+# once as an FFT cross-correlation with the map.  The best scoring placements
+# can then be locally optimized.
+#
+# Points should be in volume local coordinates.
+#
+def fft_placements(points, point_weights, volume, angle_step = 15, count = 20,
+                   peaks_per_rotation = 3, nthread = None, request_stop_cb = None):
+    '''
+    Return the count best scoring placements, list of (score, transform) with
+    transforms mapping points to new positions in volume local coordinates,
+    best first.  Rotations are spaced by about angle_step degrees.
+    '''
+    data = volume.matrix(step = 1)
+    ijk_to_xyz_tf = volume.matrix_indices_to_xyz_transform(step = 1)
+    xyz_to_ijk_tf = ijk_to_xyz_tf.inverse()
+    from numpy import ones, float32
+    weights = ones((len(points),), float32) if point_weights is None else point_weights
+
+    center = points.mean(axis = 0)
+    rotations = uniform_rotations(angle_step)
+
+    # Pad map so that the cross-correlation does not wrap the fit points
+    # around to the other side of the map.
+    extent = _rotated_extent(points, center, xyz_to_ijk_tf)
+    from chimerax.map_filter.fftbackend import fft_backend, fft_size
+    fft = fft_backend()
+    shape = tuple(fft_size(s + e) for s, e in zip(data.shape, extent[::-1]))
+    target = _padded(data, shape)
+    target_fft = fft.rfftn(target)
+    del target
+
+    if nthread is None:
+        from multiprocessing import cpu_count
+        nthread = max(1, cpu_count()//2)
+
+    # Rotations are spread over threads, each computing single threaded FFTs.
+    def rotation_peaks(rot):
+        return _rotation_peaks(rot, points, weights, center, xyz_to_ijk_tf, ijk_to_xyz_tf,
+                               fft, target_fft, shape, data.shape, peaks_per_rotation)
+
+    candidates = []
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers = nthread) as executor:
+        for i, peaks in enumerate(executor.map(rotation_peaks, rotations)):
+            candidates.extend(peaks)
+            if len(candidates) > 4 * count:
+                candidates.sort(key = lambda c: c[0], reverse = True)
+                del candidates[2 * count:]
+            if request_stop_cb and i % 20 == 0:
+                if request_stop_cb('FFT search rotation %d of %d' % (i+1, len(rotations))):
+                    executor.shutdown(wait = True, cancel_futures = True)
+                    break
+
+    candidates.sort(key = lambda c: c[0], reverse = True)
+    return candidates[:count]
+
+# -----------------------------------------------------------------------------
+# Rotations about the origin with rotation axes and spin angles spaced by
+# about angle_step degrees.
+#
+def uniform_rotations(angle_step):
+    from math import pi, ceil
+    a = angle_step * pi / 180
+    ndir = max(1, int(ceil(4 * pi / (a * a))))
+    nspin = max(1, int(ceil(360.0 / angle_step)))
+    from chimerax.geometry.sphere import sphere_points
+    from chimerax.geometry import vector_rotation, rotation
+    spins = [rotation((0,0,1), 360.0 * i / nspin) for i in range(nspin)]
+    rlist = []
+    for d in sphere_points(ndir):
+        zr = vector_rotation((0,0,1), d)
+        rlist.extend([zr * s for s in spins])
+    return rlist
+
+# -----------------------------------------------------------------------------
+# Compute the fit score for all grid translations of the rotated points and
+# return the best peaks as (score, transform).
+#
+def _rotation_peaks(rot, points, weights, center, xyz_to_ijk_tf, ijk_to_xyz_tf,
+                    fft, target_fft, shape, data_shape, npeaks):
+    from chimerax.geometry import translation
+    rtf = translation(center) * rot * translation(-center)
+    ijk = (xyz_to_ijk_tf * rtf).transform_points(points)
+    from numpy import floor, int64
+    origin = floor(ijk.min(axis = 0)).astype(int64)
+    ijk -= origin
+    model = _splat_points(ijk, weights, shape)
+    corr = fft.irfftn(fft.rfftn(model, nthread = 1).conj() * target_fft, s = shape, nthread = 1)
+    peaks = []
+    for ijk_corner, score in _correlation_peaks(corr, npeaks):
+        # Correlation index is the map grid index of the point grid corner.
+        # Corners before the start of the map wrap around to the end.
+        c = [(i - n if i >= d else i)
+             for i, n, d in zip(ijk_corner, shape[::-1], data_shape[::-1])]
+        shift = ijk_to_xyz_tf.transform_vector(c - origin)
+        tf = translation(shift) * rtf
+        peaks.append((score, tf))
+    return peaks
+
+# -----------------------------------------------------------------------------
+# Spread point weights to the 8 nearest grid points with trilinear weights.
+#
+def _splat_points(ijk, weights, shape):
+    from numpy import zeros, float32, floor, int64, add
+    grid = zeros(shape, float32)
+    i0 = floor(ijk).astype(int64)
+    f = (ijk - i0).astype(float32)
+    ksize, jsize, isize = shape
+    for di in (0,1):
+        wi = f[:,0] if di else 1 - f[:,0]
+        for dj in (0,1):
+            wj = f[:,1] if dj else 1 - f[:,1]
+            for dk in (0,1):
+                wk = f[:,2] if dk else 1 - f[:,2]
+                w = weights * wi * wj * wk
+                i, j, k = i0[:,0] + di, i0[:,1] + dj, i0[:,2] + dk
+                add.at(grid, (k % ksize, j % jsize, i % isize), w)
+    return grid
+
+# -----------------------------------------------------------------------------
+# Return up to n highest correlation values that are at least 2 grid points
+# apart as ((i,j,k), value).
+#
+def _correlation_peaks(corr, n, separation = 2):
+    from numpy import argpartition, unravel_index, argsort
+    flat = corr.ravel()
+    m = min(len(flat), 50 * n)
+    top = argpartition(flat, -m)[-m:]
+    top = top[argsort(flat[top])[::-1]]
+    peaks = []
+    for index in top:
+        k, j, i = unravel_index(index, corr.shape)
+        if all(max(abs(i-pi), abs(j-pj), abs(k-pk)) > separation
+               for (pi,pj,pk), v in peaks):
+            peaks.append(((i,j,k), float(flat[index])))
+            if len(peaks) >= n:
+                break
+    return peaks
+
+# -----------------------------------------------------------------------------
+# Size of box in grid index units (i,j,k) enclosing all rotations of points.
+#
+def _rotated_extent(points, center, xyz_to_ijk_tf):
+    from numpy import sqrt
+    d = points - center
+    r = sqrt((d*d).sum(axis = 1).max())
+    from math import ceil
+    axes = xyz_to_ijk_tf.matrix[:,:3]
+    # Grid index range of a sphere of radius r along each axis.
+    return [int(ceil(2 * r * sqrt((axes[a]*axes[a]).sum()))) + 2 for a in range(3)]
+
+# -----------------------------------------------------------------------------
+#
+def _padded(data, shape):
+    from numpy import zeros, float32
+    p = zeros(shape, float32)
+    ksize, jsize, isize = data.shape
+    p[:ksize,:jsize,:isize] = data
+    return p
@@ -21,7 +21,7 @@ def fitmap(session, atoms_or_map, in_map = None, subtract_maps = None,
            cluster_angle = 6, cluster_shift = 3,
            asymmetric_unit = True, level_inside = 0.1, sequence = 0,
            max_steps = 2000, grid_step_min = 0.01, grid_step_max = 0.5,
-           list_fits = None, each_model = False):
+           list_fits = None, each_model = False, processes = 1, fft_angle = None):
     '''
     Fit an atomic model or a map in a map using a rigid rotation and translation
     by locally optimizing correlation.  There are four modes: 1) fit all models into map
@@ -94,6 +94,15 @@ def fitmap(session, atoms_or_map, in_map = None, subtract_maps = None,
     level_inside : float
        Fraction of fit atoms or map that must be inside the target map contour level
        in order to keep the fit.
+    processes : integer
+       Number of processes to use for optimizing the random placements.  The same
+       fits are found as with one process.  Default 1.
+    fft_angle : float
+       Instead of random placements optimize the best placements found by an
+       exhaustive search of rotations spaced by this angle (degrees) and all
+       grid translations scored with FFT cross-correlation of fit points and map.
+       The number of placements optimized is given by the search option.
+       Cannot be used with shift or rotate false, radius, or placement other than 'sr'.
 
     ----------------------------------------------------------------------------
     Output options
@@ -113,7 +122,8 @@ def fitmap(session, atoms_or_map, in_map = None, subtract_maps = None,
             sequence = 1
 
     check_fit_options(atoms_or_map, volume, metric, resolution,
-                      symmetric, mwm, search, sequence)
+                      symmetric, mwm, search, sequence, fft_angle,
+                      shift, rotate, placement, radius)
 
     flist = []
     log = session.logger
@@ -127,7 +137,8 @@ def fitmap(session, atoms_or_map, in_map = None, subtract_maps = None,
             fits = fit_search(atoms, v, volume, metric, envelope, zeros, shift, rotate,
                               mwm, search, placement, radius,
                               cluster_angle, cluster_shift, asymmetric_unit, level_inside,
-                              max_steps, grid_step_min, grid_step_max, log)
+                              max_steps, grid_step_min, grid_step_max, log, processes,
+                              fft_angle)
         elif symmetric:
             fits = [fit_map_in_symmetric_map(v, volume, metric, envelope, zeros,
                                              shift, rotate, mwm,
@@ -150,7 +161,9 @@ def fitmap(session, atoms_or_map, in_map = None, subtract_maps = None,
 # -----------------------------------------------------------------------------
 #
 def check_fit_options(atoms_or_map, volume, metric, resolution,
-                      symmetric, move_whole_molecules, search, sequence):
+                      symmetric, move_whole_molecules, search, sequence,
+                      fft_angle = None, shift = True, rotate = True,
+                      placement = 'sr', radius = None):
     if volume is None:
         raise UserError('Must specify "in" keyword, e.g. fit #1 in #2')
     if sequence > 0 and search > 0:
@@ -159,6 +172,21 @@ def check_fit_options(atoms_or_map, volume, metric, resolution,
         raise UserError('Cannot use "sequence" and "symmetric" options together.')
     if search and symmetric:
         raise UserError('Symmetric fitting not available with fit search')
+    if fft_angle is not None:
+        if search == 0:
+            raise UserError('The "fftAngle" option requires the "search" option'
+                            ' giving the number of placements to optimize')
+        if fft_angle <= 0:
+            raise UserError('The "fftAngle" option must be a positive angle')
+        # FFT search places the model at all rotations and translations.
+        if not shift or not rotate:
+            raise UserError('The "fftAngle" option cannot be used with'
+                            ' "shift false" or "rotate false"')
+        if radius is not None:
+            raise UserError('The "fftAngle" option cannot be used with "radius"')
+        if set(placement) != set('sr'):
+            raise UserError('The "fftAngle" option cannot be used with "placement %s"'
+                            % placement)
     if symmetric:
       if not metric in ('correlation', 'cam', None):
           raise UserError('Only "correlation" and "cam" metrics are'
@@ -384,7 +412,8 @@ def fit_map_in_symmetric_map(v, volume, metric, envelope, zeros,
 def fit_search(atoms, v, volume, metric, envelope, zeros, shift, rotate,
                move_whole_molecules, search, placement, radius,
                cluster_angle, cluster_shift, asymmetric_unit, level_inside,
-               max_steps, grid_step_min, grid_step_max, log = None):
+               max_steps, grid_step_min, grid_step_max, log = None, processes = 1,
+               fft_angle = None):
     
     # TODO: Handle case where not moving whole molecules.
 
@@ -411,12 +440,15 @@ def fit_search(atoms, v, volume, metric, envelope, zeros, shift, rotate,
     flist, outside = FS.fit_search(
             mlist, points, point_weights, volume, search, rotations, shifts,
             radius, cluster_angle, cluster_shift, asymmetric_unit, level_inside,
-            me, shift, rotate, max_steps, grid_step_min, grid_step_max, stop_cb)
+            me, shift, rotate, max_steps, grid_step_min, grid_step_max, stop_cb,
+            processes, fft_angle)
 #    finally:
 #        task.finished()
 
     if log:
-        report_fit_search_results(flist, search, outside, level_inside, log)
+        placements = sum(f.hits() for f in flist) + outside
+        report_fit_search_results(flist, placements, outside, level_inside, log,
+                                  fft = fft_angle is not None)
     return flist
 
 # -----------------------------------------------------------------------------
@@ -434,10 +466,11 @@ def request_stop_cb(message, task = None, log = None):
 
 # -----------------------------------------------------------------------------
 #
-def report_fit_search_results(flist, search, outside, level_inside, log):
+def report_fit_search_results(flist, search, outside, level_inside, log, fft = False):
 
-    log.info('Found %d unique fits from %d random placements ' %
-             (len(flist), search) +
+    pname = 'FFT search peaks' if fft else 'random placements'
+    log.info('Found %d unique fits from %d %s ' %
+             (len(flist), search, pname) +
              'having fraction of points inside contour >= %.3f (%d of %d).\n'
              % (level_inside, search-outside,  search))
 
@@ -581,6 +614,8 @@ def register_fitmap_command(logger):
             ('cluster_shift', FloatArg),
             ('asymmetric_unit', BoolArg),
             ('level_inside', FloatArg),            # fraction of point in contour
+            ('processes', IntArg),
+            ('fft_angle', FloatArg),
 
 # Output options
             ('move_whole_molecules', BoolArg),
@@ -12,7 +12,9 @@
 # === UCSF ChimeraX Copyright ===
 
 # -----------------------------------------------------------------------------
-# Optimize N random placements of a model and collect unique fits.
+# Optimize N random placements of a model and collect unique fits.  If an
+# FFT angle step is given the N best placements of an exhaustive FFT search
+# are optimized instead of random placements.
 #
 # Points should be in volume local coordinates.
 # Models can contain atomic models and maps that are the source of the points.
@@ -26,7 +28,7 @@ def fit_search(models, points, point_weights, volume, n,
                optimize_translation = True, optimize_rotation = True,
                max_steps = 2000,
                ijk_step_size_min = 0.01, ijk_step_size_max = 0.5,
-               request_stop_cb = None):
+               request_stop_cb = None, processes = 1, fft_angle = None):
 
     bounds = volume.surface_bounds()
     if bounds is None:
@@ -47,39 +49,48 @@ def fit_search(models, points, point_weights, volume, n,
     vtfinv = volume.position.inverse()
     mtv_list = [vtfinv * m.position for m in models]
 
+    # Random placements are chosen before optimizing so that parallel
+    # optimization gives the same fits as serial optimization.
+    placements = []
+    if fft_angle is not None:
+        from .fftsearch import fft_placements
+        placements = [tf for score, tf in
+                      fft_placements(points, point_weights, volume, angle_step = fft_angle,
+                                     count = n, request_stop_cb = request_stop_cb)]
+        n = len(placements)
+    for i in range(n - len(placements)):
+        shift = ((random_translation(bounds) if radius is None
+                  else random_translation_step(center, radius)) if shifts
+                  else translation(center))
+        rot = random_rotation() if rotations else identity()
+        placements.append(shift * rot * ctf)
+
+    symmetries = volume.data.symmetries if asymmetric_unit else None
+    opt = _PlacementOptimizer(points, point_weights, data_array, xyz_to_ijk_tf,
+                              max_steps, ijk_step_size_min, ijk_step_size_max,
+                              optimize_translation, optimize_rotation, metric,
+                              center, asym_center, symmetries)
+
     flist = []
     outside = 0
     from math import pi
     from chimerax.geometry import bins
     b = bins.Binned_Transforms(angle_tolerance*pi/180, shift_tolerance, center)
     fo = {}
-    from .fitmap import locate_maximum
+    if processes > 1 and n > 1:
+        results = _optimize_in_processes(opt, placements, processes)
+    else:
+        # Only reoptimize a symmetry moved fit if it is not close to a previous fit.
+        results = (opt.optimize(tf, lambda atf: not b.close_transforms(atf))
+                   for tf in placements)
     for i in range(n):
         if request_stop_cb and request_stop_cb('Fit %d of %d' % (i+1,n)):
             break
-        shift = ((random_translation(bounds) if radius is None
-                  else random_translation_step(center, radius)) if shifts
-                  else translation(center))
-        rot = random_rotation() if rotations else identity()
-        tf = shift * rot * ctf
-        optimize = True
-        max_opt = 2
-        while optimize and max_opt > 0:
-            p_to_ijk_tf = xyz_to_ijk_tf * tf
-            move_tf, stats = \
-              locate_maximum(points, point_weights, data_array, p_to_ijk_tf,
-                             max_steps, ijk_step_size_min, ijk_step_size_max,
-                             optimize_translation, optimize_rotation,
-                             metric, request_stop_cb = None)
-            ptf = tf * move_tf
-            optimize = False
-            max_opt -= 1
-            if asymmetric_unit:
-                atf = unique_symmetry_position(ptf, center, asym_center,
-                                               volume.data.symmetries)
-                if not atf is ptf:
-                    ptf = tf = atf
-                    optimize = not b.close_transforms(ptf)
+        first, second = next(results)
+        if second is not None and not b.close_transforms(first[0]):
+            ptf, stats = second
+        else:
+            ptf, stats = first
         close = b.close_transforms(ptf)
         if len(close) == 0:
             transforms = [ptf * mtv for mtv in mtv_list]
@@ -92,6 +103,8 @@ def fit_search(models, points, point_weights, volume, n,
         else:
             s = fo[id(close[0])].stats
             s['hits'] += 1
+    if hasattr(results, 'close'):
+        results.close()         # Stop worker processes if search was stopped.
 
     # Filter out solutions with too many points outside volume contour.
     fflist = [f for f in flist if (in_contour(f.ptf, points, volume, f.stats)
@@ -105,6 +118,162 @@ def fit_search(models, points, point_weights, volume, n,
 
     return fflist, outside
 
+# -----------------------------------------------------------------------------
+# Locally optimize a placement and if it moved out of the asymmetric unit move
+# it back with a symmetry and optimize again.
+#
+class _PlacementOptimizer:
+
+    def __init__(self, points, point_weights, data_array, xyz_to_ijk_tf,
+                 max_steps, ijk_step_size_min, ijk_step_size_max,
+                 optimize_translation, optimize_rotation, metric,
+                 center, asym_center, symmetries):
+        self.points = points
+        self.point_weights = point_weights
+        self.data_array = data_array
+        self.xyz_to_ijk_tf = xyz_to_ijk_tf
+        self.max_steps = max_steps
+        self.ijk_step_size_min = ijk_step_size_min
+        self.ijk_step_size_max = ijk_step_size_max
+        self.optimize_translation = optimize_translation
+        self.optimize_rotation = optimize_rotation
+        self.metric = metric
+        self.center = center
+        self.asym_center = asym_center
+        self.symmetries = symmetries
+
+    # -------------------------------------------------------------------------
+    # Returns (ptf, stats) for the optimized placement and a second (ptf, stats)
+    # if the fit was moved to the asymmetric unit and reoptimize(ptf) is true,
+    # otherwise None.
+    #
+    def optimize(self, tf, reoptimize = None):
+        ptf, stats = self._locate_maximum(tf)
+        atf = self._asymmetric_unit_position(ptf)
+        if atf is ptf:
+            return (ptf, stats), None
+        first = (atf, stats)
+        if reoptimize and not reoptimize(atf):
+            return first, None
+        ptf, stats = self._locate_maximum(atf)
+        second = (self._asymmetric_unit_position(ptf), stats)
+        return first, second
+
+    # -------------------------------------------------------------------------
+    #
+    def _locate_maximum(self, tf):
+        from .fitmap import locate_maximum
+        move_tf, stats = \
+          locate_maximum(self.points, self.point_weights, self.data_array,
+                         self.xyz_to_ijk_tf * tf, self.max_steps,
+                         self.ijk_step_size_min, self.ijk_step_size_max,
+                         self.optimize_translation, self.optimize_rotation,
+                         self.metric, request_stop_cb = None)
+        return tf * move_tf, stats
+
+    # -------------------------------------------------------------------------
+    #
+    def _asymmetric_unit_position(self, ptf):
+        if self.symmetries is None:
+            return ptf
+        return unique_symmetry_position(ptf, self.center, self.asym_center,
+                                        self.symmetries)
+
+# -----------------------------------------------------------------------------
+# Optimize placements in a pool of processes.  The map data array is shared
+# read-only through shared memory.  Results are yielded in placement order.
+#
+def _optimize_in_processes(opt, placements, processes):
+
+    processes = min(processes, len(placements))
+    data = opt.data_array
+    from multiprocessing import shared_memory, get_context
+    shm = shared_memory.SharedMemory(create = True, size = max(1, data.nbytes))
+    try:
+        from numpy import ndarray
+        shared = ndarray(data.shape, data.dtype, buffer = shm.buf)
+        shared[:] = data
+        del shared
+        syms = opt.symmetries
+        init_args = (shm.name, data.shape, data.dtype.str,
+                     opt.points, opt.point_weights, opt.xyz_to_ijk_tf.matrix,
+                     opt.max_steps, opt.ijk_step_size_min, opt.ijk_step_size_max,
+                     opt.optimize_translation, opt.optimize_rotation, opt.metric,
+                     opt.center, opt.asym_center,
+                     None if syms is None else syms.array())
+        from concurrent.futures import ProcessPoolExecutor
+        try:
+            pool = ProcessPoolExecutor(processes, mp_context = get_context('spawn'),
+                                       initializer = _initialize_worker, initargs = init_args)
+        except Exception:
+            pool = None     # Cannot start processes.
+        done = 0
+        if pool is not None:
+            try:
+                chunk = max(1, min(16, len(placements) // (4*processes)))
+                tf_list = [tf.matrix for tf in placements]
+                for first, second in pool.map(_optimize_worker, tf_list, chunksize = chunk):
+                    yield _placement_result(first), _placement_result(second)
+                    done += 1
+            except Exception:
+                # A worker failed to start (BrokenProcessPool) or raised an error.
+                pass
+            finally:
+                pool.shutdown(wait = True, cancel_futures = True)
+        # Optimize placements not done by worker processes in this process.
+        for tf in placements[done:]:
+            yield opt.optimize(tf)
+    finally:
+        shm.close()
+        shm.unlink()
+
+# -----------------------------------------------------------------------------
+#
+def _placement_result(r):
+    if r is None:
+        return None
+    ptf, stats = r
+    from chimerax.geometry import Place
+    stats['transform'] = Place(stats['transform'])
+    return Place(ptf), stats
+
+# -----------------------------------------------------------------------------
+# Worker process state.
+#
+_worker = None
+
+def _initialize_worker(shm_name, shape, dtype, points, point_weights, xyz_to_ijk_matrix,
+                       max_steps, ijk_step_size_min, ijk_step_size_max,
+                       optimize_translation, optimize_rotation, metric,
+                       center, asym_center, symmetries):
+    from multiprocessing import shared_memory
+    shm = shared_memory.SharedMemory(name = shm_name)
+    from numpy import ndarray
+    data_array = ndarray(shape, dtype, buffer = shm.buf)
+    from chimerax.geometry import Place, Places
+    syms = None if symmetries is None else Places(place_array = symmetries)
+    global _worker
+    _worker = (shm, _PlacementOptimizer(points, point_weights, data_array,
+                                        Place(xyz_to_ijk_matrix), max_steps,
+                                        ijk_step_size_min, ijk_step_size_max,
+                                        optimize_translation, optimize_rotation, metric,
+                                        center, asym_center, syms))
+
+def _optimize_worker(tf_matrix):
+    from chimerax.geometry import Place
+    opt = _worker[1]
+    # Always reoptimize symmetry moved fits since which fits are close to
+    # previous fits is only known when the results are merged in order.
+    first, second = opt.optimize(Place(tf_matrix))
+    return _picklable_result(first), _picklable_result(second)
+
+def _picklable_result(r):
+    if r is None:
+        return None
+    ptf, stats = r
+    stats['transform'] = stats['transform'].matrix
+    return ptf.matrix, stats
+
 # -----------------------------------------------------------------------------
 #
 def in_contour(tf, points, volume, stats):
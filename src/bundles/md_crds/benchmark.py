@@ -0,0 +1,54 @@
+# vi:set shiftwidth=4 expandtab:
+# Time to reach the first, middle and last frame of a trajectory.
+#
+# run "ChimeraX --nogui --exit --silent --script 'benchmark.py [structure trajectory]'"
+#
+# Compares reading all frames up front, lazy reading without a frame index
+# (frame offsets found by scanning the file) and lazy reading with the
+# frame index saved by the previous open.
+#
+import os
+import sys
+from time import time
+from chimerax.core.commands import run
+
+session = session  # noqa -- shut up flake8
+
+if len(sys.argv) >= 3:
+    structure_path, trajectory_path = sys.argv[1:3]
+else:
+    here = os.path.dirname(os.path.abspath(__file__))
+    structure_path = os.path.join(here, 'test-data', 'chimera_test.pdb')
+    trajectory_path = os.path.join(here, 'test-data', 'chimera_test.xtc')
+
+
+def remove_index():
+    from chimerax.md_crds.frame_index import index_paths
+    for path in index_paths(trajectory_path):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def time_frames(label, open_options):
+    run(session, f'close; open "{structure_path}"', log=False)
+    t0 = time()
+    run(session, f'open "{trajectory_path}" structureModel #1 slider false {open_options}', log=False)
+    t_open = time() - t0
+    s = session.models[0]
+    ids = s.coordset_ids
+    times = []
+    for cs_id in (ids[0], ids[len(ids)//2], ids[-1]):
+        t0 = time()
+        s.active_coordset_id = cs_id
+        s.atoms.coords
+        times.append(time() - t0)
+    print(f"{label}: open {t_open:.4f}s, first {times[0]:.4f}s,"
+          f" middle {times[1]:.4f}s, last {times[2]:.4f}s ({len(ids)} frames)")
+
+
+print(f"Trajectory {trajectory_path} ({os.path.getsize(trajectory_path)} bytes)")
+time_frames("Read all frames", "")
+remove_index()
+time_frames("Lazy, no frame index", "lazy true")
+time_frames("Lazy, saved frame index", "lazy true")
+run(session, "close", log=False)
@@ -7,3 +7,44 @@ run(session, "close; open test-data/start.pdb; open test-data/test.dcd structure
 if session.models[0].num_coordsets != 2:
 	raise SystemExit("Expected chimera_test.xtc to produce 2 coordinate sets; actually produced %s"
 		% session.models[0].num_coordsets)
+run(session, "close; open test-data/chimera_test.pdb; open test-data/chimera_test.xtc structureModel #1 lazy true cacheFrames 3")
+s = session.models[0]
+if s.num_coordsets != 21:
+	raise SystemExit("Expected lazily read chimera_test.xtc to produce 21 coordinate sets; actually produced %s"
+		% s.num_coordsets)
+first_coords = s.atoms.coords
+for cs_id in s.coordset_ids:
+	s.active_coordset_id = cs_id
+s.active_coordset_id = 1
+if (s.atoms.coords != first_coords).any():
+	raise SystemExit("Lazily read first frame of chimera_test.xtc changed after being reloaded")
+if len(s._coordset_loader.resident_ids) != 3:
+	raise SystemExit("Expected 3 frames in memory with cacheFrames 3; actually %d"
+		% len(s._coordset_loader.resident_ids))
+run(session, "close; open test-data/chimera_test.pdb; open test-data/chimera_test.xtc structureModel #1")
+s = session.models[0]
+s.active_coordset_id = 21
+double_coords = s.atoms.coords
+run(session, "close; open test-data/chimera_test.pdb; open test-data/chimera_test.xtc structureModel #1 float32 true")
+s = session.models[0]
+if not s.float32_coordsets:
+	raise SystemExit("Opening chimera_test.xtc with 'float32 true' did not set float32_coordsets")
+s.active_coordset_id = 21
+if abs(s.atoms.coords - double_coords).max() > 1e-4:
+	raise SystemExit("Single precision coordsets of chimera_test.xtc differ from double precision ones")
+run(session, "close; open test-data/chimera_test.pdb; open test-data/chimera_test.xtc structureModel #1")
+all_coords = {}
+for cs_id in session.models[0].coordset_ids:
+	all_coords[cs_id] = session.models[0].coordset(cs_id).xyzs
+run(session, "close; open test-data/chimera_test.pdb; open test-data/chimera_test.xtc structureModel #1 lazy true cacheFrames 3")
+s = session.models[0]
+for cs_id in (5, 10, 15):
+	s.active_coordset_id = cs_id
+c = s.copy()
+if c._coordset_loader is None or c._coordset_loader is s._coordset_loader:
+	raise SystemExit("Copy of lazily read structure does not have its own coordset loader")
+for cs_id in c.coordset_ids:
+	c.active_coordset_id = cs_id
+	if abs(c.atoms.coords - all_coords[cs_id]).max() > 1e-4:
+		raise SystemExit("Copy of lazily read structure has wrong coordinates for frame %d" % cs_id)
+c.delete()
@@ -128,6 +128,69 @@ read_traj_file(PyObject *args, bool is_xtc)
 	return Py_BuildValue(PY_STUPID "iO", num_atoms, crd_list);
 }
 
+static PyObject *
+read_traj_frame(PyObject *args, bool is_xtc)
+{
+	char error_string[256];
+
+	char *file_name;
+	long long offset;
+	int num_atoms;
+	if (!PyArg_ParseTuple(args, PY_STUPID "sLi", &file_name, &offset, &num_atoms)) {
+		if (is_xtc) {
+			ERROR_RETURN("readXtcFrame: could not parse args");
+		} else {
+			ERROR_RETURN("readTrrFrame: could not parse args");
+		}
+	}
+	const char *format = (is_xtc ? "xtc" : "trr");
+
+	XDRFILE *xd = xdrfile_open(file_name, "r");
+	if (xd == NULL)
+		ERROR_RETURN("xdrfile_open failure");
+	if (xdr_seek(xd, offset, SEEK_SET) != exdrOK) {
+		xdrfile_close(xd);
+		ERROR_RETURN3("Cannot seek to %s frame at offset %lld", format, offset);
+	}
+
+	npy_intp dimensions[2];
+	dimensions[0] = num_atoms;
+	dimensions[1] = 3;
+	PyObject *array = PyArray_SimpleNew(2, dimensions, NPY_FLOAT);
+	if (array == NULL) {
+		xdrfile_close(xd);
+		ERROR_RETURN("Couldn't allocate enough memory for coords");
+	}
+	rvec *crds = (rvec *)PyArray_DATA((PyArrayObject *)array);
+
+	int step, status;
+	float time, precision;
+	matrix box;
+	float lambda;
+	if (is_xtc)
+		status = read_xtc(xd, num_atoms, &step, &time, box, crds, &precision);
+	else
+		status = read_trr(xd, num_atoms, &step, &time, &lambda, box, crds, NULL, NULL);
+	xdrfile_close(xd);
+	if (status != exdrOK) {
+		Py_DECREF(array);
+		ERROR_RETURN3("read_%s failure; return code %d", format, status);
+	}
+	return array;
+}
+
+static PyObject *
+readXtcFrame(PyObject *, PyObject *args)
+{
+	return read_traj_frame(args, true);
+}
+
+static PyObject *
+readTrrFrame(PyObject *, PyObject *args)
+{
+	return read_traj_frame(args, false);
+}
+
 static PyObject *
 readXtcFile(PyObject *, PyObject *args)
 {
@@ -145,6 +208,8 @@ static PyMethodDef Methods[] =
 {
 	{PY_STUPID "read_xtc_file", readXtcFile, METH_VARARGS, NULL},
 	{PY_STUPID "read_trr_file", readTrrFile, METH_VARARGS, NULL},
+	{PY_STUPID "read_xtc_frame", readXtcFrame, METH_VARARGS, NULL},
+	{PY_STUPID "read_trr_frame", readTrrFrame, METH_VARARGS, NULL},
 	{nullptr, nullptr, 0, nullptr}
 };
 
@@ -17,6 +17,12 @@ class _MDCrdsBundleAPI(BundleAPI):
     
     from chimerax.atomic import StructureArg
 
+    @staticmethod
+    def get_class(class_name):
+        if class_name == 'TrajectoryCoordsets':
+            from .trajectory import TrajectoryCoordsets
+            return TrajectoryCoordsets
+
     @staticmethod
     def run_provider(session, name, mgr):
         if mgr == session.open_command:
@@ -31,8 +37,11 @@ class _MDCrdsBundleAPI(BundleAPI):
                         from chimerax.core.commands import BoolArg, OpenFileNameArg, PositiveIntArg
                         return {
                             'auto_style': BoolArg,
+                            'cache_frames': PositiveIntArg,
                             'coords': OpenFileNameArg,
                             'end': PositiveIntArg,
+                            'float32': BoolArg,
+                            'lazy': BoolArg,
                             'slider': BoolArg,
                             'start': PositiveIntArg,
                             'step': PositiveIntArg,
@@ -49,7 +58,8 @@ class _MDCrdsBundleAPI(BundleAPI):
             else:
                 class MDInfo(OpenerInfo):
                     def open(self, session, data, file_name, *, structure_model=None,
-                            md_type=name, replace=True, slider=True, start=1, step=1, end=None, **kw):
+                            md_type=name, replace=True, slider=True, start=1, step=1, end=None,
+                            lazy=False, cache_frames=None, float32=None, **kw):
                         if structure_model is None:
                             from chimerax.core.errors import UserError, CancelOperation
                             from chimerax.atomic import Structure
@@ -98,7 +108,8 @@ class _MDCrdsBundleAPI(BundleAPI):
                                         " into")
                         from .read_coords import read_coords
                         num_coords = read_coords(session, data, structure_model, md_type,
-                            replace=replace, start=start, step=step, end=end)
+                            replace=replace, start=start, step=step, end=end, lazy=lazy,
+                            cache_frames=cache_frames, float32=float32)
                         if slider and session.ui.is_gui:
                             from chimerax.std_commands.coordset import coordset_slider
                             coordset_slider(session, [structure_model])
@@ -112,7 +123,10 @@ class _MDCrdsBundleAPI(BundleAPI):
                         from chimerax.atomic import StructureArg
                         from chimerax.core.commands import BoolArg, PositiveIntArg
                         return {
+                            'cache_frames': PositiveIntArg,
                             'end': PositiveIntArg,
+                            'float32': BoolArg,
+                            'lazy': BoolArg,
                             'replace': BoolArg,
                             'slider': BoolArg,
                             'start': PositiveIntArg,
@@ -322,10 +322,9 @@ See also: AtomGroup, ASel
                         if size != sz :
                                 raise DCDFormatError("14")
                         frame = copy.copy(self.fixed_buff)
-                        ii = 0
-                        for i in self.FREEINDEXES:
-                                frame[i] = (xfree[ii],yfree[ii],zfree[ii])
-                                ii = ii + 1
+                        frame[self.FREEINDEXES,0] = xfree
+                        frame[self.FREEINDEXES,1] = yfree
+                        frame[self.FREEINDEXES,2] = zfree
                 return frame
         def asel(self):
                 fakemol = AtomGroup()
@@ -0,0 +1,93 @@
+# vim: set expandtab shiftwidth=4 softtabstop=4:
+
+# === UCSF ChimeraX Copyright ===
+# Copyright 2016 Regents of the University of California.
+# All rights reserved.  This software provided pursuant to a
+# license agreement containing restrictions on its disclosure,
+# duplication and use.  For details see:
+# http://www.rbvi.ucsf.edu/chimerax/docs/licensing.html
+# This notice must be embedded in or attached to all copies,
+# including partial copies, of the software or any revisions
+# or derivations thereof.
+# === UCSF ChimeraX Copyright ===
+
+# Persistent trajectory frame-offset index.  Finding where frames start in an
+# xtc or trr file requires a pass over the whole file, so the offsets are saved
+# in a small sidecar file the first time a trajectory is opened.  The sidecar is
+# written next to the trajectory (".name.xtc.cxidx"), or in the ChimeraX cache
+# directory if the trajectory directory is not writable.  An index is only used
+# if the trajectory size and modification time match those recorded in it.
+
+INDEX_SUFFIX = '.cxidx'
+INDEX_VERSION = 1
+
+def frame_offsets(path, format_name, *, use_index=True):
+    '''Return number of atoms and array of frame byte offsets for an xtc or trr file.'''
+    if use_index:
+        index = read_frame_index(path, format_name)
+        if index is not None:
+            return index
+    from .trajectory import xtc_frame_offsets, trr_frame_offsets
+    scan = xtc_frame_offsets if format_name == 'xtc' else trr_frame_offsets
+    num_atoms, offsets = scan(path)
+    if use_index:
+        write_frame_index(path, format_name, num_atoms, offsets)
+    return num_atoms, offsets
+
+def read_frame_index(path, format_name):
+    '''Return (num_atoms, offsets) from an up-to-date index file, otherwise None.'''
+    import os
+    stat = os.stat(path)
+    for index_path in index_paths(path):
+        if not os.path.exists(index_path):
+            continue
+        from numpy import load
+        try:
+            with load(index_path) as idx:
+                if (int(idx['version']) != INDEX_VERSION
+                        or str(idx['format']) != format_name
+                        or int(idx['file_size']) != stat.st_size
+                        or int(idx['mtime_ns']) != stat.st_mtime_ns):
+                    continue
+                return int(idx['num_atoms']), idx['offsets']
+        except Exception:
+            # Corrupt or unreadable index; it will be rewritten.
+            continue
+    return None
+
+def write_frame_index(path, format_name, num_atoms, offsets):
+    '''Save frame offsets next to the trajectory or in the cache directory.
+       Returns the path of the index written, or None if no location was writable.'''
+    import os
+    stat = os.stat(path)
+    from numpy import savez
+    for index_path in index_paths(path):
+        try:
+            os.makedirs(os.path.dirname(index_path), exist_ok=True)
+            # Write to a temporary file and rename so a partial index is never read.
+            tmp_path = index_path + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                savez(f, version=INDEX_VERSION, format=format_name, num_atoms=num_atoms,
+                    file_size=stat.st_size, mtime_ns=stat.st_mtime_ns, offsets=offsets)
+            os.replace(tmp_path, index_path)
+        except OSError:
+            continue
+        return index_path
+    return None
+
+def index_paths(path):
+    '''Candidate index file locations in order of preference.'''
+    import os
+    path = os.path.abspath(path)
+    dir, name = os.path.split(path)
+    paths = [os.path.join(dir, '.' + name + INDEX_SUFFIX)]
+    try:
+        from chimerax import app_dirs
+    except ImportError:
+        pass
+    else:
+        from hashlib import sha1
+        key = sha1(path.encode('utf-8')).hexdigest()
+        paths.append(os.path.join(app_dirs.user_cache_dir, 'trajectory_index',
+            key + '-' + name + INDEX_SUFFIX))
+    return paths
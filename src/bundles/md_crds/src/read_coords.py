@@ -13,20 +13,47 @@
 
 from chimerax.core.errors import UserError
 
-def read_coords(session, file_name, model, format_name, *, replace=True, start=1, step=1, end=None):
-    from numpy import array, float64
+def read_coords(session, file_name, model, format_name, *, replace=True, start=1, step=1, end=None,
+        lazy=False, cache_frames=None, float32=None):
+    if float32 is not None:
+        model.float32_coordsets = float32
+    if lazy:
+        from .trajectory import read_coords_lazily
+        session.logger.status("Indexing %s trajectory frames" % format_name, blank_after=0)
+        num_frames = read_coords_lazily(session, file_name, model, format_name, replace=replace,
+            start=start, step=step, end=end, cache_frames=cache_frames)
+        session.logger.status("Finished indexing %s trajectory frames" % format_name)
+        return num_frames
+    from numpy import array, float32, float64
+    # Keep the single precision values stored in the file if the structure allows it
+    crd_type = float32 if model.float32_coordsets else float64
+    if format_name in ("xtc", "trr") and (start != 1 or step != 1 or end is not None):
+        # Use the frame index to read only the requested frames
+        from .trajectory import XdrFrames
+        session.logger.status("Reading Gromacs %s coordinates" % format_name, blank_after=0)
+        frames = XdrFrames(file_name, format_name)
+        num_atoms = frames.num_atoms
+        if model.num_atoms != num_atoms:
+            raise UserError("Specified structure has %d atoms"
+                " whereas the coordinates are for %d atoms" % (model.num_atoms, num_atoms))
+        start, step, end = process_limit_args(session, start, step, end, frames.num_frames)
+        coords = array([frames.frame_coords(i, crd_type) for i in range(start, end, step)],
+            dtype=crd_type)
+        session.logger.status("Finished reading Gromacs %s coordinates" % format_name)
+        model.add_coordsets(coords, replace=replace)
+        return len(coords)
     if format_name == "xtc":
         from ._gromacs import read_xtc_file
         session.logger.status("Reading Gromacs xtc coordinates", blank_after=0)
         num_atoms, coords_list = read_xtc_file(file_name)
-        coords = array(coords_list, dtype=float64)
+        coords = array(coords_list, dtype=crd_type)
         coords *= 10.0
         session.logger.status("Finished reading Gromacs xtc coordinates")
     elif format_name == "trr":
         from ._gromacs import read_trr_file
         session.logger.status("Reading Gromacs trr coordinates", blank_after=0)
         num_atoms, coords_list = read_trr_file(file_name)
-        coords = array(coords_list, dtype=float64)
+        coords = array(coords_list, dtype=crd_type)
         coords *= 10.0
         session.logger.status("Finished reading Gromacs trr coordinates")
     elif format_name == "dcd":
@@ -41,7 +68,7 @@ def read_coords(session, file_name, model, format_name, *, replace=True, start=1
         ds = Dataset(file_name, "r")
         try:
             # netCDF4 has a builtin __array__ that doesn't allow a second argumeht...
-            coords = array(array(ds.variables['coordinates']), dtype=float64)
+            coords = array(array(ds.variables['coordinates']), dtype=crd_type)
         except KeyError:
             raise UserError("File is not an Amber netCDF coordinates file (no coordinates found)")
         num_atoms = len(coords[0])
@@ -80,10 +107,11 @@ def _set_model_dcd_coordinates(session, model, dcd, replace, start, step, end):
         base = 1
     else:
         base = max(model.coordset_ids) + 1
-    from numpy import asarray, float64
+    from numpy import asarray, float32, float64
+    crd_type = float32 if model.float32_coordsets else float64
     num_frames = 0
     for i in range(start, end, step):
-        model.add_coordset(base+num_frames, asarray(dcd[i], float64, order = 'C'))
+        model.add_coordset(base+num_frames, asarray(dcd[i], crd_type, order = 'C'))
         num_frames += 1
     model.active_coordset_id = base
     return num_frames
@@ -0,0 +1,309 @@
+# vim: set expandtab shiftwidth=4 softtabstop=4:
+
+# === UCSF ChimeraX Copyright ===
+# Copyright 2016 Regents of the University of California.
+# All rights reserved.  This software provided pursuant to a
+# license agreement containing restrictions on its disclosure,
+# duplication and use.  For details see:
+# http://www.rbvi.ucsf.edu/chimerax/docs/licensing.html
+# This notice must be embedded in or attached to all copies,
+# including partial copies, of the software or any revisions
+# or derivations thereof.
+# === UCSF ChimeraX Copyright ===
+
+# Trajectory-backed coordinate sets.  Rather than reading every frame of a
+# trajectory into memory, empty coordsets are added to the structure and a frame
+# is decoded from the file when its coordset is made active.  Only a bounded
+# number of decoded frames (least recently used are dropped) is kept in memory.
+
+from chimerax.core.state import State
+from chimerax.core.errors import UserError
+from numpy import float64
+
+DEFAULT_CACHE_FRAMES = 50
+
+def read_coords_lazily(session, file_name, model, format_name, *, replace=True, start=1, step=1,
+        end=None, cache_frames=None):
+    '''Add one empty coordset per trajectory frame to 'model' and read frame coordinates
+       from the file on demand.  Returns the number of frames.'''
+    source = frame_source(file_name, format_name)
+    if model.num_atoms != source.num_atoms:
+        raise UserError("Specified structure has %d atoms"
+            " whereas the coordinates are for %d atoms" % (model.num_atoms, source.num_atoms))
+    from .read_coords import process_limit_args
+    start, step, end = process_limit_args(session, start, step, end, source.num_frames)
+    frames = range(start, end, step)
+
+    loader = None if replace else model._coordset_loader
+    if replace:
+        model.remove_coordsets()
+        base = 1
+    else:
+        base = max(model.coordset_ids) + 1
+    if loader is None:
+        loader = TrajectoryCoordsets(cache_frames)
+    elif cache_frames is not None:
+        loader.cache_frames = cache_frames
+    loader.add_frames(model, file_name, format_name, source, base, frames)
+    model._coordset_loader = loader
+    if replace:
+        model.active_coordset_id = base
+    return len(frames)
+
+class TrajectoryCoordsets(State):
+    '''Loads coordsets of a structure from trajectory files when they are made active.
+
+       Coordsets managed here exist in the structure but are empty unless they are
+       among the 'cache_frames' most recently used ones.
+    '''
+
+    def __init__(self, cache_frames=None):
+        self._cache_frames = DEFAULT_CACHE_FRAMES
+        if cache_frames is not None:
+            self.cache_frames = cache_frames
+        self._sources = []		# (path, format name, frame source or None if not opened)
+        self._frames = {}		# coordset id -> (source index, frame index)
+        from collections import OrderedDict
+        self._resident = OrderedDict()	# coordset ids with coordinates in memory, oldest first
+
+    def _get_cache_frames(self):
+        return self._cache_frames
+    def _set_cache_frames(self, n):
+        # Need room for the active coordset plus the one being loaded
+        self._cache_frames = max(2, n)
+    cache_frames = property(_get_cache_frames, _set_cache_frames)
+
+    def add_frames(self, structure, path, format_name, source, base_id, frames):
+        si = len(self._sources)
+        self._sources.append((path, format_name, source))
+        for i, fi in enumerate(frames):
+            cs_id = base_id + i
+            structure.new_coordset(cs_id, 0)
+            self._frames[cs_id] = (si, fi)
+
+    @property
+    def num_frames(self):
+        return len(self._frames)
+
+    @property
+    def resident_ids(self):
+        return list(self._resident.keys())
+
+    def load_coordset(self, structure, cs_id):
+        frame = self._frames.get(cs_id)
+        if frame is None:
+            return
+        resident = self._resident
+        if cs_id in resident:
+            resident.move_to_end(cs_id)
+            return
+        si, fi = frame
+        from numpy import float32, float64
+        xyz = self._frame_source(si).frame_coords(fi, float32 if structure.float32_coordsets else float64)
+        structure.set_coordset_coords(cs_id, xyz)
+        resident[cs_id] = True
+        if len(resident) > self._cache_frames:
+            active_id = structure.active_coordset_id
+            if active_id in resident:
+                resident.move_to_end(active_id)
+            resident.move_to_end(cs_id)
+            while len(resident) > self._cache_frames:
+                old_id, _ = resident.popitem(last = False)
+                structure.release_coordset_coords(old_id)
+
+    def copy(self):
+        '''Return a loader for a copy of the structure.  Frame files are opened again
+           when needed so that no file is shared with this loader.'''
+        tc = TrajectoryCoordsets(self._cache_frames)
+        tc._sources = [(path, format_name, None) for path, format_name, source in self._sources]
+        tc._frames = self._frames.copy()
+        tc._resident = self._resident.copy()
+        return tc
+
+    def _frame_source(self, si):
+        path, format_name, source = self._sources[si]
+        if source is None:
+            import os
+            if not os.path.exists(path):
+                raise UserError("Trajectory file %s no longer exists" % path)
+            source = frame_source(path, format_name)
+            self._sources[si] = (path, format_name, source)
+        return source
+
+    def take_snapshot(self, session, flags):
+        cs_ids = list(self._frames.keys())
+        data = {
+            'version': 1,
+            'cache frames': self._cache_frames,
+            'sources': [(path, format_name) for path, format_name, source in self._sources],
+            'coordset ids': cs_ids,
+            'frames': [self._frames[cs_id] for cs_id in cs_ids],
+            'resident': list(self._resident.keys()),
+        }
+        return data
+
+    @staticmethod
+    def restore_snapshot(session, data):
+        tc = TrajectoryCoordsets(data['cache frames'])
+        tc._sources = [(path, format_name, None) for path, format_name in data['sources']]
+        tc._frames = {cs_id:tuple(frame) for cs_id, frame in zip(data['coordset ids'], data['frames'])}
+        for cs_id in data['resident']:
+            tc._resident[cs_id] = True
+        return tc
+
+def frame_source(path, format_name):
+    if format_name in ('xtc', 'trr'):
+        return XdrFrames(path, format_name)
+    if format_name == 'dcd':
+        return DCDFrames(path)
+    if format_name == 'amber':
+        return AmberFrames(path)
+    raise ValueError("Unknown MD coordinate format: %s" % format_name)
+
+class XdrFrames:
+    '''Random access to frames of a Gromacs xtc or trr file.'''
+    def __init__(self, path, format_name):
+        self.path = path
+        self.format_name = format_name
+        from .frame_index import frame_offsets
+        self.num_atoms, self.offsets = frame_offsets(path, format_name)
+
+    @property
+    def num_frames(self):
+        return len(self.offsets)
+
+    def frame_coords(self, i, dtype = float64):
+        from . import _gromacs
+        read = _gromacs.read_xtc_frame if self.format_name == 'xtc' else _gromacs.read_trr_frame
+        xyz = read(self.path, int(self.offsets[i]), self.num_atoms)
+        if dtype == xyz.dtype:
+            xyz *= 10.0		# nm -> Angstroms
+            return xyz
+        from numpy import multiply, empty
+        coords = empty(xyz.shape, dtype)
+        multiply(xyz, 10.0, out = coords)
+        return coords
+
+class DCDFrames:
+    '''Random access to frames of a DCD file.'''
+    def __init__(self, path):
+        from .dcd.MDToolsMarch97.md_DCD import DCD
+        self.dcd = DCD(path)
+        self.num_atoms = self.dcd.numatoms
+
+    @property
+    def num_frames(self):
+        return self.dcd.numframes
+
+    def frame_coords(self, i, dtype = float64):
+        from numpy import asarray
+        return asarray(self.dcd[i], dtype, order = 'C')
+
+class AmberFrames:
+    '''Random access to frames of an Amber netCDF trajectory.'''
+    def __init__(self, path):
+        from netCDF4 import Dataset
+        self.dataset = ds = Dataset(path, "r")
+        try:
+            self._coords = ds.variables['coordinates']
+        except KeyError:
+            raise UserError("File is not an Amber netCDF coordinates file (no coordinates found)")
+        self.num_atoms = self._coords.shape[1]
+
+    @property
+    def num_frames(self):
+        return self._coords.shape[0]
+
+    def frame_coords(self, i, dtype = float64):
+        from numpy import array
+        return array(self._coords[i], dtype)
+
+# Gromacs files are XDR encoded (big-endian, 4-byte aligned).  Frame offsets are
+# found by reading each frame header and skipping the coordinate data.
+XTC_MAGIC = 1995
+TRR_MAGIC = 1993
+
+def xtc_frame_offsets(path):
+    '''Return number of atoms and array of byte offsets of the frames of an xtc file.'''
+    from struct import unpack
+    import os
+    file_size = os.path.getsize(path)
+    offsets = []
+    num_atoms = None
+    with open(path, 'rb') as f:
+        offset = 0
+        while True:
+            f.seek(offset)
+            # magic, natoms, step, time, 3x3 box, natoms
+            header = f.read(56)
+            if len(header) < 56:
+                break
+            magic, natoms = unpack('>2i', header[:8])
+            if magic != XTC_MAGIC:
+                raise UserError("Bad xtc frame header at byte %d of %s" % (offset, path))
+            if num_atoms is None:
+                num_atoms = natoms
+            if natoms <= 9:
+                # Uncompressed coordinates
+                size = 56 + 12*natoms
+            else:
+                # precision, minint[3], maxint[3], smallidx, byte count
+                cheader = f.read(36)
+                if len(cheader) < 36:
+                    break
+                nbytes = unpack('>i', cheader[32:36])[0]
+                size = 56 + 36 + 4*((nbytes + 3) // 4)
+            if offset + size > file_size:
+                break	# Truncated last frame
+            offsets.append(offset)
+            offset += size
+    if num_atoms is None:
+        raise UserError("No frames found in xtc file %s" % path)
+    from numpy import array, int64
+    return num_atoms, array(offsets, int64)
+
+def trr_frame_offsets(path):
+    '''Return number of atoms and array of byte offsets of the frames of a trr file.'''
+    from struct import unpack
+    import os
+    file_size = os.path.getsize(path)
+    offsets = []
+    num_atoms = None
+    with open(path, 'rb') as f:
+        offset = 0
+        while True:
+            f.seek(offset)
+            start = f.read(12)
+            if len(start) < 12:
+                break
+            magic, slen, vlen = unpack('>3i', start)
+            if magic != TRR_MAGIC:
+                raise UserError("Bad trr frame header at byte %d of %s" % (offset, path))
+            vbytes = 4*((vlen + 3) // 4)
+            f.seek(vbytes, 1)
+            sizes = f.read(44)
+            if len(sizes) < 44:
+                break
+            (ir_size, e_size, box_size, vir_size, pres_size, top_size, sym_size,
+                x_size, v_size, f_size, natoms) = unpack('>11i', sizes)
+            if num_atoms is None:
+                num_atoms = natoms
+            if box_size:
+                float_size = box_size // 9
+            elif x_size:
+                float_size = x_size // (3*natoms)
+            elif v_size:
+                float_size = v_size // (3*natoms)
+            else:
+                float_size = f_size // (3*natoms)
+            # step, nre, time, lambda
+            header_size = 12 + vbytes + 44 + 8 + 2*float_size
+            size = header_size + box_size + vir_size + pres_size + x_size + v_size + f_size
+            if offset + size > file_size:
+                break	# Truncated last frame
+            offsets.append(offset)
+            offset += size
+    if num_atoms is None:
+        raise UserError("No frames found in trr file %s" % path)
+    from numpy import array, int64
+    return num_atoms, array(offsets, int64)
@@ -199,7 +199,9 @@ interpolate_dihedrals(PyObject *, PyObject *args, PyObject *keywds)
       return NULL;
     }
 
+  Py_BEGIN_ALLOW_THREADS
   interp_dihedrals(i, coords0, coords1, f, coords);
+  Py_END_ALLOW_THREADS
   
   return python_none();
 }
@@ -245,7 +247,9 @@ interpolate_linear(PyObject *, PyObject *args, PyObject *keywds)
       return NULL;
     }
 
+  Py_BEGIN_ALLOW_THREADS
   interp_linear(i, coords0, coords1, f, coords);
+  Py_END_ALLOW_THREADS
   
   return python_none();
 }
@@ -312,7 +316,9 @@ apply_rigid_motion(PyObject *, PyObject *args, PyObject *keywds)
       return NULL;
     }
 
+  Py_BEGIN_ALLOW_THREADS
   rigid_motion(coords, i, axis, angle, center, shift, f);
+  Py_END_ALLOW_THREADS
   
   return python_none();
 }
@@ -0,0 +1,30 @@
+from chimerax.core.commands import run
+run(session, "open 1gcn ; open 1gcn ; turn y 30 models #2 ; move x 5 models #2")
+run(session, "morph #1,2 frames 20 hideModels false play false")
+full = session.models[-1]
+
+# Frames computed in threads are each added once, when done.
+run(session, "morph #1,2 frames 20 hideModels false play false wait false")
+traj = session.models[-1]
+calc = traj._morph_calculation
+added = []
+add_coordset = traj.add_coordset
+def count_added(cs_id, xyz):
+	added.append(cs_id)
+	add_coordset(cs_id, xyz)
+traj.add_coordset = count_added
+from time import sleep
+while not calc.finished:
+	session.triggers.activate_trigger('new frame', None)
+	sleep(0.01)
+
+if len(added) != len(set(added)):
+	raise SystemExit("Morph with wait false added frames %s more than once"
+		% ', '.join('%d' % cs_id for cs_id in sorted(added) if added.count(cs_id) > 1))
+if list(traj.coordset_ids) != list(full.coordset_ids):
+	raise SystemExit("Morph with wait false has %d frames instead of %d"
+		% (traj.num_coordsets, full.num_coordsets))
+from numpy import allclose
+for cs_id in full.coordset_ids:
+	if not allclose(traj.coordset(cs_id).xyzs, full.coordset(cs_id).xyzs, atol = 1e-3):
+		raise SystemExit("Morph with wait false frame %d differs from wait true frame" % cs_id)
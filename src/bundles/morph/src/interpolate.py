@@ -13,7 +13,7 @@ from time import time
 stt = rit = rst = rsit = 0
 from time import time
 def interpolate(coordset0, coordset1, segment_interpolator, residue_interpolator,
-                rate_method, frames, log):
+                rate_method, frames, log, nthread = 1):
         '''
         coordset0              initial coordinates indexed by atom index
         coordset1              final coordinates indexed by atom index
@@ -23,36 +23,62 @@ def interpolate(coordset0, coordset1, segment_interpolator, residue_interpolator
                                  "linear", "sinusoidal", "ramp up", "ramp down"
         frames                 number of frames to generate in trajectory
         log                    Logger for reporting progress messages
+        nthread                number of threads computing frames in parallel
         '''
 
         # Calculate interpolated coordinates for each frame.
-        coordsets = []
-        rateFunction = RateMap[rate_method]
-        rate = rateFunction(frames)  # Compute fractional steps controlling speed of motion.
+        fi = FrameInterpolator(coordset0, coordset1, segment_interpolator,
+                               residue_interpolator, rate_method, frames)
+        coordsets = fi.frames(nthread, log)
 
-        c1s = coordset1.copy()
-        segment_interpolator.reverse_motion(c1s)
+        # Add last frame with coordinates equal to final position.
+        coordsets.append(coordset1.copy())
+
+        return coordsets
+
+class FrameInterpolator:
+        '''
+        Computes the coordinates of each intermediate frame independently so
+        frames can be calculated in any order and in parallel threads.
+        '''
+        def __init__(self, coordset0, coordset1, segment_interpolator, residue_interpolator,
+                     rate_method, frames):
+                self.coordset0 = coordset0
+                self.coordset1 = coordset1
+                self.segment_interpolator = segment_interpolator
+                self.residue_interpolator = residue_interpolator
+                rateFunction = RateMap[rate_method]
+                # Compute fractional steps controlling speed of motion.
+                self.fractions = rateFunction(frames)
 
-        for i, f in enumerate(rate):
-                coordset = coordset0.copy()
+                self._c1s = c1s = coordset1.copy()
+                segment_interpolator.reverse_motion(c1s)
+
+        def frame(self, f):
+                coordset = self.coordset0.copy()
                 # Interpolate residue conformations
                 t0 = time()
-                residue_interpolator.interpolate(coordset0, c1s, f, coordset)
+                self.residue_interpolator.interpolate(self.coordset0, self._c1s, f, coordset)
                 t1 = time()
                 global rst
                 rst += t1-t0
 
                 # Interplate segment motions
-                segment_interpolator.interpolate(f, coordset)
-
-                coordsets.append(coordset)
-                if log and (i+1)%100 == 0:
-                        log.status("Trajectory frame %d generated" % (i+1))
-
-        # Add last frame with coordinates equal to final position.
-        coordsets.append(coordset1.copy())
+                self.segment_interpolator.interpolate(f, coordset)
+                return coordset
 
-        return coordsets
+        def frames(self, nthread = 1, log = None):
+                '''Return list of coordinates for all intermediate frames.'''
+                if nthread > 1:
+                        from concurrent.futures import ThreadPoolExecutor
+                        with ThreadPoolExecutor(max_workers = nthread) as executor:
+                                return list(executor.map(self.frame, self.fractions))
+                coordsets = []
+                for i, f in enumerate(self.fractions):
+                        coordsets.append(self.frame(f))
+                        if log and (i+1)%100 == 0:
+                                log.status("Trajectory frame %d generated" % (i+1))
+                return coordsets
 
 def rateLinear(frames):
         "Generate fractions from 0 to 1 linearly (excluding start/end)"
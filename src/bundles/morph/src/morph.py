@@ -14,7 +14,8 @@
 #
 def morph(session, structures, frames = 50, wrap = False, rate = 'linear', method = 'corkscrew',
           cartesian = False, same = False, core_fraction = 0.5, min_hinge_spacing = 6,
-          hide_models = True, play = True, slider = True, color_segments = False, color_core = None):
+          hide_models = True, play = True, slider = True, color_segments = False, color_core = None,
+          wait = True):
     '''
     Morph between atomic models using Yale Morph Server algorithm.
 
@@ -60,6 +61,10 @@ def morph(session, structures, frames = 50, wrap = False, rate = 'linear', metho
     color_core : Color or None
         Color the core residues the specified color.  This is to understand what residues
         the algorithm calculates to be the core.
+    wait : bool
+        Whether to compute all frames before returning.  If false the morph model is
+        opened and played while intermediate frames are computed in threads, frames
+        not yet computed being skipped.  Default true.
     '''
 
     if len(structures) < 2:
@@ -69,18 +74,24 @@ def morph(session, structures, frames = 50, wrap = False, rate = 'linear', metho
     if wrap:
         structures.append(structures[0])
         
+    def report_frames(traj, session = session):
+        if not traj.deleted:
+            session.logger.info('Computed %d frame morph #%s' % (traj.num_coordsets, traj.id_string))
+
     from .motion import compute_morph
     traj = compute_morph(structures, session.logger, method=method, rate=rate, frames=frames,
                          cartesian=cartesian, match_same=same, core_fraction = core_fraction,
                          min_hinge_spacing = min_hinge_spacing,
-                         color_segments = color_segments, color_core = color_core)
+                         color_segments = color_segments, color_core = color_core,
+                         wait = wait, done_cb = None if wait else report_frames)
     session.models.add([traj])
     if not color_segments and color_core is None:
         if traj.num_chains == 1:
             # Assign new color for single chain morphs for visual clarity
             traj.set_initial_color()
 
-    session.logger.info('Computed %d frame morph #%s' % (traj.num_coordsets, traj.id_string))
+    if wait:
+        report_frames(traj)
 
     if hide_models:
         for m in structures:
@@ -132,7 +143,8 @@ def register_morph_command(logger):
                    ('play', BoolArg),
                    ('slider', BoolArg),
                    ('color_segments', BoolArg),
-                   ('color_core', ColorArg)],
+                   ('color_core', ColorArg),
+                   ('wait', BoolArg)],
         synopsis = 'morph atomic structures'
     )
     register('morph', desc, morph, logger=logger)
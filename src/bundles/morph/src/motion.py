@@ -11,8 +11,18 @@
 
 def compute_morph(mols, log, method = 'corkscrew', rate = 'linear', frames = 20,
                   cartesian = False, match_same = False, core_fraction = 0.5, min_hinge_spacing = 6,
-                  color_segments = False, color_core = None):
+                  color_segments = False, color_core = None, nthread = None, wait = True,
+                  done_cb = None):
+        '''
+        If wait is false, the atom pairing and rigid segments are computed and the
+        final frame of each morph step is added to the returned trajectory, while the
+        intermediate frames are computed in threads and added as they finish.
+        Function done_cb is called with the trajectory when all frames are added.
+        '''
         from time import time
+        if nthread is None:
+                from multiprocessing import cpu_count
+                nthread = max(1, cpu_count()//2)
         t0 = time()
         motion = MolecularMotion(mols[0], method = method, rate = rate, frames = frames,
                                  match_same = match_same, core_fraction = core_fraction,
@@ -20,9 +30,14 @@ def compute_morph(mols, log, method = 'corkscrew', rate = 'linear', frames = 20,
         traj = motion.trajectory()
         from .interpolate import ResidueInterpolator
         res_interp = ResidueInterpolator(traj.residues, cartesian, log)
+        pending = []
         for i, mol in enumerate(mols[1:]):
                 log.status("Computing interpolation %d\n" % (i+1))
-                res_groups = motion.interpolate(mol, res_interp)
+                if wait:
+                        res_groups = motion.interpolate(mol, res_interp, nthread = nthread)
+                else:
+                        res_groups, fi, base_id = motion.add_final_frame(mol, res_interp)
+                        pending.append((fi, base_id))
                 if color_segments and i == 0:
                         from random import seed, randint
                         seed(1)
@@ -38,7 +53,13 @@ def compute_morph(mols, log, method = 'corkscrew', rate = 'linear', frames = 20,
                                         r.atoms.colors = rgba
         traj.active_coordset_id = 1	# Start at initial trajectory frame.
         t1 = time()
-        log.status('Computed morph %d frames in %.3g seconds' % (traj.num_coordsets, t1-t0))
+        if pending:
+                traj._morph_calculation = MorphCalculation(traj, pending, nthread, done_cb)
+                log.status('Computing morph frames')
+        else:
+                log.status('Computed morph %d frames in %.3g seconds' % (traj.num_coordsets, t1-t0))
+                if done_cb:
+                        done_cb(traj)
         return traj
 
 ht = it = 0
@@ -88,8 +109,26 @@ class MolecularMotion:
                 self.min_hinge_spacing = min_hinge_spacing
                 self.log = log
 
-        def interpolate(self, m, res_interp, color_segments = False):
+        def interpolate(self, m, res_interp, color_segments = False, nthread = 1):
                 """Interpolate to new conformation 'm'."""
+                res_groups, fi, base_id = self.add_final_frame(m, res_interp)
+                from time import time
+                t0 = time()
+                sm = self.mol
+                for i, cs in enumerate(fi.frames(nthread, sm.session.logger)):
+                        sm.add_coordset(base_id + i, cs)
+                t1 = time()
+                global it
+                it += t1-t0
+                return res_groups
+
+        def add_final_frame(self, m, res_interp):
+                """
+                Pair atoms with new conformation 'm', find rigid segments and add
+                the final coordinate set as the active coordinate set.  Returns the
+                residue groups, a FrameInterpolator for computing the intermediate
+                frames, and the coordinate set id for the first intermediate frame.
+                """
 
                 #
                 # Find matching set of residues.  First try for
@@ -149,18 +188,88 @@ class MolecularMotion:
                 from .interpolate import SegmentInterpolator
                 seg_interp = SegmentInterpolator(res_groups, self.method, coords0, coords1)
 
-                from .interpolate import interpolate
-                coordsets = interpolate(coords0, coords1, seg_interp, res_interp,
-                                        self.rate, self.frames, sm.session.logger)
+                from .interpolate import FrameInterpolator
+                fi = FrameInterpolator(coords0, coords1, seg_interp, res_interp,
+                                       self.rate, self.frames)
+                # Intermediate frames get the ids before the final frame.
                 base_id = max(sm.coordset_ids) + 1
-                for i, cs in enumerate(coordsets):
-                        sm.add_coordset(base_id + i, cs)
-                sm.active_coordset_id = base_id + i
+                final_id = base_id + len(fi.fractions)
+                sm.add_coordset(final_id, coords1.copy())
+                sm.active_coordset_id = final_id
                 t1 = time()
                 global it
                 it += t1-t0
 
-                return res_groups
+                return res_groups, fi, base_id
 
         def trajectory(self):
                 return self.mol
+
+class MorphCalculation:
+        '''
+        Compute intermediate morph frames in threads and add them to the trajectory
+        each graphics frame as they finish, so the morph can be played before all
+        frames are computed.  Missing frames are skipped during playback.
+        '''
+        def __init__(self, traj, segments, nthread = 1, done_cb = None):
+                self.traj = traj
+                self._done_cb = done_cb
+                from concurrent.futures import ThreadPoolExecutor
+                self._executor = ex = ThreadPoolExecutor(max_workers = max(1, nthread))
+                self._futures = [(base_id + i, ex.submit(fi.frame, f))
+                                 for fi, base_id in segments
+                                 for i, f in enumerate(fi.fractions)]
+                self._total = len(self._futures)
+                self._handler = traj.session.triggers.add_handler('new frame', self._add_frames)
+
+        def _add_frames(self, *_):
+                traj = self.traj
+                from chimerax.core.triggerset import DEREGISTER
+                if traj.deleted:
+                        self._stop()
+                        return DEREGISTER
+                # Check each future once so a frame finishing during this call
+                # is not added now and again next time, replacing its coordset.
+                done = [(cs_id, f) for cs_id, f in self._futures if f.done()]
+                done_ids = set(cs_id for cs_id, f in done)
+                self._futures = [(cs_id, f) for cs_id, f in self._futures
+                                 if cs_id not in done_ids]
+                log = traj.session.logger
+                for cs_id, f in done:
+                        try:
+                                xyz = f.result()
+                        except Exception as e:
+                                self._stop()
+                                log.error('Morph frame calculation failed: %s' % str(e))
+                                return DEREGISTER
+                        traj.add_coordset(cs_id, xyz)
+                if self._futures:
+                        if done:
+                                log.status('Computed %d of %d morph frames'
+                                           % (self._total - len(self._futures), self._total))
+                        return None
+                self._stop()
+                log.status('Computed morph %d frames' % traj.num_coordsets)
+                if self._done_cb:
+                        self._done_cb(traj)
+                return DEREGISTER
+
+        @property
+        def finished(self):
+                return self._handler is None
+
+        def cancel(self):
+                '''Stop computing frames.  Frames already added are kept.'''
+                h = self._handler
+                self._stop()
+                if h is not None:
+                        self.traj.session.triggers.remove_handler(h)
+
+        def _stop(self):
+                for cs_id, f in self._futures:
+                        f.cancel()
+                self._futures = []
+                self._executor.shutdown(wait = False)
+                self._handler = None
+                if getattr(self.traj, '_morph_calculation', None) is self:
+                        self.traj._morph_calculation = None
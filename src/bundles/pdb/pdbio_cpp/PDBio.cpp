@@ -1912,10 +1912,12 @@ write_coord_set(StreamDispatcher& os, const Structure* s, const CoordSet* cs,
                 *rec_serial = ++serial;
                 rev_asn[a] = *rec_serial;
                 const Coord* crd;
+                Coord cs_crd;
                 float bfactor, occupancy;
                 if (alt_loc == ' ') {
-                    // no alt locs
-                    crd = &a->coord(cs);
+                    // no alt locs; don't widen single-precision coordsets
+                    cs_crd = a->coord_value(cs);
+                    crd = &cs_crd;
                     bfactor = cs->get_bfactor(a);
                     occupancy = cs->get_occupancy(a);
                 } else {
@@ -0,0 +1,126 @@
+# Check that chunked (version 4) session containers read back what was written.
+import io
+import os
+import tempfile
+import numpy
+from chimerax.core import session_chunks
+
+small = numpy.arange(100, dtype=numpy.int32)                       # in msgpack data
+separate = numpy.linspace(0, 1, 50000, dtype=numpy.float32)        # out-of-band, read with chunk
+large = numpy.arange(200000, dtype=numpy.float64).reshape(200, 1000)    # out-of-band, lazy
+metadata = {'generator': 'cxtest'}
+bundles = {'ChimeraX-Core': ('1.0', 1)}
+states = [('state %d' % i, {'small': small, 'separate': separate, 'large': large, 'i': i})
+          for i in range(3)]
+
+
+def write_session(stream, compression):
+    w = session_chunks.ChunkWriter(stream, compression)
+    try:
+        w.write_header()
+        w.add('metadata', metadata)
+        w.add('bundles', bundles)
+        for name, data in states:
+            w.add(('state', name), name, data)
+        w.finish()
+    finally:
+        w.close()
+
+
+def open_reader(stream):
+    tokens = stream.readline().split()
+    if tokens[:5] != [b'#', b'ChimeraX', b'Session', b'version', b'4']:
+        raise SystemExit("Bad version 4 session header %s" % tokens)
+    return session_chunks.ChunkReader(stream, tokens[5].decode('ascii'))
+
+
+def check_states(objects, compression):
+    if objects[0] != metadata or objects[1] != bundles:
+        raise SystemExit("%s session metadata or bundle list not read back" % compression)
+    rest = objects[2:]
+    if [rest[2 * i] for i in range(len(states))] != [name for name, data in states]:
+        raise SystemExit("%s session state names not read back in order" % compression)
+    for i, (name, data) in enumerate(states):
+        d = rest[2 * i + 1]
+        if d['i'] != i:
+            raise SystemExit("%s session state %s has wrong value" % (compression, name))
+        for key in ('small', 'separate'):
+            if not isinstance(d[key], numpy.ndarray) or not numpy.array_equal(d[key], data[key]):
+                raise SystemExit("%s session array %s of %s not read back"
+                                 % (compression, key, name))
+        lazy = d['large']
+        if (not isinstance(lazy, session_chunks.LazyArray) or lazy.materialized
+                or lazy.shape != large.shape or lazy.dtype != large.dtype):
+            raise SystemExit("%s session large array placeholder is wrong: %r"
+                             % (compression, lazy))
+    return [rest[2 * i + 1]['large'] for i in range(len(states))]
+
+
+for compression in session_chunks.COMPRESSIONS:
+    fd, path = tempfile.mkstemp(suffix='.cxs')
+    os.close(fd)
+    try:
+        with open(path, 'wb') as f:
+            write_session(f, compression)
+
+        # Sequential reading, and reading with the index.
+        with open(path, 'rb') as f:
+            r = open_reader(f)
+            check_states(list(r.objects()), compression)
+        with open(path, 'rb') as f:
+            r = open_reader(f)
+            index = r.read_index()
+            if index['compression'] != compression or [s[0] for s in index['states']] != \
+                    [name for name, data in states]:
+                raise SystemExit("%s session chunk index is wrong: %s" % (compression, index))
+            name, data = r.chunk_objects(index['states'][1][1])
+            if name != states[1][0] or data['i'] != 1:
+                raise SystemExit("%s session state chunk read through the index is wrong"
+                                 % compression)
+            f.seek(0)
+            r = open_reader(f)
+            lazy_arrays = check_states(list(r.session_objects()), compression)
+
+        # Lazy arrays are read after the session file is closed.
+        for a in lazy_arrays:
+            if not numpy.array_equal(numpy.asarray(a), large):
+                raise SystemExit("%s session lazy array differs after file closed" % compression)
+            if not a.materialize().flags.writeable:
+                raise SystemExit("%s session lazy array is read-only" % compression)
+    finally:
+        os.remove(path)
+
+    # Arrays in streams that are not files are read with their chunk.
+    stream = io.BytesIO()
+    write_session(stream, compression)
+    stream.seek(0)
+    lazy_arrays = check_states(list(open_reader(stream).session_objects()), compression)
+    stream.close()
+    for a in lazy_arrays:
+        if not numpy.array_equal(numpy.asarray(a), large):
+            raise SystemExit("%s session lazy array differs after stream closed" % compression)
+
+# Sessions are saved in version 3 format unless version 4 is asked for.
+from chimerax.core.commands import run
+from chimerax.core.session import is_lz4_file
+import lz4.frame
+run(session, "open 1a0m")
+tmpdir = tempfile.mkdtemp()
+for version, header in ((None, b'# ChimeraX Session version 3\n'),
+                        (4, b'# ChimeraX Session version 4 lz4\n')):
+    path = os.path.join(tmpdir, 'test.cxs')
+    run(session, "save %s" % path + ("" if version is None else " version %d" % version))
+    if version is None:
+        f = lz4.frame.open(path, 'rb') if is_lz4_file(path) else open(path, 'rb')
+    else:
+        f = open(path, 'rb')
+    with f:
+        line = f.readline()
+    if line != header:
+        raise SystemExit("Session saved with version %s has header %r" % (version, line))
+    coords = session.models[0].atoms.coords
+    run(session, "close; open %s" % path)
+    if not numpy.allclose(session.models[0].atoms.coords, coords):
+        raise SystemExit("Session version %s restored different coordinates" % version)
+    os.remove(path)
+os.rmdir(tmpdir)
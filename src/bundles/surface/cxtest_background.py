@@ -0,0 +1,58 @@
+# Check surfaces computed in the background with "wait false" are added once
+# when done, and that closing surfaces or structures cancels pending surfaces.
+from chimerax.core.commands import run
+from chimerax.surface.surfthread import surface_calculation
+from time import sleep
+
+added = []
+models_add = session.models.add
+def count_added(models, **kw):
+	added.extend(models)
+	return models_add(models, **kw)
+session.models.add = count_added
+
+def wait_for_surfaces(frames = None):
+	f = 0
+	while (surface_calculation(session) is not None if frames is None else f < frames):
+		session.triggers.activate_trigger('new frame', None)
+		sleep(0.01)
+		f += 1
+
+def surfaces(s):
+	from chimerax.atomic import MolecularSurface
+	return [m for m in s.child_models() if isinstance(m, MolecularSurface)]
+
+# Surfaces are added to the structure when the calculation finishes.
+s = run(session, "open 1a0m")[0]
+run(session, "surface #1 wait false")
+calc = surface_calculation(session)
+if calc is None or len(calc.pending_surfaces) != 2:
+	raise SystemExit("Surface with wait false did not start computing 2 chain surfaces")
+wait_for_surfaces()
+surfs = surfaces(s)
+if len(surfs) != 2 or len(added) != 2 or set(added) != set(surfs):
+	raise SystemExit("Surface with wait false added %d models for %d surfaces" % (len(added), len(surfs)))
+for surf in surfs:
+	if surf.vertices is None or len(surf.vertices) == 0 or surf.triangles is None:
+		raise SystemExit("Surface %s computed with wait false has no geometry" % surf.name)
+
+# Closing surfaces cancels pending calculations.
+run(session, "surface close ; surface #1 wait false ; surface close")
+pending = surface_calculation(session)
+if pending is not None and pending.pending_surfaces:
+	raise SystemExit("Surface close left %d surfaces computing" % len(pending.pending_surfaces))
+del added[:]
+wait_for_surfaces(20)
+if added or surfaces(s):
+	raise SystemExit("Surfaces were added after surface close")
+
+# Closing the structure drops its pending surfaces.
+run(session, "surface #1 wait false")
+pending = surface_calculation(session).pending_surfaces
+run(session, "close #1")
+wait_for_surfaces()
+wait_for_surfaces(20)
+if added:
+	raise SystemExit("Surfaces were added after their structure was closed")
+if [surf for surf in pending if not surf.deleted]:
+	raise SystemExit("Pending surfaces of a closed structure were not deleted")
@@ -0,0 +1,72 @@
+# Check surface geometry cache memory hits, disk file hits and size limits.
+import os
+import tempfile
+from numpy import arange, array_equal, float32, int32
+from chimerax.surface.surfcache import SurfaceGeometryCache
+
+def geometry(n):
+	return {'va': arange(3*n, dtype = float32).reshape(n,3), 'ta': arange(3*n, dtype = int32).reshape(n,3)}
+
+def nbytes(g):
+	return sum(a.nbytes for a in g.values())
+
+directory = tempfile.mkdtemp()
+g = geometry(1000)
+size = nbytes(g)
+c = SurfaceGeometryCache(max_bytes = 2*size, disk_cache = True, max_disk_bytes = 100*size,
+	directory = directory)
+keys = [c.key(arange(30.0).reshape(10,3) + i, arange(10.0), ('SES', 1.4)) for i in range(3)]
+if len(set(keys)) != 3 or c.key(arange(30.0).reshape(10,3), arange(10.0), ('SES', 1.4)) != keys[0]:
+	raise SystemExit("Surface cache keys do not depend only on coordinates, radii and parameters")
+
+# Memory hits return copies of the cached arrays.
+c.put(keys[0], g)
+cg = c.get(keys[0])
+if cg is None or not array_equal(cg['va'], g['va']) or c.hits != 1:
+	raise SystemExit("Surface cache did not find cached geometry in memory")
+cg['va'][:] = 0
+if not array_equal(c.get(keys[0])['va'], g['va']):
+	raise SystemExit("Surface cache geometry changed by modifying a returned array")
+
+# Memory limit drops least recently used geometry.
+c.put(keys[1], g)
+c.get(keys[0])
+c.put(keys[2], g)
+if c.memory_use > c.max_bytes or c.num_surfaces != 2 or keys[1] in c._geometry:
+	raise SystemExit("Surface cache memory limit %d not enforced, using %d bytes for %d surfaces"
+		% (c.max_bytes, c.memory_use, c.num_surfaces))
+c.set_memory_limit(size)
+if c.memory_use > size or list(c._geometry.keys()) != [keys[2]]:
+	raise SystemExit("Lowering the surface cache memory limit did not drop least recently used geometry")
+
+# Geometry dropped from memory is read from the cache file.
+disk_hits = c.disk_hits
+if c.get(keys[1]) is None or c.disk_hits != disk_hits + 1:
+	raise SystemExit("Surface cache did not read dropped geometry from disk")
+c2 = SurfaceGeometryCache(disk_cache = True, directory = directory)
+if not array_equal(c2.get(keys[0])['ta'], g['ta']) or c2.disk_hits != 1 or c2.hits != 0:
+	raise SystemExit("New surface cache did not read geometry from cache files")
+if c2.get('no such key') is not None or c2.misses != 1:
+	raise SystemExit("Surface cache miss not counted")
+
+# Disk limit removes least recently used files.
+for i, key in enumerate(keys):
+	t = 1000000000 + i
+	os.utime(os.path.join(directory, key + '.npz'), (t, t))
+file_size = c.disk_use() // 3
+c.set_disk_limit(2*file_size)
+if c.disk_use() > 2*file_size or os.path.exists(os.path.join(directory, keys[0] + '.npz')):
+	raise SystemExit("Surface cache disk limit not enforced, using %d bytes" % c.disk_use())
+
+c.clear(disk = True)
+if c.num_surfaces or c.disk_use() or c.hits or c.misses:
+	raise SystemExit("Clearing the surface cache left surfaces, files or statistics")
+os.rmdir(directory)
+
+# Showing the same surface again uses the cached geometry.
+from chimerax.core.commands import run
+run(session, "open 1gcn ; surface cache clear")
+cache = session._surface_geometry_cache
+run(session, "surface #1 ; surface close ; surface #1")
+if cache.hits != 1:
+	raise SystemExit("Recomputing the same surface had %d surface cache hits instead of 1" % cache.hits)
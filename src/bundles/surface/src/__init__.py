@@ -15,7 +15,7 @@ from .sasa import spheres_surface_area
 from .split import split_surfaces
 from .shapes import sphere_geometry, sphere_geometry2, cylinder_geometry, dashed_cylinder_geometry, cone_geometry, box_geometry
 from .area import surface_area, enclosed_volume, surface_volume_and_area
-from .gridsurf import ses_surface_geometry
+from .gridsurf import ses_surface_geometry, SESSurfaceGrids
 
 # Make sure _surface can runtime link shared library libarrays.
 from chimerax import arrays ; arrays.load_libarrays()
@@ -18,41 +18,13 @@ def ses_surface_geometry(xyz, radii, probe_radius = 1.4, grid_spacing = 0.5, sas
     If sas is true then the solvent accessible surface is returned instead.
     '''
 
-    # Compute bounding box for atoms
-    xyz_min, xyz_max = xyz.min(axis = 0), xyz.max(axis = 0)
-    pad = 2*probe_radius + radii.max() + grid_spacing
-    origin = [x-pad for x in xyz_min]
-
-    # Create 3d grid for computing distance map
-    from math import ceil
-    s = grid_spacing
-    shape = [int(ceil((xyz_max[a] - xyz_min[a] + 2*pad) / s))
-             for a in (2,1,0)]
-#    print('ses surface grid size', shape, 'spheres', len(xyz))
-    from numpy import empty, float32, sqrt
-    try:
-        matrix = empty(shape, float32)
-    except (MemoryError, ValueError):
-        raise MemoryError('Surface calculation out of memory trying to allocate a grid %d x %d x %d '
-                          % (shape[2], shape[1], shape[0]) + 
-                          'to cover xyz bounds %.3g,%.3g,%.3g ' % tuple(xyz_min) +
-                          'to %.3g,%.3g,%.3g ' % tuple(xyz_max) +
-                          'with grid size %.3g' % grid_spacing)
-                          
+    origin, shape, xyz_to_ijk_tf = _surface_grid(xyz, radii, probe_radius, grid_spacing)
+    matrix = _allocate_grid(shape, xyz, grid_spacing)
     max_index_range = 2
     matrix[:,:,:] = max_index_range
 
     # Transform centers and radii to grid index coordinates
-    from chimerax.geometry import Place
-    xyz_to_ijk_tf = Place(((1.0/s, 0, 0, -origin[0]/s),
-                           (0, 1.0/s, 0, -origin[1]/s),
-                           (0, 0, 1.0/s, -origin[2]/s)))
-    from numpy import float32
-    ijk = xyz.astype(float32)
-    xyz_to_ijk_tf.transform_points(ijk, in_place = True)
-    ri = radii.astype(float32)
-    ri += probe_radius
-    ri /= s
+    ijk, ri = _grid_spheres(xyz, radii, probe_radius, grid_spacing, xyz_to_ijk_tf)
 
     # Compute distance map from surface of spheres, positive outside.
     from chimerax.map import sphere_surface_distance
@@ -70,8 +42,7 @@ def ses_surface_geometry(xyz, radii, probe_radius = 1.4, grid_spacing = 0.5, sas
     # Compute SES surface distance map using SAS surface vertex
     # points as probe sphere centers.
     matrix[:,:,:] = max_index_range
-    rp = empty((len(sas_va),), float32)
-    rp[:] = float(probe_radius)/s
+    rp = _probe_radii(len(sas_va), probe_radius, grid_spacing)
     sphere_surface_distance(sas_va, rp, max_index_range, matrix)
     ses_va, ses_ta, ses_na = contour_surface(matrix, level, cap_faces = False,
                                              calculate_normals = True)
@@ -79,9 +50,60 @@ def ses_surface_geometry(xyz, radii, probe_radius = 1.4, grid_spacing = 0.5, sas
     # Transform surface from grid index coordinates to atom coordinates
     xyz_to_ijk_tf.inverse().transform_points(ses_va, in_place = True)
 
+    return _remove_dust(ses_va, ses_na, ses_ta, xyz, radii, probe_radius)
+
+def _surface_grid(xyz, radii, probe_radius, grid_spacing):
+    # Compute bounding box for atoms
+    xyz_min, xyz_max = xyz.min(axis = 0), xyz.max(axis = 0)
+    pad = 2*probe_radius + radii.max() + grid_spacing
+    origin = [x-pad for x in xyz_min]
+
+    # Create 3d grid for computing distance map
+    from math import ceil
+    s = grid_spacing
+    shape = [int(ceil((xyz_max[a] - xyz_min[a] + 2*pad) / s))
+             for a in (2,1,0)]
+#    print('ses surface grid size', shape, 'spheres', len(xyz))
+
+    from chimerax.geometry import Place
+    xyz_to_ijk_tf = Place(((1.0/s, 0, 0, -origin[0]/s),
+                           (0, 1.0/s, 0, -origin[1]/s),
+                           (0, 0, 1.0/s, -origin[2]/s)))
+    return origin, shape, xyz_to_ijk_tf
+
+def _allocate_grid(shape, xyz, grid_spacing):
+    from numpy import empty, float32
+    try:
+        matrix = empty(shape, float32)
+    except (MemoryError, ValueError):
+        xyz_min, xyz_max = xyz.min(axis = 0), xyz.max(axis = 0)
+        raise MemoryError('Surface calculation out of memory trying to allocate a grid %d x %d x %d '
+                          % (shape[2], shape[1], shape[0]) + 
+                          'to cover xyz bounds %.3g,%.3g,%.3g ' % tuple(xyz_min) +
+                          'to %.3g,%.3g,%.3g ' % tuple(xyz_max) +
+                          'with grid size %.3g' % grid_spacing)
+    return matrix
+
+def _grid_spheres(xyz, radii, probe_radius, grid_spacing, xyz_to_ijk_tf):
+    from numpy import float32
+    ijk = xyz.astype(float32)
+    xyz_to_ijk_tf.transform_points(ijk, in_place = True)
+    ri = radii.astype(float32)
+    ri += probe_radius
+    ri /= grid_spacing
+    return ijk, ri
+
+def _probe_radii(n, probe_radius, grid_spacing):
+    from numpy import empty, float32
+    rp = empty((n,), float32)
+    rp[:] = float(probe_radius)/grid_spacing
+    return rp
+
+def _remove_dust(ses_va, ses_na, ses_ta, xyz, radii, probe_radius):
     # Delete connected components more than 1.5 probe radius from atom spheres.
     kvi = []
     kti = []
+    from numpy import sqrt
     from ._surface import connected_pieces
     vtilist = connected_pieces(ses_ta)
     for vi,ti in vtilist:
@@ -99,3 +121,196 @@ def ses_surface_geometry(xyz, radii, probe_radius = 1.4, grid_spacing = 0.5, sas
     va,na,ta = reduce_geometry(ses_va, ses_na, ses_ta, keepv, keept)
                                
     return va, na, ta
+
+class SESSurfaceGrids:
+    '''
+    Solvent excluded surface calculation like ses_surface_geometry() that keeps
+    its distance grids and surface so that when a few atoms move only the part
+    of the grids near those atoms is recomputed and contoured, and the new
+    surface patch is stitched into the existing surface.  This is much faster
+    than recomputing the whole surface when a side chain is rotated or tugged.
+    The two grids are kept in memory as long as this object exists.
+    '''
+
+    max_changed_fraction = 0.1	# Recompute fully if more atoms moved.
+
+    def __init__(self, xyz, radii, probe_radius = 1.4, grid_spacing = 0.5):
+        self.probe_radius = probe_radius
+        self.grid_spacing = grid_spacing
+        self._max_range = m = 2
+
+        # Moved atoms must stay inside the original atom bounds so the grid is large enough.
+        self._xyz_bounds = xyz.min(axis = 0), xyz.max(axis = 0)
+        self._max_radius = radii.max()
+
+        origin, shape, self._xyz_to_ijk_tf = _surface_grid(xyz, radii, probe_radius, grid_spacing)
+        self._ijk_max = (shape[2]-1, shape[1]-1, shape[0]-1)
+        self._xyz, self._radii = xyz.copy(), radii.copy()
+        self._ijk, self._ri = _grid_spheres(xyz, radii, probe_radius, grid_spacing,
+                                            self._xyz_to_ijk_tf)
+
+        from chimerax.map import sphere_surface_distance, contour_surface
+        self._sas = sas = _allocate_grid(shape, xyz, grid_spacing)
+        sas[:,:,:] = m
+        sphere_surface_distance(self._ijk, self._ri, m, sas)
+        self._sas_va = contour_surface(sas, 0, cap_faces = False)[0]
+
+        self._ses = ses = _allocate_grid(shape, xyz, grid_spacing)
+        ses[:,:,:] = m
+        rp = _probe_radii(len(self._sas_va), probe_radius, grid_spacing)
+        sphere_surface_distance(self._sas_va, rp, m, ses)
+        # Surface in grid index coordinates before removing dust.
+        self._va, self._ta, self._na = contour_surface(ses, 0, cap_faces = False,
+                                                       calculate_normals = True)
+
+    def surface_geometry(self):
+        '''Return vertex, normal and triangle arrays for the current surface.'''
+        va = self._va.copy()
+        self._xyz_to_ijk_tf.inverse().transform_points(va, in_place = True)
+        return _remove_dust(va, self._na, self._ta, self._xyz, self._radii, self.probe_radius)
+
+    def update(self, xyz, radii):
+        '''
+        Update the surface for new atom coordinates and radii and return vertex,
+        normal and triangle arrays.  Returns None if the surface cannot be updated
+        because the number of atoms changed, too many atoms moved, or atoms moved
+        outside the grid.  Then a new SESSurfaceGrids is needed.
+        '''
+        if len(xyz) != len(self._xyz):
+            return None
+        from numpy import logical_or
+        moved = logical_or((xyz != self._xyz).any(axis = 1), radii != self._radii)
+        nmoved = moved.sum()
+        if nmoved == 0:
+            return self.surface_geometry()
+        if nmoved > self.max_changed_fraction * len(xyz):
+            return None
+        xyz_min, xyz_max = self._xyz_bounds
+        mxyz = xyz[moved]
+        if ((mxyz < xyz_min).any() or (mxyz > xyz_max).any()
+            or radii[moved].max() > self._max_radius):
+            return None
+
+        ijk, ri = _grid_spheres(xyz, radii, self.probe_radius, self.grid_spacing,
+                                self._xyz_to_ijk_tf)
+        from numpy import concatenate
+        centers = concatenate((self._ijk[moved], ijk[moved]))
+        cradii = concatenate((self._ri[moved], ri[moved]))
+        self._xyz, self._radii = xyz.copy(), radii.copy()
+        self._ijk, self._ri = ijk, ri
+
+        # Recompute the solvent accessible distance grid near moved atoms.
+        m = self._max_range
+        lo, hi = self._region(centers, cradii + m)
+        self._recompute_distances(self._sas, lo, hi, ijk, ri)
+
+        # Replace solvent accessible surface points in that region.
+        from chimerax.map import contour_surface
+        sas_va = self._sas_va
+        old_in = _strictly_inside(sas_va, lo-1, hi+1)
+        sub, origin = self._subgrid(self._sas, lo-1, hi+1)
+        rva = contour_surface(sub, 0, cap_faces = False)[0]
+        rva += origin
+        new_in = _strictly_inside(rva, lo-1, hi+1)
+        old_va, new_va = sas_va[old_in], rva[new_in]
+        self._sas_va = concatenate((sas_va[~old_in], new_va))
+
+        # Recompute solvent excluded distance grid near probe positions that changed.
+        changed = concatenate((_unmatched_points(old_va, new_va),
+                               _unmatched_points(new_va, old_va)))
+        if len(changed) > 0:
+            rp = self.probe_radius / self.grid_spacing
+            lo, hi = self._region(changed, rp + m)
+            rpa = _probe_radii(len(self._sas_va), self.probe_radius, self.grid_spacing)
+            self._recompute_distances(self._ses, lo, hi, self._sas_va, rpa)
+            self._replace_surface_patch(lo-1, hi+1)
+
+        return self.surface_geometry()
+
+    def _region(self, centers, radii):
+        '''Grid index bounds covering spheres, clamped to grid.'''
+        from numpy import floor, ceil, clip, array, asarray, int64
+        r = asarray(radii).reshape((-1,1))
+        lo = floor((centers - r).min(axis = 0)).astype(int64)
+        hi = ceil((centers + r).max(axis = 0)).astype(int64)
+        ijk_max = array(self._ijk_max, int64)
+        return clip(lo, 0, ijk_max), clip(hi, 0, ijk_max)
+
+    def _subgrid(self, matrix, lo, hi):
+        '''Copy of grid region and its grid index origin, clamped to grid.'''
+        from numpy import clip, array
+        ijk_max = array(self._ijk_max)
+        (i0,j0,k0), (i1,j1,k1) = clip(lo, 0, ijk_max), clip(hi, 0, ijk_max)
+        return matrix[k0:k1+1,j0:j1+1,i0:i1+1].copy(), array((i0,j0,k0))
+
+    def _recompute_distances(self, matrix, lo, hi, centers, radii):
+        '''
+        Recompute grid values in region lo to hi.  Spheres not reaching the region
+        are skipped and spheres reaching outside it do not change values outside
+        since those already include their distances.  Using the full grid gives
+        values identical to a full calculation.
+        '''
+        m = self._max_range
+        (i0,j0,k0), (i1,j1,k1) = lo, hi
+        matrix[k0:k1+1,j0:j1+1,i0:i1+1] = m
+        from numpy import maximum
+        d = maximum(maximum(lo - centers, centers - hi), 0)
+        near = (d*d).sum(axis = 1) <= (radii + m)**2
+        from chimerax.map import sphere_surface_distance
+        sphere_surface_distance(centers[near], radii[near], m, matrix)
+
+    def _replace_surface_patch(self, lo, hi):
+        '''
+        Replace the triangles of grid cells between grid index bounds lo and hi
+        with a contour surface of that region.  Vertices on the faces of the
+        region are shared with the outside triangles and are merged.
+        '''
+        from chimerax.map import contour_surface
+        sub, plo = self._subgrid(self._ses, lo, hi)
+        pva, pta, pna = contour_surface(sub, 0, cap_faces = False, calculate_normals = True)
+        pva += plo
+
+        # Remove old triangles with centers inside the region.
+        va, ta, na = self._va, self._ta, self._na
+        tcenter = va[ta].mean(axis = 1)
+        keep_t = ta[~_strictly_inside(tcenter, lo, hi)]
+
+        # Merge patch vertices on region faces with old vertices.
+        from numpy import array
+        phi = plo + array(sub.shape[::-1]) - 1
+        tol = 1e-3
+        face = ((abs(pva - plo) < tol) | (abs(pva - phi) < tol)).any(axis = 1)
+        from numpy import zeros, ones, unique, nonzero, arange, int32, concatenate
+        used = zeros((len(va),), bool)
+        used[keep_t.ravel()] = True
+        uvi = nonzero(used)[0]
+        fvi = nonzero(face)[0]
+        from chimerax.geometry import find_close_point_pairs
+        pi, oi = find_close_point_pairs(pva[fvi], va[uvi], tol)
+        pi, first = unique(pi, return_index = True)
+        oi = oi[first]
+
+        # Compact vertices, old vertices used by remaining triangles followed by
+        # new patch vertices that were not merged.
+        omap = zeros((len(va),), int32)
+        omap[uvi] = arange(len(uvi))
+        pmap = zeros((len(pva),), int32)
+        pmap[fvi[pi]] = omap[uvi[oi]]
+        addv = ones((len(pva),), bool)
+        addv[fvi[pi]] = False
+        pmap[addv] = len(uvi) + arange(addv.sum())
+        self._va = concatenate((va[uvi], pva[addv]))
+        self._na = concatenate((na[uvi], pna[addv]))
+        self._ta = concatenate((omap[keep_t], pmap[pta])).astype(int32)
+
+def _strictly_inside(points, lo, hi):
+    return ((points > lo) & (points < hi)).all(axis = 1)
+
+def _unmatched_points(points, ref_points, tolerance = 1e-3):
+    '''Return points with no reference point within tolerance.'''
+    from chimerax.geometry import find_close_point_pairs
+    pi, ri = find_close_point_pairs(points, ref_points, tolerance)
+    from numpy import ones
+    unmatched = ones((len(points),), bool)
+    unmatched[pi] = False
+    return points[unmatched]
@@ -14,6 +14,11 @@
 from chimerax.core.settings import Settings
 
 class _SurfaceSettings(Settings):
+    AUTO_SAVE = {
+        'surface_cache_size': 256.0,            # Mbytes
+        'surface_disk_cache': False,
+        'surface_disk_cache_size': 2048.0,      # Mbytes
+    }
     EXPLICIT_SAVE = {
         'clipping_surface_caps': True,
         'clipping_cap_offset': 0.01,
@@ -16,7 +16,8 @@
 def surface(session, atoms = None, enclose = None, include = None,
             probe_radius = None, grid_spacing = None, resolution = None, level = None,
             color = None, transparency = None, visible_patches = None,
-            sharp_boundaries = None, nthread = None, replace = True, update = True):
+            sharp_boundaries = None, nthread = None, replace = True, update = True,
+            wait = True):
     '''
     Compute and display solvent excluded molecular surfaces.
 
@@ -61,6 +62,11 @@ def surface(session, atoms = None, enclose = None, include = None,
       Whether to replace an existing surface for the same atoms or make a copy.
     update : bool
       Whether to automatically recompute the surface when atom positions change.  Default True.
+    wait : bool
+      Whether to compute new surfaces before returning.  If false new surfaces are
+      computed in threads and each is added to the scene when it is ready, so
+      the returned surfaces may not yet have geometry or be open models.
+      Default True.
     '''
 
     if resolution is not None and probe_radius is not None:
@@ -72,8 +78,13 @@ def surface(session, atoms = None, enclose = None, include = None,
 
     if replace:
         all_surfs = dict((s.atoms.hash(), s) for s in session.models.list(type = MolecularSurface))
+        # Surfaces still being computed in threads for the same atoms are replaced.
+        from .surfthread import surface_calculation
+        calc = surface_calculation(session)
+        pending = {} if calc is None else dict((s.atoms.hash(), s) for s in calc.pending_surfaces)
     else:
-        all_surfs = {}
+        all_surfs = pending = {}
+    cancel = []
 
     # Set default parameters for new molecular surfaces for probe radius, grid spacing, and sharp boundaries.
     probe = 1.4 if probe_radius is None else probe_radius
@@ -111,6 +122,8 @@ def surface(session, atoms = None, enclose = None, include = None,
                     chain_atoms = matoms.filter(matoms.chain_ids == chain_id)
                 enclose_atoms = remove_solvent_ligands_ions(chain_atoms, include)[0]
             s = all_surfs.get(enclose_atoms.hash())
+            if enclose_atoms.hash() in pending:
+                cancel.append(pending[enclose_atoms.hash()])
             if s is None:
                 stype = 'SES' if resolution is None else 'Gaussian'
                 name = '%s_%s %s surface' % (m.name, chain_id, stype)
@@ -131,6 +144,8 @@ def surface(session, atoms = None, enclose = None, include = None,
             raise UserError('No atoms specified by %s' % (enclose.spec,))
         show_atoms = enclose_atoms if atoms is None else atoms.intersect(enclose_atoms)
         s = all_surfs.get(enclose_atoms.hash())
+        if enclose_atoms.hash() in pending:
+            cancel.append(pending[enclose_atoms.hash()])
         if s is None:
             mols = enclose.unique_structures
             parent = mols[0] if len(mols) == 1 else None
@@ -154,9 +169,23 @@ def surface(session, atoms = None, enclose = None, include = None,
         osurfs = surfaces_overlapping_atoms(other_surfs, surf_atoms)
         if osurfs:
             session.models.close(osurfs)
+        if cancel:
+            calc.cancel(cancel)
+
+    if not wait and new_surfs:
+        # Compute new surfaces in threads adding each to the scene when done.
+        from .surfthread import surface_calculation
+        calc = surface_calculation(session, create = True, nthread = nthread,
+                                   done_cb = lambda surfs: _report_gaussian_levels(session, surfs, level))
+        calc.add(new_surfs, update)
+        new = set(s for s, parent in new_surfs)
+        surfs_now = [s for s in surfs if s not in new]
+        new_surfs = []
+    else:
+        surfs_now = surfs
 
     # Compute surfaces using multiple threads
-    args = [(s,) for s in surfs]
+    args = [(s,) for s in surfs_now]
     args.sort(key = lambda s: s[0].atom_count, reverse = True)      # Largest first for load balancing
     from chimerax.core import threadq
     threadq.apply_to_list(_calculate_surface, args, nthread)
@@ -165,29 +194,36 @@ def surface(session, atoms = None, enclose = None, include = None,
     # TODO: Any Python error in the threaded call causes a crash when it tries
     #       to write an error message to the log, not in the main thread.
 
-    if not resolution is None and resolution > 0 and level is None:
-        gsurfs = [s for s in surfs if hasattr(s, 'gaussian_level')]
-        if gsurfs:
-            levels = [s.gaussian_level for s in gsurfs]
-            min_lev, max_lev = ('%.3f' % min(levels)), ('%.3f' % max(levels))
-            level_range = '%s - %s' % (min_lev, max_lev) if max_lev != min_lev else max_lev
-            msg = '%d Gaussian surfaces, threshold level %s' % (len(gsurfs), level_range)
-            session.logger.info(msg)
+    if resolution is not None and resolution > 0:
+        _report_gaussian_levels(session, surfs_now, level)
 
     # Add new surfaces to open models list.
     for s, parent in new_surfs:
         session.models.add([s], parent = parent)
 
     # Make sure replaced surfaces are displayed.
-    for s in surfs:
+    for s in surfs_now:
         s.display = True
 
     # Set automatic updating.
-    for s in surfs:
+    for s in surfs_now:
         s.auto_update = update
 
     return surfs
 
+# -------------------------------------------------------------------------------------
+#
+def _report_gaussian_levels(session, surfs, level):
+    if level is not None:
+        return
+    gsurfs = [s for s in surfs if hasattr(s, 'gaussian_level')]
+    if gsurfs:
+        levels = [s.gaussian_level for s in gsurfs]
+        min_lev, max_lev = ('%.3f' % min(levels)), ('%.3f' % max(levels))
+        level_range = '%s - %s' % (min_lev, max_lev) if max_lev != min_lev else max_lev
+        msg = '%d Gaussian surfaces, threshold level %s' % (len(gsurfs), level_range)
+        session.logger.info(msg)
+
 # -------------------------------------------------------------------------------------
 #
 def _calculate_surface(surf):
@@ -264,6 +300,16 @@ def surface_close(session, objects = None):
     surfs = _molecular_surfaces(session, objects)
     from chimerax.atomic.molsurf import close_surfaces
     close_surfaces(surfs)
+
+    # Stop computing surfaces not yet added to the scene.
+    from .surfthread import surface_calculation
+    calc = surface_calculation(session)
+    if calc:
+        if objects is None:
+            calc.cancel()
+        else:
+            atoms = objects.atoms
+            calc.cancel([s for s in calc.pending_surfaces if s.atoms.intersects(atoms)])
     if objects:
         close_surfaces(objects.atoms)
         
@@ -428,6 +474,42 @@ def surface_cap(session, enable = None, offset = None, subdivision = None, mesh
                   settings.clipping_cap_on_mesh))
         session.logger.status(msg, log = True)
         
+# -------------------------------------------------------------------------------------
+#
+def surface_cache(session, memory = None, disk = None, disk_size = None, clear = False):
+    '''
+    Set surface geometry cache limits and report cache statistics.  Molecular surfaces
+    with identical atom coordinates, radii and surface parameters as a cached surface
+    reuse the cached geometry instead of being recomputed.
+
+    Parameters
+    ----------
+    memory : float
+      Maximum memory in Mbytes used to cache surface geometry.  Default 256.
+    disk : bool
+      Whether to also save surface geometry in files in the user cache directory
+      for use in later sessions.  Default False.
+    disk_size : float
+      Maximum disk space in Mbytes for cached surface geometry files.  Default 2048.
+    clear : bool
+      Remove all cached surfaces including cache files.
+    '''
+    from .surfcache import surface_geometry_cache
+    cache = surface_geometry_cache(session)
+    from .settings import settings
+    if memory is not None:
+        settings.surface_cache_size = memory
+        cache.set_memory_limit(int(memory * 2**20))
+    if disk is not None:
+        settings.surface_disk_cache = disk
+        cache.disk_cache = disk
+    if disk_size is not None:
+        settings.surface_disk_cache_size = disk_size
+        cache.set_disk_limit(int(disk_size * 2**20))
+    if clear:
+        cache.clear(disk = True)
+    session.logger.info(cache.statistics())
+
 # -------------------------------------------------------------------------------------
 #
 def register_command(logger):
@@ -449,7 +531,8 @@ def register_command(logger):
                    ('sharp_boundaries', BoolArg),
                    ('nthread', IntArg),
                    ('replace', BoolArg),
-                   ('update', BoolArg)],
+                   ('update', BoolArg),
+                   ('wait', BoolArg)],
         synopsis = 'create molecular surface')
     register('surface', surface_desc, surface, logger=logger)
 
@@ -493,6 +576,14 @@ def register_command(logger):
         synopsis = 'Enable or disable clipping surface caps')
     register('surface cap', cap_desc, surface_cap, logger=logger)
 
+    cache_desc = CmdDesc(
+        keyword = [('memory', FloatArg),
+                   ('disk', BoolArg),
+                   ('disk_size', FloatArg),
+                   ('clear', NoArg)],
+        synopsis = 'Set surface geometry cache size and report cache use')
+    register('surface cache', cache_desc, surface_cache, logger=logger)
+
     # Register surface operation subcommands.
     from . import sop
     sop.register_surface_subcommands(logger)
@@ -0,0 +1,257 @@
+# vim: set expandtab shiftwidth=4 softtabstop=4:
+
+# === UCSF ChimeraX Copyright ===
+# Copyright 2016 Regents of the University of California.
+# All rights reserved.  This software provided pursuant to a
+# license agreement containing restrictions on its disclosure,
+# duplication and use.  For details see:
+# http://www.rbvi.ucsf.edu/chimerax/docs/licensing.html
+# This notice must be embedded in or attached to all copies,
+# including partial copies, of the software or any revisions
+# or derivations thereof.
+# === UCSF ChimeraX Copyright ===
+
+# -------------------------------------------------------------------------------------
+# Cache of molecular surface geometry keyed by a hash of the atom coordinates,
+# radii and surface parameters so that recalculating an identical surface, for
+# instance after closing and reshowing it, or when a trajectory loops back to
+# frames already shown, reuses the previous triangulation.  Least recently used
+# geometry is dropped when the memory limit is exceeded.  Optionally geometry is
+# also saved in files in the user cache directory so it is reused in later
+# ChimeraX sessions.
+#
+CACHE_VERSION = 1
+
+class SurfaceGeometryCache:
+
+    def __init__(self, max_bytes = 256 * 2**20, disk_cache = False, max_disk_bytes = 2 * 2**30,
+                 directory = None):
+        self.max_bytes = max_bytes
+        self.disk_cache = disk_cache
+        self.max_disk_bytes = max_disk_bytes
+        self.directory = directory
+        from collections import OrderedDict
+        self._geometry = OrderedDict()  # Maps key to dictionary of arrays
+        self._bytes = 0
+        self.hits = self.disk_hits = self.misses = 0
+        from threading import Lock
+        self._lock = Lock()      # Surfaces are computed in threads.
+
+    # ---------------------------------------------------------------------------------
+    #
+    def key(self, xyz, radii, parameters):
+        '''
+        Return key string from atom coordinates, radii, and a tuple of
+        other surface parameters that have a repr().
+        '''
+        from hashlib import sha1
+        h = sha1(repr((CACHE_VERSION, len(xyz), parameters)).encode('utf-8'))
+        from numpy import ascontiguousarray, float64, float32
+        h.update(ascontiguousarray(xyz, float64).tobytes())
+        h.update(ascontiguousarray(radii, float32).tobytes())
+        return h.hexdigest()
+
+    # ---------------------------------------------------------------------------------
+    #
+    def get(self, key):
+        '''Return a dictionary of copies of cached arrays, or None if not cached.'''
+        with self._lock:
+            g = self._geometry.get(key)
+            if g is not None:
+                self._geometry.move_to_end(key)
+                self.hits += 1
+        if g is None:
+            g = self._read_file(key)
+            with self._lock:
+                if g is None:
+                    self.misses += 1
+                else:
+                    self.disk_hits += 1
+            if g is None:
+                return None
+            self._add(key, g)
+        return {name:a.copy() for name,a in g.items()}
+
+    # ---------------------------------------------------------------------------------
+    #
+    def put(self, key, arrays):
+        '''Cache a dictionary of arrays.  Entries with value None are not saved.'''
+        g = {name:a.copy() for name,a in arrays.items() if a is not None}
+        self._add(key, g)
+        if self.disk_cache:
+            self._write_file(key, g)
+
+    # ---------------------------------------------------------------------------------
+    #
+    def _add(self, key, g):
+        size = sum(a.nbytes for a in g.values())
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._geometry:
+                return
+            self._geometry[key] = g
+            self._bytes += size
+            self._trim(self.max_bytes)
+
+    # ---------------------------------------------------------------------------------
+    #
+    def _trim(self, max_bytes):
+        while self._bytes > max_bytes and self._geometry:
+            key, g = self._geometry.popitem(last = False)
+            self._bytes -= sum(a.nbytes for a in g.values())
+
+    # ---------------------------------------------------------------------------------
+    #
+    def set_memory_limit(self, max_bytes):
+        self.max_bytes = max_bytes
+        with self._lock:
+            self._trim(max_bytes)
+
+    # ---------------------------------------------------------------------------------
+    #
+    def set_disk_limit(self, max_bytes):
+        self.max_disk_bytes = max_bytes
+        self.trim_files()
+
+    # ---------------------------------------------------------------------------------
+    #
+    def clear(self, disk = False):
+        with self._lock:
+            self._geometry.clear()
+            self._bytes = 0
+            self.hits = self.disk_hits = self.misses = 0
+        if disk:
+            for path, size, mtime in self._cache_files():
+                _remove_file(path)
+
+    # ---------------------------------------------------------------------------------
+    #
+    @property
+    def memory_use(self):
+        return self._bytes
+
+    @property
+    def num_surfaces(self):
+        return len(self._geometry)
+
+    # ---------------------------------------------------------------------------------
+    #
+    def disk_use(self):
+        return sum(size for path, size, mtime in self._cache_files())
+
+    # ---------------------------------------------------------------------------------
+    #
+    def statistics(self):
+        lookups = self.hits + self.disk_hits + self.misses
+        hit_pct = 100 * (self.hits + self.disk_hits) / lookups if lookups else 0
+        msg = ('Surface cache: %d surfaces, %.1f of %.0f Mbytes, %d lookups, %d hits, %d disk hits (%.0f%%)'
+               % (self.num_surfaces, self.memory_use / 2**20, self.max_bytes / 2**20,
+                  lookups, self.hits, self.disk_hits, hit_pct))
+        if self.disk_cache:
+            msg += ', disk cache %.1f of %.0f Mbytes in %s' % (self.disk_use() / 2**20,
+                                                             self.max_disk_bytes / 2**20,
+                                                             self.directory)
+        return msg
+
+    # ---------------------------------------------------------------------------------
+    #
+    def _path(self, key):
+        import os.path
+        return os.path.join(self.directory, key + '.npz')
+
+    # ---------------------------------------------------------------------------------
+    #
+    def _read_file(self, key):
+        if not self.disk_cache or self.directory is None:
+            return None
+        path = self._path(key)
+        from numpy import load
+        try:
+            with load(path) as f:
+                g = {name:f[name] for name in f.files}
+        except Exception:
+            # Missing, partly written or corrupt file.
+            return None
+        import os
+        try:
+            os.utime(path)      # Record use for least recently used removal.
+        except OSError:
+            pass
+        return g
+
+    # ---------------------------------------------------------------------------------
+    #
+    def _write_file(self, key, g):
+        if self.directory is None:
+            return
+        import os
+        try:
+            os.makedirs(self.directory, exist_ok = True)
+            path = self._path(key)
+            # Write a temporary file and rename so readers never see a partial file.
+            tmp_path = '%s.%d.tmp' % (path, os.getpid())
+            with open(tmp_path, 'wb') as f:
+                from numpy import savez
+                savez(f, **g)
+            os.replace(tmp_path, path)
+        except OSError:
+            return
+        self.trim_files()
+
+    # ---------------------------------------------------------------------------------
+    #
+    def trim_files(self):
+        '''Remove least recently used cache files until within the disk limit.'''
+        files = self._cache_files()
+        total = sum(size for path, size, mtime in files)
+        if total <= self.max_disk_bytes:
+            return
+        files.sort(key = lambda f: f[2])
+        for path, size, mtime in files:
+            if total <= self.max_disk_bytes:
+                break
+            _remove_file(path)
+            total -= size
+
+    # ---------------------------------------------------------------------------------
+    #
+    def _cache_files(self):
+        import os
+        files = []
+        if self.directory is None or not os.path.isdir(self.directory):
+            return files
+        for e in os.scandir(self.directory):
+            if e.name.endswith('.npz'):
+                try:
+                    st = e.stat()
+                except OSError:
+                    continue
+                files.append((e.path, st.st_size, st.st_mtime))
+        return files
+
+# -------------------------------------------------------------------------------------
+#
+def _remove_file(path):
+    import os
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+# -------------------------------------------------------------------------------------
+#
+def surface_geometry_cache(session):
+    '''Return the surface geometry cache for a session configured from settings.'''
+    c = getattr(session, '_surface_geometry_cache', None)
+    if c is None:
+        from .settings import settings
+        import os.path
+        from chimerax import app_dirs
+        directory = os.path.join(app_dirs.user_cache_dir, 'surface_geometry')
+        c = SurfaceGeometryCache(max_bytes = int(settings.surface_cache_size * 2**20),
+                                 disk_cache = settings.surface_disk_cache,
+                                 max_disk_bytes = int(settings.surface_disk_cache_size * 2**20),
+                                 directory = directory)
+        session._surface_geometry_cache = c
+    return c
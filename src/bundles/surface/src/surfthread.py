@@ -0,0 +1,179 @@
+# vim: set expandtab shiftwidth=4 softtabstop=4:
+
+# === UCSF ChimeraX Copyright ===
+# Copyright 2016 Regents of the University of California.
+# All rights reserved.  This software provided pursuant to a
+# license agreement containing restrictions on its disclosure,
+# duplication and use.  For details see:
+# http://www.rbvi.ucsf.edu/chimerax/docs/licensing.html
+# This notice must be embedded in or attached to all copies,
+# including partial copies, of the software or any revisions
+# or derivations thereof.
+# === UCSF ChimeraX Copyright ===
+
+# -------------------------------------------------------------------------------------
+# Compute molecular surfaces in worker threads so that graphics keeps drawing
+# while surfaces for hundreds of chains are calculated.  Each surface is added
+# to the scene as soon as its geometry is ready, largest surfaces first.
+#
+class SurfaceCalculation:
+
+    def __init__(self, session, nthread = None, done_cb = None):
+        self.session = session
+        if nthread is None:
+            from multiprocessing import cpu_count
+            nthread = cpu_count()//2
+        self._nthread = max(1, nthread)
+        self._done_cb = done_cb         # Called with list of finished surfaces.
+        self._pending = {}              # Maps surface to (parent model, auto update, atom count).
+        self._threads = []
+        self._finished = []
+        self._total = 0
+        from queue import Queue
+        self._in_queue, self._out_queue = Queue(), Queue()
+        self._frame_handler = None
+
+    # ---------------------------------------------------------------------------------
+    #
+    def add(self, surfaces, update = True):
+        '''
+        Queue surfaces for calculation.  Surfaces is a list of (surface, parent) pairs
+        with the surface not yet added to the scene.  When a surface is added its
+        automatic updating is set to the update value.  The atom coordinates and
+        radii are copied here so worker threads never access the atoms, which may
+        be changed or deleted while surfaces are computed.
+        '''
+        surfaces = sorted(surfaces, key = lambda sp: sp[0].atom_count, reverse = True)
+        for s, parent in surfaces:
+            inputs = s._surface_inputs()
+            self._pending[s] = (parent, update, len(inputs[0]))
+            self._in_queue.put((s, inputs))
+        self._total += len(surfaces)
+        self._start_threads()
+        if self._frame_handler is None:
+            self._frame_handler = self.session.triggers.add_handler('new frame',
+                                                                    self._check_for_surfaces)
+
+    # ---------------------------------------------------------------------------------
+    #
+    @property
+    def pending_surfaces(self):
+        return list(self._pending.keys())
+
+    # ---------------------------------------------------------------------------------
+    #
+    def cancel(self, surfaces = None):
+        '''Stop calculating the specified surfaces or all pending surfaces if None.'''
+        cancel = self.pending_surfaces if surfaces is None else surfaces
+        for s in cancel:
+            if s in self._pending:
+                del self._pending[s]
+                self._total -= 1
+                s.delete()
+        if not self._pending:
+            # Drop queued work.  Threads finish the surface they are computing.
+            import queue
+            try:
+                while True:
+                    self._in_queue.get_nowait()
+                    self._in_queue.task_done()
+            except queue.Empty:
+                pass
+            self._finish()
+
+    # ---------------------------------------------------------------------------------
+    #
+    def _start_threads(self):
+        self._threads = threads = [t for t in self._threads if t.is_alive()]
+        from chimerax.core.threadq import WorkThread
+        for i in range(min(self._nthread, len(self._pending)) - len(threads)):
+            t = WorkThread(self._calculate_surface, self._in_queue, self._out_queue)
+            t.daemon = True
+            t.start()
+            threads.append(t)
+
+    # ---------------------------------------------------------------------------------
+    # Called in a worker thread.
+    #
+    def _calculate_surface(self, surf, inputs):
+        if surf not in self._pending:
+            return surf, None   # Cancelled
+        try:
+            geom = surf._compute_surface_geometry(inputs)
+        except Exception as e:
+            return surf, e
+        return surf, geom
+
+    # ---------------------------------------------------------------------------------
+    # Called each graphics frame to add computed surfaces to the scene.
+    #
+    def _check_for_surfaces(self, *_):
+        import queue
+        added = []
+        while True:
+            try:
+                surf, geom = self._out_queue.get_nowait()
+            except queue.Empty:
+                break
+            if surf not in self._pending:
+                continue        # Cancelled
+            parent, update, atom_count = self._pending.pop(surf)
+            if isinstance(geom, Exception):
+                self._total -= 1
+                surf.delete()
+                msg = str(geom) if isinstance(geom, MemoryError) else repr(geom)
+                self.session.logger.error('Surface %s calculation failed: %s' % (surf.name, msg))
+                continue
+            if len(surf.atoms) == 0 or (parent is not None and parent.deleted):
+                self._total -= 1
+                surf.delete()
+                continue
+            if surf.vertices is None:
+                # Atom motion may have recomputed the surface already.
+                if len(surf.atoms) == atom_count:
+                    surf._set_surface_geometry(*geom)
+                else:
+                    # Atoms were deleted during the calculation.
+                    surf.calculate_surface_geometry()
+            self.session.models.add([surf], parent = parent)
+            surf.auto_update = update
+            added.append(surf)
+
+        if added:
+            self._finished.extend(added)
+            self.session.logger.status('Computed %d of %d surfaces'
+                                       % (len(self._finished), self._total))
+
+        if self._pending:
+            if not self._in_queue.empty():
+                # Threads exit if the queue was briefly empty.
+                self._start_threads()
+            return None
+
+        self._finish()
+        self._frame_handler = None
+        from chimerax.core.triggerset import DEREGISTER
+        return DEREGISTER
+
+    # ---------------------------------------------------------------------------------
+    #
+    def _finish(self):
+        if getattr(self.session, '_surface_calculation', None) is self:
+            self.session._surface_calculation = None
+        finished = self._finished
+        self._finished = []
+        self._total = 0
+        if finished:
+            self.session.logger.status('Computed %d surfaces' % len(finished))
+            if self._done_cb:
+                self._done_cb(finished)
+
+# -------------------------------------------------------------------------------------
+#
+def surface_calculation(session, create = False, nthread = None, done_cb = None):
+    '''Return the current background surface calculation, creating one if requested.'''
+    c = getattr(session, '_surface_calculation', None)
+    if c is None and create:
+        session._surface_calculation = c = SurfaceCalculation(session, nthread = nthread,
+                                                              done_cb = done_cb)
+    return c
@@ -127,7 +127,7 @@ cdef object _decode_unique_name(bytes buf):
         return _UniqueName(uid)
 
 
-cdef dict _encode_ndarray(object o):
+cdef dict _encode_ndarray(object o, bint include_data=True):
     # inspired by msgpack-numpy package
     if o.dtype.kind == 'V':
         # structured array
@@ -138,15 +138,21 @@ cdef dict _encode_ndarray(object o):
         dtype = o.dtype.str
     if 'O' in dtype:
         raise TypeError("Serializing numpy arrays of objects is not supported")
-    return {
+    result = {
         b'kind': kind,
         b'dtype': dtype,
         b'shape': list(o.shape),
-        b'data': o.tobytes()
     }
+    if include_data:
+        if o.flags.c_contiguous:
+            # packed directly from the array memory
+            result[b'data'] = memoryview(o)
+        else:
+            result[b'data'] = o.tobytes()
+    return result
 
 
-cdef object _decode_ndarray(dict data):
+cdef object _decode_dtype(dict data):
     kind = data[b'kind']
     dtype = data[b'dtype']
     if kind == b'V':
@@ -155,7 +161,45 @@ cdef object _decode_ndarray(dict data):
         for d in dtype:
             tmp.append(tuple(str(t) for t in d))
         dtype = tmp
-    return numpy.frombuffer(data[b'data'], numpy.dtype(dtype)).reshape(data[b'shape'])
+    return numpy.dtype(dtype)
+
+
+cdef object _decode_ndarray(dict data):
+    return numpy.frombuffer(data[b'data'], _decode_dtype(data)).reshape(data[b'shape'])
+
+
+# Large arrays can be stored outside of the msgpack stream (out-of-band, like
+# pickle protocol 5 buffers), so they are not copied into msgpack data and can
+# be read lazily from a session file.  The array writer is given the
+# array and returns a reference (any msgpack-able value) that the array reader
+# is later given, along with the dtype and shape, to recreate the array.
+cdef object _array_writer = None
+cdef object _array_reader = None
+cdef size_t _array_min_size = 0
+
+
+def set_array_handlers(writer=None, reader=None, size_t min_size=0):
+    """Set functions used to store numpy arrays of at least min_size bytes
+    outside of the msgpack stream.  Returns the previous handlers."""
+    global _array_writer, _array_reader, _array_min_size
+    previous = (_array_writer, _array_reader, _array_min_size)
+    _array_writer = writer
+    _array_reader = reader
+    _array_min_size = min_size
+    return previous
+
+
+cdef object _encode_array_ref(object o):
+    data = _encode_ndarray(o, False)
+    data[b'ref'] = _array_writer(o)
+    packer = Packer(**_packer_args)
+    return ExtType(16, packer.pack(data))
+
+
+cdef object _decode_array_ref(dict data):
+    if _array_reader is None:
+        raise RuntimeError("No reader for numpy array stored outside of msgpack stream")
+    return _array_reader(_decode_dtype(data), tuple(data[b'shape']), data[b'ref'])
 
 
 cdef bytes _encode_image(object img):
@@ -211,6 +255,8 @@ cdef object _encode_ext(object obj):
         return ExtType(0, _encode_unique_name(obj))
     if isinstance(obj, numpy.ndarray):
         # handle numpy array subclasses
+        if _array_writer is not None and obj.nbytes >= _array_min_size:
+            return _encode_array_ref(obj)
         packer = Packer(**_packer_args)
         return ExtType(1, packer.pack(_encode_ndarray(obj)))
     if isinstance(obj, complex):
@@ -308,6 +354,8 @@ cdef object _decode_ext(int n, bytes buf):
         return _decode_tinyarray(_decode_bytes(buf))
     elif n == 15:
         return range(*_decode_bytes_as_tuple(buf))
+    elif n == 16:
+        return _decode_array_ref(_decode_bytes(buf))
     else:
         raise RuntimeError("Unknown extension type: %d" % n)
 
@@ -72,6 +72,8 @@ all atoms.
 import re
 from .cli import Annotation
 from contextlib import contextmanager
+from collections import OrderedDict
+from threading import local, Lock
 
 _double_quote = re.compile(r'"(.|\")*?"(\s|$)')
 _terminator = re.compile(r"[;\s]")  # semicolon or whitespace
@@ -89,6 +91,48 @@ def maximum_stack(max_depth=MAX_STACK_DEPTH):
     sys.setrecursionlimit(save_current_limit)
 
 
+#
+# Parsing an atom specifier takes milliseconds, so parse trees are cached
+# by specifier text.  Parse trees do not refer to models, which are found
+# when the tree is evaluated, but selector names are checked during parsing,
+# so the cache is cleared when selectors are registered or deregistered.
+#
+PARSE_CACHE_SIZE = 1024
+
+_parse_cache = OrderedDict()    # Maps (text, add_implied) to parse tree
+_parse_cache_lock = Lock()
+_parsers = local()              # Parsers are not thread safe
+
+
+def _parse_atom_specifier(text, session, add_implied):
+    """Return atom specifier parse tree, raising grako parse errors."""
+    key = (text, add_implied)
+    with _parse_cache_lock:
+        ast = _parse_cache.get(key)
+        if ast is not None:
+            _parse_cache.move_to_end(key)
+            return ast
+    parser = getattr(_parsers, 'parser', None)
+    if parser is None:
+        from ._atomspec import _atomspecParser
+        _parsers.parser = parser = _atomspecParser(parseinfo=True)
+    semantics = _AtomSpecSemantics(session, add_implied=add_implied)
+    with maximum_stack():
+        ast = parser.parse(text, "atom_specifier", semantics=semantics)
+    if not semantics.session_dependent:
+        with _parse_cache_lock:
+            _parse_cache[key] = ast
+            while len(_parse_cache) > PARSE_CACHE_SIZE:
+                _parse_cache.popitem(last=False)
+    return ast
+
+
+def clear_parse_cache():
+    """Discard cached atom specifier parse trees."""
+    with _parse_cache_lock:
+        _parse_cache.clear()
+
+
 class AtomSpecArg(Annotation):
     """Command line type annotation for atom specifiers.
 
@@ -132,14 +176,10 @@ class AtomSpecArg(Annotation):
         # Convert quote contents to string
         from .cli import unescape_with_index_map
         token, index_map = unescape_with_index_map(text[start + 1:end - 1])
-        # Create parser and parse converted token
-        from ._atomspec import _atomspecParser
-        parser = _atomspecParser(parseinfo=True)
-        semantics = _AtomSpecSemantics(session, add_implied=add_implied)
+        # Parse converted token
         from grako.exceptions import FailedParse, FailedSemantics
         try:
-            with maximum_stack():
-                ast = parser.parse(token, "atom_specifier", semantics=semantics)
+            ast = _parse_atom_specifier(token, session, add_implied)
         except FailedSemantics as e:
             from .cli import AnnotationError
             raise AnnotationError(str(e), offset=e.pos)
@@ -172,13 +212,9 @@ class AtomSpecArg(Annotation):
             parse_text = text
             add_implied = True
             text_offset = 0
-        from ._atomspec import _atomspecParser
-        parser = _atomspecParser(parseinfo=True)
-        semantics = _AtomSpecSemantics(session, add_implied=add_implied)
         from grako.exceptions import FailedParse, FailedSemantics
         try:
-            with maximum_stack():
-                ast = parser.parse(parse_text, "atom_specifier", semantics=semantics)
+            ast = _parse_atom_specifier(parse_text, session, add_implied)
         except FailedSemantics as e:
             from .cli import AnnotationError
             raise AnnotationError(str(e), offset=e.pos)
@@ -227,6 +263,7 @@ class _AtomSpecSemantics:
     def __init__(self, session, *, add_implied=True):
         self._session = session
         self._add_implied = add_implied
+        self.session_dependent = False  # Parse tree can't be reused in other sessions
 
     def atom_specifier(self, ast):
         # print("atom_specifier", ast)
@@ -399,6 +436,8 @@ class _AtomSpecSemantics:
             if ast.name.lower().endswith("color"):
                 # if ast.name ends with color, convert to color
                 from . import ColorArg, make_converter
+                # Color names can be defined by the user.
+                self.session_dependent = True
                 try:
                     c = make_converter(ColorArg)(self._session, av)
                 except ValueError as e:
@@ -844,14 +883,22 @@ class _AttrTest:
             return "%s%s%s" % (self.name, op, self.value)
 
     def attr_matcher(self):
-        import operator
         attr_name = self.name
+        value_matcher = self.value_matcher()
+
+        def matcher(obj):
+            try:
+                v = getattr(obj, attr_name)
+            except AttributeError:
+                return False
+            return value_matcher(v)
+        return matcher
+
+    def value_matcher(self):
+        """Return function that tests an attribute value."""
+        import operator
         if self.value is None:
-            def matcher(obj):
-                try:
-                    v = getattr(obj, attr_name)
-                except AttributeError:
-                    return False
+            def matcher(v):
                 return bool(v)
         elif (self.op in (operator.eq, operator.ne, "==", "!==") and
                 isinstance(self.value, str)):
@@ -862,12 +909,8 @@ class _AttrTest:
             if _has_wildcard(self.value):
                 from fnmatch import fnmatchcase
 
-                def matcher(obj):
-                    try:
-                        v = getattr(obj, attr_name)
-                        if v is None:
-                            return False
-                    except AttributeError:
+                def matcher(v):
+                    if v is None:
                         return False
                     v = str(v)
                     if not case_sensitive:
@@ -875,12 +918,8 @@ class _AttrTest:
                     matches = fnmatchcase(v, attr_value)
                     return not matches if invert else matches
             else:
-                def matcher(obj):
-                    try:
-                        v = getattr(obj, attr_name)
-                        if v is None:
-                            return False
-                    except AttributeError:
+                def matcher(v):
+                    if v is None:
                         return False
                     v = str(v)
                     if not case_sensitive and isinstance(v, str):
@@ -891,16 +930,45 @@ class _AttrTest:
             op = self.op
             attr_value = self.value
 
-            def matcher(obj):
-                try:
-                    v = getattr(obj, attr_name)
-                    if v is None:
-                        return False
-                except AttributeError:
+            def matcher(v):
+                if v is None:
                     return False
                 return op(v, attr_value)
         return matcher
 
+    def array_matcher(self):
+        """Return function that tests a 1-D numpy array of attribute values
+        and returns a boolean mask.  Numeric comparisons are done on the whole
+        array and other tests are done once for each distinct value."""
+        import operator
+        import numpy
+        value_matcher = self.value_matcher()
+        numeric_ops = (operator.eq, operator.ne, operator.ge,
+                       operator.gt, operator.le, operator.lt)
+        numeric_value = (isinstance(self.value, (int, float)) and
+                         self.op in numeric_ops)
+
+        def matcher(values):
+            kind = values.dtype.kind
+            if kind in 'biuf':
+                if self.value is None:
+                    return values != 0
+                if numeric_value:
+                    # Compare in double precision like the Python scalar values.
+                    vt = numpy.float64 if kind == 'f' else numpy.int64
+                    return numpy.asarray(self.op(values.astype(vt), self.value),
+                                         dtype=numpy.bool_)
+            try:
+                u, inverse = numpy.unique(values, return_inverse=True)
+            except TypeError:
+                # Values that cannot be sorted, e.g. a mix of strings and None.
+                return numpy.array([value_matcher(v) for v in values.tolist()],
+                                   dtype=numpy.bool_)
+            umask = numpy.array([value_matcher(v) for v in u.tolist()],
+                                dtype=numpy.bool_)
+            return umask[inverse.ravel()]
+        return matcher
+
 
 class _SelectorName:
     """Stores a single selector name."""
@@ -1202,6 +1270,7 @@ def register_selector(name, value, logger, *,
             logger.warning("registering illegal selector name \"%s\"" % name)
             return
     _selectors[name] = _Selector(name, value, user, desc, atomic)
+    clear_parse_cache()
     from ..toolshed import get_toolshed
     ts = get_toolshed()
     if ts:
@@ -1229,6 +1298,7 @@ def deregister_selector(name, logger=None):
         if logger:
             logger.warning("deregistering unregistered selector \"%s\"" % name)
     else:
+        clear_parse_cache()
         from ..toolshed import get_toolshed
         ts = get_toolshed()
         if ts:
@@ -42,6 +42,7 @@ from . import _serialize
 
 # from ._serial_python import msgpack_serialize_stream, msgpack_deserialize_stream
 from ._serialize import msgpack_serialize_stream, msgpack_deserialize_stream, PRIMITIVE_TYPES
+from ._serialize import set_array_handlers
 import pickle  # to recognize old session files
 
 
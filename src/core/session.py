@@ -37,6 +37,9 @@ from .errors import UserError
 _builtin_open = open
 #: session file suffix
 SESSION_SUFFIX = ".cxs"
+#: session file format version written by default, version 4 is opt-in
+#: until ChimeraX releases that can read it are widely used
+SESSION_VERSION = 3
 
 # If any of the *STATE_VERSIONs change, then increase the (maximum) core session
 # number in setup.py.in
@@ -363,9 +366,21 @@ class _RestoreManager:
             raise UserError(msg)
         self.bundle_infos = bundle_infos
 
-    def resolve_references(self, data):
-        # resolve references in data
-        return dereference_state(data, _UniqueName.lookup, _UniqueName)
+    def resolve_references(self, data, lazy_arrays=False):
+        # resolve references in data, and read arrays not yet read from
+        # the session file unless lazy arrays are acceptable
+        from .session_chunks import LazyArray
+        from numpy import ndarray
+
+        def convert(obj):
+            if isinstance(obj, _UniqueName):
+                return _UniqueName.lookup(obj)
+            if isinstance(obj, ndarray):
+                # Deserialized arrays are not shared, so only copy if
+                # a read-only view of deserialized data.
+                return obj if obj.flags.writeable else obj.copy()
+            return obj if lazy_arrays else obj.materialize()
+        return dereference_state(data, convert, (_UniqueName, ndarray, LazyArray))
 
     def add_reference(self, name, obj):
         _UniqueName.add(name.uid, obj)
@@ -590,25 +605,35 @@ class Session:
         '''
         self._snapshot_methods.update(methods)
 
-    def save(self, stream, version, include_maps=False):
-        """Serialize session to binary stream."""
+    def save(self, stream, version, include_maps=False, compress='lz4'):
+        """Serialize session to binary stream.
+
+        Version 4 session files are compressed internally with the given
+        compress method (lz4, gzip, or none).  Version 3 streams are expected
+        to already be compressed, if compression is wanted.
+        """
         from . import serialize
         flags = State.SESSION
         if include_maps:
             flags |= State.INCLUDE_MAPS
         mgr = _SaveManager(self, flags)
+        chunks = None
         self.triggers.activate_trigger("begin save session", self)
         try:
             if version == 1:
                 raise UserError("Version 1 formatted session files are no longer supported")
             elif version == 2:
                 raise UserError("Version 2 formatted session files are no longer supported")
-            else:
-                if version != 3:
-                    raise UserError("Only version 3 formatted session files are supported")
+            elif version == 3:
                 stream.write(b'# ChimeraX Session version 3\n')
                 stream = serialize.msgpack_serialize_stream(stream)
                 fserialize = serialize.msgpack_serialize
+            elif version == 4:
+                from .session_chunks import ChunkWriter
+                chunks = ChunkWriter(stream, compress)
+                chunks.write_header(version)
+            else:
+                raise UserError("Only version 3 and 4 formatted session files are supported")
             metadata = standard_metadata(self.metadata)
             # TODO: put thumbnail in metadata
             # stash attribute info into metadata...
@@ -616,18 +641,33 @@ class Session:
             for tag, container in self._state_containers.items():
                 attr_info[tag] = getattr(self, tag, None) == container
             metadata['attr_info'] = attr_info
-            fserialize(stream, metadata)
+            if chunks:
+                chunks.add('metadata', metadata)
+            else:
+                fserialize(stream, metadata)
             # guarantee that bundles are serialized first, so on restoration,
             # all of the related code will be loaded before the rest of the
             # session is restored
             mgr.discovery(self._state_containers)
-            fserialize(stream, mgr.bundle_infos())
+            if chunks:
+                chunks.add('bundles', mgr.bundle_infos())
+            else:
+                fserialize(stream, mgr.bundle_infos())
             # TODO: collect OrderDAGError exceptions from walk and analyze
             for name, data in mgr.walk():
-                fserialize(stream, name)
-                fserialize(stream, data)
-            fserialize(stream, None)
+                if chunks:
+                    # each top-level state object is compressed separately
+                    chunks.add(('state', name), name, data)
+                else:
+                    fserialize(stream, name)
+                    fserialize(stream, data)
+            if chunks:
+                chunks.finish()
+            else:
+                fserialize(stream, None)
         finally:
+            if chunks:
+                chunks.close()
             mgr.cleanup()
             self.triggers.activate_trigger("end save session", self)
 
@@ -663,6 +703,8 @@ class Session:
                 raise UserError("session file format version 2 detected.  DO NOT USE.  Recreate session from scratch, and then save.")
             elif version == 3:
                 stream = serialize.msgpack_deserialize_stream(stream)
+            elif version == 4:
+                stream = _chunk_reader(stream, tokens).session_objects()
             else:
                 raise UserError(
                     "need newer version of ChimeraX to restore session")
@@ -701,8 +743,8 @@ class Session:
                 if name is None:
                     break
                 data = fdeserialize(stream)
-                data = mgr.resolve_references(data)
                 if isinstance(name, str):
+                    data = mgr.resolve_references(data)
                     if attr_info.get(name, False):
                         setattr(self, name, data)
                         # Make sure leading underscore attributes are state managers.
@@ -726,6 +768,8 @@ class Session:
                             obj = None
                             self.logger.warning('Unable to restore "%s" object' % cls.__name__)
                         else:
+                            lazy_arrays = getattr(cls, 'lazy_session_arrays', False)
+                            data = mgr.resolve_references(data, lazy_arrays)
                             obj = sm.restore_snapshot(self, data)
                             if obj is None:
                                 self.logger.warning('restore_snapshot for "%s" returned None' % cls.__name__)
@@ -848,14 +892,20 @@ def standard_metadata(previous_metadata={}):
     return metadata
 
 
-def save(session, path, version=3, compress='lz4', include_maps=False):
+def save(session, path, version=SESSION_VERSION, compress='lz4', include_maps=False):
     """
     Command line version of saving a session.
 
     Option compress can be lz4 (default), gzip, or None.
     Tests saving 3j3z show lz4 is as fast as uncompressed and 4x smaller file size,
     and gzip is 2.5 times slower with 7x smaller file size.
+    Version 3 (default) files compress the whole file as one stream.
+    Version 4 session files compress each state object separately using
+    multiple threads, but cannot be read by older ChimeraX versions.
     """
+    if compress is None:
+        compress = 'none'
+    open_func = None
     if hasattr(path, 'write'):
         # called via export, it's really a stream
         output = path
@@ -865,7 +915,7 @@ def save(session, path, version=3, compress='lz4', include_maps=False):
         if not path.endswith(SESSION_SUFFIX):
             path += SESSION_SUFFIX
 
-        if compress is None or compress == 'none':
+        if compress == 'none' or version >= 4:
             from .safesave import SaveBinaryFile
             open_func = SaveBinaryFile
         elif compress == 'gzip':
@@ -891,7 +941,8 @@ def save(session, path, version=3, compress='lz4', include_maps=False):
 
     session.session_file_path = path
     try:
-        session.save(output, version=version, include_maps=include_maps)
+        session.save(output, version=version, include_maps=include_maps,
+                     compress=compress)
     except Exception:
         if open_func is not None:
             output.close("exceptional")
@@ -955,6 +1006,8 @@ def sdump(session, session_file, output=None):
             version = int(tokens[4])
             if version == 2:
                 raise UserError("Use UCSF ChimeraX 0.8 for Session file format version 2.")
+            elif version == 4:
+                stream = _chunk_reader(stream, tokens).session_objects()
             else:
                 stream = serialize.msgpack_deserialize_stream(stream)
             fdeserialize = serialize.msgpack_deserialize
@@ -971,7 +1024,9 @@ def sdump(session, session_file, output=None):
             if name is None:
                 break
             data = fdeserialize(stream)
-            data = dereference_state(data, lambda x: x, _UniqueName)
+            # show large arrays without reading them
+            from .session_chunks import LazyArray
+            data = dereference_state(data, lambda x: x, (_UniqueName, LazyArray))
             print('==== name/uid:', name, file=output)
             pprint(data, stream=output)
 
@@ -1002,6 +1057,15 @@ def open(session, path, resize_window=None):
     return [], "opened ChimeraX session"
 
 
+def _chunk_reader(stream, header_tokens):
+    # version 4 session header gives the chunk compression method
+    from .session_chunks import ChunkReader, COMPRESSIONS
+    compression = header_tokens[5].decode('ascii') if len(header_tokens) > 5 else None
+    if compression not in COMPRESSIONS:
+        raise UserError("unknown session file compression: %s" % compression)
+    return ChunkReader(stream, compression)
+
+
 def is_gzip_file(filename):
     f = _builtin_open(filename, 'rb')
     magic = f.read(2)
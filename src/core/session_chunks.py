@@ -0,0 +1,527 @@
+# vim: set expandtab shiftwidth=4 softtabstop=4:
+
+# === UCSF ChimeraX Copyright ===
+# Copyright 2016 Regents of the University of California.
+# All rights reserved.  This software provided pursuant to a
+# license agreement containing restrictions on its disclosure,
+# duplication and use.  For details see:
+# http://www.rbvi.ucsf.edu/chimerax/docs/licensing.html
+# This notice must be embedded in or attached to all copies,
+# including partial copies, of the software or any revisions
+# or derivations thereof.
+# === UCSF ChimeraX Copyright ===
+
+"""
+session_chunks: Chunked session file container
+===============================================
+
+Version 4 session files hold the session metadata, the bundle list and each
+top-level state object in its own chunk.  A chunk is the msgpack serialization
+of one or more objects, split into blocks that are compressed independently,
+so compression (which releases the Python global interpreter lock) runs on a
+pool of worker threads while the next state object is being serialized.
+Numpy arrays of at least :py:data:`OUT_OF_BAND_SIZE` bytes are stored after
+the msgpack data of the chunk, compressed directly from the array memory.
+When read they become arrays using the decompressed buffer, or a memory
+mapping of the file if uncompressed, without further copying.  Arrays of at
+least :py:data:`LAZY_ARRAY_SIZE` bytes are skipped when reading and only read
+(see :py:class:`LazyArray`) when needed.
+
+File layout::
+
+    # ChimeraX Session version 4 <compression>\\n
+    chunk ... chunk
+    end marker (a chunk with zero parts)
+    index chunk
+    trailer: index chunk offset (8 bytes) + INDEX_MAGIC (8 bytes)
+
+A chunk is a little-endian uint32 part count followed by the parts.  The first
+part is the msgpack data and the remaining parts are the arrays it refers to.
+A part is a uint32 block count followed by the blocks, each block being a
+uint64 compressed size, a uint64 uncompressed size and the compressed bytes.
+The index is a dictionary giving the (offset, size) of the metadata and bundle
+chunks and a list of [name, offset, size] for the state chunks, in the order
+they must be restored.  Chunks can be read sequentially, so the index is only
+needed for random access.
+"""
+
+from struct import Struct
+
+INDEX_MAGIC = b'CXSINDEX'
+INDEX_VERSION = 1
+COMPRESSIONS = ('lz4', 'gzip', 'none')
+BLOCK_SIZE = 16 * 1024 * 1024   # bytes of serialized data per compressed block
+OUT_OF_BAND_SIZE = 64 * 1024    # arrays at least this many bytes are stored separately
+LAZY_ARRAY_SIZE = 1024 * 1024   # separate arrays at least this many bytes are read when used
+
+_count = Struct('<I')
+_block_header = Struct('<QQ')
+_trailer = Struct('<Q8s')
+
+
+def _compressor(compression):
+    if compression == 'lz4':
+        import lz4.frame
+        return lz4.frame.compress
+    if compression == 'gzip':
+        import gzip
+        return gzip.compress
+    if compression == 'none':
+        return None
+    raise ValueError("Unknown session compression: %r" % compression)
+
+
+def _decompressor(compression):
+    # Decompress to a writable buffer if possible, so arrays can use it.
+    if compression == 'lz4':
+        import lz4.frame
+
+        def decompress(data):
+            return lz4.frame.decompress(data, return_bytearray=True)
+        return decompress
+    if compression == 'gzip':
+        import gzip
+        return gzip.decompress
+    if compression == 'none':
+        return None
+    raise ValueError("Unknown session compression: %r" % compression)
+
+
+def _thread_pool(max_workers):
+    if max_workers is None:
+        import os
+        max_workers = min(8, os.cpu_count() or 1)
+    from concurrent.futures import ThreadPoolExecutor
+    return ThreadPoolExecutor(max_workers=max_workers,
+                              thread_name_prefix='session-compress')
+
+
+class ChunkWriter:
+    """Write session chunks, compressing blocks on a thread pool.
+
+    Chunks are written to the stream in the order they are added.  At most
+    *max_pending* blocks are kept in memory waiting to be written.
+    """
+
+    def __init__(self, stream, compression='lz4', max_workers=None, max_pending=None):
+        self.stream = stream
+        self.compression = compression
+        self._compress = _compressor(compression)
+        self._pool = None if self._compress is None else _thread_pool(max_workers)
+        if max_pending is None:
+            max_pending = 2 * (self._pool._max_workers if self._pool else 1)
+        self._max_pending = max_pending
+        self._pending = []      # (key, [[(future or bytes, raw size)]])
+        self._num_pending_blocks = 0
+        self._offset = 0
+        self._metadata = None
+        self._bundles = None
+        self._states = []
+        from . import serialize
+        self._packer = serialize.msgpack_serialize_stream(None)[1]
+
+    def write_header(self, version=4):
+        self._write(b'# ChimeraX Session version %d %s\n'
+                    % (version, self.compression.encode('ascii')))
+
+    def add(self, key, *objs):
+        """Serialize objects into a new chunk.
+
+        key is 'metadata', 'bundles', or ('state', name) for state objects.
+        """
+        arrays = []
+
+        def save_array(a):
+            arrays.append(a)
+            return len(arrays)   # part number
+        from . import serialize
+        previous = serialize.set_array_handlers(save_array, None, OUT_OF_BAND_SIZE)
+        try:
+            pack = self._packer.pack
+            data = b''.join(pack(obj) for obj in objs)
+        finally:
+            serialize.set_array_handlers(*previous)
+        parts = [self._compress_blocks(data)]
+        parts.extend(self._compress_blocks(_array_bytes(a)) for a in arrays)
+        self._pending.append((key, parts))
+        self._num_pending_blocks += sum(len(blocks) for blocks in parts)
+        while self._num_pending_blocks > self._max_pending and len(self._pending) > 1:
+            self._write_oldest()
+
+    def finish(self):
+        """Write remaining chunks, end marker, index and trailer."""
+        while self._pending:
+            self._write_oldest()
+        self._write(_count.pack(0))
+        index = {
+            'version': INDEX_VERSION,
+            'compression': self.compression,
+            'metadata': self._metadata,
+            'bundles': self._bundles,
+            'states': self._states,
+        }
+        self.add('index', index)
+        index_offset = self._offset
+        self._write_oldest()
+        self._write(_trailer.pack(index_offset, INDEX_MAGIC))
+
+    def close(self):
+        if self._pool is not None:
+            for key, parts in self._pending:
+                for blocks in parts:
+                    for block, raw_size in blocks:
+                        block.cancel()
+            self._pool.shutdown(wait=True)
+            self._pool = None
+        self._pending.clear()
+
+    def _compress_blocks(self, data):
+        # Uncompressed data is written as one block so it can be memory mapped.
+        block_size = BLOCK_SIZE if self._pool else max(len(data), 1)
+        blocks = []
+        for start in range(0, max(len(data), 1), block_size):
+            block = memoryview(data)[start:start + block_size]
+            if self._pool is None:
+                blocks.append((block, len(block)))
+            else:
+                blocks.append((self._pool.submit(self._compress, block), len(block)))
+        return blocks
+
+    def _write(self, data):
+        self.stream.write(data)
+        self._offset += len(data)
+
+    def _write_oldest(self):
+        key, parts = self._pending.pop(0)
+        self._num_pending_blocks -= sum(len(blocks) for blocks in parts)
+        offset = self._offset
+        self._write(_count.pack(len(parts)))
+        for blocks in parts:
+            self._write(_count.pack(len(blocks)))
+            for block, raw_size in blocks:
+                if self._pool is not None:
+                    block = block.result()
+                self._write(_block_header.pack(len(block), raw_size))
+                self._write(block)
+        entry = [offset, self._offset - offset]
+        if key == 'metadata':
+            self._metadata = entry
+        elif key == 'bundles':
+            self._bundles = entry
+        elif key != 'index':
+            self._states.append([key[1]] + entry)
+
+
+class ChunkReader:
+    """Read session chunks, decompressing ahead on a thread pool.
+
+    Arrays stored separately in the chunks are returned as
+    :py:class:`LazyArray` placeholders.  If the stream is a file, large
+    arrays are not read until they are materialized.  They are then read
+    with a file handle of the reader's own, opened by path, so they can
+    still be read after the session stream is closed.  Arrays in other
+    streams are read with their chunk.  The thread pool is shut down when
+    the :py:meth:`objects` generator finishes or is discarded.
+    """
+
+    def __init__(self, stream, compression, max_workers=None, read_ahead=None):
+        self.stream = stream
+        self.compression = compression
+        self._decompress = _decompressor(compression)
+        self._pool = None if self._decompress is None else _thread_pool(max_workers)
+        if read_ahead is None:
+            read_ahead = self._pool._max_workers if self._pool else 1
+        self._read_ahead = read_ahead
+        self._seekable = stream.seekable()
+        import io
+        path = getattr(stream, 'name', None)
+        is_file = isinstance(stream, (io.BufferedReader, io.FileIO))
+        self._path = path if is_file and isinstance(path, str) else None
+        self._lazy = self._seekable and self._path is not None
+        self._array_stream = None   # own file handle for reading lazy arrays
+        from threading import Lock
+        self._lock = Lock()     # lazy arrays may be read from other threads
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def __del__(self):
+        # no more lazy arrays use this reader
+        if self._array_stream is not None:
+            self._array_stream.close()
+
+    def objects(self, offset=None):
+        """Generator returning the deserialized objects of all chunks in order.
+
+        If offset is given, start reading with the chunk at that file offset.
+        """
+        if offset is not None:
+            self.stream.seek(offset)
+        from collections import deque
+        pending = deque()
+        at_end = False
+        read_ahead = 1    # don't delay the first chunk
+        try:
+            while True:
+                while not at_end and len(pending) < read_ahead:
+                    with self._lock:
+                        chunk = self._read_chunk()
+                    if chunk is None:
+                        at_end = True
+                    else:
+                        pending.append(chunk)
+                if not pending:
+                    return
+                read_ahead = self._read_ahead
+                for obj in self._unpack(*pending.popleft()):
+                    yield obj
+        finally:
+            # also run if restore stops early, e.g., only reading metadata
+            self.close()
+
+    def session_objects(self):
+        """Generator returning the session metadata, bundle list, and then
+        the name and data of each state object.
+
+        If the chunk index is available, the metadata and bundle list
+        chunks are read directly so no state chunks are read ahead
+        unless the caller continues past the bundle list.
+        """
+        index = self.read_index()
+        if index is None:
+            yield from self.objects()
+            return
+        for offset, size in (index['metadata'], index['bundles']):
+            yield from self.chunk_objects(offset)
+        states = index['states']
+        if states:
+            yield from self.objects(states[0][1])
+        else:
+            self.close()
+
+    def chunk_objects(self, offset):
+        """Return the deserialized objects of the chunk at the given file offset."""
+        with self._lock:
+            self.stream.seek(offset)
+            chunk = self._read_chunk()
+        return [] if chunk is None else self._unpack(*chunk)
+
+    def read_index(self):
+        """Return the chunk index, or None if the stream is not seekable."""
+        if not self._seekable:
+            return None
+        with self._lock:
+            self.stream.seek(-_trailer.size, 2)
+            index_offset, magic = _trailer.unpack(self._read(_trailer.size))
+        if magic != INDEX_MAGIC:
+            raise ValueError("Session file chunk index not found")
+        index, = self.chunk_objects(index_offset)
+        return index
+
+    def read_array(self, part, dtype, shape):
+        """Return array for an array part of a chunk.
+
+        The array uses the decompressed buffer, or a copy-on-write
+        memory mapping of the file for uncompressed data, when possible.
+        """
+        in_file, blocks, raw_size = part
+        if in_file:
+            if self._decompress is None and len(blocks) == 1:
+                offset, size = blocks[0]
+                array = self._map_array(offset, size, dtype, shape)
+                if array is not None:
+                    return array
+            blocks = self._read_blocks(blocks)
+        return self._array_from_blocks(blocks, dtype, shape)
+
+    def _read_chunk(self):
+        # Return msgpack blocks and array parts, or None at end.
+        num_parts, = _count.unpack(self._read(_count.size))
+        if num_parts == 0:
+            return None
+        in_file, blocks, raw_size = self._read_part(lazy=False)
+        if self._pool is not None:
+            blocks = [self._pool.submit(self._decompress, block) for block in blocks]
+        array_parts = [self._read_part(lazy=True) for i in range(num_parts - 1)]
+        return blocks, array_parts
+
+    def _read_part(self, lazy):
+        # Return whether blocks are left in the file, the block data or
+        # (file offset, size) of the blocks, and the uncompressed size.
+        num_blocks, = _count.unpack(self._read(_count.size))
+        blocks = []
+        in_file = False
+        part_size = 0
+        for i in range(num_blocks):
+            size, raw_size = _block_header.unpack(self._read(_block_header.size))
+            part_size += raw_size
+            if i == 0:
+                in_file = (lazy and self._lazy
+                           and (raw_size >= LAZY_ARRAY_SIZE or num_blocks > 1))
+            if in_file:
+                offset = self.stream.tell()
+                self.stream.seek(size, 1)
+                blocks.append((offset, size))
+            else:
+                blocks.append(self._read(size))
+        return in_file, blocks, part_size
+
+    def _read_blocks(self, blocks):
+        with self._lock:
+            stream = self._file_for_arrays()
+            data = []
+            for offset, size in blocks:
+                stream.seek(offset)
+                data.append(self._read(size, stream))
+        return data
+
+    def _file_for_arrays(self):
+        # Lazy arrays may be read after restore has closed the session
+        # stream, and while it is being read, so use a separate file handle.
+        if self._array_stream is None:
+            self._array_stream = open(self._path, 'rb')
+        return self._array_stream
+
+    def _map_array(self, offset, size, dtype, shape):
+        import mmap
+        try:
+            with self._lock:
+                fileno = self._file_for_arrays().fileno()
+            start = offset - offset % mmap.ALLOCATIONGRANULARITY
+            m = mmap.mmap(fileno, offset + size - start, access=mmap.ACCESS_COPY,
+                          offset=start)
+        except (OSError, ValueError):
+            return None     # not a file, or cannot be mapped
+        return _buffer_array(m, dtype, shape, offset - start)
+
+    def _array_from_blocks(self, blocks, dtype, shape):
+        # Return array from block data, using the data memory if one block.
+        blocks = self._decompress_blocks(blocks)
+        if len(blocks) == 1:
+            return _buffer_array(blocks[0], dtype, shape)
+        import numpy
+        array = numpy.empty(shape, dtype)
+        buf = array.reshape(-1).view(numpy.uint8)
+        pos = 0
+        for data in blocks:
+            size = len(data)
+            if pos + size > len(buf):
+                break
+            buf[pos:pos + size] = numpy.frombuffer(data, numpy.uint8)
+            pos += size
+        if pos != array.nbytes:
+            raise ValueError("Session array size does not match dtype %s shape %s"
+                             % (dtype, shape))
+        return array
+
+    def _decompress_blocks(self, blocks):
+        if self._decompress is None:
+            return blocks
+        if self._pool is None or len(blocks) == 1:
+            return [self._decompress(block) for block in blocks]
+        return list(self._pool.map(self._decompress, blocks))
+
+    def _unpack(self, blocks, array_parts):
+        if self._pool is not None:
+            blocks = [b.result() for b in blocks]
+        elif self._decompress is not None:
+            blocks = [self._decompress(b) for b in blocks]
+        data = blocks[0] if len(blocks) == 1 else b''.join(blocks)
+
+        def out_of_band_array(dtype, shape, part):
+            part = array_parts[part - 1]
+            in_file, part_blocks, size = part
+            if in_file or size >= LAZY_ARRAY_SIZE:
+                return LazyArray(self, part, dtype, shape)
+            return self._array_from_blocks(part_blocks, dtype, shape)
+        from . import serialize
+        import io
+        previous = serialize.set_array_handlers(None, out_of_band_array)
+        try:
+            return list(serialize.msgpack_deserialize_stream(io.BytesIO(data)))
+        finally:
+            serialize.set_array_handlers(*previous)
+
+    def _read(self, size, stream=None):
+        # Read into a writable buffer so arrays can use it.
+        data = bytearray(size)
+        if stream is None:
+            stream = self.stream
+        if stream.readinto(data) != size:
+            raise EOFError("Truncated session file")
+        return data
+
+
+def _array_bytes(a):
+    # Return array memory as bytes without copying, unless not contiguous.
+    import numpy
+    a = numpy.ascontiguousarray(a)
+    return memoryview(a.reshape(-1).view(numpy.uint8))
+
+
+def _buffer_array(buffer, dtype, shape, offset=0):
+    # Return writable array using the memory of a buffer if possible.
+    import numpy
+    count = int(numpy.prod(shape))
+    if len(buffer) - offset < count * dtype.itemsize:
+        raise ValueError("Session array size does not match dtype %s shape %s"
+                         % (dtype, shape))
+    a = numpy.frombuffer(buffer, dtype, count, offset).reshape(shape)
+    if not a.flags.writeable:
+        a = a.copy()    # e.g., gzip decompresses to read-only bytes
+    return a
+
+
+class LazyArray:
+    """Placeholder for a numpy array that is read from a session file when needed.
+
+    Has the shape and dtype of the array.  Use :py:meth:`materialize`,
+    or numpy.asarray(), to get the array.
+    """
+
+    def __init__(self, reader, part, dtype, shape):
+        self._reader = reader
+        self._part = part
+        self.dtype = dtype
+        self.shape = shape
+        self._array = None
+
+    @property
+    def ndim(self):
+        return len(self.shape)
+
+    @property
+    def size(self):
+        from numpy import prod
+        return int(prod(self.shape))
+
+    @property
+    def nbytes(self):
+        return self.size * self.dtype.itemsize
+
+    @property
+    def materialized(self):
+        return self._array is not None
+
+    def materialize(self):
+        """Return the array, reading it from the session file the first time."""
+        if self._array is None:
+            self._array = self._reader.read_array(self._part, self.dtype, self.shape)
+            self._reader = self._part = None   # allow file to be closed
+        return self._array
+
+    def __array__(self, dtype=None):
+        a = self.materialize()
+        return a if dtype is None else a.astype(dtype, copy=False)
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __getitem__(self, key):
+        return self.materialize()[key]
+
+    def __repr__(self):
+        state = '' if self.materialized else ', not read'
+        return 'LazyArray(shape=%s, dtype=%s%s)' % (self.shape, self.dtype, state)
@@ -38,6 +38,11 @@ class State:
     INCLUDE_MAPS = 0x4
     ALL = SCENE | SESSION | INCLUDE_MAPS
 
+    #: If true, large numpy arrays in the data given to restore_snapshot()
+    #: may be :py:class:`~.session_chunks.LazyArray` placeholders that
+    #: read the array from the session file when it is first used.
+    lazy_session_arrays = False
+
     def take_snapshot(self, session, flags):
         """Return snapshot of current state of instance.
 